@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lade-Benchmark für PostgreSQL-Tabellen
+--------------------------------------
+
+Vergleicht das bisherige Laden über pd.read_sql_query ('sql') mit dem
+COPY-Export ('copy') für die angegebenen Tabellen. Neben der Laufzeit wird
+geprüft, dass beide Verfahren dieselben Werte und Datentypen liefern; bei
+Abweichungen endet das Skript mit Exit-Code 1.
+
+Benötigt eine PostgreSQL-Datenbank (DATABASE_URL).
+
+Verwendung:
+    python benchmark_loader.py --table TABELLE [--table TABELLE ...] [--runs N] [--limit N]
+"""
+
+import sys
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from data_quality import get_db_connection, get_table_list, table_to_dataframe
+
+def laufzeit(engine, table: str, loader: str, limit, runs: int):
+    """
+    Lädt eine Tabelle mehrfach und gibt den Median der Laufzeit und das letzte Ergebnis zurück.
+
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table: Name der Tabelle
+        loader: Ladeverfahren ('sql' oder 'copy')
+        limit: Maximale Anzahl der zu ladenden Zeilen (None für alle)
+        runs: Anzahl der Wiederholungen
+
+    Returns:
+        Tupel aus Median der Laufzeit in Sekunden und geladenem DataFrame
+    """
+    zeiten = []
+    df = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        df = table_to_dataframe(engine, table, limit=limit, loader=loader)
+        zeiten.append(time.perf_counter() - start)
+    return statistics.median(zeiten), df
+
+def main():
+    parser = argparse.ArgumentParser(description='Lade-Benchmark für PostgreSQL-Tabellen')
+    parser.add_argument('--table', action='append', help='Zu ladende Tabelle (mehrfach möglich, Standard: alle)')
+    parser.add_argument('--runs', type=int, default=3, help='Wiederholungen je Messung')
+    parser.add_argument('--limit', type=int, default=None, help='Maximale Anzahl der zu ladenden Zeilen')
+    args = parser.parse_args()
+
+    engine = get_db_connection()
+    if engine.dialect.name != 'postgresql':
+        print("Der COPY-Export ist nur für PostgreSQL verfügbar.")
+        sys.exit(2)
+
+    tables = args.table or get_table_list(engine)
+    fehler = []
+
+    print("=== Lade-Benchmark ===")
+    for table in tables:
+        dauer_sql, df_sql = laufzeit(engine, table, 'sql', args.limit, args.runs)
+        dauer_copy, df_copy = laufzeit(engine, table, 'copy', args.limit, args.runs)
+        faktor = dauer_sql / dauer_copy if dauer_copy > 0 else float('inf')
+        print(f"  {table}: {len(df_sql)} Zeilen, sql {dauer_sql:.3f} s, copy {dauer_copy:.3f} s "
+              f"(Faktor {faktor:.1f})")
+
+        try:
+            pd.testing.assert_frame_equal(df_sql, df_copy, check_exact=True)
+        except AssertionError as e:
+            fehler.append(f"{table}: {str(e).splitlines()[0]}")
+
+    if fehler:
+        print("\nAbweichungen zwischen den Ladeverfahren:")
+        for f in fehler:
+            print(f"  • {f}")
+        sys.exit(1)
+
+    print("\nBeide Ladeverfahren liefern identische DataFrames.")
+
+if __name__ == "__main__":
+    main()
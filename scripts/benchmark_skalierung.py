@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Skalierungs-Benchmark für die Datenqualitätsprüfung
+---------------------------------------------------
+
+Erzeugt synthetische Tabellen nach dem Schema von tblactivity_logs,
+tblroad_damages, tblattachment und tblproject in mehreren Größen und misst
+für jede Stufe (Datenprofil, Ausreißer, Erwartungssuite, Validierung und
+optional das Laden aus einer Datenbank) Laufzeit und Spitzenspeicher.
+
+Die Ergebnisse werden als JSON in data_quality_reports/benchmarks gespeichert.
+Mit --compare wird ein früherer Lauf als Referenz verwendet; Stufen, die um
+mehr als --tolerance langsamer geworden sind, führen zu Exit-Code 1.
+
+Verwendung:
+    python benchmark_skalierung.py [--rows 10000 100000 ...] [--tables tblroad_damages ...]
+                                   [--stages profil ausreisser ...] [--runs N]
+                                   [--database sqlite:///bench.db] [--compare DATEI]
+"""
+
+import sys
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_quality import (
+    REPORT_DIR, profil_erstellen, identifiziere_ausreisser, erstelle_expectations_suite,
+    teste_daten_gegen_erwartungen, table_to_dataframe, get_db_connection
+)
+
+BENCHMARK_DIR = REPORT_DIR / "benchmarks"
+
+STUFEN = ['laden', 'profil', 'ausreisser', 'erwartungen', 'validierung']
+
+# ---- Synthetische Tabellen ----
+
+KOMPONENTEN = np.array(['Projekt', 'Kunde', 'Firma', 'Bautagebuch', 'Anhang', 'Straßenschaden',
+                        'Bodenanalyse', 'Benutzer', 'Meilenstein', 'Kapazitätsplanung'], dtype=object)
+AKTIONEN = np.array(['CREATE', 'UPDATE', 'DELETE', 'VIEW', 'LOGIN', 'LOGOUT', 'EXPORT', 'IMPORT'], dtype=object)
+SCHWEREGRADE = np.array(['gering', 'mittel', 'hoch', 'kritisch'], dtype=object)
+SCHADENSARTEN = np.array(['riss', 'schlagloch', 'abplatzung', 'spurrinne', 'absenkung', 'aufbruch',
+                          'frostschaden', 'sonstiges'], dtype=object)
+REPARATURSTATUS = np.array(['offen', 'geplant', 'in_bearbeitung', 'abgeschlossen'], dtype=object)
+DATEITYPEN = np.array(['pdf', 'excel', 'image', 'other'], dtype=object)
+DATEIKATEGORIEN = np.array(['Verträge', 'Rechnungen', 'Pläne', 'Protokolle', 'Genehmigungen', 'Fotos',
+                            'Analysen', 'Andere'], dtype=object)
+PROJEKTARTEN = np.array(['Tiefbau', 'Hochbau', 'Straßenbau', 'Kanalbau', 'Brückenbau'], dtype=object)
+
+def _zeitstempel(rng: np.random.Generator, n: int, tage: int = 730) -> pd.Series:
+    start = pd.Timestamp("2024-01-01")
+    return pd.Series(start + pd.to_timedelta(rng.integers(0, tage * 86400, n), unit='s'))
+
+def _mit_nulls(werte, anteil: float, rng: np.random.Generator) -> pd.Series:
+    # Setzt etwa den angegebenen Anteil der Werte auf NULL
+    return pd.Series(werte).where(rng.random(len(werte)) >= anteil)
+
+def _texte(praefix: str, ids: np.ndarray) -> pd.Series:
+    return praefix + pd.Series(ids).astype(str)
+
+def _aktivitaetsprotokoll(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(1, n + 1)
+    return pd.DataFrame({
+        "id": ids,
+        "user_id": rng.integers(1, 200, n),
+        "component": rng.choice(KOMPONENTEN, n),
+        "action_type": rng.choice(AKTIONEN, n, p=[0.15, 0.2, 0.05, 0.4, 0.08, 0.07, 0.03, 0.02]),
+        "entity_type": rng.choice(KOMPONENTEN, n),
+        "entity_id": _mit_nulls(rng.integers(1, 50000, n), 0.1, rng),
+        "details": _mit_nulls(_texte('{"feld": "wert", "version": ', rng.integers(1, 20, n)) + '}', 0.3, rng),
+        "created_at": _zeitstempel(rng, n).sort_values(ignore_index=True),
+        "ip_address": _texte("10.0.0.", rng.integers(1, 255, n)),
+    })
+
+def _strassenschaeden(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(1, n + 1)
+    erstellt = _zeitstempel(rng, n)
+    # Lognormalverteilte Kosten und Flächen mit einzelnen Ausreißern
+    kosten = rng.lognormal(8, 1, n)
+    kosten[rng.random(n) < 0.001] *= 100
+    return pd.DataFrame({
+        "id": ids,
+        "project_id": rng.integers(1, 5000, n),
+        "title": _texte("Schaden ", ids),
+        "description": _mit_nulls(_texte("Beschreibung des Schadens ", ids), 0.4, rng),
+        "severity": rng.choice(SCHWEREGRADE, n, p=[0.4, 0.35, 0.2, 0.05]),
+        "damage_type": rng.choice(SCHADENSARTEN, n),
+        "location": _texte("Hauptstraße ", rng.integers(1, 300, n)),
+        "area_size": _mit_nulls(rng.lognormal(1, 0.8, n), 0.1, rng),
+        "repair_status": rng.choice(REPARATURSTATUS, n, p=[0.4, 0.25, 0.15, 0.2]),
+        "estimated_repair_cost": _mit_nulls(kosten, 0.15, rng),
+        "repair_due_date": _mit_nulls(erstellt + pd.to_timedelta(rng.integers(7, 180, n), unit='D'), 0.3, rng),
+        "repair_priority": rng.integers(1, 6, n),
+        "created_by": rng.integers(1, 200, n),
+        "assigned_to": _mit_nulls(rng.integers(1, 200, n), 0.5, rng),
+        "created_at": erstellt,
+        "updated_at": erstellt + pd.to_timedelta(rng.integers(0, 30 * 86400, n), unit='s'),
+    })
+
+def _anhaenge(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(1, n + 1)
+    original = rng.lognormal(13, 1.5, n).astype(np.int64)
+    optimiert = rng.random(n) < 0.6
+    optimierte_groesse = np.where(optimiert, (original * rng.uniform(0.2, 0.9, n)).astype(np.int64), original)
+    return pd.DataFrame({
+        "id": ids,
+        "project_id": rng.integers(1, 5000, n),
+        "file_name": _texte("datei_", ids) + ".pdf",
+        "original_name": _texte("Dokument ", ids) + ".pdf",
+        "file_type": rng.choice(DATEITYPEN, n, p=[0.4, 0.1, 0.45, 0.05]),
+        "file_category": rng.choice(DATEIKATEGORIEN, n),
+        "file_path": _texte("uploads/", ids),
+        "file_size": optimierte_groesse,
+        "created_at": _zeitstempel(rng, n),
+        "description": _mit_nulls(_texte("Anhang ", ids), 0.7, rng),
+        "tags": _mit_nulls(rng.choice(DATEIKATEGORIEN, n), 0.5, rng),
+        "original_size": original,
+        "optimized_size": optimierte_groesse,
+        "optimization_savings": original - optimierte_groesse,
+        "original_format": rng.choice(np.array(['jpeg', 'png', 'pdf', 'xlsx'], dtype=object), n),
+        "is_optimized": optimiert,
+        "file_missing": rng.random(n) < 0.01,
+        "file_storage": rng.choice(np.array(['local', 's3'], dtype=object), n),
+        "is_public": rng.random(n) < 0.1,
+    })
+
+def _projekte(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    ids = np.arange(1, n + 1)
+    start = _zeitstempel(rng, n, tage=3650)
+    return pd.DataFrame({
+        "id": ids,
+        "project_id": ids + 10000,
+        "customer_id": rng.integers(1, 2000, n),
+        "company_id": rng.integers(1, 300, n),
+        "person_id": _mit_nulls(rng.integers(1, 1000, n), 0.2, rng),
+        "project_cluster": rng.choice(np.array(['Nord', 'Süd', 'Ost', 'West'], dtype=object), n),
+        "project_name": _texte("Projekt ", ids),
+        "project_art": rng.choice(PROJEKTARTEN, n),
+        "project_width": np.round(rng.uniform(2, 30, n), 2),
+        "project_length": np.round(rng.lognormal(5, 1, n), 2),
+        "project_height": _mit_nulls(np.round(rng.uniform(0, 10, n), 2), 0.5, rng),
+        "project_startdate": start,
+        "project_enddate": _mit_nulls(start + pd.to_timedelta(rng.integers(30, 900, n), unit='D'), 0.2, rng),
+        "project_stop": rng.random(n) < 0.05,
+        "project_latitude": np.round(rng.uniform(47.3, 50.5, n), 7),
+        "project_longitude": np.round(rng.uniform(9.0, 13.8, n), 7),
+        "project_address": _texte("Baustelle ", rng.integers(1, 10000, n)),
+        "created_by": rng.integers(1, 200, n),
+        "created_at": _zeitstempel(rng, n),
+    })
+
+TABELLEN = {
+    "tblactivity_logs": _aktivitaetsprotokoll,
+    "tblroad_damages": _strassenschaeden,
+    "tblattachment": _anhaenge,
+    "tblproject": _projekte,
+}
+
+def synthetische_tabelle(name: str, zeilen: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Erzeugt eine synthetische Tabelle mit dem Schema einer Bau-Structura-Tabelle.
+
+    JSONB-Spalten werden als JSON-Text erzeugt.
+
+    Args:
+        name: Name der Tabelle (Schlüssel von TABELLEN)
+        zeilen: Anzahl der Zeilen
+        seed: Startwert des Zufallsgenerators
+
+    Returns:
+        DataFrame mit den synthetischen Daten
+    """
+    return TABELLEN[name](zeilen, np.random.default_rng(seed))
+
+# ---- Messung ----
+
+def messen(funktion, runs: int, speicher: bool = True) -> dict:
+    """
+    Misst Laufzeit (Median über runs Läufe) und Spitzenspeicher einer Stufe.
+
+    Der Spitzenspeicher wird in einem zusätzlichen Lauf mit tracemalloc gemessen,
+    damit dessen Mehraufwand nicht in die Laufzeit eingeht.
+
+    Args:
+        funktion: Auszuführende Stufe ohne Argumente
+        runs: Anzahl der Läufe für die Laufzeit
+        speicher: Wenn True, wird der Spitzenspeicher gemessen
+
+    Returns:
+        Dictionary mit 'seconds' und 'peak_mb' (None ohne Speichermessung)
+    """
+    zeiten = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append(time.perf_counter() - start)
+
+    spitze = None
+    if speicher:
+        tracemalloc.start()
+        try:
+            funktion()
+            spitze = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return {"seconds": statistics.median(zeiten), "peak_mb": spitze}
+
+def stufen_fuer_tabelle(df: pd.DataFrame, name: str, tmp: str, engine=None) -> dict:
+    """
+    Liefert die zu messenden Stufen für eine Tabelle als Funktionen ohne Argumente.
+    """
+    numerisch = [c for c in df.select_dtypes(include=['number']).columns if c != 'id']
+    suite = erstelle_expectations_suite(df, suite_name=f"{name}_benchmark")
+
+    def profil():
+        profil_erstellen(df, str(Path(tmp) / f"profil_{name}.html"), f"Benchmark {name}")
+
+    def ausreisser():
+        for spalte in numerisch:
+            identifiziere_ausreisser(df, spalte)
+
+    stufen = {
+        "profil": profil,
+        "ausreisser": ausreisser,
+        "erwartungen": lambda: erstelle_expectations_suite(df, suite_name=f"{name}_benchmark"),
+        "validierung": lambda: teste_daten_gegen_erwartungen(df, suite),
+    }
+    if engine is not None:
+        stufen["laden"] = lambda: table_to_dataframe(engine, name)
+    return stufen
+
+def git_version() -> str:
+    """
+    Gibt den aktuellen Git-Commit zurück (oder 'unbekannt').
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unbekannt"
+
+def vergleichen(ergebnisse: list, referenz_datei: str, toleranz: float) -> list:
+    """
+    Vergleicht die Laufzeiten mit einem früheren Benchmark-Lauf.
+
+    Args:
+        ergebnisse: Messungen des aktuellen Laufs
+        referenz_datei: JSON-Datei eines früheren Laufs
+        toleranz: Zulässiger Faktor, um den eine Stufe langsamer sein darf
+
+    Returns:
+        Liste der Regressionen als Texte
+    """
+    with open(referenz_datei, 'r') as f:
+        referenz = {(m["table"], m["rows"], m["stage"]): m for m in json.load(f)["results"]}
+
+    regressionen = []
+    print(f"\n=== Vergleich mit {referenz_datei} ===")
+    for messung in ergebnisse:
+        alt = referenz.get((messung["table"], messung["rows"], messung["stage"]))
+        if alt is None or not alt["seconds"]:
+            continue
+        faktor = messung["seconds"] / alt["seconds"]
+        status = "REGRESSION" if faktor > toleranz else "OK"
+        print(f"  {messung['table']:<18} {messung['rows']:>10} {messung['stage']:<12} "
+              f"{alt['seconds']:.3f} s -> {messung['seconds']:.3f} s (Faktor {faktor:.2f}) {status}")
+        if faktor > toleranz:
+            regressionen.append(f"{messung['table']} ({messung['rows']} Zeilen) {messung['stage']}: "
+                                f"{alt['seconds']:.3f} s -> {messung['seconds']:.3f} s")
+    return regressionen
+
+def main():
+    parser = argparse.ArgumentParser(description='Skalierungs-Benchmark für die Datenqualitätsprüfung')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                        help='Tabellengrößen in Zeilen (z. B. 10000 100000 1000000 10000000)')
+    parser.add_argument('--tables', nargs='+', choices=list(TABELLEN), default=list(TABELLEN),
+                        help='Zu erzeugende Tabellen')
+    parser.add_argument('--stages', nargs='+', choices=STUFEN, default=STUFEN, help='Zu messende Stufen')
+    parser.add_argument('--runs', type=int, default=1, help='Läufe je Messung (Median)')
+    parser.add_argument('--seed', type=int, default=0, help='Startwert für die synthetischen Daten')
+    parser.add_argument('--no-memory', action='store_true', help='Spitzenspeicher nicht messen')
+    parser.add_argument('--database', default=None,
+                        help="Datenbank-URL für die Stufe 'laden' (z. B. sqlite:///benchmark.db); "
+                             "die Tabellen werden dort neu angelegt")
+    parser.add_argument('--output', default=None, help='Ergebnisdatei (Standard: data_quality_reports/benchmarks)')
+    parser.add_argument('--compare', default=None, help='Früheren Benchmark-Lauf (JSON) als Referenz verwenden')
+    parser.add_argument('--tolerance', type=float, default=1.5,
+                        help='Zulässiger Laufzeitfaktor gegenüber der Referenz (Standard: 1.5)')
+    args = parser.parse_args()
+
+    engine = get_db_connection(args.database) if args.database else None
+    ergebnisse = []
+
+    print("=== Skalierungs-Benchmark ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        for zeilen in args.rows:
+            for name in args.tables:
+                df = synthetische_tabelle(name, zeilen, seed=args.seed)
+                print(f"\n{name}: {zeilen} Zeilen, {df.shape[1]} Spalten, "
+                      f"{df.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+                if engine is not None:
+                    df.to_sql(name, engine, if_exists='replace', index=False, chunksize=10000)
+
+                stufen = stufen_fuer_tabelle(df, name, tmp, engine)
+                for stufe in args.stages:
+                    if stufe not in stufen:
+                        continue
+                    messung = messen(stufen[stufe], args.runs, speicher=not args.no_memory)
+                    speicher = f", Spitze {messung['peak_mb']:.1f} MB" if messung["peak_mb"] is not None else ""
+                    print(f"  {stufe:<12} {messung['seconds']:.3f} s{speicher}")
+                    ergebnisse.append(dict(messung, table=name, rows=zeilen, columns=df.shape[1], stage=stufe))
+                del df, stufen
+
+    lauf = {
+        "created": datetime.now().isoformat(),
+        "version": git_version(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "runs": args.runs,
+        "seed": args.seed,
+        "database": engine.dialect.name if engine is not None else None,
+        "results": ergebnisse,
+    }
+    if args.output:
+        ausgabe = Path(args.output)
+    else:
+        BENCHMARK_DIR.mkdir(parents=True, exist_ok=True)
+        ausgabe = BENCHMARK_DIR / f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(ausgabe, 'w') as f:
+        json.dump(lauf, f, indent=2)
+    print(f"\nErgebnisse gespeichert: {ausgabe}")
+
+    if args.compare:
+        regressionen = vergleichen(ergebnisse, args.compare, args.tolerance)
+        if regressionen:
+            print("\nRegressionen:")
+            for r in regressionen:
+                print(f"  • {r}")
+            sys.exit(1)
+        print("\nKeine Regressionen gegenüber der Referenz.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Startzeit-Benchmark für die Datenqualitätsskripte
+-------------------------------------------------
+
+Die Node-API startet data_quality.py und run_quality_check.py pro Anfrage als
+neuen Prozess. Dieses Skript misst die Startzeit der Befehle, die ohne
+ydata-profiling, Great Expectations und matplotlib auskommen müssen, und
+bricht mit Exit-Code 1 ab, wenn ein Zeitbudget überschritten wird oder
+eines dieser Pakete bereits beim Import von data_quality geladen wird.
+
+Verwendung:
+    python benchmark_startup.py [--runs N] [--budget-help SEKUNDEN] [--budget-outliers SEKUNDEN]
+"""
+
+import os
+import sys
+import argparse
+import json
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Module, die beim Import von data_quality nicht geladen werden dürfen
+SCHWERE_MODULE = ['ydata_profiling', 'great_expectations', 'matplotlib']
+
+def laufzeit(befehl: list, cwd: str, env: dict, runs: int) -> float:
+    """
+    Führt einen Befehl mehrfach aus und gibt den Median der Laufzeit zurück.
+
+    Args:
+        befehl: Befehl mit Argumenten
+        cwd: Arbeitsverzeichnis
+        env: Umgebungsvariablen
+        runs: Anzahl der Wiederholungen
+
+    Returns:
+        Median der Laufzeit in Sekunden
+    """
+    zeiten = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(befehl, cwd=cwd, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        zeiten.append(time.perf_counter() - start)
+    return statistics.median(zeiten)
+
+def geladene_schwere_module(cwd: str, env: dict) -> list:
+    """
+    Prüft in einem frischen Interpreter, welche schweren Module data_quality beim Import lädt.
+    """
+    code = (
+        "import sys, json, data_quality; "
+        f"print(json.dumps([m for m in {SCHWERE_MODULE!r} if m in sys.modules]))"
+    )
+    ausgabe = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, check=True,
+                             capture_output=True, text=True).stdout
+    return json.loads(ausgabe.strip().splitlines()[-1])
+
+def testdatenbank_erstellen(pfad: Path, zeilen: int = 1000) -> None:
+    """
+    Erstellt eine kleine SQLite-Datenbank für den Ausreißer-Pfad.
+    """
+    with sqlite3.connect(pfad) as conn:
+        conn.execute("CREATE TABLE tblbenchmark (id INTEGER PRIMARY KEY, wert REAL)")
+        conn.executemany("INSERT INTO tblbenchmark (id, wert) VALUES (?, ?)",
+                         [(i, (i * 7919) % 1000 / 10.0) for i in range(zeilen)])
+
+def main():
+    parser = argparse.ArgumentParser(description='Startzeit-Benchmark für die Datenqualitätsskripte')
+    parser.add_argument('--runs', type=int, default=5, help='Wiederholungen je Messung')
+    parser.add_argument('--budget-help', type=float, default=2.0, help='Zeitbudget für --help in Sekunden')
+    parser.add_argument('--budget-outliers', type=float, default=4.0,
+                        help='Zeitbudget für die reine Ausreißeranalyse in Sekunden')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "benchmark.db"
+        testdatenbank_erstellen(db_path)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}",
+                   PYTHONPATH=os.pathsep.join(filter(None, [str(SCRIPT_DIR), os.environ.get('PYTHONPATH')])))
+
+        messungen = {
+            "data_quality --help": (
+                [sys.executable, str(SCRIPT_DIR / 'data_quality.py'), '--help'], args.budget_help),
+            "run_quality_check --help": (
+                [sys.executable, str(SCRIPT_DIR / 'run_quality_check.py'), '--help'], args.budget_help),
+            "run_quality_check --outliers": (
+                [sys.executable, str(SCRIPT_DIR / 'run_quality_check.py'),
+                 '--table', 'tblbenchmark', '--outliers', '--chunk-size', '500', '--no-charts'], args.budget_outliers),
+        }
+
+        fehler = []
+        geladen = geladene_schwere_module(tmp, env)
+        if geladen:
+            fehler.append(f"Beim Import von data_quality geladen: {', '.join(geladen)}")
+
+        print("=== Startzeit-Benchmark ===")
+        for name, (befehl, budget) in messungen.items():
+            dauer = laufzeit(befehl, tmp, env, args.runs)
+            status = "OK" if dauer <= budget else "ÜBERSCHRITTEN"
+            print(f"  {name}: {dauer:.3f} s (Budget {budget:.1f} s) {status}")
+            if dauer > budget:
+                fehler.append(f"{name}: {dauer:.3f} s > {budget:.1f} s")
+
+    if fehler:
+        print("\nFehler:")
+        for f in fehler:
+            print(f"  • {f}")
+        sys.exit(1)
+
+    print("\nAlle Startzeiten innerhalb des Budgets.")
+
+if __name__ == "__main__":
+    main()
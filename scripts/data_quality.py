@@ -9,28 +9,41 @@ Dieses Modul bietet Funktionen zum Erstellen von Datenqualitätsprofilen,
 zum Testen von Daten gegen Erwartungen und zum Identifizieren von Ausreißern.
 Es verwendet ydata-profiling (ehemals pandas-profiling) für Datenprofile
 und Great Expectations für Datenvalidierung.
+
+Größere Teilsysteme liegen in eigenen Modulen, die die Hilfsfunktionen dieses
+Moduls importieren:
+    dq_anhaenge    Prüfung von Anhängen und Mediendateien (Befehl attachments)
+    dq_dienst      Dienstmodus für die Node-API (Befehl serve)
+    dq_duplikate   Doppelte und fast doppelte Zeilen (Befehl duplicates)
+    dq_multivariat Multivariate Ausreißer (Befehl outliers --multivariate)
+    dq_referenzen  Referenzielle Integrität zwischen Tabellen (Befehl references)
+    dq_zeitplan    Zeitplanung für nächtliche Läufe (run_quality_check.py --deadline)
+    dq_zeitreihen  Zeitreihen-Anomalien in Protokolltabellen (Befehl timeseries)
 """
 
 import os
 import sys
 import json
 import logging
+import hashlib
+import time
+import threading
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from datetime import datetime
+from datetime import datetime, date
+from decimal import Decimal
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Tuple, Any, Optional, Union
+from typing import Dict, List, Tuple, Any, Optional, Union, Iterable, Iterator
 
-# Datenprofilierung
-from ydata_profiling import ProfileReport
-
-# Datenvalidierung mit Great Expectations
-import great_expectations as ge
-from great_expectations.dataset import PandasDataset
+# ydata-profiling, Great Expectations und matplotlib werden erst in den Funktionen
+# importiert, die sie benötigen. Ein Modul-Import kostet sonst mehrere Sekunden und
+# mehrere hundert MB Speicher, auch für Befehle, die sie gar nicht verwenden
+# (z. B. --help oder Ausreißeranalyse im Streaming-Modus).
 
 # SQLAlchemy für Datenbankverbindungen
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, inspect, text, select, func, distinct, cast, and_, or_, true, false, literal_column
+from sqlalchemy import table as sa_table, column as sa_column, types as sa_types
 
 # Logger konfigurieren
 logging.basicConfig(
@@ -43,12 +56,13 @@ logger = logging.getLogger('data_quality')
 REPORT_DIR = Path("./data_quality_reports")
 REPORT_DIR.mkdir(exist_ok=True)
 
-def get_db_connection(db_url: Optional[str] = None) -> 'sqlalchemy.engine.Engine':
+def get_db_connection(db_url: Optional[str] = None, **engine_optionen: Any) -> 'sqlalchemy.engine.Engine':
     """
     Stellt eine Verbindung zur Datenbank her.
     
     Args:
         db_url: Die Datenbank-URL. Wenn None, wird die Umgebungsvariable DATABASE_URL verwendet.
+        **engine_optionen: Weitere Optionen für create_engine (z. B. pool_size, pool_pre_ping)
         
     Returns:
         SQLAlchemy Engine-Objekt
@@ -60,7 +74,7 @@ def get_db_connection(db_url: Optional[str] = None) -> 'sqlalchemy.engine.Engine
         raise ValueError("Keine Datenbank-URL angegeben. Bitte geben Sie eine URL an oder setzen Sie die Umgebungsvariable DATABASE_URL.")
     
     logger.info(f"Verbindung zur Datenbank wird hergestellt...")
-    engine = create_engine(db_url)
+    engine = create_engine(db_url, **engine_optionen)
     logger.info(f"Verbindung zur Datenbank hergestellt.")
     return engine
 
@@ -78,25 +92,36 @@ def get_table_list(engine: 'sqlalchemy.engine.Engine') -> List[str]:
     tables = inspector.get_table_names()
     return [t for t in tables if not t.startswith('pg_') and not t.startswith('sql_')]
 
-def query_to_dataframe(engine: 'sqlalchemy.engine.Engine', query: str) -> pd.DataFrame:
+def query_to_dataframe(engine: 'sqlalchemy.engine.Engine', query: str, loader: str = 'sql') -> pd.DataFrame:
     """
     Führt eine SQL-Abfrage aus und gibt das Ergebnis als DataFrame zurück.
     
     Args:
         engine: SQLAlchemy Engine-Objekt
         query: SQL-Abfrage
+        loader: 'sql' (pd.read_sql_query) oder 'copy' (COPY ... TO STDOUT, nur PostgreSQL;
+            siehe query_to_dataframe_copy)
         
     Returns:
         DataFrame mit dem Ergebnis der Abfrage
     """
     logger.info(f"Führe Abfrage aus: {query[:100]}...")
+    if loader == 'copy':
+        if engine.dialect.name == 'postgresql':
+            df = query_to_dataframe_copy(engine, query)
+            if df is not None:
+                return df
+        else:
+            logger.warning("COPY wird nur unter PostgreSQL unterstützt, lade über den DBAPI-Cursor.")
     try:
         return pd.read_sql_query(query, engine)
     except Exception as e:
         logger.error(f"Fehler beim Ausführen der Abfrage: {e}")
         raise
 
-def table_to_dataframe(engine: 'sqlalchemy.engine.Engine', table_name: str, limit: Optional[int] = None) -> pd.DataFrame:
+def table_to_dataframe(engine: 'sqlalchemy.engine.Engine', table_name: str, limit: Optional[int] = None,
+                       stichprobe: Optional[Dict[str, Any]] = None, loader: str = 'sql',
+                       columns: Optional[List[str]] = None, kompakt: bool = False) -> pd.DataFrame:
     """
     Lädt eine Tabelle als DataFrame.
     
@@ -104,343 +129,3779 @@ def table_to_dataframe(engine: 'sqlalchemy.engine.Engine', table_name: str, limi
         engine: SQLAlchemy Engine-Objekt
         table_name: Name der Tabelle
         limit: Maximale Anzahl der zu ladenden Zeilen (None für alle)
+        stichprobe: Stichprobe aus stichprobe_definieren (None für alle Zeilen)
+        loader: Ladeverfahren für query_to_dataframe ('sql' oder 'copy')
+        columns: Zu ladende Spalten (None für alle); nicht vorhandene Spalten werden übergangen
+        kompakt: Wenn True, werden die dtypes mit dtypes_verkleinern verkleinert; der
+            Speicherbericht steht danach in df.attrs["memory"]
         
     Returns:
         DataFrame mit dem Inhalt der Tabelle
     """
-    limit_clause = f" LIMIT {limit}" if limit is not None else ""
-    query = f"SELECT * FROM {table_name}{limit_clause}"
-    return query_to_dataframe(engine, query)
+    if columns is not None:
+        vorhanden = set(tabellenspalten(engine, table_name))
+        columns = [c for c in columns if c in vorhanden]
+    if stichprobe is not None:
+        bloecke = list(stichprobe_zu_chunks(engine, table_name, stichprobe, limit=limit, columns=columns))
+        if bloecke:
+            df = pd.concat(bloecke, ignore_index=True)
+        else:
+            df = query_to_dataframe(engine, _tabellen_abfrage(table_name, 0, columns=columns))
+    else:
+        df = query_to_dataframe(engine, _tabellen_abfrage(table_name, limit, columns=columns), loader=loader)
+    if kompakt:
+        df = _kompakt(df, table_name)
+    return df
 
-def profil_erstellen(df: pd.DataFrame, output_file: Optional[str] = None, 
-                    title: str = "Datenprofilbericht", minimal: bool = False) -> ProfileReport:
+def _tabellen_abfrage(table_name: str, limit: Optional[int] = None, tablesample: str = "",
+                      columns: Optional[List[str]] = None) -> str:
     """
-    Erstellt ein Datenprofil für einen DataFrame.
+    Baut die SELECT-Abfrage für eine ganze Tabelle.
     
     Args:
-        df: DataFrame mit den zu analysierenden Daten
-        output_file: Pfad zur Ausgabedatei (HTML)
-        title: Titel des Berichts
-        minimal: Wenn True, wird ein minimal-Bericht erstellt (schneller)
+        table_name: Name der Tabelle
+        limit: Maximale Anzahl der zu ladenden Zeilen (None für alle)
+        tablesample: TABLESAMPLE-Klausel aus _tablesample_klausel
+        columns: Zu ladende Spalten (None für alle)
         
     Returns:
-        ProfileReport-Objekt
+        SQL-Abfrage als String
     """
-    logger.info(f"Erstelle Datenprofil für DataFrame mit {df.shape[0]} Zeilen und {df.shape[1]} Spalten...")
-    
-    # Ersetze None-Werte in numerischen Spalten
-    for col in df.select_dtypes(include=['number']).columns:
-        df[col] = df[col].fillna(np.nan)
+    limit_clause = f" LIMIT {limit}" if limit is not None else ""
+    auswahl = "*" if columns is None else ", ".join('"' + c.replace('"', '""') + '"' for c in columns)
+    return f"SELECT {auswahl} FROM {table_name}{tablesample}{limit_clause}"
+
+# ---- COPY-Export für PostgreSQL ----
+
+# Verfügbare Ladeverfahren für query_to_dataframe
+LADEVERFAHREN = ('sql', 'copy')
+
+# Ab dieser Größe wird die COPY-Ausgabe in eine temporäre Datei ausgelagert
+COPY_PUFFER_BYTES = 256 * 1024 * 1024
+
+# Umwandlung der COPY-Textdarstellung je PostgreSQL-Typ (OID). Nicht aufgeführte Typen
+# (Arrays, bytea, interval, ...) werden über den DBAPI-Cursor geladen.
+_COPY_ARTEN = {
+    16: 'bool',
+    20: 'int', 21: 'int', 23: 'int', 26: 'int',
+    700: 'float', 701: 'float', 1700: 'float',  # numeric: read_sql_query macht aus Decimal float
+    25: 'text', 1042: 'text', 1043: 'text', 19: 'text',
+    1082: 'date', 1083: 'time', 1114: 'timestamp', 1184: 'timestamptz',
+    114: 'json', 3802: 'json',
+    2950: 'uuid',
+}
+
+def _copy_spalte_umwandeln(werte: pd.Series, art: str, zeitzone: Any = None,
+                           uuid_als_text: bool = True) -> pd.Series:
+    """
+    Wandelt eine Spalte der COPY-Ausgabe (Text, fehlende Werte als NaN) in dieselben
+    Werte und denselben dtype um, die pd.read_sql_query über den DBAPI-Cursor liefert.
     
-    # Erstelle das Profil
-    if minimal:
-        profile = ProfileReport(df, title=title, minimal=True)
-    else:
-        profile = ProfileReport(
-            df, 
-            title=title,
-            explorative=True,
-            correlations={
-                "pearson": {"calculate": True},
-                "spearman": {"calculate": True},
-                "kendall": {"calculate": True},
-                "phi_k": {"calculate": True},
-            },
-            missing_diagrams={
-                "bar": True,
-                "matrix": True,
-                "heatmap": True,
-            },
-            interactions={
-                "continuous": True,
-            }
-        )
+    Args:
+        werte: Spalte mit den Textwerten
+        art: Umwandlung aus _COPY_ARTEN
+        zeitzone: Zeitzone des Treibers für timestamptz (None: feste UTC-Abstände wie psycopg2)
+        uuid_als_text: True, wenn der Treiber UUIDs als Text liefert (psycopg2)
+        
+    Returns:
+        Umgewandelte Spalte
+    """
+    fehlend = werte.isna()
+    if fehlend.all():
+        # Nur NULL (oder keine Zeilen): read_sql_query liefert eine object-Spalte mit None
+        return pd.Series([None] * len(werte), index=werte.index, dtype=object, name=werte.name)
     
-    # Speichere den Bericht, wenn ein Ausgabepfad angegeben wurde
-    if output_file:
-        output_path = REPORT_DIR / output_file
-        profile.to_file(output_path)
-        logger.info(f"Datenprofil gespeichert unter: {output_path}")
+    def als_objekte(umwandlung):
+        ergebnis = pd.Series(None, index=werte.index, dtype=object, name=werte.name)
+        ergebnis[~fehlend] = [umwandlung(w) for w in werte[~fehlend]]
+        return ergebnis
     
-    return profile
+    if art == 'int':
+        # Mit NULL-Werten wird daraus wie bei read_sql_query float64
+        return werte.astype('int64' if not fehlend.any() else 'float64')
+    if art == 'float':
+        # astype erkennt auch 'NaN' und 'Infinity' aus der PostgreSQL-Ausgabe
+        return werte.astype('float64')
+    if art == 'bool':
+        bools = werte.map({'t': True, 'f': False})
+        return bools.astype(bool) if not fehlend.any() else bools.astype(object).where(~fehlend, None)
+    if art == 'text':
+        return werte.astype(object).where(~fehlend, None)
+    if art == 'timestamp':
+        return pd.to_datetime(werte, format='ISO8601')
+    if art == 'timestamptz':
+        utc = pd.to_datetime(werte, format='ISO8601', utc=True)
+        if zeitzone is not None:
+            return utc.dt.tz_convert(zeitzone)
+        # psycopg2 liefert feste UTC-Abstände; gleiche Abstände ergeben einen tz-dtype, sonst Objekte
+        abstaende = werte[~fehlend].str.extract(r'([+-]\d{2}(?::?\d{2}){0,2})$')[0].unique()
+        if len(abstaende) == 1:
+            return utc.dt.tz_convert(datetime.fromisoformat(f"2000-01-01T00:00:00{abstaende[0]}").tzinfo)
+        return als_objekte(datetime.fromisoformat)
+    if art == 'date':
+        return als_objekte(date.fromisoformat)
+    if art == 'time':
+        from datetime import time as zeit
+        return als_objekte(zeit.fromisoformat)
+    if art == 'json':
+        return als_objekte(json.loads)
+    if art == 'uuid':
+        if uuid_als_text:
+            return werte.astype(object).where(~fehlend, None)
+        import uuid
+        return als_objekte(uuid.UUID)
+    raise ValueError(f"Unbekannte Umwandlung: {art}")
 
-def tabellen_profilieren(engine: 'sqlalchemy.engine.Engine', table_names: Optional[List[str]] = None, 
-                         limit: Optional[int] = None, output_dir: Optional[str] = None) -> Dict[str, str]:
+def query_to_dataframe_copy(engine: 'sqlalchemy.engine.Engine', query: str) -> Optional[pd.DataFrame]:
     """
-    Erstellt Datenprofile für mehrere Tabellen.
+    Lädt das Ergebnis einer Abfrage per COPY (SELECT ...) TO STDOUT im CSV-Format.
+    
+    Die Werte werden nicht einzeln vom Treiber in Python-Objekte umgewandelt, sondern
+    mit dem CSV-Parser von pandas gelesen und spaltenweise umgewandelt. Werte und
+    dtypes entsprechen denen von pd.read_sql_query (psycopg2 bzw. psycopg 3).
     
     Args:
-        engine: SQLAlchemy Engine-Objekt
-        table_names: Liste der zu profilierenden Tabellen (None für alle)
-        limit: Maximale Anzahl der zu ladenden Zeilen pro Tabelle (None für alle)
-        output_dir: Verzeichnis für die Ausgabedateien
+        engine: SQLAlchemy Engine-Objekt (PostgreSQL)
+        query: SQL-Abfrage
         
     Returns:
-        Dictionary mit Tabellennamen als Schlüssel und Pfaden zu den Berichten als Werte
+        DataFrame mit dem Ergebnis der Abfrage oder None, wenn das Ergebnis Spaltentypen
+        ohne COPY-Umwandlung enthält bzw. die Umwandlung fehlschlägt
     """
-    if output_dir is None:
-        output_dir = REPORT_DIR
-    else:
-        output_dir = Path(output_dir)
-        output_dir.mkdir(exist_ok=True)
-    
-    if table_names is None:
-        table_names = get_table_list(engine)
+    import tempfile
     
-    report_paths = {}
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # Spaltennamen und Typen ermitteln, ohne Zeilen zu lesen
+        cursor.execute(f"SELECT * FROM ({query}) AS abfrage LIMIT 0")
+        namen = [spalte[0] for spalte in cursor.description]
+        oids = [spalte[1] for spalte in cursor.description]
+        arten = [_COPY_ARTEN.get(oid) for oid in oids]
+        unbekannt = sorted({oid for oid, art in zip(oids, arten) if art is None})
+        if unbekannt:
+            # Enum-Typen haben keine feste OID und werden wie Text geliefert
+            cursor.execute("SELECT oid FROM pg_type WHERE oid = ANY(%s) AND typtype = 'e'", (unbekannt,))
+            enums = {zeile[0] for zeile in cursor.fetchall()}
+            arten = [art or ('text' if oid in enums else None) for oid, art in zip(oids, arten)]
+        if None in arten:
+            typen = sorted({oid for oid, art in zip(oids, arten) if art is None})
+            logger.info(f"COPY nicht möglich (Spaltentypen {typen}), lade über den DBAPI-Cursor.")
+            raw.rollback()
+            return None
+        
+        psycopg2 = hasattr(cursor, 'copy_expert')
+        zeitzone = None if psycopg2 else raw.driver_connection.info.timezone
+        befehl = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, NULL '\\N')"
+        with tempfile.SpooledTemporaryFile(max_size=COPY_PUFFER_BYTES) as puffer:
+            if psycopg2:
+                cursor.copy_expert(befehl, puffer)
+            else:
+                with cursor.copy(befehl) as copy:
+                    for block in copy:
+                        puffer.write(block)
+            raw.rollback()
+            puffer.seek(0)
+            text_df = pd.read_csv(puffer, header=None, names=range(len(namen)), dtype=str,
+                                  keep_default_na=False, na_values=['\\N'], encoding='utf-8')
+    finally:
+        raw.close()
     
-    for table in table_names:
-        logger.info(f"Profiliere Tabelle: {table}")
-        try:
-            df = table_to_dataframe(engine, table, limit=limit)
-            output_file = f"profil_{table}_{timestamp}.html"
-            output_path = output_dir / output_file
-            
-            profile = profil_erstellen(
-                df, 
-                output_file=str(output_path),
-                title=f"Datenprofil für {table}"
-            )
-            
-            report_paths[table] = str(output_path)
-            logger.info(f"Profil für {table} erstellt: {output_path}")
-        except Exception as e:
-            logger.error(f"Fehler beim Profilieren von {table}: {e}")
+    try:
+        spalten = [
+            _copy_spalte_umwandeln(text_df[i], art, zeitzone, uuid_als_text=psycopg2)
+            for i, art in enumerate(arten)
+        ]
+    except (ValueError, TypeError, OverflowError) as e:
+        # z. B. 'infinity' in Datumsspalten
+        logger.warning(f"COPY-Ergebnis konnte nicht umgewandelt werden ({e}), lade über den DBAPI-Cursor.")
+        return None
+    df = pd.concat(spalten, axis=1) if spalten else pd.DataFrame(index=text_df.index)
+    df.columns = namen
+    return df
+
+# ---- Speichersparende Datentypen ----
+
+# Zeichenkettenspalten werden kategorisch, wenn höchstens dieser Anteil der Werte
+# unterschiedlich ist und es nicht mehr als KATEGORIE_MAX_WERTE Kategorien gibt
+KATEGORIE_ANTEIL = 0.5
+KATEGORIE_MAX_WERTE = 1000
+
+def tabellenspalten(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                    arten: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Liefert die Spalten einer Tabelle aus dem Datenbankschema, ohne Zeilen zu lesen.
     
-    return report_paths
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        arten: Nur Spalten dieser Arten (siehe _sql_spaltenart, z. B. ('numeric',)), None für alle
+        
+    Returns:
+        Liste der Spaltennamen in Tabellenreihenfolge
+    """
+    spalten = inspect(engine).get_columns(table_name)
+    return [s['name'] for s in spalten if arten is None or _sql_spaltenart(s['type']) in arten]
 
-# ---- Datenqualitätserwartungen mit Great Expectations ----
+def speicherbedarf(df: pd.DataFrame) -> int:
+    """
+    Gibt den Speicherbedarf eines DataFrames in Bytes zurück (einschließlich Python-Objekten).
+    """
+    return int(df.memory_usage(deep=True).sum())
 
-def erstelle_expectations_suite(df: pd.DataFrame, suite_name: str = "default_suite") -> ge.core.ExpectationSuite:
+def _in_float64(daten: Union[pd.DataFrame, pd.Series]) -> Union[pd.DataFrame, pd.Series]:
+    # float32-Spalten aus dtypes_verkleinern für Quantile, Mittelwert und Standardabweichung
+    # in float64 umwandeln, damit die Ergebnisse nicht vom Ladeverfahren abhängen
+    if isinstance(daten, pd.Series):
+        return daten.astype(np.float64) if daten.dtype == np.float32 else daten
+    float32 = {c: np.float64 for c in daten.columns if daten[c].dtype == np.float32}
+    return daten.astype(float32) if float32 else daten
+
+def dtypes_verkleinern(df: pd.DataFrame, kategorien: bool = True,
+                       arrow_strings: bool = True) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     """
-    Erstellt automatisch eine Erwartungssuite basierend auf den Daten.
+    Verkleinert die dtypes eines DataFrames, ohne Werte zu verändern.
+    
+    - Ganzzahlen: kleinster vorzeichenbehafteter Typ, der alle Werte fasst
+    - float64: float32, wenn alle Werte exakt darstellbar sind
+    - Zeichenketten mit wenigen unterschiedlichen Werten: category
+    - übrige Zeichenketten: Arrow-basierte Strings (nur mit pyarrow)
+    
+    Kategorische Spalten gelten in spaltenstatistiken_berechnen als 'categorical'
+    und erhalten daher immer eine Wertemenge. Mittelwert und Standardabweichung
+    werden für float32-Spalten weiterhin in float64 berechnet.
     
     Args:
         df: DataFrame mit den Daten
-        suite_name: Name der Erwartungssuite
+        kategorien: Wenn True, werden Zeichenketten mit wenigen Werten kategorisch
+        arrow_strings: Wenn True, werden übrige Zeichenketten Arrow-basiert gespeichert
         
     Returns:
-        ExpectationSuite-Objekt
+        Tuple mit (verkleinertem DataFrame, Bericht mit 'before' und 'after' in Bytes
+        und den geänderten dtypes je Spalte unter 'columns')
     """
-    ge_df = ge.from_pandas(df)
-    suite = ge_df.create_expectation_suite(suite_name, overwrite_existing=True)
+    if arrow_strings:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            arrow_strings = False
     
-    # Automatische Erwartungen basierend auf Datentypen erstellen
+    vorher = speicherbedarf(df)
+    neue_spalten = {}
+    geaendert = {}
     for column in df.columns:
-        dtype = df[column].dtype
-        
-        # Grundlegende Erwartung: Keine NULL-Werte, wenn die Spalte keine enthält
-        if df[column].isnull().sum() == 0:
-            ge_df.expect_column_values_to_not_be_null(column)
-        
-        # Numerische Spalten
-        if pd.api.types.is_numeric_dtype(dtype):
-            min_val = df[column].min()
-            max_val = df[column].max()
-            ge_df.expect_column_values_to_be_between(column, min_val, max_val)
-            
-        # Kategorische Spalten
-        elif pd.api.types.is_categorical_dtype(dtype) or df[column].nunique() < 20:
-            value_set = df[column].dropna().unique().tolist()
-            ge_df.expect_column_values_to_be_in_set(column, value_set)
-            
-        # Datum/Zeit-Spalten
-        elif pd.api.types.is_datetime64_any_dtype(dtype):
-            min_date = df[column].min()
-            max_date = df[column].max()
-            ge_df.expect_column_values_to_be_between(column, min_date, max_date)
+        series = df[column]
+        dtype = series.dtype
+        neu = None
+        if pd.api.types.is_bool_dtype(dtype) or not isinstance(dtype, np.dtype):
+            # bool, category, Arrow- und Extension-Typen bleiben unverändert
+            pass
+        elif pd.api.types.is_integer_dtype(dtype):
+            neu = pd.to_numeric(series, downcast='integer')
+        elif dtype == np.float64:
+            kandidat = series.astype(np.float32)
+            if np.array_equal(kandidat.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+                neu = kandidat
+        elif dtype == object:
+            nicht_null = series.dropna()
+            if len(nicht_null) and pd.api.types.infer_dtype(nicht_null, skipna=False) == 'string':
+                anzahl = nicht_null.nunique()
+                if kategorien and anzahl <= min(KATEGORIE_MAX_WERTE, KATEGORIE_ANTEIL * len(nicht_null)):
+                    neu = series.astype('category')
+                elif arrow_strings:
+                    neu = series.astype('string[pyarrow]')
+        if neu is not None and neu.dtype != dtype:
+            neue_spalten[column] = neu
+            geaendert[column] = {"from": str(dtype), "to": str(neu.dtype)}
     
-    return suite
+    if neue_spalten:
+        df = pd.DataFrame({c: neue_spalten.get(c, df[c]) for c in df.columns}, index=df.index)
+    return df, {"before": vorher, "after": speicherbedarf(df), "columns": geaendert}
+
+def _kompakt(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    # Verkleinert die dtypes einer geladenen Tabelle und legt den Bericht in df.attrs["memory"] ab
+    df, bericht = dtypes_verkleinern(df)
+    df.attrs["memory"] = bericht
+    logger.info(f"Speicherbedarf {table_name}: {bericht['before'] / 1e6:.1f} MB -> "
+                f"{bericht['after'] / 1e6:.1f} MB ({len(bericht['columns'])} Spalten verkleinert)")
+    return df
+
+# ---- Streaming-Verarbeitung großer Tabellen ----
 
-def speichere_expectations_suite(suite: ge.core.ExpectationSuite, datei_pfad: str) -> None:
+# Standard-Blockgröße für das Laden über einen serverseitigen Cursor
+DEFAULT_CHUNK_SIZE = 50000
+
+# Größe der Stichprobe, aus der Quantile (Q1/Q3) im Streaming-Modus geschätzt werden.
+# Solange eine Spalte weniger Werte enthält, sind die Quantile exakt.
+RESERVOIR_GROESSE = 100000
+
+# Ab dieser Anzahl unterschiedlicher Werte wird keine Wertemenge mehr erwartet
+# (entspricht der Bedingung nunique() < 20 in erstelle_expectations_suite)
+MAX_WERTEMENGE = 20
+
+class AuftragAbgebrochen(Exception):
     """
-    Speichert eine Erwartungssuite in einer JSON-Datei.
-    
-    Args:
-        suite: ExpectationSuite-Objekt
-        datei_pfad: Pfad zur JSON-Datei
+    Wird in einem laufenden Auftrag des Dienstes (dq_dienst) ausgelöst, nachdem er abgebrochen wurde.
     """
-    with open(datei_pfad, 'w') as f:
-        json.dump(suite.to_json_dict(), f, indent=2)
-    logger.info(f"Erwartungssuite gespeichert unter: {datei_pfad}")
 
-def lade_expectations_suite(datei_pfad: str) -> ge.core.ExpectationSuite:
+# Abbruchsignal des Auftrags, den der aktuelle Thread bearbeitet
+_auftrag_lokal = threading.local()
+
+def _abbruch_pruefen() -> None:
     """
-    Lädt eine Erwartungssuite aus einer JSON-Datei.
+    Bricht den Auftrag des aktuellen Threads ab, falls dies angefordert wurde.
     
-    Args:
-        datei_pfad: Pfad zur JSON-Datei
-        
-    Returns:
-        ExpectationSuite-Objekt
+    Wird zwischen den Datenblöcken von query_to_chunks aufgerufen; Aufträge im
+    Streaming-Modus lassen sich daher nach dem nächsten Block abbrechen,
+    vollständige Ladevorgänge erst nach deren Ende.
     """
-    with open(datei_pfad, 'r') as f:
-        suite_dict = json.load(f)
-    suite = ge.core.ExpectationSuite(**suite_dict)
-    return suite
+    abbruch = getattr(_auftrag_lokal, "abbruch", None)
+    if abbruch is not None and abbruch.is_set():
+        raise AuftragAbgebrochen("Auftrag wurde abgebrochen.")
 
-def teste_daten_gegen_erwartungen(df: pd.DataFrame, suite: ge.core.ExpectationSuite) -> ge.core.ExpectationValidationResult:
+def query_to_chunks(engine: 'sqlalchemy.engine.Engine', query: str,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    params: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
     """
-    Testet Daten gegen eine Erwartungssuite.
+    Führt eine SQL-Abfrage über einen serverseitigen Cursor aus und liefert
+    das Ergebnis blockweise als DataFrames.
+    
+    Der Speicherbedarf ist durch die Blockgröße begrenzt, nicht durch die
+    Größe des Ergebnisses.
     
     Args:
-        df: DataFrame mit den zu testenden Daten
-        suite: ExpectationSuite-Objekt
+        engine: SQLAlchemy Engine-Objekt
+        query: SQL-Abfrage
+        chunk_size: Anzahl der Zeilen pro Block
+        params: Gebundene Parameter der Abfrage (z. B. {"watermark": ...})
         
-    Returns:
-        ExpectationValidationResult-Objekt
+    Yields:
+        DataFrames mit jeweils höchstens chunk_size Zeilen
     """
-    ge_df = ge.from_pandas(df)
-    result = ge_df.validate(expectation_suite=suite, only_return_failures=False)
-    logger.info(f"Datenvalidierung abgeschlossen. Erfolgreiche Tests: {result.statistics['successful_expectations']} von {result.statistics['evaluated_expectations']}")
-    return result
+    logger.info(f"Führe Streaming-Abfrage aus (Blockgröße {chunk_size}): {query[:100]}...")
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_size)
+        try:
+            for chunk in pd.read_sql_query(text(query), conn, params=params, chunksize=chunk_size):
+                # Abgebrochene Aufträge im Dienstmodus enden zwischen zwei Blöcken
+                _abbruch_pruefen()
+                yield chunk
+        except AuftragAbgebrochen:
+            raise
+        except Exception as e:
+            logger.error(f"Fehler beim Ausführen der Streaming-Abfrage: {e}")
+            raise
 
-def speichere_validierungsergebnis(ergebnis: ge.core.ExpectationValidationResult, datei_pfad: str) -> None:
+def table_to_chunks(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, limit: Optional[int] = None,
+                    stichprobe: Optional[Dict[str, Any]] = None) -> Iterator[pd.DataFrame]:
     """
-    Speichert ein Validierungsergebnis in einer JSON-Datei.
+    Lädt eine Tabelle blockweise über einen serverseitigen Cursor.
     
     Args:
-        ergebnis: ExpectationValidationResult-Objekt
-        datei_pfad: Pfad zur JSON-Datei
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        chunk_size: Anzahl der Zeilen pro Block
+        limit: Maximale Anzahl der zu ladenden Zeilen (None für alle)
+        stichprobe: Stichprobe aus stichprobe_definieren (None für alle Zeilen)
+        
+    Yields:
+        DataFrames mit jeweils höchstens chunk_size Zeilen
     """
-    with open(datei_pfad, 'w') as f:
-        json.dump(ergebnis.to_json_dict(), f, indent=2)
-    logger.info(f"Validierungsergebnis gespeichert unter: {datei_pfad}")
+    if stichprobe is not None:
+        return stichprobe_zu_chunks(engine, table_name, stichprobe, chunk_size=chunk_size, limit=limit)
+    return query_to_chunks(engine, _tabellen_abfrage(table_name, limit), chunk_size=chunk_size)
 
-def erstelle_kontinuierlichen_test_workflow() -> str:
+def _spaltenart(series: pd.Series) -> Optional[str]:
     """
-    Erstellt ein Python-Skript für kontinuierliche Datentests.
+    Bestimmt die Art einer Spalte für die Statistikberechnung.
     
     Returns:
-        String mit dem Python-Code für das Skript
+        'numeric', 'datetime', 'categorical', 'other' oder None, wenn die Spalte
+        im Block nur fehlende Werte enthält und der Typ daher nicht aussagekräftig ist
     """
-    script = '''#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
+    dtype = series.dtype
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    if isinstance(dtype, pd.CategoricalDtype):
+        return 'categorical'
+    if series.notna().any():
+        return 'other'
+    return None
 
-"""
-Kontinuierlicher Datenqualitätstest
------------------------------------
+def _leere_spaltenstatistik() -> Dict[str, Any]:
+    return {
+        "kind": None,
+        "count": 0,
+        "nulls": 0,
+        "min": None,
+        "max": None,
+        "mean": 0.0,
+        "m2": 0.0,
+        "values": [],
+        "reservoir": np.empty(0, dtype=float),
+        "seen": 0,
+        "Q1": None,
+        "Q3": None,
+        "nunique": None,
+    }
 
-Dieses Skript führt regelmäßige Überprüfungen der Datenqualität durch.
-Es kann als Cron-Job oder in CI/CD-Pipelines verwendet werden.
+def _python_wert(wert: Any) -> Any:
+    # NumPy-Skalare und Decimals in Python-Werte umwandeln (für Great Expectations und JSON)
+    if isinstance(wert, np.generic):
+        return wert.item()
+    if isinstance(wert, Decimal):
+        return float(wert)
+    return wert
 
-Verwendung:
-    python datentests.py [Tabelle] [Erwartungssuite] [Ausgabedatei]
-"""
+def statistiken_initialisieren() -> Dict[str, Any]:
+    """
+    Erstellt einen leeren, blockweise fortschreibbaren Statistikzustand.
+    
+    Returns:
+        Dictionary mit Zeilenanzahl und Statistiken je Spalte
+    """
+    return {"rows": 0, "columns": {}}
 
-import os
-import sys
-import json
-import pandas as pd
-from datetime import datetime
-from data_quality import (
-    get_db_connection, table_to_dataframe, 
-    lade_expectations_suite, teste_daten_gegen_erwartungen,
-    speichere_validierungsergebnis
-)
+def _reservoir_aktualisieren(spalte: Dict[str, Any], werte: np.ndarray, rng: np.random.Generator) -> None:
+    """
+    Schreibt die Quantil-Stichprobe einer Spalte mit Algorithmus R fort (vektorisiert).
+    """
+    reservoir = spalte["reservoir"]
+    seen = spalte["seen"]
+    frei = min(max(RESERVOIR_GROESSE - len(reservoir), 0), len(werte))
+    if frei:
+        reservoir = np.concatenate([reservoir, werte[:frei]])
+        werte = werte[frei:]
+        seen += frei
+    if len(werte):
+        # Für den t-ten Wert (0-basiert) wird j aus [0, t] gezogen und bei j < k ersetzt.
+        # Die Entscheidungen sind unabhängig, spätere Werte überschreiben frühere.
+        positionen = np.arange(seen, seen + len(werte))
+        j = rng.integers(0, positionen + 1)
+        treffer = j < RESERVOIR_GROESSE
+        reservoir[j[treffer]] = werte[treffer]
+        seen += len(werte)
+    spalte["reservoir"] = reservoir
+    spalte["seen"] = seen
 
-def main():
-    # Parameter auswerten
-    if len(sys.argv) < 4:
-        print("Verwendung: python datentests.py [Tabelle] [Erwartungssuite] [Ausgabedatei]")
-        sys.exit(1)
-        
-    table_name = sys.argv[1]
-    expectations_file = sys.argv[2]
-    output_file = sys.argv[3]
-    
-    # Datenbankverbindung herstellen
-    engine = get_db_connection()
-    
-    # Daten laden
-    df = table_to_dataframe(engine, table_name)
-    
-    # Erwartungen laden
-    suite = lade_expectations_suite(expectations_file)
+def statistiken_aktualisieren(stats: Dict[str, Any], chunk: pd.DataFrame,
+                              rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+    """
+    Schreibt den Statistikzustand mit einem weiteren Datenblock fort.
     
-    # Daten validieren
-    result = teste_daten_gegen_erwartungen(df, suite)
+    Erfasst je Spalte fehlende Werte, Minimum/Maximum, Mittelwert und Varianz
+    (Welford/Chan), die Wertemenge bis MAX_WERTEMENGE unterschiedlicher Werte
+    sowie eine Stichprobe zur Quantilschätzung.
     
-    # Ergebnis speichern
-    speichere_validierungsergebnis(result, output_file)
+    Args:
+        stats: Statistikzustand aus statistiken_initialisieren
+        chunk: Nächster Datenblock
+        rng: Zufallsgenerator für die Quantil-Stichprobe
+        
+    Returns:
+        Der fortgeschriebene Statistikzustand
+    """
+    if rng is None:
+        rng = np.random.default_rng(0)
+    stats["rows"] += len(chunk)
     
-    # Ausgabe
-    success_rate = result.statistics['successful_expectations'] / result.statistics['evaluated_expectations']
-    print(f"Erfolgsrate: {success_rate:.2%}")
+    for column in chunk.columns:
+        series = chunk[column]
+        spalte = stats["columns"].setdefault(column, _leere_spaltenstatistik())
+        
+        kind = _spaltenart(series)
+        if spalte["kind"] is None:
+            spalte["kind"] = kind
+        
+        nicht_null = series.dropna()
+        spalte["nulls"] += len(series) - len(nicht_null)
+        if nicht_null.empty:
+            continue
+        
+        if spalte["kind"] in ('numeric', 'datetime'):
+            chunk_min = _python_wert(nicht_null.min())
+            chunk_max = _python_wert(nicht_null.max())
+            spalte["min"] = chunk_min if spalte["min"] is None else min(spalte["min"], chunk_min)
+            spalte["max"] = chunk_max if spalte["max"] is None else max(spalte["max"], chunk_max)
+        
+        if spalte["values"] is not None:
+            try:
+                werte = set(spalte["values"]) | set(nicht_null.unique().tolist())
+            except TypeError:
+                # Nicht hashbare Werte (z. B. JSON-Objekte) haben keine Wertemenge
+                werte = None
+            spalte["values"] = list(werte) if werte is not None and len(werte) < MAX_WERTEMENGE else None
+        
+        if spalte["kind"] == 'numeric':
+            werte = nicht_null.to_numpy(dtype=float)
+            n_a, n_b = spalte["count"], len(werte)
+            mean_b = werte.mean()
+            m2_b = ((werte - mean_b) ** 2).sum()
+            delta = mean_b - spalte["mean"]
+            n = n_a + n_b
+            spalte["mean"] += delta * n_b / n
+            spalte["m2"] += m2_b + delta ** 2 * n_a * n_b / n
+            _reservoir_aktualisieren(spalte, werte, rng)
+        
+        spalte["count"] += len(nicht_null)
     
-    # Exit-Code basierend auf Erfolgsrate
-    if success_rate < 0.9:  # Erfolgsrate unter 90%
-        sys.exit(1)
+    return stats
+
+def _zeilenstichprobe_aktualisieren(stichprobe: Optional[pd.DataFrame], chunk: pd.DataFrame,
+                                   groesse: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Schreibt eine gleichverteilte Zeilenstichprobe fester Größe fort (Bottom-k-Verfahren).
     
-    sys.exit(0)
+    Jede Zeile erhält einen zufälligen Schlüssel; behalten werden die Zeilen mit
+    den kleinsten Schlüsseln. Die Schlüssel stehen in der Spalte '__schluessel'.
+    """
+    kandidaten = chunk.assign(__schluessel=rng.random(len(chunk)))
+    if stichprobe is not None:
+        if len(stichprobe) >= groesse:
+            kandidaten = kandidaten[kandidaten['__schluessel'] < stichprobe['__schluessel'].max()]
+        kandidaten = pd.concat([stichprobe, kandidaten], ignore_index=True)
+    if len(kandidaten) > groesse:
+        kandidaten = kandidaten.nsmallest(groesse, '__schluessel').reset_index(drop=True)
+    return kandidaten
 
-if __name__ == "__main__":
-    main()
-'''
-    return script
+def statistiken_berechnen_streaming(chunks: Iterable[pd.DataFrame], seed: int = 0,
+                                    stichprobe_zeilen: int = 0, mit_sketches: bool = False) -> Dict[str, Any]:
+    """
+    Berechnet Spaltenstatistiken in einem Durchlauf über eine Folge von Datenblöcken.
+    
+    Args:
+        chunks: Datenblöcke, z. B. aus table_to_chunks
+        seed: Startwert für die Zufallsstichproben
+        stichprobe_zeilen: Wenn > 0, wird zusätzlich eine gleichverteilte Zeilenstichprobe
+            dieser Größe unter stats["sample"] abgelegt (z. B. für das Datenprofil)
+        mit_sketches: Wenn True, werden im selben Durchlauf die Spalten-Sketches für die
+            Drift-Erkennung unter stats["sketches"] abgelegt (siehe sketches_aktualisieren)
+        
+    Returns:
+        Statistikzustand mit Zeilenanzahl und Statistiken je Spalte
+    """
+    rng = np.random.default_rng(seed)
+    stats = statistiken_initialisieren()
+    stichprobe = None
+    sketches = sketches_initialisieren() if mit_sketches else None
+    for chunk in chunks:
+        statistiken_aktualisieren(stats, chunk, rng)
+        if stichprobe_zeilen > 0:
+            stichprobe = _zeilenstichprobe_aktualisieren(stichprobe, chunk, stichprobe_zeilen, rng)
+        if sketches is not None:
+            sketches_aktualisieren(sketches, chunk)
+    if stichprobe is not None:
+        stats["sample"] = stichprobe.drop(columns='__schluessel')
+    if sketches is not None:
+        stats["sketches"] = sketches
+    logger.info(f"Statistiken für {stats['rows']} Zeilen und {len(stats['columns'])} Spalten berechnet.")
+    return stats
 
-# ---- Ausreißererkennung ----
+def _standardabweichung(spalte: Dict[str, Any]) -> float:
+    # Stichproben-Standardabweichung (ddof=1) wie pandas.Series.std
+    if spalte["count"] < 2:
+        return float('nan')
+    return float(np.sqrt(spalte["m2"] / (spalte["count"] - 1)))
 
-def identifiziere_ausreisser(df: pd.DataFrame, spalte: str, methode: str = 'iqr', 
-                           faktor: float = 1.5) -> Tuple[pd.Series, Dict[str, float], Any]:
+def ausreissergrenzen_aus_statistiken(spalte: Dict[str, Any], methode: str = 'iqr',
+                                     faktor: float = 1.5) -> Dict[str, float]:
     """
-    Identifiziert Ausreißer in einer Spalte eines DataFrames.
+    Berechnet die Ausreißergrenzen einer Spalte aus ihrem Statistikzustand.
+    
+    Liefert dieselben Schlüssel wie identifiziere_ausreisser. Liegen exakte Quartile vor
+    (z. B. aus spaltenstatistiken_sql), werden diese verwendet. Sonst sind die Quantile
+    exakt, solange die Spalte höchstens RESERVOIR_GROESSE Werte enthält, ansonsten geschätzt.
     
     Args:
-        df: DataFrame mit den Daten
-        spalte: Name der zu analysierenden Spalte
+        spalte: Statistik einer numerischen Spalte (stats["columns"][name])
         methode: Methode zur Ausreißererkennung ('iqr' oder 'zscore')
-        faktor: Faktor für die IQR-Methode (Standard: 1.5)
+        faktor: Faktor für die IQR-Methode bzw. Z-Score-Schwellenwert
         
     Returns:
-        Tuple mit (Ausreißer-Serie, Grenzen, Visualisierung)
+        Dictionary mit den Grenzen
     """
-    if not pd.api.types.is_numeric_dtype(df[spalte].dtype):
-        raise ValueError(f"Spalte {spalte} muss numerisch sein.")
-    
-    # Fehlende Werte entfernen
-    data = df[spalte].dropna()
+    if spalte["kind"] != 'numeric':
+        raise ValueError("Ausreißergrenzen können nur für numerische Spalten berechnet werden.")
     
     if methode.lower() == 'iqr':
-        # IQR-Methode
-        Q1 = data.quantile(0.25)
-        Q3 = data.quantile(0.75)
+        if spalte.get("Q1") is not None and spalte.get("Q3") is not None:
+            Q1, Q3 = spalte["Q1"], spalte["Q3"]
+        elif len(spalte["reservoir"]) == 0 and spalte["count"] > 0:
+            # z. B. SQL-Statistiken ohne percentile_cont (nur PostgreSQL)
+            raise ValueError("Für diese Spalte liegen keine Quartile vor.")
+        elif len(spalte["reservoir"]) == 0:
+            Q1 = Q3 = float('nan')
+        else:
+            Q1, Q3 = np.quantile(spalte["reservoir"], [0.25, 0.75])
         IQR = Q3 - Q1
-        
-        lower_bound = Q1 - faktor * IQR
-        upper_bound = Q3 + faktor * IQR
-        
-        ausreisser = df[(df[spalte] < lower_bound) | (df[spalte] > upper_bound)][spalte]
-        grenzen = {'lower': lower_bound, 'upper': upper_bound, 'Q1': Q1, 'Q3': Q3, 'IQR': IQR}
-        
-        # Boxplot erstellen
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.boxplot(data)
-        ax.set_title(f'Boxplot für {spalte} mit IQR-Methode (Faktor: {faktor})')
-        ax.set_ylabel(spalte)
-        
+        return {'lower': Q1 - faktor * IQR, 'upper': Q3 + faktor * IQR, 'Q1': Q1, 'Q3': Q3, 'IQR': IQR}
     elif methode.lower() == 'zscore':
-        # Z-Score-Methode
-        mean = data.mean()
-        std = data.std()
+        return {'mean': spalte["mean"], 'std': _standardabweichung(spalte), 'threshold': faktor}
+    else:
+        raise ValueError(f"Unbekannte Methode: {methode}. Unterstützte Methoden: 'iqr', 'zscore'")
+
+def zaehle_ausreisser_streaming(chunks: Iterable[pd.DataFrame],
+                                grenzen: Dict[str, Dict[str, float]]) -> Dict[str, int]:
+    """
+    Zählt Ausreißer blockweise anhand zuvor berechneter Grenzen.
+    
+    Args:
+        chunks: Datenblöcke, z. B. aus table_to_chunks
+        grenzen: Grenzen je Spalte aus ausreissergrenzen_aus_statistiken
         
-        z_scores = abs((data - mean) / std)
+    Returns:
+        Dictionary mit der Anzahl der Ausreißer je Spalte
+    """
+    anzahl = {spalte: 0 for spalte in grenzen}
+    for chunk in chunks:
+        for spalte, g in grenzen.items():
+            werte = chunk[spalte]
+            if 'lower' in g:
+                maske = (werte < g['lower']) | (werte > g['upper'])
+            else:
+                maske = ((werte - g['mean']) / g['std']).abs() > g['threshold']
+            anzahl[spalte] += int(maske.sum())
+    return anzahl
+
+def identifiziere_ausreisser_streaming(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                                       spalten: Optional[List[str]] = None, methode: str = 'iqr',
+                                       faktor: float = 1.5,
+                                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Identifiziert Ausreißer in mehreren numerischen Spalten mit begrenztem Speicherbedarf.
+    
+    Die Tabelle wird zweimal blockweise gelesen: zuerst für die Statistiken
+    (statistiken_berechnen_streaming), dann für die Zählung mit den Grenzen aller
+    Spalten in einem gemeinsamen Durchlauf (zaehle_ausreisser_streaming).
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        spalten: Zu analysierende Spalten (None für alle numerischen Spalten)
+        methode: Methode zur Ausreißererkennung ('iqr' oder 'zscore')
+        faktor: Faktor für die IQR-Methode bzw. Z-Score-Schwellenwert
+        chunk_size: Anzahl der Zeilen pro Block
+        
+    Returns:
+        DataFrame wie identifiziere_ausreisser_batch, jedoch ohne 'indices'
+    """
+    methode = methode.lower()
+    if methode not in ('iqr', 'zscore'):
+        raise ValueError(f"Unbekannte Methode: {methode}. Unterstützte Methoden: 'iqr', 'zscore'")
+    
+    stats = statistiken_berechnen_streaming(table_to_chunks(engine, table_name, chunk_size=chunk_size))
+    if spalten is None:
+        spalten = [column for column, spalte in stats["columns"].items() if spalte["kind"] == 'numeric']
+    grenzen = {spalte: ausreissergrenzen_aus_statistiken(stats["columns"][spalte], methode, faktor)
+               for spalte in spalten}
+    anzahl = zaehle_ausreisser_streaming(table_to_chunks(engine, table_name, chunk_size=chunk_size), grenzen)
+    
+    grenzspalten = ['lower', 'upper', 'Q1', 'Q3', 'IQR'] if methode == 'iqr' else ['mean', 'std', 'threshold']
+    ergebnis = pd.DataFrame([grenzen[spalte] for spalte in spalten], index=pd.Index(spalten, name='spalte'),
+                            columns=grenzspalten, dtype=float)
+    ergebnis['count'] = [anzahl[spalte] for spalte in spalten]
+    ergebnis['percent'] = ergebnis['count'] / stats["rows"] * 100 if stats["rows"] else 0.0
+    return ergebnis
+
+def spaltenstatistiken_berechnen(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Berechnet alle Spaltenstatistiken, die Profil, Ausreißeranalyse und Validierung
+    benötigen, in einem gemeinsamen Durchlauf über den DataFrame.
+    
+    Fehlende Werte, Minimum/Maximum, Quartile, Mittelwert und Standardabweichung
+    werden jeweils mit einem vektorisierten Aufruf für alle betroffenen Spalten
+    berechnet; Wertemengen nur für Spalten mit weniger als MAX_WERTEMENGE
+    unterschiedlichen Werten und für kategorische Spalten. Das Ergebnis hat
+    denselben Aufbau wie statistiken_berechnen_streaming.
+    
+    Args:
+        df: DataFrame mit den Daten
+        
+    Returns:
+        Statistikzustand mit Zeilenanzahl und Statistiken je Spalte
+    """
+    stats = statistiken_initialisieren()
+    stats["rows"] = len(df)
+    
+    nulls = df.isna().sum()
+    arten = {column: _spaltenart(df[column]) for column in df.columns}
+    # Für Quartile, Mittelwert und Standardabweichung nur echte Zahlen (ohne bool)
+    zahlen = list(df.select_dtypes(include=['number']).columns)
+    mit_grenzen = [c for c in df.columns if arten[c] in ('numeric', 'datetime')]
+    
+    minima = df[mit_grenzen].min() if mit_grenzen else pd.Series(dtype=object)
+    maxima = df[mit_grenzen].max() if mit_grenzen else pd.Series(dtype=object)
+    if zahlen:
+        zahlenwerte = _in_float64(df[zahlen])
+        quartile = zahlenwerte.quantile([0.25, 0.75])
+        mittelwerte = zahlenwerte.mean()
+        standardabweichungen = zahlenwerte.std()
+    
+    for column in df.columns:
+        series = df[column]
+        spalte = _leere_spaltenstatistik()
+        spalte["kind"] = arten[column]
+        spalte["nulls"] = int(nulls[column])
+        spalte["count"] = stats["rows"] - spalte["nulls"]
+        
+        if column in mit_grenzen and spalte["count"]:
+            spalte["min"] = _python_wert(minima[column])
+            spalte["max"] = _python_wert(maxima[column])
+        
+        if column in zahlen and spalte["count"]:
+            spalte["Q1"] = _python_wert(quartile.at[0.25, column])
+            spalte["Q3"] = _python_wert(quartile.at[0.75, column])
+            spalte["mean"] = _python_wert(mittelwerte[column])
+            if spalte["count"] > 1:
+                spalte["m2"] = _python_wert(standardabweichungen[column]) ** 2 * (spalte["count"] - 1)
+        
+        try:
+            spalte["nunique"] = int(series.nunique())
+        except TypeError:
+            # Nicht hashbare Werte (z. B. JSON-Objekte)
+            spalte["nunique"] = None
+        
+        if spalte["nunique"] is not None and (spalte["kind"] == 'categorical' or spalte["nunique"] < MAX_WERTEMENGE):
+            spalte["values"] = series.dropna().unique().tolist()
+        else:
+            spalte["values"] = None
+        
+        stats["columns"][column] = spalte
+    
+    return stats
+
+def _reservoirs_zusammenfuehren(a: Dict[str, Any], b: Dict[str, Any], rng: np.random.Generator) -> np.ndarray:
+    """
+    Führt zwei Quantil-Stichproben so zusammen, dass das Ergebnis wieder eine
+    gleichverteilte Stichprobe über beide Datenbestände ist.
+    """
+    if a["seen"] + b["seen"] <= RESERVOIR_GROESSE:
+        return np.concatenate([a["reservoir"], b["reservoir"]])
+    # Anzahl der Werte aus a entspricht dem Ziehen ohne Zurücklegen aus beiden Beständen
+    aus_a = rng.hypergeometric(a["seen"], b["seen"], RESERVOIR_GROESSE)
+    return np.concatenate([
+        rng.choice(a["reservoir"], size=aus_a, replace=False),
+        rng.choice(b["reservoir"], size=RESERVOIR_GROESSE - aus_a, replace=False),
+    ])
+
+def statistiken_zusammenfuehren(a: Dict[str, Any], b: Dict[str, Any],
+                                rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+    """
+    Führt zwei Statistikzustände über disjunkte Datenbestände zusammen.
+    
+    Das Ergebnis entspricht (bis auf die Zufallsstichprobe für Quantile) dem
+    Zustand, der bei einem Durchlauf über beide Bestände entstanden wäre.
+    Exakte Quartile aus SQL-Statistiken lassen sich nicht zusammenführen und
+    werden verworfen.
+    
+    Args:
+        a: Erster Statistikzustand
+        b: Zweiter Statistikzustand
+        rng: Zufallsgenerator für die Quantil-Stichprobe
+        
+    Returns:
+        Neuer, zusammengeführter Statistikzustand
+    """
+    if rng is None:
+        rng = np.random.default_rng(0)
+    ergebnis = statistiken_initialisieren()
+    ergebnis["rows"] = a["rows"] + b["rows"]
+    
+    for column in list(a["columns"]) + [c for c in b["columns"] if c not in a["columns"]]:
+        sa = a["columns"].get(column, _leere_spaltenstatistik())
+        sb = b["columns"].get(column, _leere_spaltenstatistik())
+        # Spalten, die in einem Bestand fehlen, gelten dort als vollständig NULL
+        nulls_a = sa["nulls"] if column in a["columns"] else a["rows"]
+        nulls_b = sb["nulls"] if column in b["columns"] else b["rows"]
+        
+        spalte = _leere_spaltenstatistik()
+        spalte["kind"] = sa["kind"] or sb["kind"]
+        spalte["nulls"] = nulls_a + nulls_b
+        spalte["count"] = sa["count"] + sb["count"]
+        grenzen_min = [v for v in (sa["min"], sb["min"]) if v is not None]
+        grenzen_max = [v for v in (sa["max"], sb["max"]) if v is not None]
+        spalte["min"] = min(grenzen_min) if grenzen_min else None
+        spalte["max"] = max(grenzen_max) if grenzen_max else None
+        
+        if spalte["count"]:
+            delta = sb["mean"] - sa["mean"]
+            spalte["mean"] = sa["mean"] + delta * sb["count"] / spalte["count"]
+            spalte["m2"] = sa["m2"] + sb["m2"] + delta ** 2 * sa["count"] * sb["count"] / spalte["count"]
+        
+        if sa["values"] is not None and sb["values"] is not None:
+            werte = set(sa["values"]) | set(sb["values"])
+            spalte["values"] = list(werte) if len(werte) < MAX_WERTEMENGE else None
+        else:
+            spalte["values"] = None
+        
+        spalte["reservoir"] = _reservoirs_zusammenfuehren(sa, sb, rng)
+        spalte["seen"] = sa["seen"] + sb["seen"]
+        ergebnis["columns"][column] = spalte
+    
+    return ergebnis
+
+def _json_wert(wert: Any) -> Any:
+    wert = _python_wert(wert)
+    if isinstance(wert, datetime):
+        return {"__datetime__": wert.isoformat()}
+    if isinstance(wert, date):
+        return {"__date__": wert.isoformat()}
+    return wert
+
+def _aus_json_wert(wert: Any) -> Any:
+    if isinstance(wert, dict) and "__datetime__" in wert:
+        return pd.Timestamp(wert["__datetime__"])
+    if isinstance(wert, dict) and "__date__" in wert:
+        return date.fromisoformat(wert["__date__"])
+    return wert
+
+def statistiken_serialisieren(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wandelt einen Statistikzustand in eine JSON-fähige Darstellung um.
+    
+    Eine eventuell enthaltene Zeilenstichprobe (stats["sample"]) wird nicht übernommen.
+    
+    Args:
+        stats: Statistikzustand
+        
+    Returns:
+        JSON-fähiges Dictionary
+    """
+    columns = {}
+    for column, spalte in stats["columns"].items():
+        eintrag = {k: _json_wert(v) for k, v in spalte.items() if k not in ("reservoir", "values")}
+        eintrag["reservoir"] = spalte["reservoir"].tolist()
+        eintrag["values"] = None if spalte["values"] is None else [_json_wert(v) for v in spalte["values"]]
+        columns[column] = eintrag
+    return {"rows": stats["rows"], "columns": columns}
+
+def statistiken_deserialisieren(daten: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stellt einen Statistikzustand aus seiner JSON-Darstellung wieder her.
+    
+    Args:
+        daten: Dictionary aus statistiken_serialisieren
+        
+    Returns:
+        Statistikzustand
+    """
+    stats = statistiken_initialisieren()
+    stats["rows"] = daten["rows"]
+    for column, eintrag in daten["columns"].items():
+        spalte = _leere_spaltenstatistik()
+        spalte.update({k: _aus_json_wert(v) for k, v in eintrag.items() if k not in ("reservoir", "values")})
+        spalte["reservoir"] = np.asarray(eintrag["reservoir"], dtype=float)
+        spalte["values"] = None if eintrag["values"] is None else [_aus_json_wert(v) for v in eintrag["values"]]
+        stats["columns"][column] = spalte
+    return stats
+
+def profilkennzahlen_aus_statistiken(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Leitet die wichtigsten Profilkennzahlen aus einem Statistikzustand ab.
+    
+    missing_percent ist wie p_cells_missing in ydata-profiling ein Anteil zwischen 0 und 1.
+    
+    Args:
+        stats: Statistikzustand
+        
+    Returns:
+        Dictionary mit Kennzahlen für die Tabelle und je Spalte
+    """
+    variables = len(stats["columns"])
+    missing_cells = sum(spalte["nulls"] for spalte in stats["columns"].values())
+    cells = stats["rows"] * variables
+    columns = {}
+    for column, spalte in stats["columns"].items():
+        eintrag = {
+            "missing": spalte["nulls"],
+            "missing_percent": spalte["nulls"] / stats["rows"] if stats["rows"] else 0.0,
+            "min": _json_wert(spalte["min"]),
+            "max": _json_wert(spalte["max"]),
+        }
+        if spalte["kind"] == 'numeric':
+            eintrag["mean"] = spalte["mean"]
+            eintrag["std"] = _standardabweichung(spalte)
+        if spalte["values"] is not None:
+            eintrag["distinct"] = len(spalte["values"])
+        columns[column] = eintrag
+    return {
+        "observations": stats["rows"],
+        "variables": variables,
+        "missing_cells": missing_cells,
+        "missing_percent": missing_cells / cells if cells else 0.0,
+        "columns": columns,
+    }
+
+# ---- Stichproben statt LIMIT ----
+
+# LIMIT liefert in der Praxis die physisch ältesten Zeilen. Stichproben werden unter
+# PostgreSQL per TABLESAMPLE mit festem Startwert gezogen (REPEATABLE liefert bei
+# unveränderter Tabelle in jeder Abfrage dieselben Zeilen), bei anderen Datenbanken
+# beim blockweisen Lesen: Bernoulli-Auswahl je Zeile bzw. Bottom-k-Stichprobe.
+
+STICHPROBEN_METHODEN = ('bernoulli', 'system')
+
+def stichprobe_definieren(anteil: Optional[float] = None, zeilen: Optional[int] = None,
+                          methode: str = 'bernoulli', seed: int = 0) -> Optional[Dict[str, Any]]:
+    """
+    Prüft die Angaben zu einer Stichprobe und fasst sie zusammen.
+    
+    Args:
+        anteil: Anteil der Zeilen zwischen 0 und 1
+        zeilen: Anzahl der Zeilen (alternativ zu anteil)
+        methode: TABLESAMPLE-Methode unter PostgreSQL ('bernoulli' je Zeile, 'system' je Seite)
+        seed: Startwert für die Auswahl
+        
+    Returns:
+        Dictionary mit "fraction", "rows", "method" und "seed" oder None ohne Stichprobe
+    """
+    if anteil is None and zeilen is None:
+        return None
+    if anteil is not None and zeilen is not None:
+        raise ValueError("Es kann nur ein Anteil oder eine Zeilenzahl für die Stichprobe angegeben werden.")
+    if anteil is not None and not 0 < anteil <= 1:
+        raise ValueError(f"Der Stichprobenanteil muss zwischen 0 und 1 liegen: {anteil}")
+    if zeilen is not None and zeilen <= 0:
+        raise ValueError(f"Die Stichprobengröße muss positiv sein: {zeilen}")
+    if methode not in STICHPROBEN_METHODEN:
+        raise ValueError(f"Unbekannte Stichprobenmethode: {methode}. Unterstützte Methoden: 'bernoulli', 'system'")
+    return {"fraction": anteil, "rows": zeilen, "method": methode, "seed": seed}
+
+def geschaetzte_zeilenzahl(engine: 'sqlalchemy.engine.Engine', table_name: str) -> int:
+    """
+    Ermittelt die Zeilenzahl einer Tabelle, unter PostgreSQL aus der Planerstatistik.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        
+    Returns:
+        (Geschätzte) Anzahl der Zeilen
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            schaetzung = conn.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:tabelle)"),
+                {"tabelle": table_name}
+            ).scalar()
+            # -1 bzw. 0: Tabelle wurde noch nicht analysiert
+            if schaetzung is not None and schaetzung > 0:
+                return int(schaetzung)
+        return int(conn.execute(select(func.count()).select_from(sa_table(table_name))).scalar())
+
+def _stichprobenanteil(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                       stichprobe: Dict[str, Any]) -> float:
+    if stichprobe["fraction"] is not None:
+        return stichprobe["fraction"]
+    gesamt = geschaetzte_zeilenzahl(engine, table_name)
+    # Etwas mehr Zeilen ziehen, damit nach dem Kürzen auf "rows" genug übrig bleiben
+    return min(1.0, stichprobe["rows"] * 1.1 / gesamt) if gesamt else 1.0
+
+def _tablesample_klausel(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                         stichprobe: Optional[Dict[str, Any]]) -> str:
+    """
+    Liefert die TABLESAMPLE-Klausel für PostgreSQL bzw. "" ohne Stichprobe.
+    """
+    if stichprobe is None:
+        return ""
+    if engine.dialect.name != 'postgresql':
+        raise ValueError("TABLESAMPLE wird nur unter PostgreSQL unterstützt.")
+    prozent = _stichprobenanteil(engine, table_name, stichprobe) * 100
+    return f" TABLESAMPLE {stichprobe['method'].upper()} ({prozent!r}) REPEATABLE ({int(stichprobe['seed'])})"
+
+def stichprobe_zu_chunks(engine: 'sqlalchemy.engine.Engine', table_name: str, stichprobe: Dict[str, Any],
+                         chunk_size: int = DEFAULT_CHUNK_SIZE, limit: Optional[int] = None,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lädt eine Zufallsstichprobe einer Tabelle blockweise.
+    
+    Unter PostgreSQL wählt TABLESAMPLE die Zeilen in der Datenbank aus. Sonst wird
+    die Tabelle blockweise gelesen und die Auswahl im Client getroffen. Bei einer
+    festen Zeilenzahl wird die Stichprobe mit dem Bottom-k-Verfahren auf genau
+    diese Größe gebracht und am Ende als ein Block geliefert.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        stichprobe: Stichprobe aus stichprobe_definieren
+        chunk_size: Anzahl der Zeilen pro Block
+        limit: Maximale Anzahl der zu lesenden Zeilen (None für alle)
+        columns: Zu ladende Spalten (None für alle)
+        
+    Yields:
+        DataFrames mit den Zeilen der Stichprobe
+    """
+    rng = np.random.default_rng(stichprobe["seed"])
+    if engine.dialect.name == 'postgresql':
+        abfrage = _tabellen_abfrage(table_name, limit, _tablesample_klausel(engine, table_name, stichprobe), columns)
+        chunks = query_to_chunks(engine, abfrage, chunk_size=chunk_size)
+        if stichprobe["rows"] is None:
+            yield from chunks
+            return
+    else:
+        chunks = query_to_chunks(engine, _tabellen_abfrage(table_name, limit, columns=columns), chunk_size=chunk_size)
+        if stichprobe["rows"] is None:
+            for chunk in chunks:
+                yield chunk[rng.random(len(chunk)) < stichprobe["fraction"]]
+            return
+    
+    auswahl = None
+    for chunk in chunks:
+        auswahl = _zeilenstichprobe_aktualisieren(auswahl, chunk, stichprobe["rows"], rng)
+    if auswahl is not None:
+        yield auswahl.drop(columns='__schluessel')
+
+def wilson_intervall(erfolge: int, n: int, konfidenz: float = 0.95) -> Tuple[float, float]:
+    """
+    Konfidenzintervall für einen Anteil nach Wilson.
+    
+    Args:
+        erfolge: Anzahl der Treffer in der Stichprobe
+        n: Stichprobengröße
+        konfidenz: Konfidenzniveau
+        
+    Returns:
+        Tuple mit (untere, obere Grenze) als Anteile zwischen 0 und 1
+    """
+    if n <= 0:
+        return (0.0, 1.0)
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + konfidenz / 2)
+    p = erfolge / n
+    nenner = 1 + z ** 2 / n
+    mitte = (p + z ** 2 / (2 * n)) / nenner
+    breite = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / nenner
+    return (max(0.0, float(mitte - breite)), min(1.0, float(mitte + breite)))
+
+def quantil_intervall(werte: Union[pd.Series, np.ndarray], p: float,
+                      konfidenz: float = 0.95) -> Tuple[float, float]:
+    """
+    Verteilungsfreies Konfidenzintervall für ein Quantil aus Ordnungsstatistiken.
+    
+    Args:
+        werte: Werte der Stichprobe (fehlende Werte werden entfernt)
+        p: Quantil zwischen 0 und 1
+        konfidenz: Konfidenzniveau
+        
+    Returns:
+        Tuple mit (untere, obere Grenze)
+    """
+    werte = np.asarray(werte, dtype=float)
+    werte = np.sort(werte[~np.isnan(werte)])
+    n = len(werte)
+    if n == 0:
+        return (float('nan'), float('nan'))
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + konfidenz / 2)
+    breite = z * np.sqrt(n * p * (1 - p))
+    unten = int(np.clip(np.floor(n * p - breite), 0, n - 1))
+    oben = int(np.clip(np.ceil(n * p + breite), 0, n - 1))
+    return (float(werte[unten]), float(werte[oben]))
+
+def ausreissergrenzen_intervall(werte: Union[pd.Series, np.ndarray], faktor: float = 1.5,
+                                konfidenz: float = 0.95) -> Dict[str, Tuple[float, float]]:
+    """
+    Konfidenzintervalle der IQR-Grenzen aus einer Stichprobe.
+    
+    Die Grenzen Q1 - faktor * IQR und Q3 + faktor * IQR werden aus den Intervallen
+    von Q1 und Q3 konservativ abgeschätzt.
+    
+    Args:
+        werte: Werte der Stichprobe
+        faktor: Faktor für die IQR-Methode
+        konfidenz: Konfidenzniveau je Quartil
+        
+    Returns:
+        Dictionary mit "lower" und "upper" als (untere, obere Grenze)
+    """
+    q1_unten, q1_oben = quantil_intervall(werte, 0.25, konfidenz)
+    q3_unten, q3_oben = quantil_intervall(werte, 0.75, konfidenz)
+    return {
+        "lower": ((1 + faktor) * q1_unten - faktor * q3_oben, (1 + faktor) * q1_oben - faktor * q3_unten),
+        "upper": ((1 + faktor) * q3_unten - faktor * q1_oben, (1 + faktor) * q3_oben - faktor * q1_unten),
+    }
+
+# ---- Datenprofile ----
+
+# Profilstufen von der ausführlichsten zur schnellsten. Die Laufzeit von ydata-profiling
+# wächst mit der Zahl der Zellen, Kendall und Phi_K sogar überlinear mit der Zeilenzahl.
+# "max_zellen" begrenzt die Tabellengröße je Stufe, "sekunden_je_mio_zellen" ist eine
+# grobe Schätzung der Laufzeit für die Auswahl nach Zeitbudget. Korrelationen unter
+# "stichprobe" werden auf einer geschichteten Stichprobe berechnet. "auto" ist die
+# Standardkorrelation von ydata-profiling; nicht aufgeführte Korrelationen werden
+# abgeschaltet (siehe PROFIL_KORRELATIONEN).
+PROFIL_STUFEN = [
+    {
+        "name": "voll",
+        "max_zellen": 500_000,
+        "sekunden_je_mio_zellen": 120.0,
+        "korrelationen": ["auto", "pearson", "spearman", "kendall", "phi_k"],
+        "stichprobe": [],
+        "missing_diagrams": {"bar": True, "matrix": True, "heatmap": True},
+        "interactions": True,
+    },
+    {
+        "name": "standard",
+        "max_zellen": 10_000_000,
+        "sekunden_je_mio_zellen": 15.0,
+        "korrelationen": ["pearson", "spearman"],
+        "stichprobe": ["auto", "kendall", "phi_k"],
+        "missing_diagrams": {"bar": True, "matrix": True, "heatmap": False},
+        "interactions": False,
+    },
+    {
+        "name": "reduziert",
+        "max_zellen": 100_000_000,
+        "sekunden_je_mio_zellen": 5.0,
+        "korrelationen": ["pearson"],
+        "stichprobe": ["auto", "spearman"],
+        "missing_diagrams": {"bar": True, "matrix": False, "heatmap": False},
+        "interactions": False,
+    },
+    {
+        "name": "minimal",
+        "max_zellen": None,
+        "sekunden_je_mio_zellen": 1.0,
+        "korrelationen": [],
+        "stichprobe": [],
+        "missing_diagrams": {"bar": False, "matrix": False, "heatmap": False},
+        "interactions": False,
+    },
+]
+
+# Alle Korrelationen von ydata-profiling; jede wird ausdrücklich ein- oder abgeschaltet,
+# da "auto" sonst standardmäßig auf der ganzen Tabelle berechnet wird
+PROFIL_KORRELATIONEN = ("auto", "pearson", "spearman", "kendall", "phi_k", "cramers")
+
+# Zeilenzahl der Stichprobe für Korrelationen unter "stichprobe"
+KORRELATION_STICHPROBE = 10000
+
+def profilstufe_waehlen(zeilen: int, spalten: int, zeitbudget: Optional[float] = None,
+                        stufe: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Wählt die Profilstufe anhand der Tabellengröße und eines Zeitbudgets.
+    
+    Args:
+        zeilen: Anzahl der Zeilen
+        spalten: Anzahl der Spalten
+        zeitbudget: Geschätzte Höchstdauer der Profilerstellung in Sekunden (None für unbegrenzt)
+        stufe: Name einer Stufe aus PROFIL_STUFEN, um die Auswahl zu überspringen
+        
+    Returns:
+        Eintrag aus PROFIL_STUFEN
+    """
+    if stufe is not None:
+        for eintrag in PROFIL_STUFEN:
+            if eintrag["name"] == stufe:
+                return eintrag
+        namen = ', '.join(eintrag["name"] for eintrag in PROFIL_STUFEN)
+        raise ValueError(f"Unbekannte Profilstufe: {stufe}. Verfügbare Stufen: {namen}")
+    
+    zellen = zeilen * spalten
+    for eintrag in PROFIL_STUFEN:
+        if eintrag["max_zellen"] is not None and zellen > eintrag["max_zellen"]:
+            continue
+        if zeitbudget is not None and zellen / 1e6 * eintrag["sekunden_je_mio_zellen"] > zeitbudget:
+            continue
+        return eintrag
+    return PROFIL_STUFEN[-1]
+
+def geschichtete_stichprobe(df: pd.DataFrame, n: int, schichtspalte: Optional[str] = None,
+                            seed: int = 0) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Zieht eine nach einer kategorialen Spalte geschichtete Zufallsstichprobe.
+    
+    Jede Schicht ist proportional zu ihrem Anteil vertreten. Ohne Angabe wird die
+    kategoriale Spalte mit den wenigsten (mindestens zwei) unterschiedlichen Werten
+    gewählt; gibt es keine, wird eine einfache Zufallsstichprobe gezogen.
+    
+    Args:
+        df: DataFrame mit den Daten
+        n: Ungefähre Zeilenzahl der Stichprobe
+        schichtspalte: Spalte für die Schichtung
+        seed: Startwert des Zufallsgenerators
+        
+    Returns:
+        Tuple mit (Stichprobe, verwendete Schichtspalte oder None)
+    """
+    if len(df) <= n:
+        return df, None
+    
+    if schichtspalte is None:
+        kandidaten = {}
+        for column in df.columns:
+            if not (_spaltenart(df[column]) in ('categorical', 'other')
+                    or pd.api.types.is_bool_dtype(df[column].dtype)):
+                continue
+            try:
+                anzahl = df[column].nunique(dropna=False)
+            except TypeError:
+                continue
+            if 2 <= anzahl <= MAX_WERTEMENGE:
+                kandidaten[column] = anzahl
+        if kandidaten:
+            schichtspalte = min(kandidaten, key=kandidaten.get)
+    
+    if schichtspalte is None:
+        return df.sample(n=n, random_state=seed), None
+    
+    stichprobe = df.groupby(schichtspalte, group_keys=False, dropna=False, observed=True).sample(
+        frac=n / len(df), random_state=seed
+    )
+    return stichprobe, schichtspalte
+
+def _korrelationen_auf_stichprobe(profile: 'ProfileReport', stichprobe: pd.DataFrame,
+                                  korrelationen: List[str]) -> None:
+    """
+    Berechnet Korrelationen auf einer Stichprobe und trägt sie in das Profil ein.
+    """
+    from ydata_profiling.model.correlations import calculate_correlation
+    
+    beschreibung = profile.description_set
+    for name in korrelationen:
+        matrix = calculate_correlation(profile.config, stichprobe, name, beschreibung.variables)
+        if matrix is not None:
+            beschreibung.correlations[name] = matrix
+
+def profil_erstellen(df: pd.DataFrame, output_file: Optional[str] = None, 
+                    title: str = "Datenprofilbericht", minimal: bool = False,
+                    stufe: Optional[str] = None, zeitbudget: Optional[float] = None) -> 'ProfileReport':
+    """
+    Erstellt ein Datenprofil für einen DataFrame.
+    
+    Die Konfiguration richtet sich nach der Profilstufe (siehe PROFIL_STUFEN), die
+    ohne Angabe aus Zeilen- und Spaltenzahl sowie dem Zeitbudget gewählt wird.
+    Stufe und Stichprobengröße stehen in der Beschreibung des Berichts und im
+    Attribut profilstufe des Ergebnisses.
+    
+    Args:
+        df: DataFrame mit den zu analysierenden Daten
+        output_file: Pfad zur Ausgabedatei (HTML)
+        title: Titel des Berichts
+        minimal: Wenn True, wird ein minimal-Bericht erstellt (entspricht stufe='minimal')
+        stufe: Name der Profilstufe (None für automatische Auswahl)
+        zeitbudget: Geschätzte Höchstdauer in Sekunden für die automatische Auswahl
+        
+    Returns:
+        ProfileReport-Objekt
+    """
+    from ydata_profiling import ProfileReport
+    
+    logger.info(f"Erstelle Datenprofil für DataFrame mit {df.shape[0]} Zeilen und {df.shape[1]} Spalten...")
+    
+    # Fehlende Werte in numerischen Spalten liegen in pandas bereits als NaN vor;
+    # ein zusätzliches fillna(np.nan) je Spalte wäre nur ein weiterer Durchlauf
+    
+    eintrag = profilstufe_waehlen(df.shape[0], df.shape[1], zeitbudget,
+                                  stufe='minimal' if minimal else stufe)
+    metadaten = {"tier": eintrag["name"], "rows": df.shape[0], "correlation_sample_rows": None,
+                 "stratified_by": None}
+    
+    korrelationen = list(eintrag["korrelationen"])
+    stichprobe = None
+    if eintrag["stichprobe"] and df.shape[0] <= KORRELATION_STICHPROBE:
+        # Kleine Tabellen brauchen keine Stichprobe
+        korrelationen += eintrag["stichprobe"]
+    elif eintrag["stichprobe"]:
+        stichprobe, schichtspalte = geschichtete_stichprobe(df, KORRELATION_STICHPROBE)
+        metadaten["correlation_sample_rows"] = len(stichprobe)
+        metadaten["stratified_by"] = schichtspalte
+    
+    beschreibung = f"Profilstufe: {eintrag['name']}"
+    if stichprobe is not None:
+        beschreibung += (f"; Korrelationen {', '.join(eintrag['stichprobe'])} auf einer Stichprobe "
+                         f"von {len(stichprobe)} Zeilen")
+        if metadaten["stratified_by"] is not None:
+            beschreibung += f" (geschichtet nach {metadaten['stratified_by']})"
+    logger.info(beschreibung)
+    
+    # Erstelle das Profil
+    if eintrag["name"] == 'minimal':
+        profile = ProfileReport(df, title=title, minimal=True, dataset={"description": beschreibung})
+    else:
+        profile = ProfileReport(
+            df, 
+            title=title,
+            explorative=True,
+            dataset={"description": beschreibung},
+            correlations={
+                name: {"calculate": name in korrelationen}
+                for name in PROFIL_KORRELATIONEN
+            },
+            missing_diagrams=eintrag["missing_diagrams"],
+            interactions={
+                "continuous": eintrag["interactions"],
+            }
+        )
+        if stichprobe is not None:
+            _korrelationen_auf_stichprobe(profile, stichprobe, eintrag["stichprobe"])
+    profile.profilstufe = metadaten
+    
+    # Speichere den Bericht, wenn ein Ausgabepfad angegeben wurde
+    if output_file:
+        # Reine Dateinamen landen im Berichtsverzeichnis, Pfade werden unverändert übernommen
+        output_path = Path(output_file)
+        if output_path.parent == Path('.'):
+            output_path = REPORT_DIR / output_path
+        profile.to_file(output_path)
+        logger.info(f"Datenprofil gespeichert unter: {output_path}")
+    
+    return profile
+
+def tabellen_profilieren(engine: 'sqlalchemy.engine.Engine', table_names: Optional[List[str]] = None, 
+                         limit: Optional[int] = None, output_dir: Optional[str] = None,
+                         stufe: Optional[str] = None, zeitbudget: Optional[float] = None,
+                         cache: bool = True, snapshot: bool = False,
+                         loader: str = 'sql', kompakt: bool = False) -> Dict[str, str]:
+    """
+    Erstellt Datenprofile für mehrere Tabellen.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_names: Liste der zu profilierenden Tabellen (None für alle)
+        limit: Maximale Anzahl der zu ladenden Zeilen pro Tabelle (None für alle)
+        output_dir: Verzeichnis für die Ausgabedateien
+        stufe: Profilstufe für alle Tabellen (None für automatische Auswahl je Tabelle)
+        zeitbudget: Geschätzte Höchstdauer je Tabelle in Sekunden für die automatische Auswahl
+        cache: Wenn True, wird für unveränderte Tabellen der vorhandene Bericht verwendet
+            (siehe tabellen_fingerabdruck)
+        snapshot: Wenn True, werden die Daten über table_to_dataframe_snapshot geladen
+        loader: Ladeverfahren für die Datenbank ('sql' oder 'copy', siehe LADEVERFAHREN)
+        kompakt: Wenn True, werden die dtypes vor dem Profil verkleinert (siehe dtypes_verkleinern)
+        
+    Returns:
+        Dictionary mit Tabellennamen als Schlüssel und Pfaden zu den Berichten als Werte
+    """
+    if output_dir is None:
+        output_dir = REPORT_DIR
+    else:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(exist_ok=True)
+    
+    if table_names is None:
+        table_names = get_table_list(engine)
+    
+    report_paths = {}
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    for table in table_names:
+        logger.info(f"Profiliere Tabelle: {table}")
+        try:
+            if cache:
+                fingerabdruck = tabellen_fingerabdruck(engine, table)
+                schluessel = cache_schluessel(art="profil", limit=limit, stufe=stufe, zeitbudget=zeitbudget,
+                                              kompakt=kompakt, output_dir=str(output_dir))
+                eintrag = cache_laden(table, fingerabdruck, schluessel)
+                if eintrag is not None:
+                    report_paths[table] = eintrag["result"]["file"]
+                    logger.info(f"{table} ist unverändert, verwende Profil vom {eintrag['created']}: {report_paths[table]}")
+                    continue
+            
+            if snapshot:
+                df = table_to_dataframe_snapshot(engine, table, limit=limit, loader=loader, kompakt=kompakt)
+            else:
+                df = table_to_dataframe(engine, table, limit=limit, loader=loader, kompakt=kompakt)
+            output_file = f"profil_{table}_{timestamp}.html"
+            output_path = output_dir / output_file
+            
+            profile = profil_erstellen(
+                df, 
+                output_file=str(output_path),
+                title=f"Datenprofil für {table}",
+                stufe=stufe,
+                zeitbudget=zeitbudget
+            )
+            
+            report_paths[table] = str(output_path)
+            logger.info(f"Profil für {table} erstellt: {output_path}")
+            if cache:
+                cache_speichern(table, fingerabdruck, schluessel, {"file": str(output_path)}, [str(output_path)])
+        except Exception as e:
+            logger.error(f"Fehler beim Profilieren von {table}: {e}")
+    
+    return report_paths
+
+# ---- Datenqualitätserwartungen mit Great Expectations ----
+
+def erstelle_expectations_suite(df: pd.DataFrame, suite_name: str = "default_suite",
+                                stats: Optional[Dict[str, Any]] = None) -> 'ge.core.ExpectationSuite':
+    """
+    Erstellt automatisch eine Erwartungssuite basierend auf den Daten.
+    
+    Die Erwartungen werden aus den Spaltenstatistiken abgeleitet (siehe
+    erstelle_expectations_suite_aus_statistiken). Liegen diese bereits vor,
+    z. B. weil Profil oder Ausreißeranalyse sie berechnet haben, wird der
+    DataFrame nicht erneut durchlaufen.
+    
+    Args:
+        df: DataFrame mit den Daten
+        suite_name: Name der Erwartungssuite
+        stats: Bereits berechnete Statistiken aus spaltenstatistiken_berechnen
+        
+    Returns:
+        ExpectationSuite-Objekt
+    """
+    if stats is None:
+        stats = spaltenstatistiken_berechnen(df)
+    return erstelle_expectations_suite_aus_statistiken(stats, suite_name=suite_name)
+
+def erstelle_expectations_suite_aus_statistiken(stats: Dict[str, Any],
+                                               suite_name: str = "default_suite") -> 'ge.core.ExpectationSuite':
+    """
+    Erstellt eine Erwartungssuite aus blockweise berechneten Statistiken.
+    
+    Benötigt nicht den vollständigen DataFrame, sondern nur einen Statistikzustand
+    (aus spaltenstatistiken_berechnen, statistiken_berechnen_streaming oder
+    spaltenstatistiken_sql):
+    
+    - keine NULL-Werte, wenn die Spalte keine enthält
+    - numerische Spalten: Werte zwischen Minimum und Maximum
+    - Spalten mit bekannter Wertemenge (weniger als MAX_WERTEMENGE Werte, bei
+      spaltenstatistiken_berechnen auch kategorische Spalten): Werte aus der Menge
+    - übrige Datum/Zeit-Spalten: Werte zwischen Minimum und Maximum
+    
+    Args:
+        stats: Statistikzustand mit Statistiken je Spalte
+        suite_name: Name der Erwartungssuite
+        
+    Returns:
+        ExpectationSuite-Objekt
+    """
+    import great_expectations as ge
+    
+    suite = ge.core.ExpectationSuite(expectation_suite_name=suite_name)
+    
+    def erwartung(expectation_type: str, **kwargs: Any) -> None:
+        suite.add_expectation(ge.core.ExpectationConfiguration(
+            expectation_type=expectation_type, kwargs=kwargs
+        ))
+    
+    for column, spalte in stats["columns"].items():
+        if spalte["nulls"] == 0:
+            erwartung("expect_column_values_to_not_be_null", column=column)
+        
+        if spalte["count"] == 0:
+            continue
+        
+        if spalte["kind"] == 'numeric':
+            erwartung("expect_column_values_to_be_between", column=column,
+                      min_value=spalte["min"], max_value=spalte["max"])
+        elif spalte["values"] is not None:
+            erwartung("expect_column_values_to_be_in_set", column=column, value_set=spalte["values"])
+        elif spalte["kind"] == 'datetime':
+            erwartung("expect_column_values_to_be_between", column=column,
+                      min_value=spalte["min"], max_value=spalte["max"])
+    
+    return suite
+
+def speichere_expectations_suite(suite: 'ge.core.ExpectationSuite', datei_pfad: str) -> None:
+    """
+    Speichert eine Erwartungssuite in einer JSON-Datei.
+    
+    Args:
+        suite: ExpectationSuite-Objekt
+        datei_pfad: Pfad zur JSON-Datei
+    """
+    with open(datei_pfad, 'w') as f:
+        json.dump(suite.to_json_dict(), f, indent=2)
+    logger.info(f"Erwartungssuite gespeichert unter: {datei_pfad}")
+
+def lade_expectations_suite(datei_pfad: str) -> 'ge.core.ExpectationSuite':
+    """
+    Lädt eine Erwartungssuite aus einer JSON-Datei.
+    
+    Args:
+        datei_pfad: Pfad zur JSON-Datei
+        
+    Returns:
+        ExpectationSuite-Objekt
+    """
+    import great_expectations as ge
+    
+    with open(datei_pfad, 'r') as f:
+        suite_dict = json.load(f)
+    suite = ge.core.ExpectationSuite(**suite_dict)
+    return suite
+
+def teste_daten_gegen_erwartungen(df: pd.DataFrame, suite: 'ge.core.ExpectationSuite',
+                                  stats: Optional[Dict[str, Any]] = None,
+                                  backend: str = 'numpy') -> 'ge.core.ExpectationSuiteValidationResult':
+    """
+    Testet Daten gegen eine Erwartungssuite.
+    
+    Erwartungen, deren Ergebnis sich aus den Spaltenstatistiken ergibt (keine
+    NULL-Werte, Minimum/Maximum innerhalb der Grenzen, Wertemenge enthalten),
+    werden ohne erneuten Durchlauf über die Daten ausgewertet. Die übrigen
+    Erwartungen werden mit dem Backend 'numpy' in einem gemeinsamen Durchlauf
+    über NumPy-Masken geprüft (siehe erwartungen_auswerten); nur Erwartungen,
+    die dort nicht unterstützt werden, prüft Great Expectations auf dem DataFrame.
+    Mit dem Backend 'ge' prüft Great Expectations alle übrigen Erwartungen.
+    
+    Args:
+        df: DataFrame mit den zu testenden Daten
+        suite: ExpectationSuite-Objekt
+        stats: Bereits berechnete Statistiken aus spaltenstatistiken_berechnen
+            (beim Backend 'ge' ohne Angabe berechnet)
+        backend: 'numpy' oder 'ge' (siehe VALIDIERUNGS_BACKENDS)
+        
+    Returns:
+        ExpectationSuiteValidationResult-Objekt
+    """
+    import great_expectations as ge
+    
+    if backend not in VALIDIERUNGS_BACKENDS:
+        raise ValueError(f"Unbekanntes Backend: {backend}. Unterstützt: {', '.join(VALIDIERUNGS_BACKENDS)}")
+    if stats is None and backend == 'ge':
+        stats = spaltenstatistiken_berechnen(df)
+    
+    results = {}
+    offen = []
+    for position, expectation in enumerate(suite.expectations):
+        ergebnis = _ergebnis_aus_statistiken(expectation, stats) if stats is not None else None
+        if ergebnis is None:
+            offen.append(position)
+        else:
+            results[position] = ergebnis
+    
+    if backend == 'numpy':
+        kompiliert = erwartungen_kompilieren(suite, positionen=offen)
+        erwartungen_auswerten(kompiliert, df)
+        for plan in kompiliert["plaene"]:
+            results[plan["position"]] = _ergebnis_aus_plan(plan)
+        offen = kompiliert["nicht_unterstuetzt"]
+    
+    ge_df = ge.from_pandas(df) if offen else None
+    for position in offen:
+        results[position] = _pandas_ergebnis(ge_df, suite.expectations[position])
+    
+    return _suite_validierungsergebnis([results[i] for i in sorted(results)], _validierungs_meta(suite))
+
+def _ergebnis_aus_statistiken(expectation: Any, stats: Dict[str, Any]) -> Optional['ge.core.ExpectationValidationResult']:
+    """
+    Leitet das Ergebnis einer Erwartung aus den Spaltenstatistiken ab, wenn das möglich ist.
+    
+    Returns:
+        ExpectationValidationResult oder None, wenn die Daten selbst geprüft werden müssen
+    """
+    spalte = stats["columns"].get(expectation.kwargs.get('column'))
+    if spalte is None:
+        return None
+    kwargs = expectation.kwargs
+    
+    if expectation.expectation_type == 'expect_column_values_to_not_be_null':
+        return _ergebnis_aus_zaehlwerten(expectation, stats["rows"], spalte["nulls"], spalte["nulls"])
+    
+    if spalte["count"] == 0:
+        erfuellt = expectation.expectation_type in PUSHDOWN_ERWARTUNGEN
+    elif expectation.expectation_type == 'expect_column_values_to_be_between':
+        if spalte["min"] is None or spalte["max"] is None:
+            return None
+        try:
+            erfuellt = True
+            if kwargs.get('min_value') is not None:
+                erfuellt &= (spalte["min"] > kwargs['min_value'] if kwargs.get('strict_min')
+                             else spalte["min"] >= kwargs['min_value'])
+            if kwargs.get('max_value') is not None:
+                erfuellt &= (spalte["max"] < kwargs['max_value'] if kwargs.get('strict_max')
+                             else spalte["max"] <= kwargs['max_value'])
+        except TypeError:
+            # z. B. Datumswerte, die in einer geladenen Suite als Text vorliegen
+            return None
+    elif expectation.expectation_type == 'expect_column_values_to_be_in_set':
+        if spalte["values"] is None:
+            return None
+        try:
+            erfuellt = set(spalte["values"]) <= set(kwargs.get('value_set') or [])
+        except TypeError:
+            return None
+    else:
+        return None
+    
+    # Nur erfüllte Erwartungen lassen sich ohne Daten auswerten; für verletzte
+    # werden die unerwarteten Werte gezählt und als Beispiele ausgegeben
+    if not erfuellt:
+        return None
+    return _ergebnis_aus_zaehlwerten(expectation, stats["rows"], spalte["nulls"], 0)
+
+def _validierungs_meta(suite: 'ge.core.ExpectationSuite', **extra: Any) -> Dict[str, Any]:
+    """
+    Erstellt die Metadaten eines Validierungsergebnisses.
+    """
+    import great_expectations as ge
+    
+    meta = {
+        "expectation_suite_name": suite.expectation_suite_name,
+        "great_expectations_version": ge.__version__,
+        "validation_time": datetime.now().strftime("%Y%m%dT%H%M%S.%fZ"),
+    }
+    meta.update(extra)
+    return meta
+
+def _validierungsergebnisse_zusammenfuehren(teilergebnisse: List[Any]) -> 'ge.core.ExpectationValidationResult':
+    """
+    Führt die Ergebnisse einer Erwartung über mehrere Datenblöcke zusammen.
+    """
+    import great_expectations as ge
+    
+    erstes = teilergebnisse[0]
+    ergebnisse = [r.result or {} for r in teilergebnisse]
+    result = {}
+    for key in ('element_count', 'missing_count', 'unexpected_count'):
+        if all(key in r for r in ergebnisse):
+            result[key] = sum(r[key] for r in ergebnisse)
+    if 'unexpected_count' in result and 'element_count' in result:
+        nicht_fehlend = result['element_count'] - result.get('missing_count', 0)
+        result['unexpected_percent'] = result['unexpected_count'] / nicht_fehlend * 100 if nicht_fehlend else 0.0
+    beispiele = [wert for r in ergebnisse for wert in r.get('partial_unexpected_list', [])]
+    if beispiele:
+        result['partial_unexpected_list'] = beispiele[:20]
+    
+    ausnahme = next((r.exception_info for r in teilergebnisse
+                     if r.exception_info and r.exception_info.get('raised_exception')), erstes.exception_info)
+    return ge.core.ExpectationValidationResult(
+        success=all(r.success for r in teilergebnisse),
+        expectation_config=erstes.expectation_config,
+        result=result,
+        exception_info=ausnahme
+    )
+
+def teste_daten_gegen_erwartungen_streaming(chunks: Iterable[pd.DataFrame],
+                                            suite: 'ge.core.ExpectationSuite',
+                                            backend: str = 'numpy') -> 'ge.core.ExpectationSuiteValidationResult':
+    """
+    Testet blockweise geladene Daten gegen eine Erwartungssuite.
+    
+    Mit dem Backend 'numpy' werden die Zähler der nativ auswertbaren Erwartungen
+    über die Blöcke fortgeschrieben, sodass z. B. 'mostly' für die gesamte Tabelle
+    gilt. Mit dem Backend 'ge' (und für nicht nativ unterstützte Erwartungen) wird
+    jeder Block einzeln validiert; eine Erwartung gilt dann als erfüllt, wenn sie
+    in allen Blöcken erfüllt ist. Zählwerte werden über die Blöcke summiert.
+    
+    Args:
+        chunks: Datenblöcke, z. B. aus table_to_chunks
+        suite: ExpectationSuite-Objekt
+        backend: 'numpy' oder 'ge' (siehe VALIDIERUNGS_BACKENDS)
+        
+    Returns:
+        ExpectationSuiteValidationResult-Objekt
+    """
+    import great_expectations as ge
+    
+    if backend not in VALIDIERUNGS_BACKENDS:
+        raise ValueError(f"Unbekanntes Backend: {backend}. Unterstützt: {', '.join(VALIDIERUNGS_BACKENDS)}")
+    if backend == 'numpy':
+        return _teste_streaming_nativ(chunks, suite)
+    
+    teilergebnisse: Dict[str, List[Any]] = {}
+    meta = None
+    for chunk in chunks:
+        result = ge.from_pandas(chunk).validate(expectation_suite=suite, only_return_failures=False)
+        meta = result.meta
+        for r in result.results:
+            key = json.dumps(r.expectation_config.to_json_dict(), sort_keys=True, default=str)
+            teilergebnisse.setdefault(key, []).append(r)
+    
+    if meta is None:
+        raise ValueError("Keine Daten zum Validieren vorhanden.")
+    
+    results = [_validierungsergebnisse_zusammenfuehren(liste) for liste in teilergebnisse.values()]
+    return _suite_validierungsergebnis(results, meta)
+
+def _suite_validierungsergebnis(results: List[Any], meta: Dict[str, Any]) -> 'ge.core.ExpectationSuiteValidationResult':
+    """
+    Fasst einzelne Erwartungsergebnisse zu einem Suite-Ergebnis mit Statistiken zusammen.
+    """
+    import great_expectations as ge
+    
+    evaluated = len(results)
+    successful = sum(1 for r in results if r.success)
+    statistics = {
+        "evaluated_expectations": evaluated,
+        "successful_expectations": successful,
+        "unsuccessful_expectations": evaluated - successful,
+        "success_percent": successful / evaluated * 100 if evaluated else None
+    }
+    logger.info(f"Datenvalidierung abgeschlossen. Erfolgreiche Tests: {successful} von {evaluated}")
+    return ge.core.ExpectationSuiteValidationResult(
+        success=successful == evaluated,
+        results=results,
+        statistics=statistics,
+        meta=meta
+    )
+
+def speichere_validierungsergebnis(ergebnis: 'ge.core.ExpectationValidationResult', datei_pfad: str) -> None:
+    """
+    Speichert ein Validierungsergebnis in einer JSON-Datei.
+    
+    Args:
+        ergebnis: ExpectationValidationResult-Objekt
+        datei_pfad: Pfad zur JSON-Datei
+    """
+    with open(datei_pfad, 'w') as f:
+        json.dump(ergebnis.to_json_dict(), f, indent=2)
+    logger.info(f"Validierungsergebnis gespeichert unter: {datei_pfad}")
+
+def erstelle_kontinuierlichen_test_workflow() -> str:
+    """
+    Erstellt ein Python-Skript für kontinuierliche Datentests.
+    
+    Returns:
+        String mit dem Python-Code für das Skript
+    """
+    script = '''#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Kontinuierlicher Datenqualitätstest
+-----------------------------------
+
+Dieses Skript führt regelmäßige Überprüfungen der Datenqualität durch.
+Es kann als Cron-Job oder in CI/CD-Pipelines verwendet werden.
+
+Verwendung:
+    python datentests.py [Tabelle] [Erwartungssuite] [Ausgabedatei]
+"""
+
+import os
+import sys
+import json
+import pandas as pd
+from datetime import datetime
+from data_quality import (
+    get_db_connection, table_to_dataframe, 
+    lade_expectations_suite, teste_daten_gegen_erwartungen,
+    speichere_validierungsergebnis
+)
+
+def main():
+    # Parameter auswerten
+    if len(sys.argv) < 4:
+        print("Verwendung: python datentests.py [Tabelle] [Erwartungssuite] [Ausgabedatei]")
+        sys.exit(1)
+        
+    table_name = sys.argv[1]
+    expectations_file = sys.argv[2]
+    output_file = sys.argv[3]
+    
+    # Datenbankverbindung herstellen
+    engine = get_db_connection()
+    
+    # Daten laden
+    df = table_to_dataframe(engine, table_name)
+    
+    # Erwartungen laden
+    suite = lade_expectations_suite(expectations_file)
+    
+    # Daten validieren
+    result = teste_daten_gegen_erwartungen(df, suite)
+    
+    # Ergebnis speichern
+    speichere_validierungsergebnis(result, output_file)
+    
+    # Ausgabe
+    success_rate = result.statistics['successful_expectations'] / result.statistics['evaluated_expectations']
+    print(f"Erfolgsrate: {success_rate:.2%}")
+    
+    # Exit-Code basierend auf Erfolgsrate
+    if success_rate < 0.9:  # Erfolgsrate unter 90%
+        sys.exit(1)
+    
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
+'''
+    return script
+
+# ---- Native Auswertung von Erwartungen mit NumPy ----
+
+# Backends für die Auswertung gespeicherter Erwartungssuiten
+VALIDIERUNGS_BACKENDS = ('numpy', 'ge')
+
+# Parameter, die die native Auswertung versteht; Erwartungen mit weiteren
+# Parametern (z. B. parse_strings_as_datetimes) prüft Great Expectations
+_NATIVE_PARAMETER = {
+    'expect_column_values_to_not_be_null': {'column', 'mostly'},
+    'expect_column_values_to_be_between': {'column', 'min_value', 'max_value', 'strict_min', 'strict_max', 'mostly'},
+    'expect_column_values_to_be_in_set': {'column', 'value_set', 'mostly'},
+}
+_NEUTRALE_PARAMETER = {'result_format', 'include_config', 'catch_exceptions', 'meta'}
+
+# Anzahl der Beispiele unerwarteter Werte je Erwartung (wie partial_unexpected_list in GE)
+BEISPIELE_UNERWARTET = 20
+
+def erwartungen_kompilieren(suite: 'ge.core.ExpectationSuite',
+                            positionen: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Übersetzt eine Erwartungssuite in Auswertungspläne für die native Prüfung.
+    
+    Args:
+        suite: ExpectationSuite-Objekt (z. B. aus lade_expectations_suite)
+        positionen: Nur diese Erwartungen der Suite übersetzen (None für alle)
+        
+    Returns:
+        Dictionary mit "plaene" (je Erwartung Typ, Spalte, Parameter und Zähler) und
+        "nicht_unterstuetzt" (Positionen der Erwartungen, die Great Expectations prüft)
+    """
+    plaene, nicht_unterstuetzt = [], []
+    for position, expectation in enumerate(suite.expectations):
+        if positionen is not None and position not in positionen:
+            continue
+        erlaubt = _NATIVE_PARAMETER.get(expectation.expectation_type)
+        if erlaubt is None or set(expectation.kwargs) - erlaubt - _NEUTRALE_PARAMETER:
+            nicht_unterstuetzt.append(position)
+            continue
+        plaene.append({
+            "position": position,
+            "expectation": expectation,
+            "type": expectation.expectation_type,
+            "column": expectation.kwargs.get('column'),
+            "kwargs": expectation.kwargs,
+            "value_set": None,
+            "element_count": 0,
+            "missing_count": 0,
+            "unexpected_count": 0,
+            "beispiele": [],
+            "fehler": None,
+        })
+    return {"plaene": plaene, "nicht_unterstuetzt": nicht_unterstuetzt}
+
+def _grenze_fuer_spalte(grenze: Any, series: pd.Series) -> Any:
+    # Grenzen aus einer geladenen Suite liegen für Datumsspalten als Text vor
+    if grenze is None or not pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return grenze
+    grenze = pd.Timestamp(grenze)
+    tz = getattr(series.dtype, 'tz', None)
+    if tz is not None and grenze.tzinfo is None:
+        return grenze.tz_localize(tz)
+    if tz is None and grenze.tzinfo is not None:
+        return grenze.tz_convert(None)
+    return grenze
+
+def _maske_unerwartet(plan: Dict[str, Any], series: pd.Series, fehlend: np.ndarray,
+                      zahlen: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Berechnet die Maske der unerwarteten Werte einer Erwartung für einen Datenblock.
+    
+    Args:
+        plan: Auswertungsplan aus erwartungen_kompilieren
+        series: Werte der Spalte
+        fehlend: Maske der fehlenden Werte
+        zahlen: Werte als float64-Array (nur bei numerischen Spalten, sonst None)
+        
+    Returns:
+        Boolesche Maske; fehlende Werte sind nur bei not_null unerwartet
+    """
+    kwargs = plan["kwargs"]
+    if plan["type"] == 'expect_column_values_to_not_be_null':
+        return fehlend
+    
+    if plan["type"] == 'expect_column_values_to_be_in_set':
+        if plan["value_set"] is None:
+            plan["value_set"] = list(kwargs.get('value_set') or [])
+        return ~series.isin(plan["value_set"]).to_numpy(dtype=bool) & ~fehlend
+    
+    untere = kwargs.get('min_value')
+    obere = kwargs.get('max_value')
+    if zahlen is not None:
+        maske = np.zeros(len(zahlen), dtype=bool)
+        # Vergleiche mit NaN ergeben False, fehlende Werte sind daher nicht unerwartet
+        with np.errstate(invalid='ignore'):
+            if untere is not None:
+                maske |= zahlen <= untere if kwargs.get('strict_min') else zahlen < untere
+            if obere is not None:
+                maske |= zahlen >= obere if kwargs.get('strict_max') else zahlen > obere
+        return maske
+    
+    werte = series[~fehlend]
+    untere, obere = _grenze_fuer_spalte(untere, series), _grenze_fuer_spalte(obere, series)
+    teilmaske = np.zeros(len(werte), dtype=bool)
+    if untere is not None:
+        teilmaske |= (werte <= untere if kwargs.get('strict_min') else werte < untere).to_numpy(dtype=bool)
+    if obere is not None:
+        teilmaske |= (werte >= obere if kwargs.get('strict_max') else werte > obere).to_numpy(dtype=bool)
+    maske = np.zeros(len(series), dtype=bool)
+    maske[~fehlend] = teilmaske
+    return maske
+
+def erwartungen_auswerten(kompiliert: Dict[str, Any], chunk: pd.DataFrame) -> None:
+    """
+    Wertet alle kompilierten Erwartungen in einem Durchlauf über einen Datenblock aus.
+    
+    Fehlende Werte und die float64-Darstellung werden je Spalte nur einmal
+    berechnet und von allen Erwartungen der Spalte genutzt. Die Zähler der
+    Pläne werden fortgeschrieben, sodass sich die Funktion blockweise aufrufen lässt.
+    
+    Args:
+        kompiliert: Ergebnis von erwartungen_kompilieren
+        chunk: Datenblock
+    """
+    spalten: Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]] = {}
+    for plan in kompiliert["plaene"]:
+        column = plan["column"]
+        if plan["fehler"] is not None:
+            continue
+        if column not in chunk.columns:
+            plan["fehler"] = f"Spalte {column} ist nicht vorhanden."
+            continue
+        
+        series = chunk[column]
+        if column not in spalten:
+            zahlen = None
+            if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+                zahlen = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            spalten[column] = (series.isna().to_numpy(dtype=bool), zahlen)
+        fehlend, zahlen = spalten[column]
+        
+        try:
+            maske = _maske_unerwartet(plan, series, fehlend, zahlen)
+        except TypeError as e:
+            # z. B. Vergleich von Text mit Zahlen; Great Expectations meldet hier eine Ausnahme
+            plan["fehler"] = str(e)
+            continue
+        
+        plan["element_count"] += len(series)
+        plan["missing_count"] += int(fehlend.sum())
+        unerwartet = int(maske.sum())
+        plan["unexpected_count"] += unerwartet
+        frei = BEISPIELE_UNERWARTET - len(plan["beispiele"])
+        if unerwartet and frei > 0:
+            plan["beispiele"].extend(_python_wert(w) for w in series[maske].iloc[:frei])
+
+def _ergebnis_aus_plan(plan: Dict[str, Any]) -> 'ge.core.ExpectationValidationResult':
+    """
+    Erstellt das Great-Expectations-Ergebnis einer nativ ausgewerteten Erwartung.
+    """
+    import great_expectations as ge
+    
+    if plan["fehler"] is not None:
+        return ge.core.ExpectationValidationResult(
+            success=False,
+            expectation_config=plan["expectation"],
+            exception_info={"raised_exception": True, "exception_message": plan["fehler"], "exception_traceback": None}
+        )
+    ergebnis = _ergebnis_aus_zaehlwerten(plan["expectation"], plan["element_count"],
+                                         plan["missing_count"], plan["unexpected_count"])
+    ergebnis.result["partial_unexpected_list"] = plan["beispiele"]
+    return ergebnis
+
+def _teste_streaming_nativ(chunks: Iterable[pd.DataFrame],
+                           suite: 'ge.core.ExpectationSuite') -> 'ge.core.ExpectationSuiteValidationResult':
+    """
+    Blockweise Prüfung mit dem Backend 'numpy' (siehe teste_daten_gegen_erwartungen_streaming).
+    """
+    import great_expectations as ge
+    
+    kompiliert = erwartungen_kompilieren(suite)
+    teilergebnisse = {position: [] for position in kompiliert["nicht_unterstuetzt"]}
+    bloecke = 0
+    for chunk in chunks:
+        bloecke += 1
+        erwartungen_auswerten(kompiliert, chunk)
+        if teilergebnisse:
+            ge_df = ge.from_pandas(chunk)
+            for position, liste in teilergebnisse.items():
+                liste.append(_pandas_ergebnis(ge_df, suite.expectations[position]))
+    
+    if bloecke == 0:
+        raise ValueError("Keine Daten zum Validieren vorhanden.")
+    
+    results = {plan["position"]: _ergebnis_aus_plan(plan) for plan in kompiliert["plaene"]}
+    for position, liste in teilergebnisse.items():
+        results[position] = _validierungsergebnisse_zusammenfuehren(liste)
+    return _suite_validierungsergebnis([results[i] for i in sorted(results)], _validierungs_meta(suite))
+
+# ---- SQL-Pushdown für Spaltenstatistiken und Erwartungen ----
+
+# Erwartungstypen, die als Aggregat-SQL ausgewertet werden können
+PUSHDOWN_ERWARTUNGEN = (
+    'expect_column_values_to_not_be_null',
+    'expect_column_values_to_be_between',
+    'expect_column_values_to_be_in_set',
+)
+
+def _sql_spaltenart(sa_type: Any) -> str:
+    """
+    Ordnet einen reflektierten SQLAlchemy-Typ einer Spaltenart zu.
+    
+    Returns:
+        'numeric', 'datetime', 'boolean', 'other' oder 'unsupported' (z. B. JSON, Arrays),
+        für die nur fehlende Werte per SQL gezählt werden
+    """
+    if isinstance(sa_type, sa_types.Boolean):
+        return 'boolean'
+    if isinstance(sa_type, (sa_types.Integer, sa_types.Numeric, sa_types.Float)):
+        return 'numeric'
+    if isinstance(sa_type, (sa_types.DateTime, sa_types.Date)):
+        return 'datetime'
+    if isinstance(sa_type, sa_types.String):
+        return 'other'
+    return 'unsupported'
+
+def _sql_quelle(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                limit: Optional[int] = None,
+                stichprobe: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Reflektiert die Spalten einer Tabelle und liefert die Abfragequelle.
+    
+    Returns:
+        Tuple mit (Tabelle bzw. Unterabfrage mit TABLESAMPLE/LIMIT, Dictionary Spaltenname -> SQLAlchemy-Typ)
+    """
+    spalten = inspect(engine).get_columns(table_name)
+    quelle = sa_table(table_name, *[sa_column(s['name']) for s in spalten])
+    if stichprobe is not None:
+        if engine.dialect.name != 'postgresql':
+            raise ValueError("Stichproben im Pushdown-Modus werden nur unter PostgreSQL unterstützt.")
+        prozent = _stichprobenanteil(engine, table_name, stichprobe) * 100
+        methode = func.bernoulli if stichprobe["method"] == 'bernoulli' else func.system
+        quelle = quelle.tablesample(methode(prozent), name=table_name, seed=literal_column(str(int(stichprobe["seed"]))))
+        if limit is not None:
+            quelle = select(quelle).limit(limit).subquery(table_name)
+    elif limit is not None:
+        quelle = select(quelle).limit(limit).subquery(table_name)
+    return quelle, {s['name']: s['type'] for s in spalten}
+
+def _sql_wertemengen(engine: 'sqlalchemy.engine.Engine', quelle: Any,
+                     typen: Dict[str, Any], spalten: List[str]) -> Dict[str, List[Any]]:
+    """
+    Liest die Wertemengen von Spalten mit wenigen unterschiedlichen Werten.
+    
+    Unter PostgreSQL genügt dafür eine Abfrage mit array_agg(DISTINCT ...),
+    sonst wird je Spalte ein SELECT DISTINCT ausgeführt.
+    """
+    if not spalten:
+        return {}
+    
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            ausdruecke = []
+            for i, name in enumerate(spalten):
+                col = quelle.c[name]
+                # Enum-Arrays liefert der Treiber nicht als Liste, daher als Text aggregieren
+                wert = cast(col, sa_types.Text) if isinstance(typen[name], sa_types.Enum) else col
+                ausdruecke.append(func.array_agg(distinct(wert)).filter(col.isnot(None)).label(f"c{i}"))
+            zeile = conn.execute(select(*ausdruecke).select_from(quelle)).one()
+            return {name: [_python_wert(w) for w in (zeile[i] or [])] for i, name in enumerate(spalten)}
+        
+        wertemengen = {}
+        for name in spalten:
+            col = quelle.c[name]
+            zeilen = conn.execute(select(col).distinct().select_from(quelle).where(col.isnot(None)))
+            wertemengen[name] = [_python_wert(z[0]) for z in zeilen]
+        return wertemengen
+
+def spaltenstatistiken_sql(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                           limit: Optional[int] = None,
+                           stichprobe: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Berechnet Spaltenstatistiken mit einer Aggregat-Abfrage direkt in der Datenbank.
+    
+    Fehlende Werte, Minimum/Maximum, Mittelwert/Standardabweichung, Anzahl
+    unterschiedlicher Werte und (unter PostgreSQL) Q1/Q3 per percentile_cont werden
+    in einem Tabellendurchlauf ermittelt; nur Wertemengen von Spalten mit weniger als
+    MAX_WERTEMENGE unterschiedlichen Werten erfordern eine zweite Abfrage.
+    Das Ergebnis hat denselben Aufbau wie statistiken_berechnen_streaming und kann an
+    erstelle_expectations_suite_aus_statistiken und ausreissergrenzen_aus_statistiken
+    übergeben werden.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        limit: Maximale Anzahl der zu berücksichtigenden Zeilen (None für alle)
+        stichprobe: Stichprobe aus stichprobe_definieren (nur PostgreSQL)
+        
+    Returns:
+        Statistikzustand mit Zeilenanzahl und Statistiken je Spalte
+    """
+    logger.info(f"Berechne Spaltenstatistiken per SQL für Tabelle {table_name}...")
+    quelle, typen = _sql_quelle(engine, table_name, limit, stichprobe)
+    ist_postgres = engine.dialect.name == 'postgresql'
+    
+    ausdruecke = [func.count().label('rows')]
+    felder_je_spalte = {}
+    for i, (name, sa_type) in enumerate(typen.items()):
+        col = quelle.c[name]
+        art = _sql_spaltenart(sa_type)
+        felder = {'nulls': func.count().filter(col.is_(None))}
+        if art in ('numeric', 'datetime'):
+            felder['min'] = func.min(col)
+            felder['max'] = func.max(col)
+        if art == 'numeric':
+            felder['mean'] = func.avg(col)
+            if ist_postgres:
+                felder['std'] = func.stddev_samp(col)
+                felder['Q1'] = func.percentile_cont(0.25).within_group(col)
+                felder['Q3'] = func.percentile_cont(0.75).within_group(col)
+        if art != 'unsupported':
+            felder['distinct'] = func.count(distinct(col))
+        felder_je_spalte[name] = (art, list(felder))
+        ausdruecke.extend(ausdruck.label(f"c{i}_{key}") for key, ausdruck in felder.items())
+    
+    with engine.connect() as conn:
+        zeile = conn.execute(select(*ausdruecke).select_from(quelle)).mappings().one()
+    
+    stats = statistiken_initialisieren()
+    stats["rows"] = zeile['rows']
+    wenige_werte = []
+    for i, (name, (art, felder)) in enumerate(felder_je_spalte.items()):
+        werte = {key: _python_wert(zeile[f"c{i}_{key}"]) for key in felder}
+        spalte = _leere_spaltenstatistik()
+        spalte.update({
+            "kind": art,
+            "nulls": werte['nulls'],
+            "count": stats["rows"] - werte['nulls'],
+            "min": werte.get('min'),
+            "max": werte.get('max'),
+            "Q1": werte.get('Q1'),
+            "Q3": werte.get('Q3'),
+            "values": None,
+        })
+        if werte.get('mean') is not None:
+            spalte["mean"] = werte['mean']
+        if werte.get('std') is not None and spalte["count"] > 1:
+            spalte["m2"] = werte['std'] ** 2 * (spalte["count"] - 1)
+        if werte.get('distinct') is not None and werte['distinct'] < MAX_WERTEMENGE:
+            wenige_werte.append(name)
+        stats["columns"][name] = spalte
+    
+    for name, wertemenge in _sql_wertemengen(engine, quelle, typen, wenige_werte).items():
+        stats["columns"][name]["values"] = wertemenge
+    
+    logger.info(f"Statistiken für {stats['rows']} Zeilen und {len(stats['columns'])} Spalten berechnet.")
+    return stats
+
+def zaehle_ausreisser_sql(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                          grenzen: Dict[str, Dict[str, float]], limit: Optional[int] = None,
+                          stichprobe: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """
+    Zählt Ausreißer anhand zuvor berechneter Grenzen mit einer Aggregat-Abfrage.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        grenzen: Grenzen je Spalte aus ausreissergrenzen_aus_statistiken
+        limit: Maximale Anzahl der zu berücksichtigenden Zeilen (None für alle)
+        stichprobe: Stichprobe aus stichprobe_definieren (nur PostgreSQL)
+        
+    Returns:
+        Dictionary mit der Anzahl der Ausreißer je Spalte
+    """
+    quelle, _ = _sql_quelle(engine, table_name, limit, stichprobe)
+    ausdruecke = []
+    for i, (name, g) in enumerate(grenzen.items()):
+        col = quelle.c[name]
+        if 'lower' in g:
+            grenzwerte = (g['lower'], g['upper'])
+            bedingung = or_(col < g['lower'], col > g['upper'])
+        else:
+            grenzwerte = (g['mean'], g['std'])
+            bedingung = func.abs((col - g['mean']) / g['std']) > g['threshold']
+        if any(w is None or np.isnan(w) for w in grenzwerte) or g.get('std') == 0:
+            bedingung = false()
+        ausdruecke.append(func.count().filter(bedingung).label(f"c{i}"))
+    
+    if not ausdruecke:
+        return {}
+    with engine.connect() as conn:
+        zeile = conn.execute(select(*ausdruecke).select_from(quelle)).one()
+    return {name: int(zeile[i]) for i, name in enumerate(grenzen)}
+
+def _erwartung_als_sql(col: Any, expectation_type: str, kwargs: Dict[str, Any]) -> Any:
+    """
+    Übersetzt eine Erwartung in eine SQL-Bedingung für unerwartete Zeilen.
+    """
+    if expectation_type == 'expect_column_values_to_not_be_null':
+        return col.is_(None)
+    
+    if expectation_type == 'expect_column_values_to_be_between':
+        bedingungen = []
+        if kwargs.get('min_value') is not None:
+            bedingungen.append(col <= kwargs['min_value'] if kwargs.get('strict_min') else col < kwargs['min_value'])
+        if kwargs.get('max_value') is not None:
+            bedingungen.append(col >= kwargs['max_value'] if kwargs.get('strict_max') else col > kwargs['max_value'])
+        return and_(col.isnot(None), or_(*bedingungen)) if bedingungen else false()
+    
+    if expectation_type == 'expect_column_values_to_be_in_set':
+        value_set = kwargs.get('value_set') or []
+        return and_(col.isnot(None), col.not_in(value_set) if value_set else true())
+    
+    raise ValueError(f"Erwartung kann nicht per SQL ausgewertet werden: {expectation_type}")
+
+def _ergebnis_aus_zaehlwerten(expectation: Any, element_count: int, missing_count: int,
+                       unexpected_count: int) -> 'ge.core.ExpectationValidationResult':
+    """
+    Erstellt ein Great-Expectations-Ergebnis aus gezählten Werten (SQL oder Statistiken).
+    """
+    import great_expectations as ge
+    
+    if expectation.expectation_type == 'expect_column_values_to_not_be_null':
+        # Fehlende Werte sind hier die unerwarteten Werte selbst
+        basis = element_count
+        result = {"element_count": element_count}
+    else:
+        basis = element_count - missing_count
+        result = {
+            "element_count": element_count,
+            "missing_count": missing_count,
+            "missing_percent": missing_count / element_count * 100 if element_count else None,
+        }
+    anteil = unexpected_count / basis if basis else 0.0
+    result.update({
+        "unexpected_count": unexpected_count,
+        "unexpected_percent": anteil * 100,
+        "partial_unexpected_list": [],
+    })
+    mostly = expectation.kwargs.get('mostly')
+    success = unexpected_count == 0 if mostly is None else anteil <= 1 - mostly
+    return ge.core.ExpectationValidationResult(
+        success=success, expectation_config=expectation, result=result
+    )
+
+def _pandas_ergebnis(ge_df: Any, expectation: Any) -> 'ge.core.ExpectationValidationResult':
+    """
+    Wertet eine nicht per SQL darstellbare Erwartung mit Great Expectations aus.
+    """
+    import great_expectations as ge
+    
+    kwargs = {k: v for k, v in expectation.kwargs.items() if k != 'result_format'}
+    try:
+        return getattr(ge_df, expectation.expectation_type)(**kwargs)
+    except Exception as e:
+        return ge.core.ExpectationValidationResult(
+            success=False,
+            expectation_config=expectation,
+            exception_info={"raised_exception": True, "exception_message": str(e), "exception_traceback": None}
+        )
+
+def teste_daten_gegen_erwartungen_sql(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                                      suite: 'ge.core.ExpectationSuite',
+                                      limit: Optional[int] = None,
+                                      stichprobe: Optional[Dict[str, Any]] = None) -> 'ge.core.ExpectationSuiteValidationResult':
+    """
+    Testet eine Tabelle gegen eine Erwartungssuite, soweit möglich direkt in der Datenbank.
+    
+    Erwartungen aus PUSHDOWN_ERWARTUNGEN werden in eine einzige Abfrage mit
+    COUNT(*) FILTER (WHERE ...) je Erwartung übersetzt. Nur für die übrigen
+    Erwartungen werden die benötigten Spalten geladen und mit Great Expectations
+    geprüft. Beispiele unerwarteter Werte werden im Pushdown nicht übertragen.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        suite: ExpectationSuite-Objekt
+        limit: Maximale Anzahl der zu berücksichtigenden Zeilen (None für alle)
+        stichprobe: Stichprobe aus stichprobe_definieren (nur PostgreSQL)
+        
+    Returns:
+        ExpectationSuiteValidationResult-Objekt
+    """
+    import great_expectations as ge
+    
+    quelle, typen = _sql_quelle(engine, table_name, limit, stichprobe)
+    
+    # Position in der Suite merken, damit die Ergebnisreihenfolge erhalten bleibt
+    pushdown, fallback = [], []
+    for i, expectation in enumerate(suite.expectations):
+        spalte = expectation.kwargs.get('column')
+        if expectation.expectation_type in PUSHDOWN_ERWARTUNGEN and spalte in typen:
+            pushdown.append((i, expectation))
+        else:
+            fallback.append((i, expectation))
+    
+    ergebnisse = {}
+    if pushdown:
+        spalten = sorted({e.kwargs['column'] for _, e in pushdown})
+        ausdruecke = [func.count().label('rows')]
+        ausdruecke += [func.count().filter(quelle.c[name].is_(None)).label(f"n{j}") for j, name in enumerate(spalten)]
+        ausdruecke += [
+            func.count().filter(_erwartung_als_sql(quelle.c[e.kwargs['column']], e.expectation_type, e.kwargs)).label(f"e{i}")
+            for i, e in pushdown
+        ]
+        with engine.connect() as conn:
+            zeile = conn.execute(select(*ausdruecke).select_from(quelle)).mappings().one()
+        fehlend = {name: zeile[f"n{j}"] for j, name in enumerate(spalten)}
+        for i, e in pushdown:
+            ergebnisse[i] = _ergebnis_aus_zaehlwerten(e, zeile['rows'], fehlend[e.kwargs['column']], zeile[f"e{i}"])
+    
+    if fallback:
+        logger.info(f"{len(fallback)} Erwartungen werden mit Great Expectations ausgewertet.")
+        benoetigt = {e.kwargs.get('column') for _, e in fallback}
+        tablesample = _tablesample_klausel(engine, table_name, stichprobe)
+        if None in benoetigt or not benoetigt <= set(typen):
+            abfrage = _tabellen_abfrage(table_name, limit, tablesample)
+        else:
+            spaltenliste = ", ".join(f'"{name}"' for name in sorted(benoetigt))
+            limit_clause = f" LIMIT {limit}" if limit is not None else ""
+            abfrage = f"SELECT {spaltenliste} FROM {table_name}{tablesample}{limit_clause}"
+        ge_df = ge.from_pandas(query_to_dataframe(engine, abfrage))
+        for i, e in fallback:
+            ergebnisse[i] = _pandas_ergebnis(ge_df, e)
+    
+    meta = _validierungs_meta(suite, batch_kwargs={"table": table_name, "limit": limit, "sample": stichprobe},
+                              backend="sql_pushdown")
+    return _suite_validierungsergebnis([ergebnisse[i] for i in sorted(ergebnisse)], meta)
+
+# ---- Inkrementelle Prüfung von Protokolltabellen ----
+
+# Ablage für Watermarks, Statistikzustände und Erwartungssuiten der inkrementellen Prüfung
+INKREMENT_DIR = REPORT_DIR / "inkrementell"
+
+# Bei ganzzahligen Watermarks werden so viele IDs unterhalb des Watermarks erneut gelesen.
+# Eine Transaktion kann ihre ID vor einer anderen erhalten und trotzdem erst nach ihr
+# festgeschrieben werden; solche Zeilen lägen sonst beim nächsten Lauf schon unter dem Watermark
+WATERMARK_NACHLAUF = 1000
+
+def _watermark_spalte(engine: 'sqlalchemy.engine.Engine', table_name: str) -> str:
+    """
+    Wählt die Watermark-Spalte einer Tabelle: bevorzugt eine Integer-Spalte 'id', sonst 'created_at'.
+    """
+    spalten = {s['name']: s['type'] for s in inspect(engine).get_columns(table_name)}
+    if 'id' in spalten and isinstance(spalten['id'], sa_types.Integer):
+        return 'id'
+    if 'created_at' in spalten:
+        return 'created_at'
+    raise ValueError(f"Tabelle {table_name} hat weder eine Integer-Spalte 'id' noch 'created_at'. "
+                     f"Bitte eine Watermark-Spalte angeben.")
+
+def lade_inkrementellen_zustand(table_name: str, state_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Lädt den gespeicherten Zustand der inkrementellen Prüfung einer Tabelle.
+    
+    Args:
+        table_name: Name der Tabelle
+        state_dir: Verzeichnis der Zustandsdateien (Standard: INKREMENT_DIR)
+        
+    Returns:
+        Zustand mit Watermark, Statistiken und Pfad der Erwartungssuite oder None
+    """
+    pfad = Path(state_dir or INKREMENT_DIR) / f"{table_name}.json"
+    if not pfad.exists():
+        return None
+    with open(pfad, 'r') as f:
+        zustand = json.load(f)
+    zustand["watermark"] = _aus_json_wert(zustand["watermark"])
+    zustand["stats"] = statistiken_deserialisieren(zustand["stats"])
+    return zustand
+
+def speichere_inkrementellen_zustand(zustand: Dict[str, Any], state_dir: Optional[str] = None) -> Path:
+    """
+    Speichert den Zustand der inkrementellen Prüfung einer Tabelle.
+    
+    Args:
+        zustand: Zustand mit table, watermark_column, watermark, suite_file und stats
+        state_dir: Verzeichnis der Zustandsdateien (Standard: INKREMENT_DIR)
+        
+    Returns:
+        Pfad der Zustandsdatei
+    """
+    verzeichnis = Path(state_dir or INKREMENT_DIR)
+    verzeichnis.mkdir(parents=True, exist_ok=True)
+    pfad = verzeichnis / f"{zustand['table']}.json"
+    daten = dict(zustand, watermark=_json_wert(zustand["watermark"]),
+                 stats=statistiken_serialisieren(zustand["stats"]))
+    # Erst vollständig schreiben, dann ersetzen, damit ein Abbruch den alten Zustand nicht zerstört
+    tmp_pfad = pfad.with_suffix('.json.tmp')
+    with open(tmp_pfad, 'w') as f:
+        json.dump(daten, f)
+    tmp_pfad.replace(pfad)
+    return pfad
+
+def pruefe_tabelle_inkrementell(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                                watermark_column: Optional[str] = None,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                state_dir: Optional[str] = None,
+                                seed: int = 0) -> Dict[str, Any]:
+    """
+    Prüft nur die seit dem letzten Lauf hinzugekommenen Zeilen einer Tabelle.
+    
+    Beim ersten Lauf wird die Tabelle einmal vollständig blockweise gelesen, daraus
+    die Erwartungssuite erstellt (für Watermark- und Datumsspalten ohne Obergrenze)
+    und zusammen mit Watermark (Maximum der Watermark-Spalte) und Statistikzustand
+    gespeichert. Folgeläufe lesen nur Zeilen oberhalb des Watermarks,
+    validieren sie gegen die gespeicherte Suite und führen ihre Statistiken mit dem
+    gespeicherten Zustand zusammen. Gedacht für Tabellen, in die nur angehängt wird
+    (z. B. tblactivity_logs, tbllogin_logs); Änderungen an alten Zeilen werden nicht erkannt.
+    
+    Bei einer ganzzahligen Watermark-Spalte werden zusätzlich die letzten
+    WATERMARK_NACHLAUF IDs unterhalb des Watermarks erneut gelesen und nur die
+    dort noch nicht gesehenen Zeilen übernommen, sodass auch verspätet
+    festgeschriebene Zeilen erfasst werden. Bei 'created_at' als Watermark gibt es
+    keinen Nachlauf; Zeilen mit einem älteren Zeitstempel als dem Watermark werden
+    dort übersehen.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        watermark_column: Monoton steigende Spalte (Standard: 'id' bzw. 'created_at')
+        chunk_size: Anzahl der Zeilen pro Block
+        state_dir: Verzeichnis der Zustandsdateien (Standard: INKREMENT_DIR)
+        seed: Startwert für die Stichproben der Statistiken
+        
+    Returns:
+        Dictionary mit Modus, Watermark, Zeilenzahlen, Profilkennzahlen und Validierungsergebnis
+    """
+    zustand = lade_inkrementellen_zustand(table_name, state_dir)
+    # Bereits verarbeitete IDs im Nachlauf unterhalb des Watermarks (None ohne Nachlauf)
+    gesehen = None
+    if zustand is None:
+        watermark_column = watermark_column or _watermark_spalte(engine, table_name)
+        watermark = None
+        query = f"SELECT * FROM {table_name}"
+        params = None
+    else:
+        watermark_column = zustand["watermark_column"]
+        watermark = zustand["watermark"]
+        if zustand.get("watermark_window") is not None:
+            gesehen = np.asarray(zustand["watermark_window"], dtype=np.int64)
+        elif isinstance(watermark, int):
+            # Zustand ohne gespeicherten Nachlauf: vorhandene IDs unter dem Watermark gelten als gesehen
+            with engine.connect() as conn:
+                gesehen = np.asarray(conn.execute(
+                    text(f"SELECT {watermark_column} FROM {table_name} "
+                         f"WHERE {watermark_column} > :von AND {watermark_column} <= :bis"),
+                    {"von": watermark - WATERMARK_NACHLAUF, "bis": watermark}).scalars().all(), dtype=np.int64)
+        query = f"SELECT * FROM {table_name} WHERE {watermark_column} > :watermark"
+        params = {"watermark": watermark - WATERMARK_NACHLAUF if gesehen is not None else watermark}
+    alter_watermark = watermark
+    fenster = gesehen
+    
+    rng = np.random.default_rng(seed)
+    delta = statistiken_initialisieren()
+    
+    def durchlauf(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        # Statistiken und Watermark werden beim Validieren im selben Durchlauf fortgeschrieben
+        nonlocal watermark, fenster
+        for chunk in chunks:
+            if gesehen is not None and not chunk.empty:
+                werte = chunk[watermark_column]
+                chunk = chunk[(werte > alter_watermark) | ~werte.isin(gesehen)]
+            if chunk.empty:
+                continue
+            statistiken_aktualisieren(delta, chunk, rng)
+            werte = chunk[watermark_column]
+            maximum = _python_wert(werte.max())
+            if watermark is None or maximum > watermark:
+                watermark = maximum
+            if pd.api.types.is_integer_dtype(werte):
+                # Nur die IDs innerhalb des Nachlaufs unter dem aktuellen Watermark behalten
+                ids = werte.to_numpy(dtype=np.int64)
+                fenster = ids if fenster is None else np.union1d(fenster, ids)
+                fenster = fenster[fenster > watermark - WATERMARK_NACHLAUF]
+            yield chunk
+    
+    chunks = durchlauf(query_to_chunks(engine, query, chunk_size=chunk_size, params=params))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    verzeichnis = Path(state_dir or INKREMENT_DIR)
+    verzeichnis.mkdir(parents=True, exist_ok=True)
+    validierung = None
+    
+    if zustand is None:
+        for _ in chunks:
+            pass
+        stats = delta
+        suite = erstelle_expectations_suite_aus_statistiken(stats, suite_name=f"{table_name}_inkrementell")
+        # Neue Zeilen überschreiten das bisherige Maximum der Watermark- und Zeitstempelspalten
+        # zwangsläufig; für diese Spalten wird nur die Untergrenze erwartet
+        for expectation in suite.expectations:
+            column = expectation.kwargs.get('column')
+            if (expectation.expectation_type == 'expect_column_values_to_be_between'
+                    and (column == watermark_column or stats["columns"][column]["kind"] == 'datetime')):
+                expectation.kwargs['max_value'] = None
+        suite_file = str(verzeichnis / f"erwartungen_{table_name}.json")
+        speichere_expectations_suite(suite, suite_file)
+    else:
+        suite_file = zustand["suite_file"]
+        suite = lade_expectations_suite(suite_file)
+        try:
+            result = teste_daten_gegen_erwartungen_streaming(chunks, suite)
+        except ValueError:
+            # Keine neuen Zeilen seit dem letzten Lauf
+            if delta["rows"]:
+                raise
+            result = None
+        
+        if result is not None and delta["rows"]:
+            result_path = REPORT_DIR / f"validierung_inkrementell_{table_name}_{timestamp}.json"
+            speichere_validierungsergebnis(result, str(result_path))
+            evaluated = result.statistics['evaluated_expectations']
+            successful = result.statistics['successful_expectations']
+            validierung = {
+                "expectations_file": suite_file,
+                "result_file": str(result_path),
+                "success_rate": successful / evaluated if evaluated else None,
+                "total_expectations": evaluated,
+                "successful_expectations": successful,
+            }
+        stats = statistiken_zusammenfuehren(zustand["stats"], delta, rng)
+    
+    state_file = speichere_inkrementellen_zustand({
+        "table": table_name,
+        "watermark_column": watermark_column,
+        "watermark": watermark,
+        "watermark_window": (None if fenster is None
+                             else [int(i) for i in fenster[fenster > watermark - WATERMARK_NACHLAUF]]),
+        "suite_file": suite_file,
+        "stats": stats,
+        "updated_at": datetime.now().isoformat(),
+    }, state_dir)
+    logger.info(f"Inkrementelle Prüfung von {table_name}: {delta['rows']} neue Zeilen, "
+                f"Watermark {watermark_column} = {watermark}")
+    
+    return {
+        "mode": "initial" if zustand is None else "incremental",
+        "watermark_column": watermark_column,
+        "watermark": _json_wert(watermark),
+        "new_rows": delta["rows"],
+        "total_rows": stats["rows"],
+        "state_file": str(state_file),
+        "profile": profilkennzahlen_aus_statistiken(stats),
+        "validation": validierung,
+    }
+
+# ---- Spalten-Sketches und Drift über Läufe ----
+
+# Verzeichnis der gespeicherten Sketches (ein Unterverzeichnis je Tabelle)
+SKETCH_DIR = REPORT_DIR / "sketches"
+
+# Kompression des t-Digest; ein Digest hat höchstens etwa halb so viele Zentroide
+TDIGEST_KOMPRESSION = 200
+
+# HyperLogLog mit 2^11 Registern (Standardfehler ca. 2,3 %)
+HLL_PRAEZISION = 11
+
+# Anzahl der häufigsten Werte, die je Spalte gezählt werden
+TOPK_GROESSE = 50
+
+# Anzahl der Läufe, die je Tabelle aufbewahrt werden
+SKETCH_HISTORIE = 60
+
+# PSI-Schwellen: unter PSI_LEICHT stabil, ab PSI_DEUTLICH deutliche Verschiebung
+PSI_LEICHT = 0.1
+PSI_DEUTLICH = 0.25
+
+def _tdigest_k(q: np.ndarray, kompression: float) -> np.ndarray:
+    # Skalenfunktion k1: feine Zentroide an den Rändern, grobe in der Mitte
+    return kompression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1)
+
+def _tdigest_verdichten(mittel: np.ndarray, gewichte: np.ndarray,
+                        kompression: float = TDIGEST_KOMPRESSION) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fasst Zentroide so zusammen, dass jeder Zentroid etwa eine Einheit der Skalenfunktion überdeckt.
+    
+    Args:
+        mittel: Mittelwerte der Zentroide (oder einzelne Werte)
+        gewichte: Gewichte der Zentroide
+        kompression: Kompression des Digest
+        
+    Returns:
+        Tuple mit (Mittelwerten, Gewichten) der verdichteten Zentroide, nach Mittelwert sortiert
+    """
+    if len(mittel) == 0:
+        return mittel, gewichte
+    reihenfolge = np.argsort(mittel, kind='stable')
+    mittel, gewichte = mittel[reihenfolge], gewichte[reihenfolge]
+    links = (np.cumsum(gewichte) - gewichte) / gewichte.sum()
+    gruppe = np.floor(_tdigest_k(links, kompression) - _tdigest_k(np.array(0.0), kompression)).astype(np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(gruppe)) + 1])
+    neue_gewichte = np.add.reduceat(gewichte, starts)
+    neue_mittel = np.add.reduceat(mittel * gewichte, starts) / neue_gewichte
+    return neue_mittel, neue_gewichte
+
+def _tdigest_zusammenfuehren(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if a is None or b is None:
+        return a if b is None else b
+    mittel, gewichte = _tdigest_verdichten(np.concatenate([a["means"], b["means"]]),
+                                           np.concatenate([a["weights"], b["weights"]]))
+    return {"means": mittel, "weights": gewichte, "min": min(a["min"], b["min"]), "max": max(a["max"], b["max"])}
+
+def _tdigest_stuetzstellen(digest: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    # Verteilungsfunktion: Minimum, Zentroid-Mitten und Maximum, dazwischen linear
+    gewichte = np.asarray(digest["weights"], dtype=float)
+    mitte = (np.cumsum(gewichte) - gewichte / 2) / gewichte.sum()
+    x = np.concatenate([[digest["min"]], np.asarray(digest["means"], dtype=float), [digest["max"]]])
+    q = np.concatenate([[0.0], mitte, [1.0]])
+    return x, q
+
+def tdigest_cdf(digest: Dict[str, Any], x: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Schätzt die Verteilungsfunktion P(X <= x) aus einem t-Digest.
+    """
+    stuetz_x, stuetz_q = _tdigest_stuetzstellen(digest)
+    return np.interp(x, stuetz_x, stuetz_q)
+
+def tdigest_quantil(digest: Dict[str, Any], q: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Schätzt Quantile aus einem t-Digest.
+    """
+    stuetz_x, stuetz_q = _tdigest_stuetzstellen(digest)
+    return np.interp(q, stuetz_q, stuetz_x)
+
+def _hll_register(hashes: np.ndarray, praezision: int = HLL_PRAEZISION) -> np.ndarray:
+    """
+    Berechnet die HyperLogLog-Register für 64-Bit-Hashwerte.
+    """
+    register = np.zeros(1 << praezision, dtype=np.uint8)
+    if len(hashes) == 0:
+        return register
+    index = (hashes >> np.uint64(64 - praezision)).astype(np.int64)
+    rest = hashes << np.uint64(praezision)
+    # Bitlänge in zwei 32-Bit-Hälften bestimmen, die float64 exakt darstellt
+    hoch = (rest >> np.uint64(32)).astype(np.float64)
+    tief = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    bitlaenge = np.where(hoch > 0, 33 + np.floor(np.log2(np.maximum(hoch, 1))),
+                         np.where(tief > 0, 1 + np.floor(np.log2(np.maximum(tief, 1))), 0))
+    rang = np.minimum(65 - bitlaenge, 65 - praezision).astype(np.uint8)
+    np.maximum.at(register, index, rang)
+    return register
+
+def hll_schaetzen(register: np.ndarray) -> int:
+    """
+    Schätzt die Anzahl unterschiedlicher Werte aus HyperLogLog-Registern.
+    """
+    m = len(register)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    schaetzung = alpha * m * m / np.sum(np.ldexp(1.0, -register.astype(np.int64)))
+    leer = int(np.count_nonzero(register == 0))
+    if schaetzung <= 2.5 * m and leer:
+        # Kleine Mengen: Linear Counting
+        schaetzung = m * np.log(m / leer)
+    return int(round(schaetzung))
+
+def _topk_zusammenfuehren(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if a is None or b is None:
+        return a if b is None else b
+    zaehler = dict(a["items"])
+    for wert, anzahl in b["items"].items():
+        zaehler[wert] = zaehler.get(wert, 0) + anzahl
+    behalten = sorted(zaehler.items(), key=lambda e: e[1], reverse=True)[:TOPK_GROESSE]
+    rest = sum(zaehler.values()) - sum(anzahl for _, anzahl in behalten)
+    return {"items": dict(behalten), "other": a["other"] + b["other"] + rest}
+
+def _sketch_art(series: pd.Series) -> Optional[str]:
+    # Zahlen und Zeitpunkte erhalten einen t-Digest, alle übrigen Spalten (auch bool) Top-k-Häufigkeiten
+    art = _spaltenart(series)
+    if art == 'numeric' and pd.api.types.is_bool_dtype(series.dtype):
+        return 'categorical'
+    if art in ('numeric', 'datetime') or art is None:
+        return art
+    return 'categorical'
+
+def _sketch_hashes(werte: pd.Series, art: str) -> np.ndarray:
+    # Hashwerte unabhängig vom dtype (z. B. nach dtypes_verkleinern) bilden
+    if art in ('numeric', 'datetime'):
+        return pd.util.hash_array(werte.to_numpy(dtype=np.float64))
+    if not isinstance(werte.dtype, (pd.CategoricalDtype, np.dtype)):
+        werte = werte.astype(object)
+    try:
+        return pd.util.hash_pandas_object(werte, index=False).to_numpy()
+    except TypeError:
+        # Nicht hashbare Werte (z. B. JSON-Objekte) über ihre Textdarstellung
+        return pd.util.hash_pandas_object(werte.astype(str), index=False).to_numpy()
+
+def _leerer_sketch() -> Dict[str, Any]:
+    return {"kind": None, "count": 0, "nulls": 0, "tdigest": None,
+            "hll": np.zeros(1 << HLL_PRAEZISION, dtype=np.uint8), "topk": None}
+
+def sketches_initialisieren() -> Dict[str, Any]:
+    """
+    Erstellt einen leeren, blockweise fortschreibbaren Sketch-Zustand.
+    
+    Returns:
+        Dictionary mit Zeilenanzahl und Sketches je Spalte
+    """
+    return {"rows": 0, "columns": {}}
+
+def sketches_aktualisieren(sketches: Dict[str, Any], chunk: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Schreibt die Sketches mit einem weiteren Datenblock fort.
+    
+    Je Spalte werden fehlende Werte gezählt, die Anzahl unterschiedlicher Werte
+    mit HyperLogLog geschätzt und die Verteilung als t-Digest (Zahlen, Zeitpunkte
+    in Sekunden) bzw. als Häufigkeiten der TOPK_GROESSE häufigsten Werte erfasst.
+    Alle Teile lassen sich ohne die ursprünglichen Zeilen zusammenführen.
+    
+    Args:
+        sketches: Zustand aus sketches_initialisieren
+        chunk: Nächster Datenblock
+        
+    Returns:
+        Der fortgeschriebene Sketch-Zustand
+    """
+    sketches["rows"] += len(chunk)
+    for column in chunk.columns:
+        series = chunk[column]
+        sketch = sketches["columns"].setdefault(column, _leerer_sketch())
+        if sketch["kind"] is None:
+            sketch["kind"] = _sketch_art(series)
+        
+        nicht_null = series.dropna()
+        sketch["nulls"] += len(series) - len(nicht_null)
+        sketch["count"] += len(nicht_null)
+        if nicht_null.empty:
+            continue
+        
+        if sketch["kind"] in ('numeric', 'datetime'):
+            if sketch["kind"] == 'datetime':
+                zeitpunkte = pd.to_datetime(nicht_null, utc=True)
+                nicht_null = (zeitpunkte - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)
+            werte = nicht_null.to_numpy(dtype=np.float64)
+            mittel, gewichte = _tdigest_verdichten(werte, np.ones(len(werte)))
+            sketch["tdigest"] = _tdigest_zusammenfuehren(
+                sketch["tdigest"],
+                {"means": mittel, "weights": gewichte, "min": float(werte.min()), "max": float(werte.max())}
+            )
+        else:
+            try:
+                haeufigkeiten = nicht_null.value_counts()
+            except TypeError:
+                haeufigkeiten = nicht_null.astype(str).value_counts()
+            oben = haeufigkeiten.iloc[:TOPK_GROESSE]
+            sketch["topk"] = _topk_zusammenfuehren(
+                sketch["topk"],
+                {"items": {str(k): int(v) for k, v in oben.items()}, "other": int(haeufigkeiten.iloc[TOPK_GROESSE:].sum())}
+            )
+        
+        sketch["hll"] = np.maximum(sketch["hll"], _hll_register(_sketch_hashes(nicht_null, sketch["kind"])))
+    return sketches
+
+def sketches_berechnen(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Berechnet die Sketches aller Spalten eines DataFrames.
+    
+    Args:
+        df: DataFrame mit den Daten
+        
+    Returns:
+        Sketch-Zustand (siehe sketches_aktualisieren)
+    """
+    return sketches_aktualisieren(sketches_initialisieren(), df)
+
+def sketches_zusammenfuehren(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Führt zwei Sketch-Zustände über disjunkte Datenbestände zusammen.
+    
+    Args:
+        a: Erster Sketch-Zustand
+        b: Zweiter Sketch-Zustand
+        
+    Returns:
+        Neuer, zusammengeführter Sketch-Zustand
+    """
+    ergebnis = {"rows": a["rows"] + b["rows"], "columns": {}}
+    for column in list(a["columns"]) + [c for c in b["columns"] if c not in a["columns"]]:
+        sa = a["columns"].get(column, _leerer_sketch())
+        sb = b["columns"].get(column, _leerer_sketch())
+        ergebnis["columns"][column] = {
+            "kind": sa["kind"] or sb["kind"],
+            "count": sa["count"] + sb["count"],
+            # Spalten, die in einem Bestand fehlen, gelten dort als vollständig NULL
+            "nulls": (sa["nulls"] if column in a["columns"] else a["rows"])
+                     + (sb["nulls"] if column in b["columns"] else b["rows"]),
+            "tdigest": _tdigest_zusammenfuehren(sa["tdigest"], sb["tdigest"]),
+            "hll": np.maximum(sa["hll"], sb["hll"]),
+            "topk": _topk_zusammenfuehren(sa["topk"], sb["topk"]),
+        }
+    return ergebnis
+
+def sketches_serialisieren(sketches: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Wandelt einen Sketch-Zustand in eine kompakte JSON-fähige Darstellung um
+    (HyperLogLog-Register komprimiert und Base64-kodiert).
+    """
+    import base64
+    import zlib
+    columns = {}
+    for column, sketch in sketches["columns"].items():
+        eintrag = dict(sketch, hll=base64.b64encode(zlib.compress(sketch["hll"].tobytes())).decode('ascii'))
+        if sketch["tdigest"] is not None:
+            gewichte = sketch["tdigest"]["weights"]
+            eintrag["tdigest"] = dict(sketch["tdigest"], means=sketch["tdigest"]["means"].tolist(),
+                                      weights=[int(g) if float(g).is_integer() else float(g) for g in gewichte])
+        columns[column] = eintrag
+    return {"rows": sketches["rows"], "columns": columns}
+
+def sketches_deserialisieren(daten: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Stellt einen Sketch-Zustand aus seiner JSON-Darstellung wieder her.
+    """
+    import base64
+    import zlib
+    columns = {}
+    for column, eintrag in daten["columns"].items():
+        sketch = dict(eintrag, hll=np.frombuffer(zlib.decompress(base64.b64decode(eintrag["hll"])), dtype=np.uint8).copy())
+        if eintrag["tdigest"] is not None:
+            sketch["tdigest"] = dict(eintrag["tdigest"], means=np.asarray(eintrag["tdigest"]["means"], dtype=float),
+                                     weights=np.asarray(eintrag["tdigest"]["weights"], dtype=float))
+        columns[column] = sketch
+    return {"rows": daten["rows"], "columns": columns}
+
+def sketches_speichern(table_name: str, sketches: Dict[str, Any], sketch_dir: Optional[str] = None,
+                       historie: int = SKETCH_HISTORIE) -> Path:
+    """
+    Speichert die Sketches eines Laufs und entfernt Läufe über die Historienlänge hinaus.
+    
+    Args:
+        table_name: Name der Tabelle
+        sketches: Sketch-Zustand
+        sketch_dir: Verzeichnis der Sketches (Standard: SKETCH_DIR)
+        historie: Anzahl der aufbewahrten Läufe je Tabelle
+        
+    Returns:
+        Pfad der Sketch-Datei
+    """
+    verzeichnis = Path(sketch_dir or SKETCH_DIR) / table_name
+    verzeichnis.mkdir(parents=True, exist_ok=True)
+    erstellt = datetime.now()
+    pfad = verzeichnis / f"sketch_{erstellt.strftime('%Y%m%d_%H%M%S_%f')}.json"
+    tmp_pfad = pfad.with_suffix('.json.tmp')
+    with open(tmp_pfad, 'w') as f:
+        json.dump(dict(sketches_serialisieren(sketches), table=table_name, created=erstellt.isoformat()), f)
+    tmp_pfad.replace(pfad)
+    
+    for alt in sorted(verzeichnis.glob("sketch_*.json"))[:-historie]:
+        alt.unlink()
+    return pfad
+
+def sketches_laden(table_name: str, anzahl: Optional[int] = None,
+                   sketch_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Lädt die gespeicherten Sketches früherer Läufe einer Tabelle.
+    
+    Args:
+        table_name: Name der Tabelle
+        anzahl: Nur die letzten anzahl Läufe (None für alle)
+        sketch_dir: Verzeichnis der Sketches (Standard: SKETCH_DIR)
+        
+    Returns:
+        Liste der Sketch-Zustände (älteste zuerst) mit Zeitpunkt unter "created"
+    """
+    dateien = sorted((Path(sketch_dir or SKETCH_DIR) / table_name).glob("sketch_*.json"))
+    if anzahl is not None:
+        dateien = dateien[-anzahl:] if anzahl > 0 else []
+    laeufe = []
+    for datei in dateien:
+        with open(datei, 'r') as f:
+            daten = json.load(f)
+        laeufe.append(dict(sketches_deserialisieren(daten), created=daten["created"]))
+    return laeufe
+
+def _psi(p: np.ndarray, q: np.ndarray, epsilon: float = 1e-4) -> float:
+    # Population Stability Index zweier Anteilsverteilungen über dieselben Klassen
+    p = np.maximum(np.asarray(p, dtype=float), epsilon)
+    q = np.maximum(np.asarray(q, dtype=float), epsilon)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+def _drift_status(psi: Optional[float]) -> str:
+    if psi is None:
+        return "unbekannt"
+    if psi >= PSI_DEUTLICH:
+        return "deutlich"
+    if psi >= PSI_LEICHT:
+        return "leicht"
+    return "stabil"
+
+def drift_berechnen(aktuell: Dict[str, Any], referenz: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Vergleicht zwei Sketch-Zustände Spalte für Spalte.
+    
+    - Zahlen und Zeitpunkte: Kolmogorow-Smirnow-Abstand der t-Digest-Verteilungen
+      und PSI über die Dezile der Referenz, dazu der Median beider Läufe
+    - übrige Spalten: PSI über die häufigsten Werte (Rest als eigene Klasse)
+      und neu aufgetretene Werte
+    - alle Spalten: Anteil fehlender Werte und geschätzte Anzahl unterschiedlicher Werte
+    
+    Args:
+        aktuell: Sketches des aktuellen Laufs
+        referenz: Sketches der Referenz (früherer Lauf oder zusammengeführte Läufe)
+        
+    Returns:
+        Dictionary mit Zeilenanzahl beider Läufe und Ergebnissen je Spalte
+        (psi, ks, status 'stabil', 'leicht', 'deutlich' oder 'unbekannt')
+    """
+    ergebnis = {
+        "rows": aktuell["rows"],
+        "reference_rows": referenz["rows"],
+        "rows_change": (aktuell["rows"] - referenz["rows"]) / referenz["rows"] if referenz["rows"] else None,
+        "columns": {},
+    }
+    for column, sa in aktuell["columns"].items():
+        sr = referenz["columns"].get(column)
+        if sr is None:
+            ergebnis["columns"][column] = {"status": "neu"}
+            continue
+        
+        gesamt_a, gesamt_r = sa["count"] + sa["nulls"], sr["count"] + sr["nulls"]
+        spalte = {
+            "null_rate": sa["nulls"] / gesamt_a if gesamt_a else None,
+            "reference_null_rate": sr["nulls"] / gesamt_r if gesamt_r else None,
+            "distinct": hll_schaetzen(sa["hll"]),
+            "reference_distinct": hll_schaetzen(sr["hll"]),
+            "psi": None,
+            "ks": None,
+        }
+        
+        if sa["tdigest"] is not None and sr["tdigest"] is not None:
+            stellen = np.concatenate([_tdigest_stuetzstellen(sa["tdigest"])[0], _tdigest_stuetzstellen(sr["tdigest"])[0]])
+            spalte["ks"] = float(np.max(np.abs(tdigest_cdf(sa["tdigest"], stellen) - tdigest_cdf(sr["tdigest"], stellen))))
+            kanten = np.unique(tdigest_quantil(sr["tdigest"], np.linspace(0.1, 0.9, 9)))
+            anteile_r = np.diff(np.concatenate([[0.0], tdigest_cdf(sr["tdigest"], kanten), [1.0]]))
+            anteile_a = np.diff(np.concatenate([[0.0], tdigest_cdf(sa["tdigest"], kanten), [1.0]]))
+            spalte["psi"] = _psi(anteile_r, anteile_a)
+            spalte["median"] = float(tdigest_quantil(sa["tdigest"], 0.5))
+            spalte["reference_median"] = float(tdigest_quantil(sr["tdigest"], 0.5))
+        elif sa["topk"] is not None and sr["topk"] is not None and sa["count"] and sr["count"]:
+            klassen = sorted(set(sa["topk"]["items"]) | set(sr["topk"]["items"]))
+            anteile_a = [sa["topk"]["items"].get(k, 0) / sa["count"] for k in klassen]
+            anteile_r = [sr["topk"]["items"].get(k, 0) / sr["count"] for k in klassen]
+            # Werte außerhalb der gezählten Top-k bilden eine gemeinsame Restklasse
+            anteile_a.append(max(1.0 - sum(anteile_a), 0.0))
+            anteile_r.append(max(1.0 - sum(anteile_r), 0.0))
+            spalte["psi"] = _psi(anteile_r, anteile_a)
+            if not sr["topk"]["other"]:
+                spalte["new_values"] = [k for k in sa["topk"]["items"] if k not in sr["topk"]["items"]]
+        
+        spalte["status"] = _drift_status(spalte["psi"])
+        ergebnis["columns"][column] = spalte
+    return ergebnis
+
+def drift_gegen_historie(table_name: str, sketches: Dict[str, Any], referenz_laeufe: int = 1,
+                         sketch_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Vergleicht die Sketches eines Laufs mit den gespeicherten Sketches früherer Läufe.
+    
+    Mehrere Referenzläufe werden zu einer Referenzverteilung zusammengeführt; als
+    Zeilenanzahl der Referenz gilt deren Mittelwert.
+    
+    Args:
+        table_name: Name der Tabelle
+        sketches: Sketches des aktuellen Laufs
+        referenz_laeufe: Anzahl der letzten gespeicherten Läufe als Referenz
+        sketch_dir: Verzeichnis der Sketches (Standard: SKETCH_DIR)
+        
+    Returns:
+        Ergebnis von drift_berechnen mit den Zeitpunkten der Referenzläufe unter
+        "reference_runs" oder None, wenn noch kein früherer Lauf gespeichert ist
+    """
+    laeufe = sketches_laden(table_name, anzahl=referenz_laeufe, sketch_dir=sketch_dir)
+    if not laeufe:
+        return None
+    referenz = laeufe[0]
+    for lauf in laeufe[1:]:
+        referenz = sketches_zusammenfuehren(referenz, lauf)
+    referenz["rows"] = round(referenz["rows"] / len(laeufe))
+    drift = drift_berechnen(sketches, referenz)
+    drift["reference_runs"] = [lauf["created"] for lauf in laeufe]
+    return drift
+
+# ---- Ergebnis-Cache für unveränderte Tabellen ----
+
+# Ablage der Cache-Einträge (eine Datei je Tabelle, ein Eintrag je Konfiguration)
+CACHE_DIR = REPORT_DIR / "cache"
+
+# Einträge und Berichtsdateien, die älter sind, werden bei cache_bereinigen entfernt
+CACHE_TTL_TAGE = 7
+
+# Höchstgröße der Berichtsdateien in REPORT_DIR in MB
+CACHE_MAX_MB = 500
+
+# Zusammenfassungen der Läufe (run_quality_check.py); die neuesten bleiben unabhängig
+# von Alter und Größe erhalten, da die Zeitplanung (dq_zeitplan) ihre Laufzeiten liest
+ZUSAMMENFASSUNG_MUSTER = "qualitaetspruefung_zusammenfassung_*.json"
+ZUSAMMENFASSUNGEN_BEHALTEN = 30
+
+def tabellen_fingerabdruck(engine: 'sqlalchemy.engine.Engine', table_name: str) -> Dict[str, Any]:
+    """
+    Ermittelt einen günstigen Fingerabdruck des Tabelleninhalts.
+    
+    Enthalten sind die Maxima von 'id' und 'updated_at' (falls vorhanden) und unter
+    PostgreSQL die Zähler n_live_tup, n_tup_ins, n_tup_upd und n_tup_del aus
+    pg_stat_user_tables, die jede Änderung erfassen. Andere Datenbanken liefern
+    stattdessen die exakte Zeilenzahl.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        
+    Returns:
+        JSON-serialisierbares Dictionary; ungleiche Fingerabdrücke bedeuten geänderte Daten
+    """
+    spalten = [s['name'] for s in inspect(engine).get_columns(table_name)]
+    quelle = sa_table(table_name, *[sa_column(name) for name in spalten])
+    ist_postgres = engine.dialect.name == 'postgresql'
+    
+    ausdruecke = [] if ist_postgres else [func.count().label('rows')]
+    ausdruecke += [func.max(quelle.c[name]).label(f"max_{name}") for name in ('id', 'updated_at') if name in spalten]
+    
+    fingerabdruck = {}
+    with engine.connect() as conn:
+        if ausdruecke:
+            fingerabdruck.update(conn.execute(select(*ausdruecke).select_from(quelle)).mappings().one())
+        if ist_postgres:
+            zaehler = conn.execute(
+                text("SELECT n_live_tup, n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_user_tables "
+                     "WHERE relid = to_regclass(:tabelle)"),
+                {"tabelle": table_name}
+            ).mappings().one_or_none()
+            if zaehler is None:
+                # Ohne Statistik bleibt nur die exakte Zeilenzahl
+                fingerabdruck['rows'] = conn.execute(select(func.count()).select_from(quelle)).scalar()
+            else:
+                fingerabdruck.update(zaehler)
+    return {name: _json_wert(_python_wert(wert)) for name, wert in fingerabdruck.items()}
+
+def cache_schluessel(**optionen: Any) -> str:
+    """
+    Bildet den Schlüssel eines Cache-Eintrags aus den Optionen, die das Ergebnis beeinflussen.
+    """
+    return hashlib.sha256(json.dumps(optionen, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+def _cache_datei(table_name: str, cache_dir: Optional[str] = None) -> Path:
+    return Path(cache_dir or CACHE_DIR) / f"{table_name}.json"
+
+def _cache_lesen(pfad: Path) -> Dict[str, Any]:
+    if not pfad.exists():
+        return {}
+    try:
+        with open(pfad, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cache-Datei {pfad} wird ignoriert: {e}")
+        return {}
+
+def _cache_schreiben(pfad: Path, eintraege: Dict[str, Any]) -> None:
+    pfad.parent.mkdir(parents=True, exist_ok=True)
+    if not eintraege:
+        pfad.unlink(missing_ok=True)
+        return
+    tmp_pfad = pfad.with_suffix('.json.tmp')
+    with open(tmp_pfad, 'w') as f:
+        json.dump(eintraege, f, indent=2)
+    tmp_pfad.replace(pfad)
+
+def _cache_eintrag_gueltig(eintrag: Dict[str, Any], ttl_tage: float) -> bool:
+    alter = datetime.now() - datetime.fromisoformat(eintrag["created"])
+    return alter.total_seconds() <= ttl_tage * 86400 and all(Path(d).exists() for d in eintrag["files"])
+
+def cache_laden(table_name: str, fingerabdruck: Dict[str, Any], schluessel: str,
+                ttl_tage: float = CACHE_TTL_TAGE, cache_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sucht ein früheres Ergebnis für eine unveränderte Tabelle.
+    
+    Args:
+        table_name: Name der Tabelle
+        fingerabdruck: Aktueller Fingerabdruck aus tabellen_fingerabdruck
+        schluessel: Schlüssel der Konfiguration aus cache_schluessel
+        ttl_tage: Höchstalter des Eintrags in Tagen
+        cache_dir: Verzeichnis der Cache-Dateien (Standard: CACHE_DIR)
+        
+    Returns:
+        Eintrag mit "created", "fingerprint", "result" und "files" oder None, wenn der
+        Fingerabdruck abweicht, der Eintrag abgelaufen ist oder Dateien fehlen
+    """
+    eintrag = _cache_lesen(_cache_datei(table_name, cache_dir)).get(schluessel)
+    if eintrag is None or eintrag["fingerprint"] != fingerabdruck:
+        return None
+    if not _cache_eintrag_gueltig(eintrag, ttl_tage):
+        return None
+    return eintrag
+
+def cache_speichern(table_name: str, fingerabdruck: Dict[str, Any], schluessel: str,
+                    ergebnis: Dict[str, Any], dateien: List[str], cache_dir: Optional[str] = None) -> None:
+    """
+    Speichert das Ergebnis einer Tabellenprüfung für spätere Läufe.
+    
+    Args:
+        table_name: Name der Tabelle
+        fingerabdruck: Fingerabdruck zu Beginn der Prüfung
+        schluessel: Schlüssel der Konfiguration aus cache_schluessel
+        ergebnis: JSON-serialisierbares Ergebnis
+        dateien: Berichtsdateien, auf die das Ergebnis verweist
+        cache_dir: Verzeichnis der Cache-Dateien (Standard: CACHE_DIR)
+    """
+    pfad = _cache_datei(table_name, cache_dir)
+    eintraege = _cache_lesen(pfad)
+    eintraege[schluessel] = {
+        "created": datetime.now().isoformat(),
+        "fingerprint": fingerabdruck,
+        "result": ergebnis,
+        "files": [str(d) for d in dateien],
+    }
+    _cache_schreiben(pfad, eintraege)
+
+def cache_bereinigen(ttl_tage: float = CACHE_TTL_TAGE, max_mb: float = CACHE_MAX_MB,
+                     report_dir: Optional[str] = None, cache_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Entfernt abgelaufene Cache-Einträge und begrenzt Alter und Größe der Berichtsdateien.
+    
+    Berichtsdateien direkt in report_dir, die älter als ttl_tage sind und von keinem
+    gültigen Eintrag verwendet werden, werden gelöscht. Ist das Verzeichnis danach
+    noch größer als max_mb, werden die ältesten Dateien gelöscht, zuerst die nicht
+    mehr verwendeten; Einträge, deren Dateien dabei wegfallen, werden entfernt.
+    Die neuesten ZUSAMMENFASSUNGEN_BEHALTEN Zusammenfassungen und Unterverzeichnisse
+    (z. B. der Zustand der inkrementellen Prüfung) bleiben unberührt.
+    
+    Args:
+        ttl_tage: Höchstalter von Einträgen und Dateien in Tagen
+        max_mb: Höchstgröße der Berichtsdateien in MB
+        report_dir: Berichtsverzeichnis (Standard: REPORT_DIR)
+        cache_dir: Verzeichnis der Cache-Dateien (Standard: CACHE_DIR)
+        
+    Returns:
+        Dictionary mit "removed_files", "removed_entries" und "bytes" (verbleibende Größe)
+    """
+    report_dir = Path(report_dir or REPORT_DIR)
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    entfernt_eintraege = 0
+    
+    # Abgelaufene Einträge entfernen und verwendete Dateien sammeln
+    caches = {}
+    for pfad in cache_dir.glob('*.json') if cache_dir.exists() else []:
+        eintraege = _cache_lesen(pfad)
+        gueltig = {k: e for k, e in eintraege.items() if _cache_eintrag_gueltig(e, ttl_tage)}
+        entfernt_eintraege += len(eintraege) - len(gueltig)
+        caches[pfad] = gueltig
+    verwendet = {str(Path(d).resolve()) for e in caches.values() for eintrag in e.values() for d in eintrag["files"]}
+    
+    grenze = datetime.now().timestamp() - ttl_tage * 86400
+    dateien = [d for d in report_dir.iterdir() if d.is_file()] if report_dir.exists() else []
+    # Dateinamen enthalten den Zeitstempel, die Sortierung entspricht dem Alter
+    behalten = set(sorted(report_dir.glob(ZUSAMMENFASSUNG_MUSTER))[-ZUSAMMENFASSUNGEN_BEHALTEN:]) \
+        if report_dir.exists() else set()
+    entfernt = set()
+    for d in dateien:
+        if d in behalten:
+            continue
+        if str(d.resolve()) not in verwendet and d.stat().st_mtime < grenze:
+            d.unlink(missing_ok=True)
+            entfernt.add(d)
+    dateien = [d for d in dateien if d not in entfernt]
+    
+    groesse = sum(d.stat().st_size for d in dateien)
+    if groesse > max_mb * 1024 * 1024:
+        # Nicht verwendete Dateien zuerst, jeweils die ältesten
+        kandidaten = [d for d in dateien if d not in behalten]
+        for d in sorted(kandidaten, key=lambda d: (str(d.resolve()) in verwendet, d.stat().st_mtime)):
+            if groesse <= max_mb * 1024 * 1024:
+                break
+            groesse -= d.stat().st_size
+            d.unlink(missing_ok=True)
+            entfernt.add(d)
+    
+    # Einträge, deren Dateien gelöscht wurden, sind nicht mehr gültig
+    for pfad, eintraege in caches.items():
+        gueltig = {k: e for k, e in eintraege.items() if all(Path(d).exists() for d in e["files"])}
+        entfernt_eintraege += len(eintraege) - len(gueltig)
+        _cache_schreiben(pfad, gueltig)
+    
+    if entfernt or entfernt_eintraege:
+        logger.info(f"Cache bereinigt: {len(entfernt)} Dateien und {entfernt_eintraege} Einträge entfernt.")
+    return {"removed_files": len(entfernt), "removed_entries": entfernt_eintraege, "bytes": groesse}
+
+# ---- Lokale Snapshots geladener Tabellen ----
+
+# Ablage der Snapshots im Arrow-IPC-Format (unkomprimiert, damit sie per
+# Memory-Mapping ohne Kopie gelesen werden können) mit Metadaten je Tabelle
+SNAPSHOT_DIR = REPORT_DIR / "snapshots"
+
+def _pyarrow() -> Any:
+    """
+    Importiert pyarrow bei Bedarf; ohne pyarrow sind Snapshots deaktiviert.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:
+        logger.warning("pyarrow ist nicht installiert, Snapshots sind deaktiviert.")
+        return None
+    return pa
+
+def _snapshot_pfade(table_name: str, limit: Optional[int], snapshot_dir: Optional[str]) -> Tuple[Path, Path]:
+    name = table_name if limit is None else f"{table_name}_limit{limit}"
+    verzeichnis = Path(snapshot_dir or SNAPSHOT_DIR)
+    return verzeichnis / f"{name}.arrow", verzeichnis / f"{name}.json"
+
+def snapshot_schreiben(df: pd.DataFrame, table_name: str, fingerabdruck: Dict[str, Any],
+                       limit: Optional[int] = None, snapshot_dir: Optional[str] = None) -> Optional[Path]:
+    """
+    Schreibt eine geladene Tabelle als Arrow-Datei in das Snapshot-Verzeichnis.
+    
+    Args:
+        df: Geladene Tabelle
+        table_name: Name der Tabelle
+        fingerabdruck: Fingerabdruck der Tabelle beim Laden (siehe tabellen_fingerabdruck)
+        limit: LIMIT, mit dem die Tabelle geladen wurde
+        snapshot_dir: Verzeichnis der Snapshots (Standard: SNAPSHOT_DIR)
+        
+    Returns:
+        Pfad der Arrow-Datei oder None, wenn kein Snapshot geschrieben werden konnte
+    """
+    pa = _pyarrow()
+    if pa is None:
+        return None
+    daten_pfad, meta_pfad = _snapshot_pfade(table_name, limit, snapshot_dir)
+    daten_pfad.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        tabelle = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        # z. B. Spalten mit gemischten Python-Typen
+        logger.warning(f"Snapshot für {table_name} nicht möglich: {e}")
+        return None
+    
+    tmp_pfad = daten_pfad.with_suffix('.arrow.tmp')
+    with pa.OSFile(str(tmp_pfad), 'wb') as sink:
+        with pa.ipc.new_file(sink, tabelle.schema) as writer:
+            writer.write_table(tabelle)
+    tmp_pfad.replace(daten_pfad)
+    
+    tmp_pfad = meta_pfad.with_suffix('.json.tmp')
+    with open(tmp_pfad, 'w') as f:
+        json.dump({"table": table_name, "limit": limit, "fingerprint": fingerabdruck,
+                   "created": datetime.now().isoformat(), "rows": len(df)}, f, indent=2)
+    tmp_pfad.replace(meta_pfad)
+    logger.info(f"Snapshot für {table_name} gespeichert: {daten_pfad}")
+    return daten_pfad
+
+def snapshot_lesen(table_name: str, fingerabdruck: Dict[str, Any], limit: Optional[int] = None,
+                   columns: Optional[List[str]] = None,
+                   snapshot_dir: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Liest einen Snapshot per Memory-Mapping, wenn er zum Fingerabdruck passt.
+    
+    Nur die angeforderten Spalten werden in einen DataFrame umgewandelt.
+    
+    Args:
+        table_name: Name der Tabelle
+        fingerabdruck: Aktueller Fingerabdruck der Tabelle
+        limit: LIMIT, mit dem die Tabelle geladen wurde
+        columns: Zu lesende Spalten (None für alle); nicht vorhandene Spalten werden übergangen
+        snapshot_dir: Verzeichnis der Snapshots (Standard: SNAPSHOT_DIR)
+        
+    Returns:
+        DataFrame oder None, wenn kein passender Snapshot vorliegt
+    """
+    daten_pfad, meta_pfad = _snapshot_pfade(table_name, limit, snapshot_dir)
+    if not (daten_pfad.exists() and meta_pfad.exists()):
+        return None
+    with open(meta_pfad, 'r') as f:
+        meta = json.load(f)
+    if meta["fingerprint"] != fingerabdruck:
+        return None
+    pa = _pyarrow()
+    if pa is None:
+        return None
+    
+    with pa.memory_map(str(daten_pfad), 'r') as quelle:
+        tabelle = pa.ipc.open_file(quelle).read_all()
+        if columns is not None:
+            tabelle = tabelle.select([c for c in columns if c in tabelle.column_names])
+        df = tabelle.to_pandas()
+    logger.info(f"Snapshot für {table_name} vom {meta['created']} verwendet ({len(df)} Zeilen).")
+    return df
+
+def table_to_dataframe_snapshot(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                                limit: Optional[int] = None, columns: Optional[List[str]] = None,
+                                snapshot_dir: Optional[str] = None, loader: str = 'sql',
+                                kompakt: bool = False) -> pd.DataFrame:
+    """
+    Lädt eine Tabelle aus dem lokalen Snapshot oder, wenn sie sich geändert hat, aus der Datenbank.
+    
+    Ob der Snapshot noch gilt, entscheidet der Fingerabdruck der Tabelle
+    (siehe tabellen_fingerabdruck). Nach dem Laden aus der Datenbank wird der
+    Snapshot für spätere Aufrufe neu geschrieben. Der Snapshot enthält immer
+    alle Spalten mit den ursprünglichen dtypes.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        limit: Maximale Anzahl der zu ladenden Zeilen (None für alle)
+        columns: Benötigte Spalten (None für alle)
+        snapshot_dir: Verzeichnis der Snapshots (Standard: SNAPSHOT_DIR)
+        loader: Ladeverfahren, falls der Snapshot neu erstellt werden muss
+        kompakt: Wenn True, werden die dtypes mit dtypes_verkleinern verkleinert
+            (Speicherbericht in df.attrs["memory"])
+        
+    Returns:
+        DataFrame mit dem Inhalt der Tabelle
+    """
+    fingerabdruck = tabellen_fingerabdruck(engine, table_name)
+    df = snapshot_lesen(table_name, fingerabdruck, limit, columns, snapshot_dir)
+    if df is None:
+        df = table_to_dataframe(engine, table_name, limit=limit, loader=loader)
+        snapshot_schreiben(df, table_name, fingerabdruck, limit, snapshot_dir)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+    if kompakt:
+        df = _kompakt(df, table_name)
+    return df
+
+# ---- Ausreißererkennung ----
+
+def identifiziere_ausreisser(df: pd.DataFrame, spalte: str, methode: str = 'iqr', 
+                           faktor: float = 1.5,
+                           stats: Optional[Dict[str, Any]] = None) -> Tuple[pd.Series, Dict[str, float], Any]:
+    """
+    Identifiziert Ausreißer in einer Spalte eines DataFrames.
+    
+    Für viele Spalten ohne Grafik ist identifiziere_ausreisser_batch deutlich schneller.
+    
+    Args:
+        df: DataFrame mit den Daten
+        spalte: Name der zu analysierenden Spalte
+        methode: Methode zur Ausreißererkennung ('iqr' oder 'zscore')
+        faktor: Faktor für die IQR-Methode (Standard: 1.5)
+        stats: Bereits berechnete Statistiken aus spaltenstatistiken_berechnen;
+            Quartile bzw. Mittelwert und Standardabweichung werden dann übernommen
+        
+    Returns:
+        Tuple mit (Ausreißer-Serie, Grenzen, Visualisierung)
+    """
+    if not pd.api.types.is_numeric_dtype(df[spalte].dtype):
+        raise ValueError(f"Spalte {spalte} muss numerisch sein.")
+    
+    # Fehlende Werte entfernen
+    data = _in_float64(df[spalte].dropna())
+    
+    if methode.lower() == 'iqr':
+        # IQR-Methode
+        if stats is not None:
+            grenzen = ausreissergrenzen_aus_statistiken(stats["columns"][spalte], 'iqr', faktor)
+        else:
+            Q1 = data.quantile(0.25)
+            Q3 = data.quantile(0.75)
+            IQR = Q3 - Q1
+            
+            lower_bound = Q1 - faktor * IQR
+            upper_bound = Q3 + faktor * IQR
+            grenzen = {'lower': lower_bound, 'upper': upper_bound, 'Q1': Q1, 'Q3': Q3, 'IQR': IQR}
+        
+        ausreisser = df[(df[spalte] < grenzen['lower']) | (df[spalte] > grenzen['upper'])][spalte]
+        
+    elif methode.lower() == 'zscore':
+        # Z-Score-Methode
+        if stats is not None:
+            grenzen = ausreissergrenzen_aus_statistiken(stats["columns"][spalte], 'zscore', faktor)
+        else:
+            grenzen = {'mean': data.mean(), 'std': data.std(), 'threshold': faktor}
+        
+        z_scores = abs((data - grenzen['mean']) / grenzen['std'])
         ausreisser = df[z_scores > faktor][spalte]
-        grenzen = {'mean': mean, 'std': std, 'threshold': faktor}
         
-        # Histogramm mit Z-Scores erstellen
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.hist(z_scores, bins=30)
+    else:
+        raise ValueError(f"Unbekannte Methode: {methode}. Unterstützte Methoden: 'iqr', 'zscore'")
+    
+    fig = ausreissergrafik_erstellen(data, spalte, grenzen, methode, faktor)
+    return ausreisser, grenzen, fig
+
+def ausreissergrafik_erstellen(data: pd.Series, spalte: str, grenzen: Dict[str, float],
+                               methode: str = 'iqr', faktor: float = 1.5) -> Any:
+    """
+    Erstellt die Grafik zur Ausreißeranalyse einer Spalte.
+    
+    Die Figure wird ohne pyplot erstellt und muss nicht geschlossen werden.
+    Für viele Grafiken ist grafiken_rendern vorzuziehen.
+    
+    Args:
+        data: Werte der Spalte ohne fehlende Werte
+        spalte: Name der Spalte
+        grenzen: Grenzen aus identifiziere_ausreisser bzw. identifiziere_ausreisser_batch
+        methode: Methode zur Ausreißererkennung ('iqr' oder 'zscore')
+        faktor: Faktor für die IQR-Methode bzw. Z-Score-Schwellenwert
+        
+    Returns:
+        matplotlib-Figure (Boxplot bzw. Histogramm der Z-Scores)
+    """
+    return grafik_aus_grafikdaten(grafikdaten_berechnen(data, spalte, grenzen, methode, faktor))
+
+def identifiziere_ausreisser_batch(df: pd.DataFrame, spalten: Optional[List[str]] = None,
+                                   methode: str = 'iqr', faktor: float = 1.5,
+                                   stats: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Identifiziert Ausreißer in mehreren numerischen Spalten gleichzeitig.
+    
+    Die Grenzen aller Spalten werden mit einem Aufruf von DataFrame.quantile bzw.
+    mean/std berechnet (oder aus stats übernommen), die Ausreißer mit einer
+    NumPy-Maske über alle Spalten bestimmt. Es wird keine Grafik erstellt;
+    dafür kann ausreissergrafik_erstellen nachträglich aufgerufen werden.
+    
+    Args:
+        df: DataFrame mit den Daten
+        spalten: Zu analysierende Spalten (None für alle numerischen Spalten)
+        methode: Methode zur Ausreißererkennung ('iqr' oder 'zscore')
+        faktor: Faktor für die IQR-Methode bzw. Z-Score-Schwellenwert
+        stats: Bereits berechnete Statistiken aus spaltenstatistiken_berechnen
+        
+    Returns:
+        DataFrame mit einer Zeile je Spalte: Grenzen ('lower', 'upper', 'Q1', 'Q3', 'IQR'
+        bzw. 'mean', 'std', 'threshold'), 'count', 'percent' und 'indices' (Zeilenindizes
+        der Ausreißer)
+    """
+    methode = methode.lower()
+    if methode not in ('iqr', 'zscore'):
+        raise ValueError(f"Unbekannte Methode: {methode}. Unterstützte Methoden: 'iqr', 'zscore'")
+    
+    if spalten is None:
+        spalten = list(df.select_dtypes(include=['number']).columns)
+    for spalte in spalten:
+        if not pd.api.types.is_numeric_dtype(df[spalte].dtype):
+            raise ValueError(f"Spalte {spalte} muss numerisch sein.")
+    
+    grenzspalten = ['lower', 'upper', 'Q1', 'Q3', 'IQR'] if methode == 'iqr' else ['mean', 'std', 'threshold']
+    if not spalten:
+        return pd.DataFrame(columns=grenzspalten + ['count', 'percent', 'indices'],
+                            index=pd.Index([], name='spalte'))
+    
+    if stats is not None:
+        grenzen = pd.DataFrame(
+            [ausreissergrenzen_aus_statistiken(stats["columns"][spalte], methode, faktor) for spalte in spalten],
+            index=spalten
+        )
+    elif methode == 'iqr':
+        quartile = _in_float64(df[spalten]).quantile([0.25, 0.75])
+        grenzen = pd.DataFrame({'Q1': quartile.loc[0.25], 'Q3': quartile.loc[0.75]})
+        grenzen['IQR'] = grenzen['Q3'] - grenzen['Q1']
+        grenzen['lower'] = grenzen['Q1'] - faktor * grenzen['IQR']
+        grenzen['upper'] = grenzen['Q3'] + faktor * grenzen['IQR']
+    else:
+        zahlenwerte = _in_float64(df[spalten])
+        grenzen = pd.DataFrame({'mean': zahlenwerte.mean(), 'std': zahlenwerte.std(), 'threshold': faktor})
+    grenzen = grenzen[grenzspalten].astype(float)
+    
+    werte = df[spalten].to_numpy(dtype=float, na_value=np.nan)
+    # Vergleiche mit NaN ergeben False, fehlende Werte sind daher keine Ausreißer
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if methode == 'iqr':
+            maske = (werte < grenzen['lower'].to_numpy()) | (werte > grenzen['upper'].to_numpy())
+        else:
+            maske = np.abs((werte - grenzen['mean'].to_numpy()) / grenzen['std'].to_numpy()) > faktor
+    
+    anzahl = maske.sum(axis=0)
+    ergebnis = grenzen.copy()
+    ergebnis['count'] = anzahl
+    ergebnis['percent'] = anzahl / len(df) * 100 if len(df) else 0.0
+    ergebnis['indices'] = [df.index[maske[:, j]].tolist() for j in range(len(spalten))]
+    ergebnis.index.name = 'spalte'
+    return ergebnis
+
+# ---- Grafiken ----
+
+# Höchstzahl der Ausreißer, die im Boxplot einzeln eingezeichnet werden
+MAX_AUSREISSER_GRAFIK = 1000
+
+def grafikdaten_berechnen(werte: Union[pd.Series, np.ndarray], spalte: str, grenzen: Dict[str, float],
+                          methode: str = 'iqr', faktor: float = 1.5,
+                          stichprobe: bool = False) -> Dict[str, Any]:
+    """
+    Berechnet die Kennzahlen, aus denen die Ausreißergrafik gezeichnet wird.
+    
+    Das Ergebnis enthält nur wenige Zahlen (Boxplot-Kennzahlen bzw. Histogramm)
+    und kann daher ohne die Rohdaten an einen Worker-Prozess übergeben werden.
+    
+    Args:
+        werte: Werte der Spalte (fehlende Werte werden entfernt), z. B. die
+            Spalte des DataFrames oder das Reservoir aus den Streaming-Statistiken
+        spalte: Name der Spalte
+        grenzen: Grenzen aus ausreissergrenzen_aus_statistiken bzw. identifiziere_ausreisser
+        methode: Methode zur Ausreißererkennung ('iqr' oder 'zscore')
+        faktor: Faktor für die IQR-Methode bzw. Z-Score-Schwellenwert
+        stichprobe: True, wenn werte nur eine Stichprobe der Spalte sind
+        
+    Returns:
+        Dictionary mit "spalte", "methode", "faktor", "stichprobe" und "box"
+        (Kennzahlen für Axes.bxp) bzw. "haeufigkeiten" und "kanten"
+    """
+    werte = np.asarray(werte, dtype=float)
+    werte = werte[~np.isnan(werte)]
+    if werte.size == 0:
+        raise ValueError(f"Spalte {spalte} enthält keine Werte für die Grafik.")
+    
+    daten = {"spalte": spalte, "methode": methode.lower(), "faktor": faktor, "stichprobe": stichprobe}
+    if daten["methode"] == 'iqr':
+        lower, upper = float(grenzen['lower']), float(grenzen['upper'])
+        innen = werte[(werte >= lower) & (werte <= upper)]
+        ausreisser = werte[(werte < lower) | (werte > upper)]
+        if ausreisser.size > MAX_AUSREISSER_GRAFIK:
+            ausreisser = np.random.default_rng(0).choice(ausreisser, MAX_AUSREISSER_GRAFIK, replace=False)
+        daten["box"] = {
+            "med": float(np.median(werte)),
+            "q1": float(grenzen['Q1']),
+            "q3": float(grenzen['Q3']),
+            # Whisker reichen wie bei Axes.boxplot bis zum äußersten Wert innerhalb der Grenzen
+            "whislo": float(innen.min()) if innen.size else float(grenzen['Q1']),
+            "whishi": float(innen.max()) if innen.size else float(grenzen['Q3']),
+            "fliers": ausreisser.tolist(),
+        }
+    elif daten["methode"] == 'zscore':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z_scores = np.abs((werte - grenzen['mean']) / grenzen['std'])
+        haeufigkeiten, kanten = np.histogram(z_scores[np.isfinite(z_scores)], bins=30)
+        daten["haeufigkeiten"] = haeufigkeiten.tolist()
+        daten["kanten"] = kanten.tolist()
+    else:
+        raise ValueError(f"Unbekannte Methode: {methode}. Unterstützte Methoden: 'iqr', 'zscore'")
+    return daten
+
+def grafik_aus_grafikdaten(daten: Dict[str, Any]) -> Any:
+    """
+    Zeichnet die Ausreißergrafik aus den Kennzahlen von grafikdaten_berechnen.
+    
+    Args:
+        daten: Ergebnis von grafikdaten_berechnen
+        
+    Die Figure wird ohne pyplot erstellt: Die globale Figure-Registry von pyplot
+    ist nicht threadsicher, und die Worker-Threads des Dienstes (dq_dienst)
+    zeichnen gleichzeitig.
+    
+    Returns:
+        matplotlib-Figure (Boxplot bzw. Histogramm der Z-Scores)
+    """
+    from matplotlib.figure import Figure
+    
+    spalte, faktor = daten["spalte"], daten["faktor"]
+    zusatz = " (Stichprobe)" if daten.get("stichprobe") else ""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    if daten["methode"] == 'iqr':
+        # Boxplot aus vorberechneten Kennzahlen
+        ax.bxp([dict(daten["box"], label=spalte)])
+        ax.set_title(f'Boxplot für {spalte} mit IQR-Methode (Faktor: {faktor}){zusatz}')
+        ax.set_ylabel(spalte)
+    else:
+        # Histogramm mit Z-Scores aus vorberechneten Häufigkeiten
+        kanten = daten["kanten"]
+        ax.hist(kanten[:-1], bins=kanten, weights=daten["haeufigkeiten"])
         ax.axvline(x=faktor, color='r', linestyle='--')
-        ax.set_title(f'Z-Scores für {spalte} (Schwellenwert: {faktor})')
+        ax.set_title(f'Z-Scores für {spalte} (Schwellenwert: {faktor}){zusatz}')
         ax.set_xlabel('Z-Score')
         ax.set_ylabel('Häufigkeit')
+    return fig
+
+def grafik_rendern(auftrag: Dict[str, Any]) -> str:
+    """
+    Zeichnet eine Ausreißergrafik und speichert sie (Agg-Canvas von savefig).
+    
+    Args:
+        auftrag: Dictionary mit "daten" (Ergebnis von grafikdaten_berechnen) und "pfad"
+        
+    Returns:
+        Pfad der gespeicherten Grafik
+    """
+    grafik_aus_grafikdaten(auftrag["daten"]).savefig(auftrag["pfad"])
+    return auftrag["pfad"]
+
+def grafiken_rendern(auftraege: List[Dict[str, Any]], jobs: int = 1) -> Dict[str, Optional[str]]:
+    """
+    Zeichnet mehrere Ausreißergrafiken, bei jobs > 1 in einem Prozesspool.
+    
+    Args:
+        auftraege: Liste von Aufträgen für grafik_rendern
+        jobs: Anzahl der Worker-Prozesse
         
+    Returns:
+        Dictionary Pfad -> Fehlermeldung (None bei Erfolg)
+    """
+    fehler = {}
+    if jobs > 1 and len(auftraege) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs, len(auftraege))) as executor:
+            futures = {auftrag["pfad"]: executor.submit(grafik_rendern, auftrag) for auftrag in auftraege}
+            for pfad, future in futures.items():
+                try:
+                    future.result()
+                    fehler[pfad] = None
+                except Exception as e:
+                    fehler[pfad] = str(e)
     else:
-        raise ValueError(f"Unbekannte Methode: {methode}. Unterstützte Methoden: 'iqr', 'zscore'")
+        for auftrag in auftraege:
+            try:
+                grafik_rendern(auftrag)
+                fehler[auftrag["pfad"]] = None
+            except Exception as e:
+                fehler[auftrag["pfad"]] = str(e)
     
-    return ausreisser, grenzen, fig
+    for pfad, meldung in fehler.items():
+        if meldung is not None:
+            logger.error(f"Fehler beim Erstellen der Grafik {pfad}: {meldung}")
+    return fehler
+
+# ---- Laufzeitmessung ----
+
+# Spitzenwert des Arbeitsspeichers je Abschnitt messen (siehe rss_messung_einstellen)
+_rss_messung_aktiv = True
+
+def rss_messung_einstellen(aktiv: bool) -> None:
+    """
+    Schaltet die Messung des Spitzenwerts des Arbeitsspeichers in abschnitt_messen ein oder aus.
+    
+    Der Spitzenwert (VmHWM) gilt für den ganzen Prozess. Laufen Abschnitte in
+    mehreren Threads gleichzeitig (Dienst mit mehreren Workern), setzen sie ihn
+    gegenseitig zurück; die Messung wird dann abgeschaltet und peak_rss_bytes
+    ist None.
+    
+    Args:
+        aktiv: True, um den Spitzenwert je Abschnitt zu messen
+    """
+    global _rss_messung_aktiv
+    _rss_messung_aktiv = aktiv
+
+def _cpu_sekunden() -> float:
+    # CPU-Zeit des Prozesses einschließlich beendeter Kindprozesse (z. B. Prozesspools)
+    zeiten = os.times()
+    return zeiten.user + zeiten.system + zeiten.children_user + zeiten.children_system
+
+def _rss_spitze_zuruecksetzen() -> bool:
+    """
+    Setzt den Spitzenwert des Arbeitsspeichers (VmHWM) des Prozesses zurück (nur Linux).
+    
+    Returns:
+        True, wenn der Spitzenwert zurückgesetzt werden konnte
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _rss_spitze_bytes() -> Optional[int]:
+    """
+    Gibt den Spitzenwert des Arbeitsspeichers des Prozesses in Bytes zurück.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for zeile in f:
+                if zeile.startswith('VmHWM:'):
+                    return int(zeile.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Bytes angegeben
+    spitze = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return spitze if sys.platform == 'darwin' else spitze * 1024
+
+@contextmanager
+def abschnitt_messen(abschnitte: List[Dict[str, Any]], name: str, **attribute: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Misst einen Verarbeitungsabschnitt und hängt das Ergebnis an eine Liste an.
+    
+    Erfasst werden Start (Unix-Zeit), Wanduhrzeit, CPU-Zeit und der Spitzenwert
+    des Arbeitsspeichers. Unter Linux wird der Spitzenwert zu Beginn des
+    Abschnitts zurückgesetzt und gilt dann nur für den Abschnitt
+    ("peak_rss_scope": "stage"), sonst für den Prozess bis zum Ende des
+    Abschnitts ("process"). Abschnitte sollten daher nicht verschachtelt werden.
+    Ist die Messung mit rss_messung_einstellen abgeschaltet, sind
+    peak_rss_bytes und peak_rss_scope None.
+    Die Anzahl verarbeiteter Zeilen kann im Abschnitt unter "rows" eingetragen werden.
+    
+    Args:
+        abschnitte: Liste, an die der Abschnitt angehängt wird
+        name: Name des Abschnitts (z. B. 'load', 'profile', 'validate')
+        **attribute: Weitere Angaben (z. B. table=...)
+        
+    Yields:
+        Dictionary des Abschnitts
+    """
+    abschnitt = {"name": name, **attribute, "rows": None, "pid": os.getpid()}
+    messen = _rss_messung_aktiv
+    zurueckgesetzt = messen and _rss_spitze_zuruecksetzen()
+    abschnitt["start"] = time.time()
+    wand = time.perf_counter()
+    cpu = _cpu_sekunden()
+    try:
+        yield abschnitt
+    except BaseException:
+        abschnitt["error"] = True
+        raise
+    finally:
+        abschnitt["wall_seconds"] = time.perf_counter() - wand
+        abschnitt["cpu_seconds"] = _cpu_sekunden() - cpu
+        abschnitt["peak_rss_bytes"] = _rss_spitze_bytes() if messen else None
+        abschnitt["peak_rss_scope"] = ("stage" if zurueckgesetzt else "process") if messen else None
+        abschnitte.append(abschnitt)
+
+def _prometheus_label(wert: Any) -> str:
+    return str(wert).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_textdatei_schreiben(abschnitte: List[Dict[str, Any]], datei_pfad: str,
+                                   praefix: str = "bau_structura_dq") -> None:
+    """
+    Schreibt gemessene Abschnitte im Prometheus-Textformat (z. B. für den
+    Textfile-Collector des node_exporter).
+    
+    Die Datei wird atomar ersetzt, damit der Collector nie eine halb geschriebene
+    Datei liest. Je Abschnitt entstehen die Metriken *_stage_wall_seconds,
+    *_stage_cpu_seconds, *_stage_rows und *_stage_peak_rss_bytes mit den Labels
+    stage und table.
+    
+    Args:
+        abschnitte: Abschnitte aus abschnitt_messen
+        datei_pfad: Pfad der Ausgabedatei (*.prom)
+        praefix: Präfix der Metriknamen
+    """
+    metriken = [
+        ("stage_wall_seconds", "wall_seconds", "Wanduhrzeit des Abschnitts in Sekunden"),
+        ("stage_cpu_seconds", "cpu_seconds", "CPU-Zeit des Abschnitts in Sekunden"),
+        ("stage_rows", "rows", "Verarbeitete Zeilen des Abschnitts"),
+        ("stage_peak_rss_bytes", "peak_rss_bytes", "Spitzenwert des Arbeitsspeichers im Abschnitt in Bytes"),
+    ]
+    zeilen = []
+    for metrik, schluessel, beschreibung in metriken:
+        zeilen.append(f"# HELP {praefix}_{metrik} {beschreibung}")
+        zeilen.append(f"# TYPE {praefix}_{metrik} gauge")
+        # Gleiche Abschnitte einer Tabelle (z. B. mehrere I/O-Abschnitte) werden summiert bzw. maximiert
+        werte = {}
+        for abschnitt in abschnitte:
+            if abschnitt.get(schluessel) is None:
+                continue
+            labels = (abschnitt["name"], abschnitt.get("table") or "")
+            if schluessel == "peak_rss_bytes":
+                werte[labels] = max(werte.get(labels, 0), abschnitt[schluessel])
+            else:
+                werte[labels] = werte.get(labels, 0) + abschnitt[schluessel]
+        for (stage, table), wert in werte.items():
+            zeilen.append(f'{praefix}_{metrik}{{stage="{_prometheus_label(stage)}",'
+                          f'table="{_prometheus_label(table)}"}} {wert}')
+    zeilen.append(f"# HELP {praefix}_last_run_timestamp_seconds Zeitpunkt des letzten Laufs (Unix-Zeit)")
+    zeilen.append(f"# TYPE {praefix}_last_run_timestamp_seconds gauge")
+    zeilen.append(f"{praefix}_last_run_timestamp_seconds {time.time()}")
+    
+    pfad = Path(datei_pfad)
+    tmp_pfad = pfad.with_name(pfad.name + '.tmp')
+    with open(tmp_pfad, 'w') as f:
+        f.write("\n".join(zeilen) + "\n")
+    tmp_pfad.replace(pfad)
+
+def chrome_trace_schreiben(abschnitte: List[Dict[str, Any]], datei_pfad: str) -> None:
+    """
+    Schreibt gemessene Abschnitte im Chrome-Trace-Format (chrome://tracing, Perfetto).
+    
+    Jeder Abschnitt wird ein vollständiges Ereignis ("ph": "X") im Prozess, in dem er
+    gemessen wurde; parallel geprüfte Tabellen erscheinen so als eigene Spuren.
+    
+    Args:
+        abschnitte: Abschnitte aus abschnitt_messen
+        datei_pfad: Pfad der Ausgabedatei (*.json)
+    """
+    ereignisse = []
+    for abschnitt in abschnitte:
+        details = {k: v for k, v in abschnitt.items() if k not in ("name", "start", "wall_seconds", "pid")}
+        ereignisse.append({
+            "name": abschnitt["name"] if not abschnitt.get("table") else f"{abschnitt['name']} {abschnitt['table']}",
+            "cat": abschnitt["name"],
+            "ph": "X",
+            "ts": abschnitt["start"] * 1e6,
+            "dur": abschnitt["wall_seconds"] * 1e6,
+            "pid": abschnitt["pid"],
+            "tid": abschnitt["pid"],
+            "args": details,
+        })
+    with open(datei_pfad, 'w') as f:
+        json.dump({"traceEvents": ereignisse, "displayTimeUnit": "ms"}, f)
 
 # ---- Hauptfunktion ----
 
@@ -449,9 +3910,25 @@ def main():
     Hauptfunktion für den direkten Aufruf des Skripts.
     """
     import argparse
+    from dq_anhaenge import anhaenge_pruefen, anhaenge_ausgeben, ANHANG_THREADS, UPLOAD_DIR
+    from dq_dienst import dienst_starten, DIENST_PARALLEL, DIENST_WARTESCHLANGE
+    from dq_duplikate import duplikate_finden, duplikate_ausgeben, DUPLIKAT_AEHNLICHKEIT
+    from dq_multivariat import (identifiziere_ausreisser_multivariat, identifiziere_ausreisser_multivariat_streaming,
+                                multivariat_ausgeben, MULTIVARIAT_TOP)
+    from dq_referenzen import referenzen_pruefen, referenzen_ausgeben, REFERENZ_THREADS, REFERENZ_MAX_BEISPIELE
+    from dq_zeitreihen import (zeitreihen_pruefen, zeitreihen_ausgeben, ZEITREIHEN_INTERVALLE, ZEITREIHEN_TAGE,
+                               ZEITREIHEN_SCHWELLE)
     
     parser = argparse.ArgumentParser(description='Datenqualitätswerkzeug für Bau-Structura')
     
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help='Tabellen immer aus der Datenbank laden statt aus dem lokalen Snapshot')
+    parser.add_argument('--loader', choices=LADEVERFAHREN, default='sql',
+                        help="Ladeverfahren für Tabellen ('copy' nutzt COPY ... TO STDOUT, nur PostgreSQL)")
+    parser.add_argument('--compact', action='store_true',
+                        help='Geladene Tabellen mit kleineren dtypes speichern (category, Arrow-Strings, '
+                             'verkleinerte Zahlen) und den Speicherbedarf protokollieren')
+    
     # Hauptbefehle
     subparsers = parser.add_subparsers(dest='command', help='Befehl')
     
@@ -460,55 +3937,268 @@ def main():
     profile_parser.add_argument('--tables', nargs='+', help='Zu profilierende Tabellen')
     profile_parser.add_argument('--limit', type=int, help='Maximale Anzahl der zu ladenden Zeilen')
     profile_parser.add_argument('--output-dir', help='Ausgabeverzeichnis für Berichte')
+    profile_parser.add_argument('--tier', choices=[eintrag["name"] for eintrag in PROFIL_STUFEN],
+                                help='Profilstufe (ohne Angabe automatisch nach Tabellengröße)')
+    profile_parser.add_argument('--time-budget', type=float, help='Geschätzte Höchstdauer je Profil in Sekunden')
+    profile_parser.add_argument('--no-cache', action='store_true', help='Profile auch für unveränderte Tabellen neu erstellen')
     
     # Erwartungen-Befehl
     expect_parser = subparsers.add_parser('expect', help='Erwartungssuite erstellen')
     expect_parser.add_argument('table', help='Tabelle für die Erwartungssuite')
     expect_parser.add_argument('--output', required=True, help='Ausgabedatei für die Erwartungssuite')
+    expect_parser.add_argument('--chunk-size', type=int, help='Tabelle blockweise mit dieser Blockgröße laden')
+    expect_parser.add_argument('--pushdown', action='store_true', help='Statistiken per SQL in der Datenbank berechnen')
     
     # Test-Befehl
     test_parser = subparsers.add_parser('test', help='Daten gegen Erwartungen testen')
     test_parser.add_argument('table', help='Zu testende Tabelle')
     test_parser.add_argument('--expectations', required=True, help='Erwartungssuite-Datei')
     test_parser.add_argument('--output', required=True, help='Ausgabedatei für das Testergebnis')
+    test_parser.add_argument('--chunk-size', type=int, help='Tabelle blockweise mit dieser Blockgröße laden')
+    test_parser.add_argument('--pushdown', action='store_true', help='Erwartungen per SQL in der Datenbank prüfen')
+    test_parser.add_argument('--backend', choices=VALIDIERUNGS_BACKENDS, default='numpy',
+                             help="Auswertung der Erwartungen ('numpy': native NumPy-Masken, 'ge': Great Expectations)")
     
     # Ausreißer-Befehl
     outlier_parser = subparsers.add_parser('outliers', help='Ausreißer identifizieren')
     outlier_parser.add_argument('table', help='Tabelle für die Ausreißeranalyse')
-    outlier_parser.add_argument('column', help='Zu analysierende Spalte')
+    outlier_parser.add_argument('column', nargs='?', help='Zu analysierende Spalte (ohne Angabe: alle numerischen Spalten, ohne Grafik)')
     outlier_parser.add_argument('--method', choices=['iqr', 'zscore'], default='iqr', help='Methode zur Ausreißererkennung')
     outlier_parser.add_argument('--factor', type=float, default=1.5, help='Faktor für die Ausreißererkennung')
+    outlier_parser.add_argument('--chunk-size', type=int, help='Tabelle blockweise mit dieser Blockgröße laden (ohne Grafik)')
+    outlier_parser.add_argument('--multivariate', action='store_true',
+                                help='Zeilen mit ungewöhnlicher Kombination mehrerer Merkmale suchen (robuster Mahalanobis-Abstand)')
+    outlier_parser.add_argument('--features', nargs='+', help='Merkmale für --multivariate (Standard je Tabelle)')
+    outlier_parser.add_argument('--top', type=int, default=MULTIVARIAT_TOP,
+                                help='Anzahl der gemeldeten Zeilen bei --multivariate')
+    
+    # Zeitreihen-Befehl
+    timeseries_parser = subparsers.add_parser('timeseries', help='Auffällige Mengen je Stunde bzw. Tag in Protokolltabellen finden')
+    timeseries_parser.add_argument('table', help='Protokolltabelle (z. B. tblactivity_logs, tbllogin_logs)')
+    timeseries_parser.add_argument('--time-column', help='Spalte mit dem Zeitstempel (Standard je Tabelle)')
+    timeseries_parser.add_argument('--group-by', nargs='*', help='Gruppierungsspalten (ohne Werte: nur Gesamtreihe)')
+    timeseries_parser.add_argument('--interval', choices=list(ZEITREIHEN_INTERVALLE), default='hour',
+                                   help='Länge der gezählten Intervalle')
+    timeseries_parser.add_argument('--days', type=int, default=ZEITREIHEN_TAGE, help='Betrachteter Zeitraum in Tagen')
+    timeseries_parser.add_argument('--threshold', type=float, default=ZEITREIHEN_SCHWELLE,
+                                   help='Robuster z-Wert, ab dem ein Intervall auffällig ist')
+    timeseries_parser.add_argument('--output', help='Ausgabedatei für das Ergebnis (JSON)')
+    
+    # Drift-Befehl
+    drift_parser = subparsers.add_parser('drift', help='Verteilungsdrift gegenüber früheren Läufen erkennen')
+    drift_parser.add_argument('table', help='Tabelle für die Drift-Erkennung')
+    drift_parser.add_argument('--baseline-runs', type=int, default=1,
+                              help='Anzahl der letzten gespeicherten Läufe als Referenz')
+    drift_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                              help='Blockgröße beim Lesen der aktuellen Daten')
+    drift_parser.add_argument('--no-save', action='store_true', help='Sketches dieses Laufs nicht speichern')
+    drift_parser.add_argument('--output', help='Ausgabedatei für das Drift-Ergebnis (JSON)')
+    
+    # Anhänge-Befehl
+    attachments_parser = subparsers.add_parser('attachments', help='Dateien hinter Anhängen und Medien-URLs prüfen')
+    attachments_parser.add_argument('--upload-dir', help=f'Upload-Verzeichnis (Standard: {UPLOAD_DIR})')
+    attachments_parser.add_argument('--threads', type=int, default=ANHANG_THREADS, help='Threads für Dateizugriffe')
+    attachments_parser.add_argument('--hash', action='store_true',
+                                    help='Inhalte per SHA-256 prüfen (unveränderte Dateien aus dem Cache)')
+    attachments_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                                    help='Blockgröße beim Lesen der Verweise')
+    attachments_parser.add_argument('--output', help='Ausgabedatei für das Ergebnis (JSON)')
+    
+    # Verweis-Befehl
+    references_parser = subparsers.add_parser('references', help='Verweise zwischen Tabellen auf fehlende Zieldatensätze prüfen')
+    references_parser.add_argument('--tables', nargs='+', help='Nur Verweise aus diesen Tabellen prüfen')
+    references_parser.add_argument('--threads', type=int, default=REFERENZ_THREADS, help='Anzahl gleichzeitiger Abfragen')
+    references_parser.add_argument('--max-examples', type=int, default=REFERENZ_MAX_BEISPIELE,
+                                   help='Höchstzahl der gelesenen Schlüssel ohne Zieldatensatz je Verweis')
+    references_parser.add_argument('--no-heuristics', action='store_true',
+                                   help='Nur angelegte Fremdschlüssel und bekannte Verweise prüfen, keine aus Spaltennamen abgeleiteten')
+    references_parser.add_argument('--output', help='Ausgabedatei für das Ergebnis (JSON)')
+    
+    # Duplikate-Befehl
+    duplicates_parser = subparsers.add_parser('duplicates', help='Doppelte und fast doppelte Zeilen finden')
+    duplicates_parser.add_argument('table', help='Zu prüfende Tabelle')
+    duplicates_parser.add_argument('--columns', nargs='+', help='Verglichene Spalten (Standard je Tabelle)')
+    duplicates_parser.add_argument('--text-columns', nargs='*',
+                                   help='Textspalten für fast gleiche Zeilen (ohne Werte: keine Suche danach)')
+    duplicates_parser.add_argument('--threshold', type=float, default=DUPLIKAT_AEHNLICHKEIT,
+                                   help='Ähnlichkeit (Jaccard), ab der Zeilen als fast gleich gelten')
+    duplicates_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                                   help='Blockgröße beim Lesen der Tabelle')
+    duplicates_parser.add_argument('--full', action='store_true',
+                                   help='Hash-Index neu aufbauen statt nur neue Zeilen zu hashen')
+    duplicates_parser.add_argument('--output', help='Ausgabedatei für das Ergebnis (JSON)')
+    
+    # Dienst-Befehl
+    serve_parser = subparsers.add_parser('serve', help='Als Dienst für die Node-API laufen (Aufträge über HTTP)')
+    serve_parser.add_argument('--socket', help='Unix-Socket statt TCP verwenden')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Adresse für HTTP über TCP')
+    serve_parser.add_argument('--port', type=int, default=8765, help='Port für HTTP über TCP')
+    serve_parser.add_argument('--workers', type=int, default=DIENST_PARALLEL,
+                              help='Anzahl gleichzeitig bearbeiteter Aufträge')
+    serve_parser.add_argument('--queue-size', type=int, default=DIENST_WARTESCHLANGE,
+                              help='Höchstzahl wartender Aufträge')
     
     args = parser.parse_args()
     
+    if args.command == 'serve':
+        # Ein Verbindungspool für alle Worker; tote Verbindungen werden vor der Nutzung erkannt
+        engine = get_db_connection(pool_size=args.workers, pool_pre_ping=True)
+        dienst_starten(engine, host=args.host, port=args.port, socket_pfad=args.socket,
+                       parallel=args.workers, warteschlange=args.queue_size)
+        return
+    
     # Datenbankverbindung herstellen
     engine = get_db_connection()
     
+    def laden(table: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        # Wiederholte Befehle auf unveränderten Tabellen lesen den lokalen Snapshot
+        if args.no_snapshot:
+            return table_to_dataframe(engine, table, loader=args.loader, columns=columns, kompakt=args.compact)
+        return table_to_dataframe_snapshot(engine, table, columns=columns, loader=args.loader,
+                                           kompakt=args.compact)
+    
     if args.command == 'profile':
         tabellen_profilieren(
             engine,
             table_names=args.tables,
             limit=args.limit,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            stufe=args.tier,
+            zeitbudget=args.time_budget,
+            cache=not args.no_cache,
+            snapshot=not args.no_snapshot,
+            loader=args.loader,
+            kompakt=args.compact
         )
     
     elif args.command == 'expect':
-        df = table_to_dataframe(engine, args.table)
-        suite = erstelle_expectations_suite(df, suite_name=f"{args.table}_suite")
+        if args.pushdown:
+            stats = spaltenstatistiken_sql(engine, args.table)
+            suite = erstelle_expectations_suite_aus_statistiken(stats, suite_name=f"{args.table}_suite")
+        elif args.chunk_size:
+            stats = statistiken_berechnen_streaming(table_to_chunks(engine, args.table, chunk_size=args.chunk_size))
+            suite = erstelle_expectations_suite_aus_statistiken(stats, suite_name=f"{args.table}_suite")
+        else:
+            df = laden(args.table)
+            suite = erstelle_expectations_suite(df, suite_name=f"{args.table}_suite")
         speichere_expectations_suite(suite, args.output)
         print(f"Erwartungssuite für {args.table} erstellt und unter {args.output} gespeichert.")
     
     elif args.command == 'test':
-        df = table_to_dataframe(engine, args.table)
         suite = lade_expectations_suite(args.expectations)
-        result = teste_daten_gegen_erwartungen(df, suite)
+        if args.pushdown:
+            result = teste_daten_gegen_erwartungen_sql(engine, args.table, suite)
+        elif args.chunk_size:
+            chunks = table_to_chunks(engine, args.table, chunk_size=args.chunk_size)
+            result = teste_daten_gegen_erwartungen_streaming(chunks, suite, backend=args.backend)
+        else:
+            spalten = {e.kwargs.get('column') for e in suite.expectations}
+            df = laden(args.table, columns=None if None in spalten else sorted(spalten))
+            result = teste_daten_gegen_erwartungen(df, suite, backend=args.backend)
         speichere_validierungsergebnis(result, args.output)
         
         success_rate = result.statistics['successful_expectations'] / result.statistics['evaluated_expectations']
         print(f"Erfolgsrate: {success_rate:.2%}")
     
+    elif args.command == 'timeseries':
+        ergebnis = zeitreihen_pruefen(engine, args.table, zeitspalte=args.time_column, gruppen=args.group_by,
+                                      intervall=args.interval, tage=args.days, schwelle=args.threshold)
+        zeitreihen_ausgeben(ergebnis)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(ergebnis, f, indent=2)
+            print(f"Ergebnis gespeichert unter: {args.output}")
+    
+    elif args.command == 'drift':
+        # Nur die aktuellen Zeilen werden gelesen, frühere Läufe liegen als Sketches vor
+        sketches = sketches_initialisieren()
+        for chunk in table_to_chunks(engine, args.table, chunk_size=args.chunk_size):
+            sketches_aktualisieren(sketches, chunk)
+        drift = drift_gegen_historie(args.table, sketches, referenz_laeufe=args.baseline_runs)
+        if not args.no_save:
+            pfad = sketches_speichern(args.table, sketches)
+            print(f"Sketches gespeichert unter: {pfad}")
+        
+        if drift is None:
+            print(f"Für {args.table} liegen noch keine früheren Läufe vor.")
+        else:
+            print(f"Zeilen: {drift['rows']} (Referenz {drift['reference_rows']}, "
+                  f"{len(drift['reference_runs'])} Lauf/Läufe)")
+            spalten = sorted(drift["columns"].items(), key=lambda e: e[1].get("psi") or 0.0, reverse=True)
+            for column, spalte in spalten:
+                psi = f"{spalte['psi']:.3f}" if spalte.get("psi") is not None else "-"
+                ks = f"{spalte['ks']:.3f}" if spalte.get("ks") is not None else "-"
+                print(f"  {column:<30} {spalte['status']:<10} PSI {psi:>7}  KS {ks:>6}")
+            if args.output:
+                with open(args.output, 'w') as f:
+                    json.dump(drift, f, indent=2)
+                print(f"Drift-Ergebnis gespeichert unter: {args.output}")
+    
+    elif args.command == 'attachments':
+        ergebnis = anhaenge_pruefen(engine, upload_dir=args.upload_dir, threads=args.threads,
+                                    mit_hash=args.hash, chunk_size=args.chunk_size)
+        anhaenge_ausgeben(ergebnis)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(ergebnis, f, indent=2, default=str)
+            print(f"Ergebnis gespeichert unter: {args.output}")
+    
+    elif args.command == 'references':
+        ergebnis = referenzen_pruefen(engine, tabellen=args.tables, threads=args.threads,
+                                      max_beispiele=args.max_examples, heuristik=not args.no_heuristics)
+        referenzen_ausgeben(ergebnis)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(ergebnis, f, indent=2, default=str)
+            print(f"Ergebnis gespeichert unter: {args.output}")
+    
+    elif args.command == 'duplicates':
+        ergebnis = duplikate_finden(engine, args.table, spalten=args.columns, textspalten=args.text_columns,
+                                    schwelle=args.threshold, chunk_size=args.chunk_size, vollstaendig=args.full)
+        duplikate_ausgeben(ergebnis)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(ergebnis, f, indent=2)
+            print(f"Ergebnis gespeichert unter: {args.output}")
+    
+    elif args.command == 'outliers' and args.multivariate:
+        if args.column is not None:
+            parser.error("--multivariate betrachtet mehrere Merkmale; bitte --features statt einer Spalte angeben")
+        if args.chunk_size:
+            ergebnis = identifiziere_ausreisser_multivariat_streaming(
+                engine, args.table, merkmale=args.features, chunk_size=args.chunk_size, top_k=args.top)
+        else:
+            spalten = tabellenspalten(engine, args.table, arten=('numeric',))
+            df = laden(args.table, columns=spalten)
+            ergebnis = identifiziere_ausreisser_multivariat(df, merkmale=args.features, table_name=args.table,
+                                                            top_k=args.top)
+        multivariat_ausgeben(ergebnis, anzahl=args.top)
+    
+    elif args.command == 'outliers' and args.chunk_size and args.column is None:
+        tabelle = identifiziere_ausreisser_streaming(engine, args.table, methode=args.method,
+                                                     faktor=args.factor, chunk_size=args.chunk_size)
+        print(tabelle.to_string())
+    
+    elif args.command == 'outliers' and args.chunk_size:
+        stats = statistiken_berechnen_streaming(
+            table_to_chunks(engine, args.table, chunk_size=args.chunk_size)
+        )
+        grenzen = ausreissergrenzen_aus_statistiken(
+            stats["columns"][args.column], methode=args.method, faktor=args.factor
+        )
+        anzahl = zaehle_ausreisser_streaming(
+            table_to_chunks(engine, args.table, chunk_size=args.chunk_size), {args.column: grenzen}
+        )
+        print(f"Gefundene Ausreißer: {anzahl[args.column]}")
+        print(f"Grenzen: {grenzen}")
+    
+    elif args.command == 'outliers' and args.column is None:
+        df = laden(args.table, columns=tabellenspalten(engine, args.table, arten=('numeric',)))
+        tabelle = identifiziere_ausreisser_batch(df, methode=args.method, faktor=args.factor)
+        print(tabelle.drop(columns=['indices']).to_string())
+    
     elif args.command == 'outliers':
-        df = table_to_dataframe(engine, args.table)
+        df = laden(args.table, columns=[args.column])
         ausreisser, grenzen, fig = identifiziere_ausreisser(
             df, args.column, methode=args.method, faktor=args.factor
         )
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+"""
+Prüfung von Anhängen und Mediendateien
+--------------------------------------
+
+Gleicht die Dateiverweise in tblattachment und tblroad_damages mit dem
+Upload-Verzeichnis ab: fehlende, leere und in der Größe abweichende Dateien,
+verwaiste Dateien ohne Verweis und optional Inhalte per SHA-256.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from sqlalchemy import inspect
+
+from data_quality import DEFAULT_CHUNK_SIZE, REPORT_DIR, _python_wert, get_table_list, logger, query_to_chunks
+
+# Verzeichnis der hochgeladenen Dateien (wie express.static('uploads') im Server)
+UPLOAD_DIR = Path(os.getenv('UPLOAD_DIR', './uploads'))
+
+# Spalten mit Dateiverweisen: Tabelle, Pfad- bzw. URL-Spalte und ggf. gespeicherte Größe
+ANHANG_QUELLEN = [
+    {"table": "tblattachment", "column": "file_path", "size": "file_size"},
+    {"table": "tblattachment", "column": "webp_path", "size": None},
+    {"table": "tblroad_damages", "column": "image_url", "size": None},
+    {"table": "tblroad_damages", "column": "voice_note_url", "size": None},
+]
+
+# Spalten, in denen ein gespeicherter SHA-256 der Datei stehen kann
+ANHANG_HASH_SPALTEN = ('sha256', 'file_hash', 'checksum')
+
+# Unterverzeichnisse, deren Dateien abgeleitet sind und nicht als verwaist gelten
+ANHANG_IGNORIERTE_ORDNER = ('thumbnails',)
+
+# Threads für stat() und Hashing, Zeilen je Auftrag und Blockgröße beim Lesen
+ANHANG_THREADS = 16
+ANHANG_STAPEL = 256
+HASH_BLOCKGROESSE = 1 << 20
+
+# Datei mit bereits berechneten Hashwerten (Schlüssel: Pfad, Änderungszeit, Größe)
+HASH_CACHE_DATEI = REPORT_DIR / "anhang_hashes.json"
+
+# Höchstzahl der Beispiele je Fehlerart im Ergebnis
+ANHANG_MAX_BEISPIELE = 100
+
+def _anhang_kandidaten(wert: str, upload_dir: Path) -> List[Path]:
+    """
+    Liefert die möglichen Dateipfade zu einem gespeicherten Pfad bzw. einer URL.
+    
+    Returns:
+        Liste der Pfade in Prüfreihenfolge (leer bei externen URLs)
+    """
+    wert = wert.strip()
+    if wert.startswith(('http://', 'https://', 'data:')):
+        return []
+    if wert.startswith('/uploads/'):
+        return [upload_dir / wert[len('/uploads/'):]]
+    # Wie der Server: zuerst der gespeicherte Pfad, dann der Dateiname im Upload-Verzeichnis
+    return [Path(wert), upload_dir / Path(wert).name]
+
+def _dateien_pruefen(zeilen: List[Dict[str, Any]], upload_dir: Path) -> List[Dict[str, Any]]:
+    """
+    Prüft einen Stapel von Dateiverweisen mit os.stat (läuft in einem Worker-Thread).
+    
+    Returns:
+        Die Zeilen, ergänzt um "file" (gefundener Pfad), "bytes", "mtime_ns" und "status"
+        ('ok', 'missing', 'size_mismatch' oder 'external')
+    """
+    for zeile in zeilen:
+        kandidaten = _anhang_kandidaten(zeile["path"], upload_dir)
+        if not kandidaten:
+            zeile["status"] = 'external'
+            continue
+        zeile["status"] = 'missing'
+        for pfad in kandidaten:
+            try:
+                info = os.stat(pfad)
+            except OSError:
+                continue
+            zeile.update(file=str(pfad.resolve()), bytes=info.st_size, mtime_ns=info.st_mtime_ns, status='ok')
+            if zeile.get("size") is not None and int(zeile["size"]) != info.st_size:
+                zeile["status"] = 'size_mismatch'
+            break
+    return zeilen
+
+def _datei_hash(pfad: str) -> str:
+    # SHA-256 blockweise, damit große Dateien nicht vollständig im Speicher liegen
+    summe = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCKGROESSE), b''):
+            summe.update(block)
+    return summe.hexdigest()
+
+def _hash_cache_laden(pfad: Path) -> Dict[str, Any]:
+    try:
+        with open(pfad, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _hash_cache_speichern(pfad: Path, cache: Dict[str, Any]) -> None:
+    tmp_pfad = pfad.with_suffix('.json.tmp')
+    with open(tmp_pfad, 'w') as f:
+        json.dump(cache, f)
+    tmp_pfad.replace(pfad)
+
+def _hashes_berechnen(dateien: Dict[str, Dict[str, int]], cache: Dict[str, Any], executor: Any) -> Dict[str, str]:
+    """
+    Berechnet die Hashwerte der Dateien; unveränderte Dateien (gleiche Änderungszeit
+    und Größe) werden aus dem Cache übernommen.
+    
+    Args:
+        dateien: Je Pfad "bytes" und "mtime_ns"
+        cache: Hash-Cache (wird aktualisiert)
+        executor: ThreadPoolExecutor für das Lesen der Dateien
+        
+    Returns:
+        SHA-256 je Pfad (ohne Dateien, die nicht gelesen werden konnten)
+    """
+    hashes, offen = {}, []
+    for pfad, info in dateien.items():
+        eintrag = cache.get(pfad)
+        if eintrag is not None and eintrag["mtime_ns"] == info["mtime_ns"] and eintrag["bytes"] == info["bytes"]:
+            hashes[pfad] = eintrag["sha256"]
+        else:
+            offen.append(pfad)
+    
+    def berechnen(pfad: str) -> Optional[str]:
+        try:
+            return _datei_hash(pfad)
+        except OSError as e:
+            logger.warning(f"Datei {pfad} konnte nicht gelesen werden: {e}")
+            return None
+    
+    for pfad, summe in zip(offen, executor.map(berechnen, offen)):
+        if summe is not None:
+            hashes[pfad] = summe
+            cache[pfad] = dict(dateien[pfad], sha256=summe)
+    logger.info(f"Hashwerte: {len(offen)} Dateien gelesen, {len(dateien) - len(offen)} aus dem Cache.")
+    return hashes
+
+def _upload_dateien(upload_dir: Path) -> Dict[str, int]:
+    """
+    Listet alle Dateien im Upload-Verzeichnis mit ihrer Größe auf (ohne ANHANG_IGNORIERTE_ORDNER).
+    """
+    dateien = {}
+    if not upload_dir.is_dir():
+        return dateien
+    offen = [upload_dir]
+    while offen:
+        verzeichnis = offen.pop()
+        try:
+            with os.scandir(verzeichnis) as eintraege:
+                for eintrag in eintraege:
+                    if eintrag.is_dir(follow_symlinks=False):
+                        if eintrag.name not in ANHANG_IGNORIERTE_ORDNER:
+                            offen.append(Path(eintrag.path))
+                    elif eintrag.is_file():
+                        dateien[str(Path(eintrag.path).resolve())] = eintrag.stat().st_size
+        except OSError as e:
+            # Nicht lesbare Unterverzeichnisse überspringen, statt die ganze Prüfung abzubrechen
+            if verzeichnis == upload_dir:
+                raise
+            logger.warning(f"Verzeichnis {verzeichnis} konnte nicht gelesen werden: {e}")
+    return dateien
+
+def anhaenge_pruefen(engine: 'sqlalchemy.engine.Engine', upload_dir: Optional[str] = None,
+                     threads: int = ANHANG_THREADS, mit_hash: bool = False,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     quellen: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Prüft die Dateien hinter den Dateiverweisen der Datenbank.
+    
+    Die Verweise werden blockweise gelesen; je Block prüft ein Threadpool mit
+    höchstens threads Threads in Stapeln von ANHANG_STAPEL Zeilen, ob die Dateien
+    existieren und ob ihre Größe der gespeicherten entspricht. Anschließend werden
+    Dateien im Upload-Verzeichnis gesucht, auf die keine Zeile verweist. Mit
+    mit_hash wird zusätzlich der SHA-256 aller gefundenen Dateien berechnet (mit
+    Cache für unveränderte Dateien), mit einer gespeicherten Prüfsumme verglichen
+    (falls eine Spalte aus ANHANG_HASH_SPALTEN existiert) und nach Dateien mit
+    gleichem Inhalt gesucht.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        upload_dir: Upload-Verzeichnis (Standard: UPLOAD_DIR)
+        threads: Anzahl der Threads für Dateizugriffe
+        mit_hash: Ob Inhalte per SHA-256 geprüft werden
+        chunk_size: Anzahl der Zeilen pro gelesenem Block
+        quellen: Zu prüfende Spalten (Standard: ANHANG_QUELLEN)
+        
+    Returns:
+        Dictionary mit Zählwerten je Quelle ("sources"), Beispielen fehlender Dateien
+        ("missing"), abweichender Größen ("size_mismatches") und Prüfsummen
+        ("hash_mismatches"), verwaisten Dateien ("orphans") und ggf. Duplikaten ("duplicates")
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    upload_dir = Path(upload_dir or UPLOAD_DIR)
+    ergebnis = {"upload_dir": str(upload_dir.resolve()), "sources": {}, "missing": [],
+                "size_mismatches": [], "hash_mismatches": []}
+    referenziert: Dict[str, Dict[str, int]] = {}
+    gespeicherte_hashes: List[Dict[str, Any]] = []
+    vorhandene_tabellen = set(get_table_list(engine))
+    
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for quelle in quellen or ANHANG_QUELLEN:
+            if quelle["table"] not in vorhandene_tabellen:
+                continue
+            spalten = {s['name'] for s in inspect(engine).get_columns(quelle["table"])}
+            if quelle["column"] not in spalten:
+                continue
+            hash_spalte = next((s for s in ANHANG_HASH_SPALTEN if s in spalten), None) if quelle["size"] else None
+            
+            auswahl = ['id', quelle["column"]] + [s for s in (quelle["size"], hash_spalte) if s and s in spalten]
+            spaltenliste = ', '.join(f'"{spalte}"' for spalte in auswahl)
+            abfrage = (f"SELECT {spaltenliste} FROM {quelle['table']} "
+                       f"WHERE \"{quelle['column']}\" IS NOT NULL AND \"{quelle['column']}\" <> ''")
+            name = f"{quelle['table']}.{quelle['column']}"
+            zaehler = ergebnis["sources"][name] = {"rows": 0, "ok": 0, "missing": 0, "size_mismatch": 0,
+                                                    "hash_mismatch": 0, "external": 0}
+            
+            for chunk in query_to_chunks(engine, abfrage, chunk_size=chunk_size):
+                zeilen = [{"id": _python_wert(z[0]), "path": z[1],
+                           "size": z[2] if quelle["size"] in auswahl else None,
+                           "hash": z[-1] if hash_spalte in auswahl else None}
+                          for z in chunk.itertuples(index=False, name=None)]
+                stapel = [zeilen[i:i + ANHANG_STAPEL] for i in range(0, len(zeilen), ANHANG_STAPEL)]
+                for geprueft in executor.map(lambda s: _dateien_pruefen(s, upload_dir), stapel):
+                    for zeile in geprueft:
+                        zaehler["rows"] += 1
+                        zaehler[zeile["status"]] += 1
+                        beispiel = {"table": quelle["table"], "column": quelle["column"], "id": zeile["id"],
+                                    "path": zeile["path"]}
+                        if zeile["status"] == 'missing' and len(ergebnis["missing"]) < ANHANG_MAX_BEISPIELE:
+                            ergebnis["missing"].append(beispiel)
+                        elif zeile["status"] == 'size_mismatch' and len(ergebnis["size_mismatches"]) < ANHANG_MAX_BEISPIELE:
+                            ergebnis["size_mismatches"].append(dict(beispiel, expected=int(zeile["size"]),
+                                                                    actual=zeile["bytes"]))
+                        if "file" in zeile:
+                            referenziert[zeile["file"]] = {"bytes": zeile["bytes"], "mtime_ns": zeile["mtime_ns"]}
+                            if zeile["hash"]:
+                                gespeicherte_hashes.append(dict(beispiel, file=zeile["file"], expected=zeile["hash"]))
+            logger.info(f"{name}: {zaehler['rows']} Verweise, {zaehler['missing']} fehlende Dateien, "
+                        f"{zaehler['size_mismatch']} abweichende Größen")
+        
+        # Dateien ohne Verweis aus der Datenbank
+        dateien = _upload_dateien(upload_dir)
+        verwaist = sorted(pfad for pfad in dateien if pfad not in referenziert)
+        ergebnis["orphans"] = {
+            "count": len(verwaist),
+            "bytes": sum(dateien[pfad] for pfad in verwaist),
+            "files": verwaist[:ANHANG_MAX_BEISPIELE],
+        }
+        
+        if mit_hash:
+            cache = _hash_cache_laden(HASH_CACHE_DATEI)
+            hashes = _hashes_berechnen(referenziert, cache, executor)
+            # Nur Einträge noch referenzierter Dateien aufbewahren
+            _hash_cache_speichern(HASH_CACHE_DATEI, {p: cache[p] for p in referenziert if p in cache})
+            
+            for eintrag in gespeicherte_hashes:
+                tatsaechlich = hashes.get(eintrag["file"])
+                if tatsaechlich is not None and tatsaechlich != str(eintrag["expected"]).lower():
+                    ergebnis["sources"][f"{eintrag['table']}.{eintrag['column']}"]["hash_mismatch"] += 1
+                    if len(ergebnis["hash_mismatches"]) < ANHANG_MAX_BEISPIELE:
+                        ergebnis["hash_mismatches"].append(dict(eintrag, actual=tatsaechlich))
+            
+            gruppen: Dict[str, List[str]] = {}
+            for pfad, summe in hashes.items():
+                gruppen.setdefault(summe, []).append(pfad)
+            duplikate = [sorted(pfade) for pfade in gruppen.values() if len(pfade) > 1]
+            ergebnis["duplicates"] = {
+                "groups": len(duplikate),
+                "redundant_bytes": sum(referenziert[pfade[0]]["bytes"] * (len(pfade) - 1) for pfade in duplikate),
+                "examples": duplikate[:ANHANG_MAX_BEISPIELE],
+            }
+    
+    return ergebnis
+
+def anhaenge_ausgeben(ergebnis: Dict[str, Any]) -> None:
+    """
+    Gibt das Ergebnis von anhaenge_pruefen zusammengefasst aus.
+    """
+    print(f"Upload-Verzeichnis: {ergebnis['upload_dir']}")
+    for name, zaehler in ergebnis["sources"].items():
+        print(f"  {name}: {zaehler['rows']} Verweise, {zaehler['missing']} fehlend, "
+              f"{zaehler['size_mismatch']} mit abweichender Größe, {zaehler['hash_mismatch']} mit abweichender "
+              f"Prüfsumme, {zaehler['external']} extern")
+    for eintrag in ergebnis["missing"][:10]:
+        print(f"  • fehlt: {eintrag['table']}.{eintrag['column']} id={eintrag['id']}: {eintrag['path']}")
+    for eintrag in ergebnis["size_mismatches"][:10]:
+        print(f"  • Größe: {eintrag['table']} id={eintrag['id']}: {eintrag['expected']} statt {eintrag['actual']} Bytes")
+    print(f"Verwaiste Dateien: {ergebnis['orphans']['count']} ({ergebnis['orphans']['bytes'] / 1e6:.1f} MB)")
+    if "duplicates" in ergebnis:
+        print(f"Dateien mit gleichem Inhalt: {ergebnis['duplicates']['groups']} Gruppen "
+              f"({ergebnis['duplicates']['redundant_bytes'] / 1e6:.1f} MB doppelt)")
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+
+"""
+Dienstmodus des Datenqualitätssystems
+-------------------------------------
+
+Hält Imports, Verbindungspool und lokale Snapshots zwischen den Anfragen der
+Node-API warm. Aufträge werden über HTTP (oder einen Unix-Socket) eingereicht,
+in einer begrenzten Warteschlange gehalten und von Worker-Threads bearbeitet.
+
+Gestartet wird der Dienst mit ``python data_quality.py serve``.
+"""
+
+import json
+import math
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional
+
+from data_quality import (
+    AuftragAbgebrochen, DEFAULT_CHUNK_SIZE, _abbruch_pruefen, _auftrag_lokal, drift_gegen_historie,
+    get_table_list, identifiziere_ausreisser_batch, lade_expectations_suite, logger, rss_messung_einstellen,
+    sketches_aktualisieren, sketches_initialisieren, sketches_speichern, tabellenspalten, table_to_chunks,
+    table_to_dataframe_snapshot, teste_daten_gegen_erwartungen
+)
+
+# Höchstzahl wartender Aufträge; weitere Aufträge werden abgelehnt
+DIENST_WARTESCHLANGE = 32
+
+# Anzahl gleichzeitig bearbeiteter Aufträge (zugleich Größe des Verbindungspools)
+DIENST_PARALLEL = 2
+
+# Anzahl abgeschlossener Aufträge, deren Status noch abgefragt werden kann
+DIENST_AUFTRAEGE_BEHALTEN = 200
+
+def _auftrag_pruefung(engine: 'sqlalchemy.engine.Engine', params: Dict[str, Any]) -> Dict[str, Any]:
+    # Prüfung wie run_quality_check.py für eine Tabelle, Optionen als Argumentliste
+    from run_quality_check import argumente_lesen, pruefe_tabelle, grafiken_ausgeben
+    try:
+        args = argumente_lesen(list(params.get("args", [])) + ['--table', params["table"]])
+    except SystemExit:
+        raise ValueError(f"Ungültige Argumente: {params.get('args')}")
+    ergebnis = pruefe_tabelle(engine, params["table"], args)
+    grafiken_ausgeben({params["table"]: ergebnis}, args)
+    ergebnis["timings"] = ergebnis.pop("_timings")
+    return ergebnis
+
+def _auftrag_ausreisser(engine: 'sqlalchemy.engine.Engine', params: Dict[str, Any]) -> Dict[str, Any]:
+    spalten = [params["column"]] if params.get("column") else tabellenspalten(engine, params["table"], arten=('numeric',))
+    df = table_to_dataframe_snapshot(engine, params["table"], columns=spalten)
+    tabelle = identifiziere_ausreisser_batch(df, methode=params.get("method", 'iqr'),
+                                             faktor=float(params.get("factor", 1.5)))
+    return json.loads(tabelle.drop(columns=['indices']).to_json(orient='index'))
+
+def _auftrag_test(engine: 'sqlalchemy.engine.Engine', params: Dict[str, Any]) -> Dict[str, Any]:
+    suite = lade_expectations_suite(params["expectations"])
+    spalten = {e.kwargs.get('column') for e in suite.expectations}
+    df = table_to_dataframe_snapshot(engine, params["table"], columns=None if None in spalten else sorted(spalten))
+    result = teste_daten_gegen_erwartungen(df, suite, backend=params.get("backend", 'numpy'))
+    return {"success": result.success, "statistics": result.statistics}
+
+def _auftrag_drift(engine: 'sqlalchemy.engine.Engine', params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    sketches = sketches_initialisieren()
+    for chunk in table_to_chunks(engine, params["table"], chunk_size=int(params.get("chunk_size", DEFAULT_CHUNK_SIZE))):
+        sketches_aktualisieren(sketches, chunk)
+    drift = drift_gegen_historie(params["table"], sketches, referenz_laeufe=int(params.get("baseline_runs", 1)))
+    if params.get("save", True):
+        sketches_speichern(params["table"], sketches)
+    return drift
+
+# Auftragsarten des Dienstes; alle erwarten den Parameter "table"
+AUFTRAGSARTEN = {
+    "check": _auftrag_pruefung,
+    "outliers": _auftrag_ausreisser,
+    "test": _auftrag_test,
+    "drift": _auftrag_drift,
+}
+
+def _auftrag_oeffentlich(auftrag: Dict[str, Any]) -> Dict[str, Any]:
+    # Status ohne interne Synchronisationsobjekte
+    return {k: v for k, v in auftrag.items() if k not in ("abbruch", "fertig")}
+
+def dienst_erstellen(engine: 'sqlalchemy.engine.Engine', parallel: int = DIENST_PARALLEL,
+                     warteschlange: int = DIENST_WARTESCHLANGE) -> Dict[str, Any]:
+    """
+    Erstellt den Zustand des Dienstes und startet die Worker-Threads.
+    
+    Bei mehr als einem Worker wird der Spitzenwert des Arbeitsspeichers in den
+    Laufzeiten der Aufträge nicht gemessen (peak_rss_bytes None), da er für den
+    ganzen Prozess gilt.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt, das sich alle Aufträge teilen
+        parallel: Anzahl gleichzeitig bearbeiteter Aufträge
+        warteschlange: Höchstzahl wartender Aufträge
+        
+    Returns:
+        Dictionary mit Engine, Warteschlange und Aufträgen (nach ID)
+    """
+    import queue
+    rss_messung_einstellen(parallel <= 1)
+    dienst = {
+        "engine": engine,
+        "warteschlange": queue.Queue(maxsize=warteschlange),
+        "auftraege": {},
+        "sperre": threading.Lock(),
+        "gestartet": datetime.now().isoformat(),
+    }
+    for i in range(parallel):
+        threading.Thread(target=_dienst_worker, args=(dienst,), name=f"dq-worker-{i}", daemon=True).start()
+    return dienst
+
+def auftrag_einreichen(dienst: Dict[str, Any], art: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reiht einen Auftrag in die Warteschlange ein.
+    
+    Args:
+        dienst: Zustand aus dienst_erstellen
+        art: Auftragsart (siehe AUFTRAGSARTEN)
+        params: Parameter des Auftrags
+        
+    Returns:
+        Status des Auftrags
+        
+    Raises:
+        ValueError: Bei unbekannter Auftragsart, fehlender oder unbekannter Tabelle
+        queue.Full: Wenn die Warteschlange voll ist
+    """
+    import uuid
+    if art not in AUFTRAGSARTEN:
+        raise ValueError(f"Unbekannte Auftragsart: {art}. Unterstützt: {', '.join(AUFTRAGSARTEN)}")
+    if not params.get("table"):
+        raise ValueError("Der Parameter 'table' fehlt.")
+    # Tabellennamen werden unquotiert in SQL eingesetzt; nur vorhandene Tabellen zulassen
+    if params["table"] not in get_table_list(dienst["engine"]):
+        raise ValueError(f"Unbekannte Tabelle: {params['table']!r}")
+    
+    auftrag = {
+        "id": uuid.uuid4().hex,
+        "type": art,
+        "params": params,
+        "status": "queued",
+        "created": datetime.now().isoformat(),
+        "started": None,
+        "finished": None,
+        "result": None,
+        "error": None,
+        "abbruch": threading.Event(),
+        "fertig": threading.Event(),
+    }
+    with dienst["sperre"]:
+        dienst["warteschlange"].put_nowait(auftrag)
+        dienst["auftraege"][auftrag["id"]] = auftrag
+    logger.info(f"Auftrag {auftrag['id']} ({art}, {params['table']}) eingereiht.")
+    return _auftrag_oeffentlich(auftrag)
+
+def auftrag_status(dienst: Dict[str, Any], auftrag_id: str, warten: float = 0.0) -> Optional[Dict[str, Any]]:
+    """
+    Gibt den Status eines Auftrags zurück.
+    
+    Args:
+        dienst: Zustand aus dienst_erstellen
+        auftrag_id: ID des Auftrags
+        warten: Höchstens so viele Sekunden auf das Ende des Auftrags warten
+        
+    Returns:
+        Status des Auftrags oder None, wenn die ID unbekannt ist
+    """
+    auftrag = dienst["auftraege"].get(auftrag_id)
+    if auftrag is None:
+        return None
+    if warten > 0:
+        auftrag["fertig"].wait(warten)
+    return _auftrag_oeffentlich(auftrag)
+
+def auftrag_abbrechen(dienst: Dict[str, Any], auftrag_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Bricht einen wartenden oder laufenden Auftrag ab.
+    
+    Wartende Aufträge werden nicht mehr gestartet; laufende Aufträge enden beim
+    nächsten Aufruf von _abbruch_pruefen mit dem Status 'cancelled'.
+    
+    Returns:
+        Status des Auftrags oder None, wenn die ID unbekannt ist
+    """
+    with dienst["sperre"]:
+        auftrag = dienst["auftraege"].get(auftrag_id)
+        if auftrag is None:
+            return None
+        auftrag["abbruch"].set()
+        if auftrag["status"] == "queued":
+            auftrag["status"] = "cancelled"
+            auftrag["finished"] = datetime.now().isoformat()
+            auftrag["fertig"].set()
+        elif auftrag["status"] == "running":
+            auftrag["status"] = "cancelling"
+    return _auftrag_oeffentlich(auftrag)
+
+def _dienst_worker(dienst: Dict[str, Any]) -> None:
+    """
+    Bearbeitet Aufträge aus der Warteschlange, bis der Prozess endet.
+    """
+    while True:
+        auftrag = dienst["warteschlange"].get()
+        with dienst["sperre"]:
+            if auftrag["status"] == "cancelled":
+                continue
+            auftrag["status"] = "running"
+            auftrag["started"] = datetime.now().isoformat()
+        
+        _auftrag_lokal.abbruch = auftrag["abbruch"]
+        try:
+            ergebnis = AUFTRAGSARTEN[auftrag["type"]](dienst["engine"], auftrag["params"])
+            _abbruch_pruefen()
+            status, auftrag["result"] = "done", ergebnis
+        except AuftragAbgebrochen:
+            status = "cancelled"
+        except Exception as e:
+            logger.error(f"Fehler bei Auftrag {auftrag['id']}: {e}")
+            status, auftrag["error"] = "failed", str(e)
+        finally:
+            _auftrag_lokal.abbruch = None
+        
+        with dienst["sperre"]:
+            auftrag["status"] = status
+            auftrag["finished"] = datetime.now().isoformat()
+            auftrag["fertig"].set()
+            # Nur die letzten abgeschlossenen Aufträge aufbewahren (dict behält die Einfügereihenfolge)
+            abgeschlossen = [a for a in dienst["auftraege"].values() if a["fertig"].is_set()]
+            for alt in abgeschlossen[:-DIENST_AUFTRAEGE_BEHALTEN]:
+                del dienst["auftraege"][alt["id"]]
+        logger.info(f"Auftrag {auftrag['id']} beendet: {status}")
+
+def _dienst_handler(dienst: Dict[str, Any]) -> type:
+    """
+    Erstellt die HTTP-Handler-Klasse des Dienstes.
+    
+    Endpunkte (JSON):
+        GET    /health               Zustand, wartende und laufende Aufträge
+        POST   /jobs?wait=SEKUNDEN   Auftrag {"type": ..., "params": {...}} einreichen (202, 429 bei voller Warteschlange)
+        GET    /jobs/ID?wait=SEKUNDEN Status und Ergebnis eines Auftrags
+        DELETE /jobs/ID              Auftrag abbrechen
+    """
+    import queue
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import urlsplit, parse_qs
+    
+    class DienstHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def _antworten(self, status: int, daten: Any) -> None:
+            inhalt = json.dumps(daten, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(inhalt)))
+            self.end_headers()
+            self.wfile.write(inhalt)
+        
+        def _pfad(self) -> Optional[Tuple[List[str], float]]:
+            # Bei ungültigem wait-Parameter wird mit 400 geantwortet und None zurückgegeben
+            teile = urlsplit(self.path)
+            wert = parse_qs(teile.query).get('wait', ['0'])[0]
+            try:
+                warten = float(wert)
+            except ValueError:
+                warten = float('nan')
+            if not math.isfinite(warten) or warten < 0:
+                self._antworten(400, {"error": f"Ungültiger Wert für wait: {wert!r}"})
+                return None
+            return [t for t in teile.path.split('/') if t], warten
+        
+        def do_GET(self):
+            anfrage = self._pfad()
+            if anfrage is None:
+                return
+            pfad, warten = anfrage
+            if pfad == ['health']:
+                with dienst["sperre"]:
+                    status = [a["status"] for a in dienst["auftraege"].values()]
+                self._antworten(200, {"status": "ok", "started": dienst["gestartet"],
+                                      "queued": status.count("queued"), "running": status.count("running")})
+            elif len(pfad) == 2 and pfad[0] == 'jobs':
+                auftrag = auftrag_status(dienst, pfad[1], warten=warten)
+                if auftrag is None:
+                    self._antworten(404, {"error": "Auftrag nicht gefunden"})
+                else:
+                    self._antworten(200, auftrag)
+            else:
+                self._antworten(404, {"error": "Unbekannter Pfad"})
+        
+        def do_POST(self):
+            ziel = self._pfad()
+            if ziel is None:
+                return
+            pfad, warten = ziel
+            if pfad != ['jobs']:
+                self._antworten(404, {"error": "Unbekannter Pfad"})
+                return
+            try:
+                laenge = int(self.headers.get('Content-Length', 0))
+                anfrage = json.loads(self.rfile.read(laenge) or b'{}')
+                if not isinstance(anfrage, dict):
+                    raise ValueError("Anfrage muss ein JSON-Objekt sein")
+                parameter = anfrage.get("params") or {}
+                if not isinstance(parameter, dict):
+                    raise ValueError("params muss ein JSON-Objekt sein")
+                auftrag = auftrag_einreichen(dienst, anfrage.get("type"), parameter)
+            except queue.Full:
+                self._antworten(429, {"error": "Warteschlange ist voll"})
+                return
+            except ValueError as e:
+                self._antworten(400, {"error": str(e)})
+                return
+            if warten > 0:
+                auftrag = auftrag_status(dienst, auftrag["id"], warten=warten)
+            self._antworten(200 if auftrag["status"] in ("done", "failed", "cancelled") else 202, auftrag)
+        
+        def do_DELETE(self):
+            ziel = self._pfad()
+            if ziel is None:
+                return
+            pfad, _ = ziel
+            auftrag = auftrag_abbrechen(dienst, pfad[1]) if len(pfad) == 2 and pfad[0] == 'jobs' else None
+            if auftrag is None:
+                self._antworten(404, {"error": "Auftrag nicht gefunden"})
+            else:
+                self._antworten(200, auftrag)
+        
+        def log_message(self, format: str, *args: Any) -> None:
+            # client_address ist bei Unix-Sockets leer, daher ohne address_string
+            logger.debug(format % args)
+    
+    return DienstHandler
+
+def dienst_starten(engine: 'sqlalchemy.engine.Engine', host: str = '127.0.0.1', port: int = 8765,
+                   socket_pfad: Optional[str] = None, parallel: int = DIENST_PARALLEL,
+                   warteschlange: int = DIENST_WARTESCHLANGE) -> None:
+    """
+    Startet den Dienst und bearbeitet Anfragen, bis der Prozess beendet wird.
+    
+    Imports, Engine-Verbindungspool und lokale Snapshots bleiben zwischen den
+    Aufträgen erhalten, sodass wiederholte Prüfungen ohne Startkosten laufen.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt (Poolgröße mindestens parallel)
+        host: Adresse für HTTP (nur ohne socket_pfad)
+        port: Port für HTTP (nur ohne socket_pfad)
+        socket_pfad: Pfad eines Unix-Sockets statt HTTP über TCP
+        parallel: Anzahl gleichzeitig bearbeiteter Aufträge
+        warteschlange: Höchstzahl wartender Aufträge
+    """
+    import signal
+    import socketserver
+    from http.server import ThreadingHTTPServer
+    
+    dienst = dienst_erstellen(engine, parallel=parallel, warteschlange=warteschlange)
+    handler = _dienst_handler(dienst)
+    
+    if socket_pfad:
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+        
+        Path(socket_pfad).unlink(missing_ok=True)
+        server = UnixHTTPServer(socket_pfad, handler)
+        adresse = f"unix:{socket_pfad}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        adresse = f"http://{host}:{server.server_address[1]}"
+    
+    def beenden(signum, frame):
+        # SIGTERM (z. B. von systemd oder pm2) wie Strg+C behandeln
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, beenden)
+    logger.info(f"Dienst läuft unter {adresse} ({parallel} Worker, Warteschlange {warteschlange}).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Dienst wird beendet.")
+    finally:
+        server.server_close()
+        if socket_pfad:
+            Path(socket_pfad).unlink(missing_ok=True)
+        engine.dispose()
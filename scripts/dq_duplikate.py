@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+
+"""
+Doppelte und fast doppelte Zeilen
+---------------------------------
+
+Findet gleiche Zeilen über einen 64-Bit-Hash der verglichenen Spalten und fast
+gleiche Zeilen über MinHash-Signaturen der Textspalten mit LSH-Bändern. Die
+Hashes werden als Index gespeichert, sodass Folgeläufe nur neue Zeilen lesen.
+"""
+
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional, Iterable
+from sqlalchemy import inspect, text
+
+from data_quality import DEFAULT_CHUNK_SIZE, REPORT_DIR, _sql_spaltenart, logger, query_to_chunks
+
+# Ablage des Hash-Index je Tabelle (Zeilen-Hashes und MinHash-Signaturen)
+DUPLIKAT_DIR = REPORT_DIR / "duplikate"
+
+# Verglichene Spalten, Textspalten für fast gleiche Zeilen und Spalte, innerhalb
+# derer verglichen wird (doppelt abgeschickte Formulare betreffen dasselbe Projekt)
+DUPLIKAT_KONFIGURATION = {
+    "tblroad_damages": {
+        "columns": ["project_id", "title", "description", "severity", "damage_type", "location"],
+        "text": ["title", "description"],
+        "block": "project_id",
+    },
+    "tblconstruction_diary": {
+        "columns": ["project_id", "date", "employee", "activity", "start_time", "end_time", "work_hours"],
+        "text": ["activity", "remarks"],
+        "block": "project_id",
+    },
+}
+
+# Vorgaben für Tabellen ohne eigene Konfiguration
+DUPLIKAT_IGNORIERTE_SPALTEN = ('id', 'created_at', 'updated_at')
+DUPLIKAT_TEXTSPALTEN = ('title', 'description', 'activity', 'remarks', 'notes', 'comment')
+
+# MinHash: Anzahl der Hashfunktionen, LSH-Bänder (je MINHASH_PERMUTATIONEN / LSH_BAENDER
+# Werte), Länge der Zeichen-Shingles und geschätzte Jaccard-Ähnlichkeit ab der Zeilen
+# als fast gleich gelten
+MINHASH_PERMUTATIONEN = 64
+LSH_BAENDER = 16
+SHINGLE_LAENGE = 4
+DUPLIKAT_AEHNLICHKEIT = 0.8
+MINHASH_SEED = 20240501
+
+# Shingles je Rechenblock beim Bilden der Signaturen
+MINHASH_BLOCK = 1 << 16
+
+# Höchstzahl der Beispielgruppen je Art im Ergebnis
+DUPLIKAT_MAX_BEISPIELE = 100
+
+def _text_normalisieren(s: pd.Series) -> pd.Series:
+    """
+    Vereinheitlicht Texte für den Vergleich: Unicode-NFKC, Kleinschreibung, Satzzeichen
+    und mehrfache Leerzeichen entfernt. Fehlende Werte werden zu leeren Texten.
+    """
+    s = s.astype('string').fillna('')
+    return (s.str.normalize('NFKC').str.lower()
+            .str.replace(r'[^\w\s]', ' ', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+def _zeilen_hashen(chunk: pd.DataFrame, spalten: List[str], texte: Dict[str, pd.Series],
+                   arten: Dict[str, str]) -> np.ndarray:
+    """
+    Berechnet einen 64-Bit-Hash je Zeile über die angegebenen Spalten.
+    
+    Die Spalten werden vorher nach ihrer Art im Datenbankschema vereinheitlicht
+    (Zahlen als float64, Zeitpunkte und sonstige Werte als Text), damit der Hash
+    nicht davon abhängt, welchen dtype pandas für einen einzelnen Block wählt.
+    Für Textspalten werden die bereits normalisierten Texte aus texte verwendet.
+    """
+    daten = {}
+    for name in spalten:
+        s = chunk[name]
+        if name in texte:
+            daten[name] = texte[name]
+        elif arten[name] in ('numeric', 'boolean'):
+            daten[name] = pd.to_numeric(s, errors='coerce').astype('float64')
+        elif arten[name] == 'datetime':
+            daten[name] = pd.to_datetime(s, errors='coerce', utc=True).astype('string')
+        else:
+            daten[name] = s.astype('string')
+    return pd.util.hash_pandas_object(pd.DataFrame(daten), index=False).to_numpy()
+
+def _minhash_permutationen(anzahl: int = MINHASH_PERMUTATIONEN) -> Tuple[np.ndarray, np.ndarray]:
+    # Feste Hashfunktionen, damit gespeicherte Signaturen vergleichbar bleiben
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(1, np.iinfo(np.uint64).max, size=anzahl, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=anzahl, dtype=np.uint64)
+    return a, b
+
+def _shingle_hashes(texte: List[str], shingle_laenge: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hasht alle Zeichen-Shingles der Texte vektorisiert über die Unicode-Codepunkte.
+    
+    Texte, die kürzer als shingle_laenge sind, bilden ein einzelnes Shingle; leere
+    Texte keines. Doppelte Shingles eines Textes werden nicht entfernt, da sie das
+    Minimum nicht verändern.
+    
+    Returns:
+        Tuple mit (64-Bit-Hash je Shingle, Zeilennummer je Shingle)
+    """
+    laengen = np.fromiter(map(len, texte), dtype=np.int64, count=len(texte))
+    zeichen = np.frombuffer(''.join(texte).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32).astype(np.uint64)
+    zeichen = np.concatenate([zeichen, np.zeros(shingle_laenge, dtype=np.uint64)])
+    anfaenge = np.cumsum(laengen) - laengen
+    
+    anzahl = np.where(laengen >= shingle_laenge, laengen - shingle_laenge + 1, np.minimum(laengen, 1))
+    zeilen = np.repeat(np.arange(len(texte)), anzahl)
+    positionen = np.arange(anzahl.sum()) - np.repeat(np.cumsum(anzahl) - anzahl, anzahl) + anfaenge[zeilen]
+    gueltig = np.minimum(laengen[zeilen], shingle_laenge)
+    
+    # FNV-1a über die Codepunkte, danach splitmix64 zur Durchmischung
+    hashes = np.full(len(positionen), 0xcbf29ce484222325, dtype=np.uint64)
+    for k in range(shingle_laenge):
+        wert = np.where(k < gueltig, zeichen[positionen + k], np.uint64(0))
+        hashes = (hashes ^ wert) * np.uint64(0x100000001B3)
+    hashes = (hashes ^ (hashes >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    hashes = (hashes ^ (hashes >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return hashes ^ (hashes >> np.uint64(31)), zeilen
+
+def minhash_signaturen(texte: Iterable[str], permutationen: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                       shingle_laenge: int = SHINGLE_LAENGE) -> np.ndarray:
+    """
+    Berechnet MinHash-Signaturen über die Zeichen-Shingles der Texte.
+    
+    Die Shingles aller Texte werden gemeinsam gehasht (_shingle_hashes) und mit
+    Multiply-Shift-Hashfunktionen permutiert; das Minimum je Zeile liefert
+    np.minimum.reduceat. Leere Texte erhalten eine Signatur aus lauter Maximalwerten.
+    
+    Args:
+        texte: Normalisierte Texte
+        permutationen: Faktoren und Summanden der Hashfunktionen (Standard: _minhash_permutationen())
+        shingle_laenge: Länge der Zeichen-Shingles
+        
+    Returns:
+        uint32-Array der Form (Anzahl Texte, Anzahl Hashfunktionen)
+    """
+    a, b = permutationen or _minhash_permutationen()
+    texte = list(texte)
+    signaturen = np.full((len(texte), len(a)), np.iinfo(np.uint32).max, dtype=np.uint32)
+    hashes, zeilen = _shingle_hashes(texte, shingle_laenge)
+    
+    for start in range(0, len(hashes), MINHASH_BLOCK):
+        h = hashes[start:start + MINHASH_BLOCK]
+        z = zeilen[start:start + MINHASH_BLOCK]
+        # Überlauf modulo 2**64 ist gewollt; die oberen 32 Bit sind der permutierte Wert.
+        # Hashfunktionen in Zeilen, Shingles in Spalten: reduceat läuft so über
+        # zusammenhängenden Speicher
+        werte = a[:, None] * h[None, :]
+        werte += b[:, None]
+        werte >>= np.uint64(32)
+        anfaenge = np.flatnonzero(np.r_[True, z[1:] != z[:-1]])
+        minima = np.minimum.reduceat(werte, anfaenge, axis=1).T.astype(np.uint32)
+        signaturen[z[anfaenge]] = np.minimum(signaturen[z[anfaenge]], minima)
+    return signaturen
+
+def _gleiche_gruppen(schluessel: np.ndarray) -> List[np.ndarray]:
+    """
+    Liefert die Positionen aller Gruppen gleicher Schlüssel mit mehr als einem Element.
+    """
+    if len(schluessel) == 0:
+        return []
+    reihenfolge = np.argsort(schluessel, kind='stable')
+    sortiert = schluessel[reihenfolge]
+    anfaenge = np.flatnonzero(np.r_[True, sortiert[1:] != sortiert[:-1]])
+    enden = np.r_[anfaenge[1:], len(sortiert)]
+    return [reihenfolge[s:e] for s, e in zip(anfaenge, enden) if e - s > 1]
+
+def _lsh_gruppen(signaturen: np.ndarray, bloecke: np.ndarray, baender: int = LSH_BAENDER,
+                 schwelle: float = DUPLIKAT_AEHNLICHKEIT) -> List[Tuple[np.ndarray, float]]:
+    """
+    Sucht Gruppen ähnlicher Signaturen mit Locality-Sensitive Hashing.
+    
+    Zeilen, deren Signatur in mindestens einem Band übereinstimmt (und die im selben
+    Block liegen), sind Kandidaten. Jeder Kandidat wird mit dem ersten Element seines
+    Buckets verglichen und ab der geschätzten Ähnlichkeit schwelle mit ihm verbunden
+    (Union-Find), sodass nie alle Paare eines Buckets gebildet werden.
+    
+    Returns:
+        Liste aus (Positionen, geringste geschätzte Ähnlichkeit zum ersten Element) je Gruppe
+    """
+    n, k = signaturen.shape
+    zeilen_je_band = k // baender
+    gueltig = np.flatnonzero(signaturen[:, 0] != np.iinfo(np.uint32).max)
+    eltern = np.arange(n)
+    
+    def wurzel(x: int) -> int:
+        while eltern[x] != x:
+            eltern[x] = eltern[eltern[x]]
+            x = eltern[x]
+        return x
+    
+    for band in range(baender):
+        teil = signaturen[gueltig, band * zeilen_je_band:(band + 1) * zeilen_je_band].astype(np.uint64)
+        schluessel = bloecke[gueltig].copy()
+        for j in range(zeilen_je_band):
+            schluessel = (schluessel * np.uint64(0x100000001B3)) ^ teil[:, j]
+        # Jedes Element eines Buckets wird mit dem ersten Element des Buckets verglichen
+        reihenfolge = np.argsort(schluessel, kind='stable')
+        sortiert = schluessel[reihenfolge]
+        neuer_bucket = np.r_[True, sortiert[1:] != sortiert[:-1]]
+        erstes = reihenfolge[np.flatnonzero(neuer_bucket)[np.cumsum(neuer_bucket) - 1]]
+        kandidat = ~neuer_bucket
+        mitglieder, vertreter = gueltig[reihenfolge[kandidat]], gueltig[erstes[kandidat]]
+        aehnlich = (signaturen[mitglieder] == signaturen[vertreter]).mean(axis=1) >= schwelle
+        for m, v in zip(mitglieder[aehnlich], vertreter[aehnlich]):
+            eltern[wurzel(m)] = wurzel(v)
+    
+    wurzeln = np.array([wurzel(i) for i in gueltig], dtype=np.int64)
+    gruppen = []
+    for positionen in _gleiche_gruppen(wurzeln):
+        mitglieder = gueltig[positionen]
+        aehnlich = (signaturen[mitglieder[1:]] == signaturen[mitglieder[0]]).mean(axis=1)
+        gruppen.append((mitglieder, float(aehnlich.min())))
+    return gruppen
+
+def _duplikat_konfiguration(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                            spalten: Optional[List[str]] = None,
+                            textspalten: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Bestimmt verglichene Spalten, Textspalten und Blockspalte einer Tabelle.
+    
+    Returns:
+        Dictionary mit "columns", "text", "block" und "kinds" (Spaltenart je Spalte)
+    """
+    schema = {s['name']: _sql_spaltenart(s['type']) for s in inspect(engine).get_columns(table_name)}
+    vorgabe = DUPLIKAT_KONFIGURATION.get(table_name, {})
+    spalten = spalten or vorgabe.get("columns") or [
+        s for s, art in schema.items() if s not in DUPLIKAT_IGNORIERTE_SPALTEN and art != 'unsupported']
+    textspalten = textspalten if textspalten is not None else (
+        vorgabe.get("text") or [s for s in schema if s in DUPLIKAT_TEXTSPALTEN])
+    block = vorgabe.get("block", 'project_id' if 'project_id' in schema else None)
+    
+    fehlend = [s for s in list(spalten) + list(textspalten) if s not in schema]
+    if fehlend:
+        raise ValueError(f"Spalten nicht in {table_name} vorhanden: {', '.join(fehlend)}")
+    return {"columns": list(spalten), "text": list(textspalten),
+            "block": block if block in schema else None, "kinds": schema}
+
+def _duplikatindex_laden(table_name: str, index_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    pfad = Path(index_dir or DUPLIKAT_DIR) / f"{table_name}.npz"
+    if not pfad.exists():
+        return None
+    with np.load(pfad, allow_pickle=False) as daten:
+        index = {name: daten[name] for name in ("ids", "hashes", "signatures", "blocks")}
+        index["meta"] = json.loads(str(daten["meta"]))
+    return index
+
+def _duplikatindex_speichern(table_name: str, index: Dict[str, Any], index_dir: Optional[str] = None) -> Path:
+    verzeichnis = Path(index_dir or DUPLIKAT_DIR)
+    verzeichnis.mkdir(parents=True, exist_ok=True)
+    pfad = verzeichnis / f"{table_name}.npz"
+    tmp_pfad = pfad.with_suffix('.npz.tmp')
+    with open(tmp_pfad, 'wb') as f:
+        np.savez(f, ids=index["ids"], hashes=index["hashes"], signatures=index["signatures"],
+                 blocks=index["blocks"], meta=np.array(json.dumps(index["meta"])))
+    tmp_pfad.replace(pfad)
+    return pfad
+
+def duplikate_finden(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                     spalten: Optional[List[str]] = None, textspalten: Optional[List[str]] = None,
+                     schwelle: float = DUPLIKAT_AEHNLICHKEIT, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     vollstaendig: bool = False, index_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Sucht doppelte und fast doppelte Zeilen einer Tabelle.
+    
+    Die Tabelle wird blockweise gelesen; je Zeile werden ein 64-Bit-Hash über die
+    verglichenen Spalten (Texte normalisiert) und eine MinHash-Signatur über die
+    Textspalten berechnet. Gleiche Hashes ergeben doppelte Zeilen, ähnliche
+    Signaturen (LSH, innerhalb derselben Blockspalte, z. B. project_id) fast gleiche.
+    
+    Hashes und Signaturen werden als Index gespeichert. Folgeläufe lesen nur Zeilen
+    mit einer id oberhalb der größten bereits indizierten; wurden seitdem Zeilen
+    gelöscht oder die Einstellungen geändert, wird der Index neu aufgebaut.
+    Änderungen an bereits indizierten Zeilen erkennt erst ein Lauf mit vollstaendig.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        spalten: Verglichene Spalten (Standard: DUPLIKAT_KONFIGURATION bzw. alle außer
+            DUPLIKAT_IGNORIERTE_SPALTEN)
+        textspalten: Spalten für fast gleiche Zeilen (leere Liste: keine Suche danach)
+        schwelle: Geschätzte Jaccard-Ähnlichkeit, ab der Zeilen als fast gleich gelten
+        chunk_size: Anzahl der Zeilen pro Block
+        vollstaendig: Index unabhängig vom gespeicherten Stand neu aufbauen
+        index_dir: Verzeichnis des Index (Standard: DUPLIKAT_DIR)
+        
+    Returns:
+        Dictionary mit Modus, Zeilenzahlen, doppelten ("exact") und fast gleichen
+        ("near") Gruppen samt Beispiel-ids
+    """
+    konfiguration = _duplikat_konfiguration(engine, table_name, spalten, textspalten)
+    spalten, textspalten, block = konfiguration["columns"], konfiguration["text"], konfiguration["block"]
+    inkrementell = konfiguration["kinds"].get('id') == 'numeric'
+    meta = {"columns": spalten, "text": textspalten, "block": block, "permutations": MINHASH_PERMUTATIONEN,
+            "shingle": SHINGLE_LAENGE, "seed": MINHASH_SEED}
+    
+    index = None if vollstaendig or not inkrementell else _duplikatindex_laden(table_name, index_dir)
+    modus = 'initial'
+    if index is not None:
+        gespeichert = dict(index["meta"])
+        watermark = gespeichert.pop("watermark")
+        anzahl = gespeichert.pop("rows")
+        if gespeichert != meta:
+            logger.info(f"Einstellungen für {table_name} geändert, Duplikat-Index wird neu aufgebaut.")
+            index = None
+        else:
+            with engine.connect() as conn:
+                vorhanden = conn.execute(text(f'SELECT COUNT(*) FROM {table_name} WHERE "id" <= :watermark'),
+                                         {"watermark": watermark}).scalar()
+            if vorhanden != anzahl:
+                logger.info(f"{table_name}: {anzahl - vorhanden} indizierte Zeilen fehlen, "
+                            f"Duplikat-Index wird neu aufgebaut.")
+                index = None
+            else:
+                modus = 'incremental'
+    
+    auswahl = list(dict.fromkeys((['id'] if 'id' in konfiguration["kinds"] else []) + spalten + textspalten
+                                 + ([block] if block else [])))
+    spaltenliste = ', '.join(f'"{s}"' for s in auswahl)
+    query = f"SELECT {spaltenliste} FROM {table_name}"
+    params = None
+    if index is not None:
+        query += ' WHERE "id" > :watermark'
+        params = {"watermark": index["meta"]["watermark"]}
+    
+    permutationen = _minhash_permutationen()
+    neu = {"ids": [], "hashes": [], "signatures": [], "blocks": []}
+    position = 0
+    for chunk in query_to_chunks(engine, query, chunk_size=chunk_size, params=params):
+        if inkrementell:
+            neu["ids"].append(chunk['id'].to_numpy(dtype=np.int64))
+        else:
+            neu["ids"].append(np.arange(position, position + len(chunk), dtype=np.int64))
+        position += len(chunk)
+        texte = {name: _text_normalisieren(chunk[name]) for name in textspalten}
+        neu["hashes"].append(_zeilen_hashen(chunk, spalten, texte, konfiguration["kinds"]))
+        if textspalten:
+            verbunden = texte[textspalten[0]]
+            for name in textspalten[1:]:
+                verbunden = verbunden + ' ' + texte[name]
+            neu["signatures"].append(minhash_signaturen(verbunden.str.strip(), permutationen))
+        else:
+            neu["signatures"].append(np.empty((len(chunk), 0), dtype=np.uint32))
+        neu["blocks"].append(pd.util.hash_pandas_object(chunk[block].astype('string'), index=False).to_numpy()
+                             if block else np.zeros(len(chunk), dtype=np.uint64))
+    
+    leer = {"ids": np.empty(0, dtype=np.int64), "hashes": np.empty(0, dtype=np.uint64),
+            "signatures": np.empty((0, MINHASH_PERMUTATIONEN if textspalten else 0), dtype=np.uint32),
+            "blocks": np.empty(0, dtype=np.uint64)}
+    alt = index if index is not None else leer
+    gesamt = {name: np.concatenate([alt[name]] + neu[name]) for name in leer}
+    neue_zeilen = int(sum(len(t) for t in neu["ids"]))
+    
+    if inkrementell:
+        watermark = int(gesamt["ids"].max()) if len(gesamt["ids"]) else 0
+        _duplikatindex_speichern(table_name, dict(gesamt, meta=dict(meta, watermark=watermark,
+                                                                     rows=len(gesamt["ids"]))), index_dir)
+    
+    # Doppelte Zeilen: gleicher Hash über alle verglichenen Spalten
+    exakt = sorted(_gleiche_gruppen(gesamt["hashes"]), key=len, reverse=True)
+    ergebnis = {
+        "table": table_name,
+        "mode": modus if inkrementell else 'full',
+        "columns": spalten,
+        "text_columns": textspalten,
+        "block_column": block,
+        "rows": len(gesamt["ids"]),
+        "new_rows": neue_zeilen,
+        "exact": {
+            "groups": len(exakt),
+            "rows": int(sum(len(g) - 1 for g in exakt)),
+            "examples": [sorted(int(i) for i in gesamt["ids"][g]) for g in exakt[:DUPLIKAT_MAX_BEISPIELE]],
+        },
+    }
+    
+    # Fast gleiche Zeilen; Gruppen, die nur aus doppelten Zeilen bestehen, sind oben schon erfasst
+    if textspalten:
+        fast = [(g, a) for g, a in _lsh_gruppen(gesamt["signatures"], gesamt["blocks"], schwelle=schwelle)
+                if len(np.unique(gesamt["hashes"][g])) > 1]
+        fast.sort(key=lambda e: len(e[0]), reverse=True)
+        ergebnis["near"] = {
+            "groups": len(fast),
+            "rows": int(sum(len(g) for g, _ in fast)),
+            "threshold": schwelle,
+            "examples": [{"ids": sorted(int(i) for i in gesamt["ids"][g]), "similarity": round(a, 3)}
+                         for g, a in fast[:DUPLIKAT_MAX_BEISPIELE]],
+        }
+    
+    logger.info(f"Duplikate in {table_name}: {neue_zeilen} Zeilen gehasht ({ergebnis['mode']}), "
+                f"{ergebnis['exact']['groups']} Gruppen gleicher Zeilen"
+                + (f", {ergebnis['near']['groups']} Gruppen fast gleicher Zeilen" if textspalten else ""))
+    return ergebnis
+
+def duplikate_ausgeben(ergebnis: Dict[str, Any]) -> None:
+    """
+    Gibt das Ergebnis von duplikate_finden zusammengefasst aus.
+    """
+    print(f"{ergebnis['table']}: {ergebnis['rows']} Zeilen ({ergebnis['new_rows']} neu gehasht, "
+          f"Modus {ergebnis['mode']})")
+    exakt = ergebnis["exact"]
+    print(f"  Doppelte Zeilen: {exakt['rows']} in {exakt['groups']} Gruppen")
+    for ids in exakt["examples"][:5]:
+        print(f"    • ids {', '.join(str(i) for i in ids[:10])}")
+    if "near" in ergebnis:
+        fast = ergebnis["near"]
+        print(f"  Fast gleiche Zeilen ({', '.join(ergebnis['text_columns'])}, ab {fast['threshold']:.0%}): "
+              f"{fast['rows']} in {fast['groups']} Gruppen")
+        for eintrag in fast["examples"][:5]:
+            print(f"    • ids {', '.join(str(i) for i in eintrag['ids'][:10])} "
+                  f"(Ähnlichkeit ≥ {eintrag['similarity']:.2f})")
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+
+"""
+Multivariate Ausreißer
+----------------------
+
+Sucht Zeilen mit einer ungewöhnlichen Kombination mehrerer Merkmale (z. B.
+kleine Schadensfläche mit sehr hohen Reparaturkosten) über robuste
+Mahalanobis-Abstände aus einer MCD-Schätzung auf einer Stichprobe.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Tuple, Any, Optional, Iterable, Callable
+from sqlalchemy import select, func, distinct
+from sqlalchemy import table as sa_table, column as sa_column
+
+from data_quality import DEFAULT_CHUNK_SIZE, _python_wert, _tabellen_abfrage, query_to_chunks, tabellenspalten
+
+# Merkmale je Tabelle; ohne Eintrag alle numerischen Spalten außer Schlüsseln
+MULTIVARIAT_MERKMALE = {
+    "tblroad_damages": ["area_size", "estimated_repair_cost", "repair_priority"],
+}
+
+# Zeilen für die Anpassung (gleichverteilte Stichprobe über alle Blöcke), Anteil der
+# Zeilen im robusten Kern, Höchstzahl der Konzentrationsschritte
+MULTIVARIAT_STICHPROBE = 50000
+MULTIVARIAT_KERNANTEIL = 0.75
+MULTIVARIAT_SCHRITTE = 20
+
+# Standardnormal-Quantil für die Schwelle (0.999) und Anzahl gemeldeter Zeilen
+MULTIVARIAT_Z = 3.090
+MULTIVARIAT_TOP = 20
+
+def _chi2_quantil(freiheitsgrade: int, z: float) -> float:
+    # Näherung nach Wilson-Hilferty, genügt für die Schwellen hier ohne scipy
+    k = float(freiheitsgrade)
+    return k * (1.0 - 2.0 / (9.0 * k) + z * np.sqrt(2.0 / (9.0 * k))) ** 3
+
+def _ist_schluesselspalte(name: str) -> bool:
+    return name == 'id' or name.endswith('_id') or name.endswith('Id')
+
+def _merkmale_transformieren(daten: pd.DataFrame, modell: Dict[str, Any]) -> np.ndarray:
+    """
+    Wandelt die Merkmale in die Matrix um, auf der das Modell arbeitet (log1p für
+    nicht negative Merkmale, danach Median/MAD-Standardisierung).
+    """
+    x = daten[modell["features"]].to_numpy(dtype=float, na_value=np.nan)
+    log = np.asarray(modell["log"], dtype=bool)
+    with np.errstate(invalid='ignore'):
+        x[:, log] = np.log1p(np.clip(x[:, log], 0.0, None))
+    return (x - np.asarray(modell["median"])) / np.asarray(modell["mad"])
+
+def _stichprobe_ziehen(stichprobe: Optional[pd.DataFrame], chunk: pd.DataFrame, schluessel: Optional[np.ndarray],
+                       groesse: int, rng: np.random.Generator) -> Tuple[pd.DataFrame, np.ndarray]:
+    # Bottom-k-Stichprobe: jede Zeile erhält einen Zufallsschlüssel, behalten werden die kleinsten
+    neue = rng.random(len(chunk))
+    if stichprobe is not None:
+        chunk = pd.concat([stichprobe, chunk], ignore_index=True)
+        neue = np.concatenate([schluessel, neue])
+    if len(chunk) <= groesse:
+        return chunk.reset_index(drop=True), neue
+    behalten = np.argpartition(neue, groesse)[:groesse]
+    return chunk.iloc[behalten].reset_index(drop=True), neue[behalten]
+
+def multivariat_anpassen(chunks: Iterable[pd.DataFrame], merkmale: List[str],
+                         stichprobe: int = MULTIVARIAT_STICHPROBE, kernanteil: float = MULTIVARIAT_KERNANTEIL,
+                         seed: int = 0) -> Dict[str, Any]:
+    """
+    Passt ein robustes Modell für Mahalanobis-Abstände an.
+    
+    Aus den Blöcken wird eine gleichverteilte Stichprobe von höchstens stichprobe
+    Zeilen gezogen. Nicht negative Merkmale werden logarithmiert, damit Verhältnisse
+    (z. B. Kosten je Fläche) zu linearen Zusammenhängen werden. Lage und Kovarianz
+    stammen aus Konzentrationsschritten wie beim MCD-Schätzer: ausgehend vom Median
+    werden wiederholt die kernanteil Zeilen mit den kleinsten Abständen gewählt und
+    Mittelwert und Kovarianz daraus neu berechnet, sodass Ausreißer das Modell nicht
+    verzerren.
+    
+    Args:
+        chunks: Blöcke der Tabelle (oder ein einzelner DataFrame in einer Liste)
+        merkmale: Numerische Spalten, die gemeinsam betrachtet werden
+        stichprobe: Höchstzahl der Zeilen für die Anpassung
+        kernanteil: Anteil der Zeilen, aus denen Lage und Kovarianz geschätzt werden
+        seed: Startwert für die Stichprobe
+        
+    Returns:
+        Modell mit Merkmalen, Transformation, Lage, Präzisionsmatrix und Schwelle
+    """
+    if len(merkmale) < 2:
+        raise ValueError("Für multivariate Ausreißer werden mindestens zwei numerische Merkmale benötigt.")
+    
+    rng = np.random.default_rng(seed)
+    auswahl, schluessel, zeilen = None, None, 0
+    for chunk in chunks:
+        chunk = chunk[merkmale].dropna()
+        zeilen += len(chunk)
+        auswahl, schluessel = _stichprobe_ziehen(auswahl, chunk, schluessel, stichprobe, rng)
+    p = len(merkmale)
+    if auswahl is None or len(auswahl) < 5 * p:
+        raise ValueError(f"Zu wenige vollständige Zeilen für {p} Merkmale "
+                         f"({0 if auswahl is None else len(auswahl)}).")
+    
+    roh = auswahl.to_numpy(dtype=float)
+    log = (roh.min(axis=0) >= 0)
+    roh[:, log] = np.log1p(roh[:, log])
+    median = np.median(roh, axis=0)
+    mad = np.median(np.abs(roh - median), axis=0) * 1.4826
+    # Merkmale, die überwiegend denselben Wert haben, mit der Standardabweichung skalieren
+    mad = np.where(mad > 0, mad, roh.std(axis=0))
+    mad = np.where(mad > 0, mad, 1.0)
+    x = (roh - median) / mad
+    
+    h = max(int(np.ceil(kernanteil * len(x))), p + 1)
+    abstand = np.einsum('ij,ij->i', x, x)
+    kern = np.argpartition(abstand, h - 1)[:h]
+    for _ in range(MULTIVARIAT_SCHRITTE):
+        mitte = x[kern].mean(axis=0)
+        kovarianz = np.cov(x[kern], rowvar=False)
+        kovarianz += np.eye(p) * 1e-9 * max(np.trace(kovarianz), 1e-12)
+        praezision = np.linalg.pinv(kovarianz)
+        z = x - mitte
+        abstand = np.einsum('ij,jk,ik->i', z, praezision, z)
+        neuer_kern = np.argpartition(abstand, h - 1)[:h]
+        if np.array_equal(np.sort(neuer_kern), np.sort(kern)):
+            break
+        kern = neuer_kern
+    
+    # Konsistenzfaktor: der Median der Abstände soll dem der Chi-Quadrat-Verteilung entsprechen
+    faktor = np.median(abstand) / _chi2_quantil(p, 0.0)
+    if faktor > 0:
+        kovarianz *= faktor
+        praezision /= faktor
+    
+    return {
+        "features": list(merkmale),
+        "log": log.tolist(),
+        "median": median.tolist(),
+        "mad": mad.tolist(),
+        "center": mitte.tolist(),
+        "precision": praezision.tolist(),
+        "threshold": _chi2_quantil(p, MULTIVARIAT_Z),
+        "fit_rows": len(x),
+        "complete_rows": zeilen,
+    }
+
+def multivariat_bewerten(modell: Dict[str, Any], chunks: Iterable[pd.DataFrame],
+                         schluesselspalte: Optional[str] = 'id', top_k: int = MULTIVARIAT_TOP) -> Dict[str, Any]:
+    """
+    Berechnet die robusten Mahalanobis-Abstände aller Zeilen blockweise.
+    
+    Je Block werden die Abstände vektorisiert berechnet; behalten werden nur die
+    Anzahl der Ausreißer und die top_k Zeilen mit den größten Abständen. Der Beitrag
+    eines Merkmals ist z_j * (P z)_j; die Beiträge summieren sich zum quadrierten
+    Abstand und zeigen, welche Merkmale (bzw. welches Verhältnis) auffällig sind.
+    
+    Args:
+        modell: Ergebnis von multivariat_anpassen
+        chunks: Blöcke der Tabelle
+        schluesselspalte: Spalte zur Identifikation der Zeilen (sonst laufende Zeilennummer)
+        top_k: Anzahl der gemeldeten Zeilen
+        
+    Returns:
+        Dictionary mit Zeilenzahlen, Anzahl der Ausreißer, Schwelle und den auffälligsten
+        Zeilen ("top") samt Werten und Beiträgen je Merkmal
+    """
+    merkmale = modell["features"]
+    mitte = np.asarray(modell["center"])
+    praezision = np.asarray(modell["precision"])
+    schwelle = modell["threshold"]
+    
+    zeilen, bewertet, ausreisser, position = 0, 0, 0, 0
+    beste: Optional[pd.DataFrame] = None
+    mit_schluessel = True
+    for chunk in chunks:
+        zeilen += len(chunk)
+        chunk = chunk.reset_index(drop=True)
+        mit_schluessel = schluesselspalte in chunk.columns
+        kennung = (chunk[schluesselspalte].to_numpy() if mit_schluessel
+                   else np.arange(position, position + len(chunk)))
+        position += len(chunk)
+        
+        z = _merkmale_transformieren(chunk, modell) - mitte
+        vollstaendig = ~np.isnan(z).any(axis=1)
+        z, kennung, werte = z[vollstaendig], kennung[vollstaendig], chunk.loc[vollstaendig, merkmale]
+        pz = z @ praezision
+        abstand = np.einsum('ij,ij->i', z, pz)
+        bewertet += len(abstand)
+        ausreisser += int((abstand > schwelle).sum())
+        
+        if len(abstand) > top_k:
+            auswahl = np.argpartition(abstand, -top_k)[-top_k:]
+        else:
+            auswahl = np.arange(len(abstand))
+        block = pd.DataFrame({"key": kennung[auswahl], "distance": abstand[auswahl]})
+        block[[f"v:{m}" for m in merkmale]] = werte.to_numpy()[auswahl]
+        block[[f"c:{m}" for m in merkmale]] = (z * pz)[auswahl]
+        beste = block if beste is None else pd.concat([beste, block], ignore_index=True)
+        beste = beste.nlargest(top_k, 'distance')
+    
+    top = []
+    for zeile in ([] if beste is None else beste.to_dict('records')):
+        beitraege = {m: zeile[f"c:{m}"] for m in merkmale}
+        top.append({
+            "key": _python_wert(zeile["key"]),
+            "distance": round(float(np.sqrt(zeile["distance"])), 3),
+            "values": {m: _python_wert(zeile[f"v:{m}"]) for m in merkmale},
+            "contributions": {m: round(float(b / zeile["distance"]), 3) if zeile["distance"] else 0.0
+                              for m, b in beitraege.items()},
+        })
+    return {
+        "method": 'robust_mahalanobis',
+        "features": merkmale,
+        "key_column": schluesselspalte if mit_schluessel else None,
+        "rows": zeilen,
+        "scored_rows": bewertet,
+        "fit_rows": modell["fit_rows"],
+        "threshold": round(float(np.sqrt(schwelle)), 3),
+        "count": ausreisser,
+        "percent": ausreisser / bewertet * 100 if bewertet else 0.0,
+        "top": top,
+    }
+
+def multivariate_merkmale(spalten: Iterable[str], anzahl_werte: Callable[[List[str]], Dict[str, int]],
+                          table_name: Optional[str] = None) -> List[str]:
+    """
+    Wählt die Merkmale für multivariate Ausreißer: MULTIVARIAT_MERKMALE der Tabelle,
+    sonst alle übergebenen numerischen Spalten außer Schlüsseln wie id und *_id und
+    außer Kennzeichen mit höchstens zwei verschiedenen Werten.
+    
+    Args:
+        spalten: Numerische, nicht boolesche Spalten
+        anzahl_werte: Liefert die Anzahl verschiedener Werte je Spalte; wird nur
+            ohne Vorgabe aufgerufen
+        table_name: Name der Tabelle für die Vorgaben aus MULTIVARIAT_MERKMALE
+        
+    Returns:
+        Liste der Merkmale
+    """
+    spalten = list(spalten)
+    vorgabe = [m for m in MULTIVARIAT_MERKMALE.get(table_name, []) if m in spalten]
+    if len(vorgabe) >= 2:
+        return vorgabe
+    kandidaten = [s for s in spalten if not _ist_schluesselspalte(s)]
+    anzahl = anzahl_werte(kandidaten) if kandidaten else {}
+    return [s for s in kandidaten if anzahl[s] > 2]
+
+def _anzahl_werte_sql(engine: 'sqlalchemy.engine.Engine', table_name: str, spalten: List[str],
+                      limit: Optional[int] = None) -> Dict[str, int]:
+    # Verschiedene Werte aller Spalten in einer Abfrage zählen (bei limit nur der ersten Zeilen)
+    quelle = sa_table(table_name, *[sa_column(s) for s in spalten])
+    if limit is not None:
+        quelle = select(*[quelle.c[s] for s in spalten]).limit(limit).subquery()
+    abfrage = select(*[func.count(distinct(quelle.c[s])) for s in spalten])
+    with engine.connect() as conn:
+        zeile = conn.execute(abfrage).one()
+    return {s: int(n) for s, n in zip(spalten, zeile)}
+
+def identifiziere_ausreisser_multivariat(df: pd.DataFrame, merkmale: Optional[List[str]] = None,
+                                         table_name: Optional[str] = None,
+                                         top_k: int = MULTIVARIAT_TOP) -> Dict[str, Any]:
+    """
+    Sucht multivariate Ausreißer in einem geladenen DataFrame.
+    
+    Args:
+        df: DataFrame mit den Daten
+        merkmale: Numerische Spalten (Standard: multivariate_merkmale)
+        table_name: Name der Tabelle für die Vorgaben aus MULTIVARIAT_MERKMALE
+        top_k: Anzahl der gemeldeten Zeilen
+        
+    Returns:
+        Ergebnis wie multivariat_bewerten
+    """
+    if merkmale is None:
+        numerisch = [s for s in df.columns if pd.api.types.is_numeric_dtype(df[s].dtype)
+                     and not pd.api.types.is_bool_dtype(df[s].dtype)]
+        merkmale = multivariate_merkmale(numerisch, lambda spalten: df[spalten].nunique().to_dict(), table_name)
+    modell = multivariat_anpassen([df], merkmale)
+    return multivariat_bewerten(modell, [df], top_k=top_k)
+
+def identifiziere_ausreisser_multivariat_streaming(engine: 'sqlalchemy.engine.Engine', table_name: str,
+                                                   merkmale: Optional[List[str]] = None,
+                                                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                                   limit: Optional[int] = None,
+                                                   top_k: int = MULTIVARIAT_TOP) -> Dict[str, Any]:
+    """
+    Sucht multivariate Ausreißer, ohne die Tabelle vollständig zu laden.
+    
+    Ein erster blockweiser Durchlauf über die Merkmalsspalten zieht die Stichprobe
+    für die Anpassung, ein zweiter bewertet alle Zeilen. Gelesen werden nur die
+    Merkmale und ggf. die Spalte id.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        merkmale: Numerische Spalten (Standard: multivariate_merkmale)
+        chunk_size: Anzahl der Zeilen pro Block
+        limit: Maximale Anzahl der zu lesenden Zeilen (None für alle)
+        top_k: Anzahl der gemeldeten Zeilen
+        
+    Returns:
+        Ergebnis wie multivariat_bewerten
+    """
+    if not merkmale:
+        merkmale = multivariate_merkmale(tabellenspalten(engine, table_name, arten=('numeric',)),
+                                         lambda spalten: _anzahl_werte_sql(engine, table_name, spalten, limit),
+                                         table_name)
+    auswahl = (['id'] if 'id' in tabellenspalten(engine, table_name) else []) + merkmale
+    query = _tabellen_abfrage(table_name, limit, columns=list(dict.fromkeys(auswahl)))
+    
+    modell = multivariat_anpassen(query_to_chunks(engine, query, chunk_size=chunk_size), merkmale)
+    return multivariat_bewerten(modell, query_to_chunks(engine, query, chunk_size=chunk_size), top_k=top_k)
+
+def multivariat_ausgeben(ergebnis: Dict[str, Any], anzahl: int = 10) -> None:
+    """
+    Gibt das Ergebnis der multivariaten Ausreißersuche zusammengefasst aus.
+    """
+    print(f"Multivariate Ausreißer ({', '.join(ergebnis['features'])}): {ergebnis['count']} von "
+          f"{ergebnis['scored_rows']} Zeilen ({ergebnis['percent']:.2f}%), Abstand > {ergebnis['threshold']:.2f}")
+    for eintrag in ergebnis["top"][:anzahl]:
+        werte = ', '.join(f"{m}={w}" for m, w in eintrag["values"].items())
+        haupt = max(eintrag["contributions"], key=lambda m: eintrag["contributions"][m])
+        print(f"  • {ergebnis['key_column'] or 'Zeile'} {eintrag['key']}: Abstand {eintrag['distance']:.2f} "
+              f"({werte}; größter Beitrag: {haupt} {eintrag['contributions'][haupt]:.0%})")
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+"""
+Referenzielle Integrität
+------------------------
+
+Prüft Verweise zwischen Tabellen auf fehlende Zieldatensätze. Geprüft werden
+angelegte Fremdschlüssel, die bekannten Verweise aus REFERENZEN_BEKANNT und
+(als Kandidaten) aus Spaltennamen wie project_id abgeleitete Verweise, jeweils
+als NOT-EXISTS-Abfrage in der Datenbank.
+"""
+
+import time
+from typing import Dict, List, Tuple, Any, Optional
+from sqlalchemy import inspect, text, select, func, and_, exists
+from sqlalchemy import table as sa_table, column as sa_column
+
+from data_quality import _python_wert, get_table_list, logger
+
+# Verweise, die nicht in jeder Datenbank als Fremdschlüssel angelegt sind
+# (Tabelle, Spalte, Zieltabelle, Zielspalte)
+REFERENZEN_BEKANNT = [
+    ("tblroad_damages", "project_id", "tblproject", "id"),
+    ("tblattachment", "project_id", "tblproject", "id"),
+    ("tblactivity_logs", "user_id", "tbluser", "id"),
+    ("tblconstruction_diary", "project_id", "tblproject", "id"),
+]
+
+# Gleichzeitige Anti-Join-Abfragen (je eine Verbindung aus dem Pool)
+REFERENZ_THREADS = 4
+
+# Höchstzahl der gelesenen Schlüssel ohne Zieldatensatz je Beziehung
+REFERENZ_MAX_BEISPIELE = 20
+
+# Abbruch einer einzelnen Abfrage nach dieser Zeit (nur PostgreSQL)
+REFERENZ_TIMEOUT_SEKUNDEN = 300
+
+def _referenz_ziel(spalte: str, tabellen: set) -> Optional[str]:
+    """
+    Leitet aus einem Spaltennamen wie project_id oder projectId die referenzierte Tabelle ab.
+    
+    Returns:
+        Name der Zieltabelle oder None, wenn keine passende Tabelle existiert
+    """
+    if spalte.endswith('_id'):
+        basis = spalte[:-3]
+    elif spalte.endswith('Id') and len(spalte) > 2:
+        basis = spalte[:-2]
+    else:
+        return None
+    basis = basis.lower()
+    for name in (f"tbl{basis}", f"tbl{basis}s", basis, f"{basis}s"):
+        if name in tabellen:
+            return name
+    return None
+
+def beziehungen_ermitteln(engine: 'sqlalchemy.engine.Engine', tabellen: Optional[List[str]] = None,
+                          heuristik: bool = True) -> List[Dict[str, Any]]:
+    """
+    Ermittelt die zu prüfenden Verweise zwischen Tabellen.
+    
+    Quellen sind die angelegten Fremdschlüssel (inspect), die Liste REFERENZEN_BEKANNT
+    und mit heuristik Spalten nach dem Muster <name>_id bzw. <name>Id, zu denen eine
+    andere Tabelle tbl<name> bzw. tbl<name>s mit einer Spalte id existiert.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        tabellen: Nur Verweise aus diesen Tabellen (Standard: alle)
+        heuristik: Ob Verweise aus Spaltennamen abgeleitet werden
+        
+    Returns:
+        Liste der Beziehungen mit "table", "columns", "ref_table", "ref_columns" und
+        "source" ('constraint', 'known' oder 'name')
+    """
+    inspector = inspect(engine)
+    vorhanden = set(get_table_list(engine))
+    spalten_je_tabelle: Dict[str, set] = {}
+    
+    def spalten(table: str) -> set:
+        if table not in spalten_je_tabelle:
+            spalten_je_tabelle[table] = {s['name'] for s in inspector.get_columns(table)}
+        return spalten_je_tabelle[table]
+    
+    beziehungen: Dict[Tuple, Dict[str, Any]] = {}
+    
+    def hinzufuegen(table: str, columns: List[str], ref_table: str, ref_columns: List[str], quelle: str) -> None:
+        schluessel = (table, tuple(columns), ref_table, tuple(ref_columns))
+        if schluessel not in beziehungen:
+            beziehungen[schluessel] = {"table": table, "columns": list(columns), "ref_table": ref_table,
+                                       "ref_columns": list(ref_columns), "source": quelle}
+    
+    for table in sorted(vorhanden if tabellen is None else set(tabellen) & vorhanden):
+        for fk in inspector.get_foreign_keys(table):
+            if fk.get('referred_table') and fk.get('constrained_columns'):
+                hinzufuegen(table, fk['constrained_columns'], fk['referred_table'], fk['referred_columns'], 'constraint')
+        
+        for quelle, spalte, ziel, ziel_spalte in REFERENZEN_BEKANNT:
+            if quelle == table and spalte in spalten(table):
+                hinzufuegen(table, [spalte], ziel, [ziel_spalte], 'known')
+        
+        if heuristik:
+            for spalte in sorted(spalten(table)):
+                ziel = _referenz_ziel(spalte, vorhanden)
+                # Spalten wie tblproject.project_id sind Geschäftsnummern, keine Selbstverweise
+                if ziel is not None and ziel != table and 'id' in spalten(ziel):
+                    hinzufuegen(table, [spalte], ziel, ['id'], 'name')
+    
+    return list(beziehungen.values())
+
+def _referenz_pruefen(engine: 'sqlalchemy.engine.Engine', beziehung: Dict[str, Any],
+                      max_beispiele: int, vorhanden: set) -> Dict[str, Any]:
+    """
+    Zählt per NOT EXISTS die Zeilen, deren Verweis keinen Zieldatensatz hat (läuft in einem Worker-Thread).
+    
+    Die Schlüssel selbst werden nur gelesen, wenn es solche Zeilen gibt, und dann
+    höchstens max_beispiele verschiedene.
+    
+    Returns:
+        Die Beziehung, ergänzt um "orphans", "examples" und "seconds" bzw. "error"
+    """
+    ergebnis = dict(beziehung)
+    if beziehung["ref_table"] not in vorhanden:
+        ergebnis["error"] = f"Zieltabelle {beziehung['ref_table']} existiert nicht"
+        return ergebnis
+    
+    kind = sa_table(beziehung["table"], *[sa_column(s) for s in beziehung["columns"]]).alias("k")
+    eltern = sa_table(beziehung["ref_table"], *[sa_column(s) for s in beziehung["ref_columns"]]).alias("e")
+    treffer = exists().where(and_(*(eltern.c[z] == kind.c[s]
+                                    for s, z in zip(beziehung["columns"], beziehung["ref_columns"]))))
+    ohne_ziel = and_(*(kind.c[s].isnot(None) for s in beziehung["columns"]), ~treffer)
+    
+    start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == 'postgresql':
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(REFERENZ_TIMEOUT_SEKUNDEN * 1000)}"))
+            anzahl = conn.execute(select(func.count()).select_from(kind).where(ohne_ziel)).scalar()
+            beispiele = []
+            if anzahl and max_beispiele > 0:
+                schluessel = [kind.c[s] for s in beziehung["columns"]]
+                zeilen = conn.execute(select(*schluessel).where(ohne_ziel).distinct().limit(max_beispiele))
+                beispiele = [[_python_wert(w) for w in z] if len(z) > 1 else _python_wert(z[0]) for z in zeilen]
+    except Exception as e:
+        logger.error(f"Prüfung von {beziehung['table']}.{','.join(beziehung['columns'])} fehlgeschlagen: {e}")
+        ergebnis["error"] = str(e)
+        return ergebnis
+    
+    ergebnis.update(orphans=int(anzahl or 0), examples=beispiele, seconds=round(time.perf_counter() - start, 3))
+    return ergebnis
+
+def referenzen_pruefen(engine: 'sqlalchemy.engine.Engine', tabellen: Optional[List[str]] = None,
+                       beziehungen: Optional[List[Dict[str, Any]]] = None, threads: int = REFERENZ_THREADS,
+                       max_beispiele: int = REFERENZ_MAX_BEISPIELE, heuristik: bool = True) -> Dict[str, Any]:
+    """
+    Prüft Verweise zwischen Tabellen auf fehlende Zieldatensätze.
+    
+    Jede Beziehung wird als eine Anti-Join-Abfrage (NOT EXISTS) in der Datenbank
+    gezählt; die Abfragen laufen in einem Threadpool mit höchstens threads
+    Verbindungen gleichzeitig. Es werden keine Tabellen in den Speicher geladen.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        tabellen: Nur Verweise aus diesen Tabellen (Standard: alle)
+        beziehungen: Zu prüfende Beziehungen (Standard: beziehungen_ermitteln)
+        threads: Anzahl gleichzeitiger Abfragen
+        max_beispiele: Höchstzahl der gelesenen Schlüssel ohne Zieldatensatz je Beziehung
+        heuristik: Ob Verweise aus Spaltennamen abgeleitet werden
+        
+    Returns:
+        Dictionary mit den geprüften Beziehungen ("relations", nach Anzahl betroffener
+        Zeilen sortiert), der Gesamtzahl betroffener Zeilen bei angelegten und bekannten
+        Verweisen ("orphans") und bei nur aus Spaltennamen abgeleiteten Kandidaten
+        ("candidate_orphans")
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    if beziehungen is None:
+        beziehungen = beziehungen_ermitteln(engine, tabellen, heuristik=heuristik)
+    vorhanden = set(get_table_list(engine))
+    logger.info(f"Prüfe {len(beziehungen)} Verweise mit {threads} parallelen Abfragen...")
+    
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        geprueft = list(executor.map(lambda b: _referenz_pruefen(engine, b, max_beispiele, vorhanden), beziehungen))
+    
+    geprueft.sort(key=lambda b: (b["source"] == 'name', -b.get("orphans", 0), b["table"], b["columns"]))
+    return {
+        "relations": geprueft,
+        "orphans": sum(b.get("orphans", 0) for b in geprueft if b["source"] != 'name'),
+        "candidate_orphans": sum(b.get("orphans", 0) for b in geprueft if b["source"] == 'name'),
+        "errors": sum(1 for b in geprueft if "error" in b),
+    }
+
+def referenzen_ausgeben(ergebnis: Dict[str, Any]) -> None:
+    """
+    Gibt das Ergebnis von referenzen_pruefen zusammengefasst aus.
+    """
+    print(f"Geprüfte Verweise: {len(ergebnis['relations'])}, Zeilen ohne Zieldatensatz: {ergebnis['orphans']} "
+          f"(zusätzlich {ergebnis['candidate_orphans']} bei aus Spaltennamen abgeleiteten Kandidaten)")
+    for beziehung in ergebnis["relations"]:
+        name = (f"{beziehung['table']}.{','.join(beziehung['columns'])} -> "
+                f"{beziehung['ref_table']}.{','.join(beziehung['ref_columns'])}")
+        if "error" in beziehung:
+            print(f"  • {name}: Fehler: {beziehung['error']}")
+        elif beziehung["orphans"]:
+            beispiele = ', '.join(str(b) for b in beziehung["examples"][:10])
+            kandidat = " (Kandidat aus Spaltenname)" if beziehung["source"] == 'name' else ""
+            print(f"  • {name}{kandidat}: {beziehung['orphans']} Zeilen ohne Zieldatensatz (z. B. {beispiele})")
+        else:
+            print(f"  {name}: OK ({beziehung['source']})")
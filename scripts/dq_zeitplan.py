@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""
+Zeitplanung für nächtliche Läufe
+--------------------------------
+
+Schätzt die Dauer der Prüfung je Tabelle aus Tabellengröße und den gemessenen
+Abschnitten früherer Läufe und verteilt die Tabellen so auf die Worker, dass
+eine Deadline eingehalten wird (siehe run_quality_check.py --deadline).
+"""
+
+import json
+import numpy as np
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from sqlalchemy import text
+
+from data_quality import REPORT_DIR, ZUSAMMENFASSUNG_MUSTER, geschaetzte_zeilenzahl
+
+# Angenommene Kosten ohne frühere Läufe: feste Kosten je Tabelle und Sekunden je Zeile
+# (Profil getrennt vom Rest, da es bei großen Tabellen den Großteil der Laufzeit ausmacht)
+PLAN_FIXKOSTEN = 0.5
+PLAN_SEKUNDEN_JE_ZEILE = {"profile": 2e-4, "rest": 2e-5}
+
+# Anzahl früherer Zusammenfassungen, aus denen Laufzeiten je Zeile geschätzt werden
+PLAN_HISTORIE = 10
+
+# Kleinster Stichprobenanteil, auf den eine Tabelle vor dem Aufschieben verkleinert wird
+PLAN_MIN_ANTEIL = 0.01
+
+# Prioritätszuschlag für Tabellen, die im letzten Lauf aufgeschoben wurden
+PLAN_ZUSCHLAG_AUFGESCHOBEN = 100
+
+def tabellengroesse(engine: 'sqlalchemy.engine.Engine', table_name: str) -> Dict[str, Any]:
+    """
+    Ermittelt die geschätzte Zeilenzahl und unter PostgreSQL die Größe einer Tabelle.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        
+    Returns:
+        Dictionary mit "rows" (aus pg_class.reltuples bzw. COUNT(*)) und "bytes" (None außer PostgreSQL)
+    """
+    groesse = {"rows": geschaetzte_zeilenzahl(engine, table_name), "bytes": None}
+    if engine.dialect.name == 'postgresql':
+        with engine.connect() as conn:
+            groesse["bytes"] = conn.execute(
+                text("SELECT pg_total_relation_size(to_regclass(:tabelle))"), {"tabelle": table_name}
+            ).scalar()
+    return groesse
+
+def laufzeiten_aus_historie(report_dir: Optional[str] = None, anzahl: int = PLAN_HISTORIE) -> Dict[str, Any]:
+    """
+    Liest die gemessenen Abschnitte (siehe abschnitt_messen) der letzten Zusammenfassungen.
+    
+    Args:
+        report_dir: Verzeichnis der Zusammenfassungen (Standard: REPORT_DIR)
+        anzahl: Anzahl der berücksichtigten Zusammenfassungen
+        
+    Returns:
+        Dictionary mit "tables" (je Tabelle Median der Sekunden je Zeile für "profile"
+        und "rest") und "deferred" (im letzten Lauf aufgeschobene Tabellen)
+    """
+    dateien = sorted(Path(report_dir or REPORT_DIR).glob(ZUSAMMENFASSUNG_MUSTER))[-anzahl:]
+    raten: Dict[str, Dict[str, List[float]]] = {}
+    aufgeschoben: List[str] = []
+    for datei in dateien:
+        try:
+            with open(datei, 'r') as f:
+                zusammenfassung = json.load(f)
+        except (OSError, ValueError):
+            continue
+        aufgeschoben = zusammenfassung.get("schedule", {}).get("deferred", [])
+        
+        # Sekunden je Abschnittsgruppe und Zeilenzahl je Tabelle eines Laufs
+        summen: Dict[str, Dict[str, float]] = {}
+        for abschnitt in zusammenfassung.get("timings", []):
+            if abschnitt.get("table") is None or abschnitt.get("error"):
+                continue
+            summe = summen.setdefault(abschnitt["table"], {"rows": 0})
+            gruppe = "profile" if abschnitt["name"] == "profile" else "rest"
+            summe[gruppe] = summe.get(gruppe, 0.0) + abschnitt["wall_seconds"]
+            if abschnitt["name"] in ("load", "stats"):
+                summe["rows"] = max(summe["rows"], abschnitt.get("rows") or 0)
+        for table, summe in summen.items():
+            zeilen = summe.pop("rows")
+            for gruppe, sekunden in summe.items():
+                if zeilen:
+                    raten.setdefault(table, {}).setdefault(gruppe, []).append(sekunden / zeilen)
+    
+    return {
+        "tables": {table: {gruppe: float(np.median(werte)) for gruppe, werte in gruppen.items()}
+                   for table, gruppen in raten.items()},
+        "deferred": aufgeschoben,
+    }
+
+def kosten_schaetzen(engine: 'sqlalchemy.engine.Engine', tables: List[str], profil: bool = True,
+                     historie: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Schätzt die Dauer der Prüfung je Tabelle aus Tabellengröße und früheren Laufzeiten.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        tables: Zu prüfende Tabellen
+        profil: Ob ein Datenprofil erstellt wird
+        historie: Ergebnis von laufzeiten_aus_historie (None: ohne frühere Läufe)
+        
+    Returns:
+        Dictionary je Tabelle mit "rows", "bytes", "rates" (Sekunden je Zeile),
+        "source" ('history' oder 'size') und "seconds" (geschätzte Dauer der vollen Prüfung)
+    """
+    kosten = {}
+    for table in tables:
+        groesse = tabellengroesse(engine, table)
+        bekannt = (historie or {}).get("tables", {}).get(table, {})
+        raten = {gruppe: bekannt.get(gruppe, standard) for gruppe, standard in PLAN_SEKUNDEN_JE_ZEILE.items()}
+        if not profil:
+            raten["profile"] = 0.0
+        kosten[table] = dict(groesse, rates=raten, source='history' if bekannt else 'size',
+                             seconds=_plankosten(groesse["rows"], raten, 1.0, profil))
+    return kosten
+
+def _plankosten(zeilen: int, raten: Dict[str, float], anteil: float, profil: bool) -> float:
+    return PLAN_FIXKOSTEN + zeilen * anteil * (raten["rest"] + (raten["profile"] if profil else 0.0))
+
+def zeitplan_erstellen(kosten: Dict[str, Dict[str, Any]], worker: int = 1, budget: Optional[float] = None,
+                       prioritaeten: Optional[Dict[str, int]] = None, profil: bool = True,
+                       herabstufen: bool = True, minimal: bool = True) -> List[Dict[str, Any]]:
+    """
+    Ordnet Tabellen nach Priorität und Kosten, verteilt sie auf die Worker und hält ein Zeitbudget ein.
+    
+    Tabellen werden absteigend nach Priorität und innerhalb gleicher Priorität nach
+    geschätzter Dauer (längste zuerst) dem Worker mit der geringsten bisherigen
+    Auslastung zugeteilt. Passt eine Tabelle nicht mehr ins Budget, wird sie
+    herabgestuft: erst eine Stichprobe mit dem größten noch passenden Anteil,
+    dann eine minimale Prüfung ohne Profil auf PLAN_MIN_ANTEIL der Zeilen.
+    Passt auch diese nicht, wird die Tabelle aufgeschoben.
+    
+    Args:
+        kosten: Ergebnis von kosten_schaetzen
+        worker: Anzahl paralleler Worker
+        budget: Verfügbare Sekunden bis zur Deadline (None: ohne Deadline)
+        prioritaeten: Priorität je Tabelle (höher zuerst, Standard 0)
+        profil: Ob ein Datenprofil vorgesehen ist
+        herabstufen: Ob Stichproben erlaubt sind (sonst nur 'full' oder 'deferred')
+        minimal: Ob eine Prüfung ohne Profil sinnvoll ist (d. h. weitere Prüfungen vorgesehen sind)
+        
+    Returns:
+        Liste der Einträge in Startreihenfolge mit "table", "priority", "mode" ('full',
+        'sampled', 'minimal' oder 'deferred'), "sample_fraction", "worker", "start"
+        (geplanter Start in Sekunden) und "estimated_seconds"
+    """
+    prioritaeten = prioritaeten or {}
+    worker = max(worker, 1)
+    reihenfolge = sorted(kosten, key=lambda t: (-prioritaeten.get(t, 0), -kosten[t]["seconds"], t))
+    
+    # Jede noch folgende Tabelle behält ihre kleinste Prüfung im Budget, damit
+    # große Tabellen am Anfang die übrigen nicht verdrängen
+    kleinste = {
+        table: (_plankosten(kosten[table]["rows"], kosten[table]["rates"], PLAN_MIN_ANTEIL, profil and not minimal)
+                if herabstufen else kosten[table]["seconds"])
+        for table in reihenfolge
+    }
+    reserviert = sum(kleinste.values())
+    
+    auslastung = [0.0] * worker
+    plan = []
+    for table in reihenfolge:
+        eintrag = {"table": table, "priority": prioritaeten.get(table, 0), "mode": 'full',
+                   "sample_fraction": None, "worker": None, "start": None,
+                   "estimated_seconds": kosten[table]["seconds"]}
+        nummer = int(np.argmin(auslastung))
+        reserviert -= kleinste[table]
+        frei = None if budget is None else budget - auslastung[nummer] - reserviert / worker
+        
+        if frei is not None and eintrag["estimated_seconds"] > frei:
+            zeilen, raten = kosten[table]["rows"], kosten[table]["rates"]
+            je_zeile = zeilen * (raten["rest"] + (raten["profile"] if profil else 0.0))
+            # Anteil abrunden, damit die Schätzung im Budget bleibt
+            anteil = np.floor((frei - PLAN_FIXKOSTEN) / je_zeile * 1e4) / 1e4 if je_zeile else 0.0
+            minimalkosten = _plankosten(zeilen, raten, PLAN_MIN_ANTEIL, False)
+            # Die kleinste Prüfung darf auch die Reserve der folgenden Tabellen nutzen
+            frei = max(frei, budget - auslastung[nummer])
+            if herabstufen and anteil >= PLAN_MIN_ANTEIL:
+                eintrag.update(mode='sampled', sample_fraction=float(anteil),
+                               estimated_seconds=_plankosten(zeilen, raten, float(anteil), profil))
+            elif herabstufen and minimal and minimalkosten <= frei:
+                eintrag.update(mode='minimal', sample_fraction=PLAN_MIN_ANTEIL, estimated_seconds=minimalkosten)
+            else:
+                eintrag.update(mode='deferred', estimated_seconds=0.0)
+        
+        if eintrag["mode"] != 'deferred':
+            eintrag["worker"], eintrag["start"] = nummer, auslastung[nummer]
+            auslastung[nummer] += eintrag["estimated_seconds"]
+        plan.append(eintrag)
+    
+    # Startreihenfolge: geplanter Start, aufgeschobene Tabellen am Ende
+    plan.sort(key=lambda e: (e["start"] is None, e["start"] or 0.0, -e["priority"]))
+    return plan
+
+def deadline_lesen(angabe: str, jetzt: Optional[datetime] = None) -> datetime:
+    """
+    Wandelt eine Deadline in einen Zeitpunkt um.
+    
+    Args:
+        angabe: Uhrzeit 'HH:MM' (nächstes Auftreten), Dauer wie '90m', '2h', '300s'
+            oder ein ISO-Zeitpunkt
+        jetzt: Bezugszeitpunkt (Standard: jetzt)
+        
+    Returns:
+        Zeitpunkt der Deadline
+    """
+    from datetime import timedelta
+    jetzt = jetzt or datetime.now()
+    angabe = angabe.strip()
+    einheiten = {'s': 1, 'm': 60, 'h': 3600}
+    if angabe[-1:] in einheiten and angabe[:-1].replace('.', '', 1).isdigit():
+        return jetzt + timedelta(seconds=float(angabe[:-1]) * einheiten[angabe[-1]])
+    if len(angabe) <= 5 and ':' in angabe:
+        stunde, minute = (int(teil) for teil in angabe.split(':'))
+        zeitpunkt = jetzt.replace(hour=stunde, minute=minute, second=0, microsecond=0)
+        return zeitpunkt if zeitpunkt > jetzt else zeitpunkt + timedelta(days=1)
+    return datetime.fromisoformat(angabe)
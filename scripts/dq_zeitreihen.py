@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""
+Zeitreihen-Anomalien in Protokolltabellen
+-----------------------------------------
+
+Zählt Einträge in tblactivity_logs und tbllogin_logs je Stunde bzw. Tag und
+Gruppe per SQL und meldet Intervalle, deren Anzahl stark von der saisonalen
+Erwartung (gleiche Stunde der Vorwochen bzw. gleicher Wochentag) abweicht.
+"""
+
+import warnings
+import time
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+from sqlalchemy import select, func
+from sqlalchemy import table as sa_table, column as sa_column, types as sa_types
+
+from data_quality import logger
+
+# Zeitspalte und Gruppierungsspalten der Protokolltabellen
+ZEITREIHEN_KONFIGURATION = {
+    "tblactivity_logs": {"time": "created_at", "groups": ["action_type", "component"]},
+    "tbllogin_logs": {"time": "timestamp", "groups": ["event_type"]},
+}
+
+# Intervalle mit Länge des gleitenden Fensters und der Saisons (jeweils in Intervallen,
+# bevorzugte zuerst): stündlich eine Woche und dieselbe Stunde der Vorwochen bzw.
+# Vortage, täglich vier Wochen und derselbe Wochentag der Vorwochen
+ZEITREIHEN_INTERVALLE = {
+    "hour": {"freq": 'h', "window": 168, "seasons": (168, 24), "sqlite": '%Y-%m-%d %H:00:00'},
+    "day": {"freq": 'D', "window": 28, "seasons": (7,), "sqlite": '%Y-%m-%d'},
+}
+
+# Anzahl der Vorsaisons für die saisonale Basislinie
+ZEITREIHEN_SAISONS = 4
+
+# Robuster z-Wert, ab dem ein Intervall als auffällig gilt, und Mindestanzahl von
+# Ereignissen (beobachtet oder erwartet), unterhalb derer nichts gemeldet wird
+ZEITREIHEN_SCHWELLE = 4.0
+ZEITREIHEN_MIN_ANZAHL = 5
+
+# Standard-Zeitraum in Tagen und Höchstzahl gemeldeter Auffälligkeiten
+ZEITREIHEN_TAGE = 365
+ZEITREIHEN_MAX_ANOMALIEN = 50
+
+def zeitreihen_zaehlen(engine: 'sqlalchemy.engine.Engine', table_name: str, zeitspalte: str,
+                       gruppen: List[str], intervall: str, von: datetime, bis: datetime) -> pd.DataFrame:
+    """
+    Zählt die Zeilen je Zeitintervall und Gruppe mit einer gruppierten Abfrage in der Datenbank.
+    
+    Unter PostgreSQL wird date_trunc verwendet, unter SQLite strftime. Die Bedingung
+    auf der Zeitspalte kann den Index auf der Zeitspalte nutzen.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        zeitspalte: Spalte mit dem Zeitstempel
+        gruppen: Gruppierungsspalten
+        intervall: Schlüssel aus ZEITREIHEN_INTERVALLE
+        von: Beginn des Zeitraums (einschließlich)
+        bis: Ende des Zeitraums (ausschließlich)
+        
+    Returns:
+        DataFrame mit den Spalten bucket, den Gruppierungsspalten und count
+    """
+    zeit = sa_column(zeitspalte, sa_types.DateTime)
+    quelle = sa_table(table_name, zeit, *[sa_column(g) for g in gruppen])
+    if engine.dialect.name == 'postgresql':
+        bucket = func.date_trunc(intervall, quelle.c[zeitspalte])
+    elif engine.dialect.name == 'sqlite':
+        bucket = func.strftime(ZEITREIHEN_INTERVALLE[intervall]["sqlite"], quelle.c[zeitspalte])
+    else:
+        raise ValueError(f"Zeitreihen werden nur unter PostgreSQL und SQLite unterstützt, nicht {engine.dialect.name}.")
+    
+    spalten = [quelle.c[g] for g in gruppen]
+    abfrage = (select(bucket.label('bucket'), *spalten, func.count().label('count'))
+               .where(quelle.c[zeitspalte] >= von, quelle.c[zeitspalte] < bis)
+               .group_by(bucket, *spalten))
+    with engine.connect() as conn:
+        zeilen = conn.execute(abfrage).all()
+    
+    df = pd.DataFrame(zeilen, columns=['bucket'] + gruppen + ['count'])
+    df['bucket'] = pd.to_datetime(df['bucket'])
+    if getattr(df['bucket'].dt, 'tz', None) is not None:
+        df['bucket'] = df['bucket'].dt.tz_convert(None)
+    for g in gruppen:
+        df[g] = df[g].astype(object).where(df[g].notna(), '(leer)').astype(str)
+    return df
+
+def zeitreihen_anomalien(reihen: pd.DataFrame, intervall: str, schwelle: float = ZEITREIHEN_SCHWELLE,
+                         min_anzahl: int = ZEITREIHEN_MIN_ANZAHL) -> pd.DataFrame:
+    """
+    Sucht auffällige Intervalle in Zählreihen.
+    
+    Erwartet wird je Intervall der Median derselben Position in den letzten
+    ZEITREIHEN_SAISONS Saisons (z. B. dieselbe Stunde der Vorwochen, solange diese
+    fehlen der Vortage); ohne solche Historie der gleitende Median des
+    vorangehenden Fensters. Die Streuung
+    ist der gleitende Median der absoluten Abweichungen (MAD, mindestens die
+    Poisson-Streuung der Erwartung). Alle Berechnungen laufen spaltenweise über alle
+    Reihen gleichzeitig.
+    
+    Args:
+        reihen: Zählwerte mit einem lückenlosen DatetimeIndex, eine Spalte je Reihe
+        intervall: Schlüssel aus ZEITREIHEN_INTERVALLE
+        schwelle: Robuster z-Wert, ab dem ein Intervall auffällig ist
+        min_anzahl: Mindestens so viele Ereignisse beobachtet oder erwartet
+        
+    Returns:
+        DataFrame mit series, bucket, count, expected, score und kind ('spike' oder 'drop')
+    """
+    einstellung = ZEITREIHEN_INTERVALLE[intervall]
+    fenster = einstellung["window"]
+    werte = reihen.astype(float)
+    
+    # Nur Vergangenheit: das aktuelle Intervall geht nicht in seine eigene Basislinie ein
+    gleitend = werte.shift(1).rolling(fenster, min_periods=max(fenster // 4, 2)).median()
+    erwartet = gleitend.to_numpy()
+    # Kürzere Saisons zuerst, damit die längste verfügbare zuletzt gesetzt wird
+    for saison in reversed(einstellung["seasons"]):
+        vorsaisons = np.stack([werte.shift(saison * i).to_numpy() for i in range(1, ZEITREIHEN_SAISONS + 1)])
+        with warnings.catch_warnings():
+            # Intervalle ohne jede Vorsaison ergeben NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            saisonal = np.nanmedian(vorsaisons, axis=0)
+        erwartet = np.where((~np.isnan(vorsaisons)).sum(axis=0) >= 2, saisonal, erwartet)
+    erwartet = pd.DataFrame(erwartet, index=werte.index, columns=werte.columns)
+    
+    abweichung = (werte - erwartet).abs()
+    mad = abweichung.shift(1).rolling(fenster, min_periods=max(fenster // 4, 2)).median() * 1.4826
+    streuung = np.maximum(mad, np.sqrt(erwartet.clip(lower=1.0)))
+    score = (werte - erwartet) / streuung
+    
+    auffaellig = (score.abs() >= schwelle) & (np.maximum(werte, erwartet) >= min_anzahl)
+    if not auffaellig.to_numpy().any():
+        return pd.DataFrame(columns=['series', 'bucket', 'count', 'expected', 'score', 'kind'])
+    
+    ergebnis = pd.DataFrame({
+        'count': werte.stack(),
+        'expected': erwartet.stack(),
+        'score': score.stack(),
+        'flag': auffaellig.stack(),
+    })
+    ergebnis = ergebnis[ergebnis['flag']].drop(columns='flag')
+    ergebnis.index.names = ['bucket', 'series']
+    ergebnis = ergebnis.reset_index()
+    ergebnis['kind'] = np.where(ergebnis['score'] > 0, 'spike', 'drop')
+    return ergebnis[['series', 'bucket', 'count', 'expected', 'score', 'kind']]
+
+def zeitreihen_pruefen(engine: 'sqlalchemy.engine.Engine', table_name: str, zeitspalte: Optional[str] = None,
+                       gruppen: Optional[List[str]] = None, intervall: str = 'hour', tage: int = ZEITREIHEN_TAGE,
+                       schwelle: float = ZEITREIHEN_SCHWELLE,
+                       max_anomalien: int = ZEITREIHEN_MAX_ANOMALIEN) -> Dict[str, Any]:
+    """
+    Sucht auffällige Mengen je Zeitintervall in einer Protokolltabelle.
+    
+    Die Zeilen werden mit einer gruppierten Abfrage in der Datenbank je Intervall
+    und Kombination der Gruppierungsspalten gezählt (zeitreihen_zaehlen); nur dieses
+    kleine Ergebnis wird geladen. Daraus entstehen die Gesamtreihe und je
+    Gruppierungsspalte eine Reihe pro Wert, die zeitreihen_anomalien auswertet. Das
+    laufende, noch unvollständige Intervall wird nicht berücksichtigt.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table_name: Name der Tabelle
+        zeitspalte: Spalte mit dem Zeitstempel (Standard: ZEITREIHEN_KONFIGURATION bzw. 'created_at')
+        gruppen: Gruppierungsspalten (Standard: ZEITREIHEN_KONFIGURATION bzw. keine)
+        intervall: 'hour' oder 'day'
+        tage: Betrachteter Zeitraum in Tagen bis heute
+        schwelle: Robuster z-Wert, ab dem ein Intervall auffällig ist
+        max_anomalien: Höchstzahl gemeldeter Auffälligkeiten (die stärksten zuerst)
+        
+    Returns:
+        Dictionary mit Zeitraum, Anzahl der Intervalle, Reihen und Zeilen sowie den
+        Auffälligkeiten ("anomalies")
+    """
+    if intervall not in ZEITREIHEN_INTERVALLE:
+        raise ValueError(f"Unbekanntes Intervall: {intervall}. Unterstützt: {', '.join(ZEITREIHEN_INTERVALLE)}")
+    vorgabe = ZEITREIHEN_KONFIGURATION.get(table_name, {})
+    zeitspalte = zeitspalte or vorgabe.get("time", 'created_at')
+    gruppen = list(gruppen if gruppen is not None else vorgabe.get("groups", []))
+    freq = ZEITREIHEN_INTERVALLE[intervall]["freq"]
+    
+    bis = pd.Timestamp.now().floor(freq).to_pydatetime()
+    von = (pd.Timestamp(bis) - pd.Timedelta(days=tage)).floor(freq).to_pydatetime()
+    start = time.perf_counter()
+    zaehlung = zeitreihen_zaehlen(engine, table_name, zeitspalte, gruppen, intervall, von, bis)
+    logger.info(f"{table_name}: {len(zaehlung)} Gruppen je {intervall} in {time.perf_counter() - start:.2f} s gezählt")
+    
+    ergebnis = {
+        "table": table_name,
+        "time_column": zeitspalte,
+        "groups": gruppen,
+        "interval": intervall,
+        "from": von.isoformat(),
+        "to": bis.isoformat(),
+        "rows": int(zaehlung['count'].sum()),
+        "anomalies": [],
+        "anomaly_count": 0,
+    }
+    if zaehlung.empty:
+        ergebnis.update(buckets=0, series=0)
+        return ergebnis
+    
+    # Lückenloser Index ab dem ersten Intervall mit Daten; fehlende Intervalle zählen 0
+    index = pd.date_range(zaehlung['bucket'].min(), pd.Timestamp(bis) - pd.Timedelta(1, unit=freq), freq=freq)
+    reihen = {"gesamt": zaehlung.groupby('bucket')['count'].sum()}
+    for g in gruppen:
+        breit = zaehlung.pivot_table(index='bucket', columns=g, values='count', aggfunc='sum')
+        for wert in breit.columns:
+            reihen[f"{g}={wert}"] = breit[wert]
+    reihen = pd.DataFrame(reihen).reindex(index, fill_value=0).fillna(0)
+    
+    anomalien = zeitreihen_anomalien(reihen, intervall, schwelle=schwelle)
+    anomalien = anomalien.reindex(anomalien['score'].abs().sort_values(ascending=False).index)
+    ergebnis.update(
+        buckets=len(index),
+        series=reihen.shape[1],
+        anomaly_count=len(anomalien),
+        anomalies=[{
+            "series": zeile["series"],
+            "bucket": zeile["bucket"].isoformat(),
+            "count": int(zeile["count"]),
+            "expected": round(float(zeile["expected"]), 2),
+            "score": round(float(zeile["score"]), 2),
+            "kind": zeile["kind"],
+        } for zeile in anomalien.head(max_anomalien).to_dict('records')],
+    )
+    return ergebnis
+
+def zeitreihen_ausgeben(ergebnis: Dict[str, Any]) -> None:
+    """
+    Gibt das Ergebnis von zeitreihen_pruefen zusammengefasst aus.
+    """
+    print(f"{ergebnis['table']} je {ergebnis['interval']} ({ergebnis['from'][:10]} bis {ergebnis['to'][:10]}): "
+          f"{ergebnis['rows']} Zeilen, {ergebnis['series']} Reihen, {ergebnis['anomaly_count']} Auffälligkeiten")
+    for eintrag in ergebnis["anomalies"][:10]:
+        art = "Spitze" if eintrag["kind"] == 'spike' else "Einbruch"
+        print(f"  • {eintrag['bucket']} {eintrag['series']}: {art}, {eintrag['count']} statt ca. "
+              f"{eintrag['expected']:.0f} (z = {eintrag['score']:+.1f})")
@@ -9,40 +9,743 @@ Dieses Skript führt Datenqualitätsprüfungen für die Bau-Structura-Datenbank
 Es erstellt Datenprofile, identifiziert Ausreißer und validiert Daten gegen Erwartungen.
 
 Verwendung:
-    python run_quality_check.py [--table TABELLE] [--profile] [--outliers] [--validate]
+    python run_quality_check.py [--table TABELLE] [--profile] [--outliers [--multivariate]] [--validate] [--sample-fraction P | --sample-rows N] [--chunk-size N] [--pushdown] [--incremental] [--jobs N] [--attachments [--attachment-hash]] [--references] [--duplicates] [--timeseries] [--deadline ZEIT] [--priority TABELLE=N] [--no-sketches] [--metrics-file DATEI] [--trace-file DATEI]
 """
 
 import os
 import sys
 import argparse
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from data_quality import (
     get_db_connection, get_table_list, table_to_dataframe,
-    profil_erstellen, erstelle_expectations_suite, 
-    teste_daten_gegen_erwartungen, identifiziere_ausreisser
+    profil_erstellen,
+    teste_daten_gegen_erwartungen, identifiziere_ausreisser_batch, grafikdaten_berechnen, grafiken_rendern,
+    table_to_chunks, statistiken_berechnen_streaming, ausreissergrenzen_aus_statistiken,
+    zaehle_ausreisser_streaming, erstelle_expectations_suite_aus_statistiken,
+    teste_daten_gegen_erwartungen_streaming, spaltenstatistiken_sql, zaehle_ausreisser_sql,
+    teste_daten_gegen_erwartungen_sql, pruefe_tabelle_inkrementell, DEFAULT_CHUNK_SIZE,
+    spaltenstatistiken_berechnen, profilkennzahlen_aus_statistiken, PROFIL_STUFEN,
+    stichprobe_definieren, geschaetzte_zeilenzahl, wilson_intervall, ausreissergrenzen_intervall,
+    STICHPROBEN_METHODEN, tabellen_fingerabdruck, cache_schluessel, cache_laden, cache_speichern,
+    cache_bereinigen, CACHE_TTL_TAGE, CACHE_MAX_MB, LADEVERFAHREN, tabellenspalten,
+    abschnitt_messen, prometheus_textdatei_schreiben, chrome_trace_schreiben, sketches_berechnen,
+    sketches_speichern, drift_gegen_historie, VALIDIERUNGS_BACKENDS
 )
+from dq_anhaenge import anhaenge_pruefen, anhaenge_ausgeben, ANHANG_THREADS
+from dq_duplikate import duplikate_finden, duplikate_ausgeben, DUPLIKAT_KONFIGURATION
+from dq_multivariat import (
+    identifiziere_ausreisser_multivariat, identifiziere_ausreisser_multivariat_streaming, multivariat_ausgeben
+)
+from dq_referenzen import referenzen_pruefen, referenzen_ausgeben
+from dq_zeitplan import (
+    laufzeiten_aus_historie, kosten_schaetzen, zeitplan_erstellen, deadline_lesen, PLAN_ZUSCHLAG_AUFGESCHOBEN
+)
+from dq_zeitreihen import zeitreihen_pruefen, zeitreihen_ausgeben, ZEITREIHEN_KONFIGURATION, ZEITREIHEN_INTERVALLE
 
 # Konfiguration
 REPORT_DIR = Path("./data_quality_reports")
 REPORT_DIR.mkdir(exist_ok=True)
 
-def main():
+def ist_binaer(spalte: dict) -> bool:
+    """
+    Prüft anhand der Spaltenstatistik, ob eine Spalte höchstens zwei unterschiedliche Werte hat.
+    """
+    if spalte.get("nunique") is not None:
+        return spalte["nunique"] <= 2
+    return spalte["values"] is not None and len(spalte["values"]) <= 2
+
+def _cache_schluessel_fuer(args: argparse.Namespace) -> str:
+    """
+    Bildet den Cache-Schlüssel aus den Optionen, die das Ergebnis einer Tabellenprüfung beeinflussen.
+    """
+    return cache_schluessel(
+        art="pruefung", profile=args.profile, outliers=args.outliers, validate=args.validate,
+        limit=args.limit, chunk_size=args.chunk_size, pushdown=args.pushdown, stichprobe=args.stichprobe,
+        profile_tier=args.profile_tier, profile_budget=args.profile_budget, charts=not args.no_charts, compact=args.compact,
+        validation_backend=args.validation_backend,
+        sketches=not args.no_sketches, multivariate=args.multivariate,
+        report_dir=str(REPORT_DIR)
+    )
+
+def _ergebnisdateien(ergebnis: dict) -> list:
+    """
+    Sammelt die Berichtsdateien, auf die ein Prüfergebnis verweist.
+    """
+    dateien = []
+    if "file" in ergebnis.get("profile", {}):
+        dateien.append(ergebnis["profile"]["file"])
+    for spalte in ergebnis.get("outliers", {}).values():
+        if isinstance(spalte, dict) and spalte.get("chart"):
+            dateien.append(spalte["chart"])
+    for schluessel in ("expectations_file", "result_file"):
+        if schluessel in ergebnis.get("validation", {}):
+            dateien.append(ergebnis["validation"][schluessel])
+    return dateien
+
+def _stichprobenwerte(df, stats: dict, column: str, n_rows: int):
+    """
+    Liefert die Werte einer Spalte für Konfidenzintervalle: die geladene Stichprobe
+    bzw. das Reservoir aus den Streaming-Statistiken (None, wenn keine Werte vorliegen).
+    """
+    if df is not None and df.shape[0] == n_rows:
+        return df[column]
+    if len(stats["columns"][column]["reservoir"]) > 0:
+        return stats["columns"][column]["reservoir"]
+    return None
+
+def zeilenerfolgsquoten(result) -> list:
+    """
+    Berechnet je Erwartung den Anteil gültiger Zeilen mit 95%-Konfidenzintervall.
+    
+    Args:
+        result: ExpectationSuiteValidationResult einer Stichprobe
+        
+    Returns:
+        Liste mit "expectation", "column", "pass_rate" und "ci" je Erwartung mit Zeilenzählung
+    """
+    quoten = []
+    for r in result.results:
+        werte = r.result or {}
+        if werte.get("element_count") is None or werte.get("unexpected_count") is None:
+            continue
+        n = werte["element_count"] - (werte.get("missing_count") or 0)
+        gueltig = n - werte["unexpected_count"]
+        quoten.append({
+            "expectation": r.expectation_config.expectation_type,
+            "column": r.expectation_config.kwargs.get("column"),
+            "pass_rate": gueltig / n if n else 1.0,
+            "ci": list(wilson_intervall(gueltig, n)),
+        })
+    return quoten
+
+def pruefe_tabelle(engine, table: str, args: argparse.Namespace) -> dict:
+    """
+    Führt die ausgewählten Prüfungen für eine Tabelle durch.
+    
+    Fehler werden abgefangen und im Ergebnis unter "error" vermerkt, damit
+    eine fehlerhafte Tabelle die übrigen Prüfungen nicht abbricht.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table: Name der Tabelle
+        args: Kommandozeilenargumente (profile, outliers, validate, limit, chunk_size, pushdown,
+            incremental, watermark_column, no_sketches)
+        
+    Returns:
+        Dictionary mit den Ergebnissen für die Zusammenfassung; die gemessenen
+        Abschnitte (siehe abschnitt_messen) stehen unter "_timings"
+    """
+    print(f"=== Prüfe Tabelle: {table} ===")
+    abschnitte = []
+    ergebnis = {"_timings": abschnitte}
+    
+    def messen(name: str):
+        return abschnitt_messen(abschnitte, name, table=table)
+    
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if args.incremental:
+            with messen("incremental"):
+                ergebnis.update(pruefe_tabelle_inkrementell_ausgeben(engine, table, args))
+            print("\n--- Prüfung abgeschlossen ---")
+            return ergebnis
+        
+        # Unveränderte Tabellen nicht erneut prüfen
+        if not args.no_cache:
+            with messen("cache_lookup"):
+                fingerabdruck = tabellen_fingerabdruck(engine, table)
+                schluessel = _cache_schluessel_fuer(args)
+                eintrag = cache_laden(table, fingerabdruck, schluessel, ttl_tage=args.cache_ttl)
+            if eintrag is not None:
+                print(f"Tabelle unverändert seit {eintrag['created']}, verwende vorhandene Ergebnisse.")
+                for datei in eintrag["files"]:
+                    print(f"  • {datei}")
+                ergebnis.update(eintrag["result"])
+                ergebnis["cache"] = {"hit": True, "created": eintrag["created"]}
+                print("\n--- Prüfung abgeschlossen ---")
+                return ergebnis
+        
+        # Sketches für die Drift-Erkennung nur, wenn die Tabelle vollständig gelesen wird
+        mit_sketches = not (args.no_sketches or args.pushdown or args.limit or args.stichprobe)
+        
+        # Daten laden
+        if args.pushdown:
+            # Statistiken werden in der Datenbank berechnet; Zeilen werden nur für das Profil übertragen
+            with messen("stats") as abschnitt:
+                stats = spaltenstatistiken_sql(engine, table, limit=args.limit, stichprobe=args.stichprobe)
+                abschnitt["rows"] = stats["rows"]
+            n_rows, n_cols = stats["rows"], len(stats["columns"])
+            print(f"Statistiken per SQL berechnet: {n_rows} Zeilen, {n_cols} Spalten")
+            df = None
+            if args.profile:
+                with messen("load") as abschnitt:
+                    df = table_to_dataframe(engine, table, limit=args.limit, stichprobe=args.stichprobe,
+                                            loader=args.loader, kompakt=args.compact)
+                    abschnitt["rows"] = len(df)
+        elif args.chunk_size:
+            # Im Streaming-Modus bleibt nur der Statistikzustand (und ggf. eine
+            # Zeilenstichprobe für das Profil) im Speicher
+            with messen("load") as abschnitt:
+                stats = statistiken_berechnen_streaming(
+                    table_to_chunks(engine, table, chunk_size=args.chunk_size, limit=args.limit, stichprobe=args.stichprobe),
+                    stichprobe_zeilen=args.chunk_size if args.profile else 0,
+                    mit_sketches=mit_sketches
+                )
+                abschnitt["rows"] = stats["rows"]
+            df = stats.get("sample")
+            n_rows, n_cols = stats["rows"], len(stats["columns"])
+            print(f"Daten blockweise gelesen: {n_rows} Zeilen, {n_cols} Spalten")
+        else:
+            with messen("load") as abschnitt:
+                # Ohne Profil und Validierung werden nur die numerischen Spalten benötigt
+                spalten = None
+                if args.outliers and not (args.profile or args.validate):
+                    spalten = tabellenspalten(engine, table, arten=('numeric',))
+                    # Sketches einzelner Spalten würden die Historie der Tabelle verfälschen
+                    mit_sketches = False
+                df = table_to_dataframe(engine, table, limit=args.limit, stichprobe=args.stichprobe,
+                                        loader=args.loader, columns=spalten, kompakt=args.compact)
+                abschnitt["rows"] = len(df)
+            n_rows, n_cols = df.shape
+            print(f"Daten geladen: {n_rows} Zeilen, {n_cols} Spalten")
+            # Ein gemeinsamer Durchlauf liefert die Statistiken für Profil, Ausreißer und Validierung
+            with messen("stats") as abschnitt:
+                stats = spaltenstatistiken_berechnen(df)
+                abschnitt["rows"] = n_rows
+        
+        if df is not None and "memory" in df.attrs:
+            bericht = df.attrs["memory"]
+            ergebnis["memory"] = {"before_mb": bericht["before"] / 1e6, "after_mb": bericht["after"] / 1e6,
+                                  "columns": bericht["columns"]}
+            print(f"Speicherbedarf: {bericht['before'] / 1e6:.1f} MB -> {bericht['after'] / 1e6:.1f} MB")
+        
+        # Verteilungen mit den gespeicherten Sketches früherer Läufe vergleichen
+        if mit_sketches:
+            with messen("sketches") as abschnitt:
+                sketches = stats["sketches"] if args.chunk_size else sketches_berechnen(df)
+                abschnitt["rows"] = sketches["rows"]
+                drift = drift_gegen_historie(table, sketches)
+                sketches_speichern(table, sketches)
+            if drift is not None:
+                auffaellig = {c: sp for c, sp in drift["columns"].items() if sp["status"] not in ("stabil", "unbekannt")}
+                ergebnis["drift"] = {"reference_run": drift["reference_runs"][-1], "rows_change": drift["rows_change"],
+                                     "columns": drift["columns"]}
+                print(f"Drift gegenüber {drift['reference_runs'][-1]}: {len(auffaellig)} auffällige Spalte(n)")
+                for column, spalte in auffaellig.items():
+                    psi = f"PSI {spalte['psi']:.3f}" if spalte.get("psi") is not None else "neue Spalte"
+                    print(f"  • {column}: {spalte['status']} ({psi})")
+        
+        # Bei einer Stichprobe werden Kennzahlen mit Stichprobengröße und Konfidenzintervall berichtet
+        if args.stichprobe is not None:
+            population_rows = geschaetzte_zeilenzahl(engine, table)
+            print(f"Stichprobe: {n_rows} von ca. {population_rows} Zeilen")
+            ergebnis["sample"] = dict(args.stichprobe, sample_rows=n_rows, population_rows=population_rows)
+        
+        # Datenprofil erstellen
+        if args.profile:
+            print("\n--- Erstelle Datenprofil ---")
+            profile_file = f"profil_{table}_{timestamp}.html"
+            profile_path = REPORT_DIR / profile_file
+            
+            with messen("profile") as abschnitt:
+                profile = profil_erstellen(df, str(profile_path), f"Datenprofil für {table}",
+                                           stufe=args.profile_tier, zeitbudget=args.profile_budget)
+                abschnitt["rows"] = len(df)
+            print(f"Datenprofil erstellt: {profile_path} (Profilstufe: {profile.profilstufe['tier']})")
+            
+            # Speichere Profil-Metadaten in der Zusammenfassung (fehlende Werte aus den
+            # Statistiken der gesamten Tabelle, auch wenn das Profil auf einer Stichprobe beruht)
+            kennzahlen = profilkennzahlen_aus_statistiken(stats)
+            ergebnis["profile"] = {
+                "file": str(profile_path),
+                "variables": n_cols,
+                "observations": n_rows,
+                "missing_cells": kennzahlen["missing_cells"],
+                "missing_percent": kennzahlen["missing_percent"]
+            }
+            if df.shape[0] != n_rows:
+                ergebnis["profile"]["sample_rows"] = df.shape[0]
+            ergebnis["profile"]["tier"] = profile.profilstufe["tier"]
+            if profile.profilstufe["correlation_sample_rows"] is not None:
+                ergebnis["profile"]["correlation_sample_rows"] = profile.profilstufe["correlation_sample_rows"]
+                ergebnis["profile"]["stratified_by"] = profile.profilstufe["stratified_by"]
+        
+        # Ausreißeranalyse für numerische Spalten
+        if args.outliers:
+            print("\n--- Führe Ausreißeranalyse durch ---")
+            with messen("outliers") as abschnitt:
+                abschnitt["rows"] = n_rows
+                numeric_columns = [c for c, sp in stats["columns"].items() if sp["kind"] == 'numeric']
+            
+                if len(numeric_columns) == 0:
+                    print("Keine numerischen Spalten für Ausreißeranalyse gefunden.")
+                    ergebnis["outliers"] = {"status": "no_numeric_columns"}
+                else:
+                    outlier_results = {}
+                    grenzen_je_spalte = {}
+                    for column in numeric_columns:
+                        if ist_binaer(stats["columns"][column]):  # Überspringe binäre Spalten
+                            continue
+                        try:
+                            grenzen_je_spalte[column] = ausreissergrenzen_aus_statistiken(stats["columns"][column], methode='iqr')
+                        except Exception as e:
+                            print(f"  • Fehler bei Ausreißeranalyse in {column}: {e}")
+                            outlier_results[column] = {"error": str(e)}
+                
+                    # Ausreißer aller Spalten gemeinsam zählen
+                    if args.pushdown:
+                        anzahl = zaehle_ausreisser_sql(engine, table, grenzen_je_spalte, limit=args.limit,
+                                                       stichprobe=args.stichprobe)
+                    elif args.chunk_size:
+                        anzahl = zaehle_ausreisser_streaming(
+                            table_to_chunks(engine, table, chunk_size=args.chunk_size, limit=args.limit,
+                                            stichprobe=args.stichprobe),
+                            grenzen_je_spalte
+                        )
+                    else:
+                        tabelle = identifiziere_ausreisser_batch(df, list(grenzen_je_spalte), methode='iqr', stats=stats)
+                        anzahl = tabelle['count'].to_dict()
+                
+                    for column, grenzen in grenzen_je_spalte.items():
+                        outlier_count = int(anzahl[column])
+                        outlier_percent = outlier_count / n_rows * 100 if n_rows else 0.0
+                        print(f"\nAusreißer in Spalte {column}: {outlier_count} ({outlier_percent:.2f}%)")
+                        print(f"  • Grenzen: Untere = {grenzen['lower']:.2f}, Obere = {grenzen['upper']:.2f}")
+                        outlier_results[column] = {
+                            "count": outlier_count,
+                            "percent": outlier_percent,
+                            "bounds": grenzen,
+                            "chart": None
+                        }
+                        if args.stichprobe is not None:
+                            intervall = wilson_intervall(outlier_count, n_rows)
+                            outlier_results[column]["sample_rows"] = n_rows
+                            outlier_results[column]["percent_ci"] = [intervall[0] * 100, intervall[1] * 100]
+                            outlier_results[column]["estimated_count"] = round(outlier_count / n_rows * population_rows) if n_rows else 0
+                            print(f"  • 95%-Konfidenzintervall: {intervall[0]:.2%} bis {intervall[1]:.2%}")
+                            werte = _stichprobenwerte(df, stats, column, n_rows)
+                            if werte is not None:
+                                outlier_results[column]["bounds_ci"] = {
+                                    k: list(v) for k, v in ausreissergrenzen_intervall(werte).items()
+                                }
+                
+                    # Grafikaufträge enthalten nur vorberechnete Kennzahlen; gezeichnet wird
+                    # gesammelt nach allen Tabellen (siehe grafiken_rendern)
+                    if not args.no_charts:
+                        auftraege = []
+                        for column, grenzen in grenzen_je_spalte.items():
+                            if df is not None and df.shape[0] == n_rows:
+                                werte, stichprobe = df[column], False
+                            elif len(stats["columns"][column]["reservoir"]) > 0:
+                                werte = stats["columns"][column]["reservoir"]
+                                stichprobe = len(werte) < stats["columns"][column]["count"]
+                            else:
+                                continue
+                            try:
+                                daten = grafikdaten_berechnen(werte, column, grenzen, stichprobe=stichprobe)
+                            except Exception as e:
+                                print(f"  • Fehler beim Erstellen der Ausreißergrafik für {column}: {e}")
+                                continue
+                            fig_path = REPORT_DIR / f"ausreisser_{table}_{column}_{timestamp}.png"
+                            auftraege.append({"daten": daten, "pfad": str(fig_path), "spalte": column})
+                            outlier_results[column]["chart"] = str(fig_path)
+                        ergebnis["_grafikauftraege"] = auftraege
+                
+                    ergebnis["outliers"] = outlier_results
+            
+            if args.multivariate:
+                with messen("outliers_multivariate") as abschnitt:
+                    try:
+                        if df is not None and df.shape[0] == n_rows:
+                            mv = identifiziere_ausreisser_multivariat(df, table_name=table)
+                        else:
+                            # Im Streaming- und Pushdown-Modus wird die Tabelle zweimal blockweise gelesen
+                            mv = identifiziere_ausreisser_multivariat_streaming(
+                                engine, table, chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE, limit=args.limit)
+                        abschnitt["rows"] = mv["scored_rows"]
+                        print()
+                        multivariat_ausgeben(mv, anzahl=5)
+                        ergebnis["multivariate_outliers"] = mv
+                    except ValueError as e:
+                        print(f"Keine multivariate Ausreißeranalyse: {e}")
+                        ergebnis["multivariate_outliers"] = {"status": str(e)}
+        
+        # Datenvalidierung mit automatisch erstellten Erwartungen
+        if args.validate:
+            print("\n--- Validiere Daten gegen Erwartungen ---")
+            
+            # Erwartungssuite erstellen
+            suite_name = f"{table}_suite_{timestamp}"
+            with messen("suite"):
+                suite = erstelle_expectations_suite_aus_statistiken(stats, suite_name=suite_name)
+            
+            # Erwartungssuite speichern
+            suite_file = f"erwartungen_{table}_{timestamp}.json"
+            suite_path = REPORT_DIR / suite_file
+            
+            with messen("io"):
+                with open(suite_path, 'w') as f:
+                    json.dump(suite.to_json_dict(), f, indent=2)
+            print(f"Erwartungssuite gespeichert: {suite_path}")
+            
+            # Daten validieren
+            with messen("validate") as abschnitt:
+                abschnitt["rows"] = n_rows
+                if args.pushdown:
+                    result = teste_daten_gegen_erwartungen_sql(engine, table, suite, limit=args.limit,
+                                                               stichprobe=args.stichprobe)
+                elif args.chunk_size:
+                    result = teste_daten_gegen_erwartungen_streaming(
+                        table_to_chunks(engine, table, chunk_size=args.chunk_size, limit=args.limit,
+                                        stichprobe=args.stichprobe), suite, backend=args.validation_backend
+                    )
+                else:
+                    result = teste_daten_gegen_erwartungen(df, suite, stats=stats, backend=args.validation_backend)
+            
+            # Ergebnisse speichern
+            result_file = f"validierung_{table}_{timestamp}.json"
+            result_path = REPORT_DIR / result_file
+            
+            with messen("io"):
+                with open(result_path, 'w') as f:
+                    json.dump(result.to_json_dict(), f, indent=2)
+            print(f"Validierungsergebnis gespeichert: {result_path}")
+            
+            # Erfolgsrate berechnen
+            success_rate = result.statistics['successful_expectations'] / result.statistics['evaluated_expectations']
+            success_percent = success_rate * 100
+            print(f"Erfolgsrate: {success_rate:.2%} ({result.statistics['successful_expectations']} von {result.statistics['evaluated_expectations']} Tests bestanden)")
+            
+            ergebnis["validation"] = {
+                "expectations_file": str(suite_path),
+                "result_file": str(result_path),
+                "success_rate": success_rate,
+                "success_percent": success_percent,
+                "total_expectations": result.statistics['evaluated_expectations'],
+                "successful_expectations": result.statistics['successful_expectations']
+            }
+            if args.stichprobe is not None:
+                ergebnis["validation"]["sample_rows"] = n_rows
+                ergebnis["validation"]["row_pass_rates"] = zeilenerfolgsquoten(result)
+        
+        if not args.no_cache:
+            zu_speichern = {k: v for k, v in ergebnis.items() if not k.startswith('_')}
+            with messen("io"):
+                cache_speichern(table, fingerabdruck, schluessel, zu_speichern, _ergebnisdateien(zu_speichern))
+        
+        print("\n--- Prüfung abgeschlossen ---")
+        
+    except Exception as e:
+        print(f"Fehler bei der Prüfung von {table}: {e}")
+        ergebnis["error"] = str(e)
+    
+    return ergebnis
+
+def pruefe_tabelle_inkrementell_ausgeben(engine, table: str, args: argparse.Namespace) -> dict:
+    """
+    Führt die inkrementelle Prüfung einer Tabelle durch und gibt das Ergebnis aus.
+    
+    Returns:
+        Dictionary mit den Einträgen "incremental", "profile" und ggf. "validation"
+    """
+    print("\n--- Inkrementelle Prüfung ---")
+    inkrement = pruefe_tabelle_inkrementell(
+        engine, table,
+        watermark_column=args.watermark_column,
+        chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE
+    )
+    profil = inkrement.pop("profile")
+    validierung = inkrement.pop("validation")
+    
+    if inkrement["mode"] == "initial":
+        print(f"Erster Lauf: {inkrement['total_rows']} Zeilen gelesen, Erwartungssuite und Zustand gespeichert")
+    else:
+        print(f"Neue Zeilen seit dem letzten Lauf: {inkrement['new_rows']} (gesamt {inkrement['total_rows']})")
+    print(f"Watermark: {inkrement['watermark_column']} = {inkrement['watermark']}")
+    print(f"Fehlende Werte gesamt: {profil['missing_cells']} ({profil['missing_percent']:.2%})")
+    
+    ergebnis = {"incremental": inkrement, "profile": profil}
+    if validierung is not None and validierung["success_rate"] is not None:
+        print(f"Erfolgsrate (neue Zeilen): {validierung['success_rate']:.2%} "
+              f"({validierung['successful_expectations']} von {validierung['total_expectations']} Tests bestanden)")
+        ergebnis["validation"] = validierung
+    return ergebnis
+
+# Engine des jeweiligen Worker-Prozesses (siehe _worker_initialisieren)
+_worker_engine = None
+
+def _worker_initialisieren() -> None:
+    """
+    Erstellt im Worker-Prozess eine eigene Datenbankverbindung.
+    """
+    global _worker_engine
+    _worker_engine = get_db_connection()
+
+def _pruefe_tabelle_im_worker(table: str, args: argparse.Namespace, eintrag: dict = None,
+                              ende: datetime = None) -> dict:
+    return pruefe_tabelle_geplant(_worker_engine, table, args, eintrag, ende)
+
+def pruefe_tabelle_geplant(engine, table: str, args: argparse.Namespace, eintrag: dict = None,
+                           ende: datetime = None) -> dict:
+    """
+    Prüft eine Tabelle in dem Umfang, den der Zeitplan vorsieht.
+    
+    Aufgeschobene Tabellen und Tabellen, deren Start erst nach der Deadline
+    möglich wäre, werden nicht geprüft, sondern nur als aufgeschoben vermerkt.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt
+        table: Name der Tabelle
+        args: Kommandozeilenargumente
+        eintrag: Eintrag aus zeitplan_erstellen (None: volle Prüfung)
+        ende: Deadline (None: ohne Deadline)
+        
+    Returns:
+        Ergebnis von pruefe_tabelle mit dem Planeintrag unter "schedule"
+    """
+    if eintrag is None:
+        return pruefe_tabelle(engine, table, args)
+    
+    plan = {k: eintrag[k] for k in ("mode", "sample_fraction", "priority", "estimated_seconds")}
+    if eintrag["mode"] == 'deferred':
+        print(f"=== Tabelle {table} aufgeschoben: geschätzte Dauer passt nicht bis zur Deadline ===")
+        return {"schedule": dict(plan, reason="budget")}
+    if ende is not None and datetime.now() >= ende:
+        print(f"=== Tabelle {table} aufgeschoben: Deadline erreicht ===")
+        return {"schedule": dict(plan, mode='deferred', reason="deadline_reached")}
+    
+    if eintrag["mode"] != 'full':
+        # Herabgestufte Prüfung auf einer Stichprobe, 'minimal' zusätzlich ohne Profil
+        args = argparse.Namespace(**vars(args))
+        args.stichprobe = stichprobe_definieren(eintrag["sample_fraction"], None, args.sample_method, args.sample_seed)
+        if eintrag["mode"] == 'minimal':
+            args.profile = False
+        print(f"Zeitplan: {table} als '{eintrag['mode']}' mit {eintrag['sample_fraction']:.2%} der Zeilen")
+    ergebnis = pruefe_tabelle(engine, table, args)
+    ergebnis["schedule"] = plan
+    return ergebnis
+
+def pruefe_tabellen_parallel(engine, tables: list, args: argparse.Namespace, plan: dict = None,
+                             ende: datetime = None) -> dict:
+    """
+    Prüft mehrere Tabellen parallel in einem Prozesspool.
+    
+    Jeder Worker verwendet eine eigene Engine. Bricht ein Worker-Prozess ab,
+    wird der Fehler nur bei der betroffenen Tabelle vermerkt. Die Tabellen werden
+    in der Reihenfolge von tables übergeben, sodass der Pool der Startreihenfolge
+    eines Zeitplans folgt.
+    
+    Args:
+        engine: SQLAlchemy Engine-Objekt des Hauptprozesses
+        tables: Liste der zu prüfenden Tabellen
+        args: Kommandozeilenargumente (jobs gibt die Anzahl der Worker an)
+        plan: Planeinträge je Tabelle aus zeitplan_erstellen (None: volle Prüfung)
+        ende: Deadline (None: ohne Deadline)
+        
+    Returns:
+        Dictionary mit den Ergebnissen je Tabelle in der Reihenfolge von tables
+    """
+    # Verbindungen des Hauptprozesses dürfen nicht in die Worker vererbt werden
+    engine.dispose()
+    
+    ergebnisse = {table: {} for table in tables}
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=_worker_initialisieren) as executor:
+        futures = {executor.submit(_pruefe_tabelle_im_worker, table, args, (plan or {}).get(table), ende): table
+                   for table in tables}
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                ergebnisse[table] = future.result()
+            except Exception as e:
+                print(f"Fehler bei der Prüfung von {table}: {e}")
+                ergebnisse[table] = {"error": str(e)}
+            status = "mit Fehler" if "error" in ergebnisse[table] else "erfolgreich"
+            print(f"=== Tabelle {table} {status} abgeschlossen ===")
+            print()
+    return ergebnisse
+
+def grafiken_ausgeben(ergebnisse: dict, args: argparse.Namespace) -> int:
+    """
+    Zeichnet die gesammelten Ausreißergrafiken aller Tabellen und trägt Fehler ein.
+    
+    Die Aufträge werden aus den Ergebnissen entfernt, damit sie nicht in der
+    Zusammenfassung landen.
+    
+    Args:
+        ergebnisse: Ergebnisse je Tabelle aus pruefe_tabelle
+        args: Kommandozeilenargumente (jobs gibt die Anzahl der Worker an)
+        
+    Returns:
+        Anzahl der gezeichneten Grafiken
+    """
+    auftraege = []
+    for table, ergebnis in ergebnisse.items():
+        for auftrag in ergebnis.pop("_grafikauftraege", []):
+            auftraege.append((table, auftrag))
+    if not auftraege:
+        return 0
+    
+    print(f"--- Erstelle {len(auftraege)} Ausreißergrafiken ---")
+    fehler = grafiken_rendern([auftrag for _, auftrag in auftraege], jobs=args.jobs)
+    for table, auftrag in auftraege:
+        spalte = ergebnisse[table]["outliers"][auftrag["spalte"]]
+        if fehler.get(auftrag["pfad"]) is None:
+            print(f"  • Ausreißergrafik gespeichert: {auftrag['pfad']}")
+        else:
+            print(f"  • Fehler beim Erstellen der Ausreißergrafik für {table}.{auftrag['spalte']}: {fehler[auftrag['pfad']]}")
+            spalte["chart"] = None
+            spalte["chart_error"] = fehler[auftrag["pfad"]]
+    print()
+    return len(auftraege)
+
+def argumente_lesen(argv: list = None) -> argparse.Namespace:
+    """
+    Liest und prüft die Kommandozeilenargumente.
+    
+    Wird auch vom Dienstmodus in data_quality.py verwendet, der Prüfaufträge mit
+    denselben Optionen entgegennimmt.
+    
+    Args:
+        argv: Argumentliste (None für sys.argv)
+        
+    Returns:
+        Argumente mit der Stichprobe unter "stichprobe"; ohne gewählte Prüfung sind alle aktiviert
+    """
     parser = argparse.ArgumentParser(description='Datenqualitätsprüfung für Bau-Structura')
     parser.add_argument('--table', help='Zu prüfende Tabelle (leer für alle)')
     parser.add_argument('--profile', action='store_true', help='Datenprofile erstellen')
     parser.add_argument('--outliers', action='store_true', help='Ausreißeranalyse durchführen')
     parser.add_argument('--validate', action='store_true', help='Daten gegen Erwartungen validieren')
+    parser.add_argument('--multivariate', action='store_true',
+                        help='Bei --outliers zusätzlich Zeilen mit ungewöhnlicher Kombination numerischer Merkmale '
+                             'suchen (robuster Mahalanobis-Abstand)')
+    parser.add_argument('--profile-tier', choices=[eintrag["name"] for eintrag in PROFIL_STUFEN], default=None,
+                        help='Profilstufe (ohne Angabe automatisch nach Tabellengröße)')
+    parser.add_argument('--profile-budget', type=float, default=None,
+                        help='Geschätzte Höchstdauer je Profil in Sekunden für die Wahl der Profilstufe')
     parser.add_argument('--limit', type=int, default=None, help='Maximale Anzahl der zu ladenden Zeilen')
+    parser.add_argument('--sample-fraction', type=float, default=None,
+                        help='Zufallsstichprobe mit diesem Anteil der Zeilen statt der ganzen Tabelle (0 bis 1)')
+    parser.add_argument('--sample-rows', type=int, default=None,
+                        help='Zufallsstichprobe mit dieser Anzahl Zeilen (unter PostgreSQL im Pushdown-Modus ungefähr)')
+    parser.add_argument('--sample-method', choices=STICHPROBEN_METHODEN, default='bernoulli',
+                        help='TABLESAMPLE-Methode unter PostgreSQL (Standard: bernoulli)')
+    parser.add_argument('--sample-seed', type=int, default=0, help='Startwert für die Stichprobe')
+    parser.add_argument('--loader', choices=LADEVERFAHREN, default='sql',
+                        help="Ladeverfahren für ganze Tabellen ('copy' nutzt COPY ... TO STDOUT, nur PostgreSQL)")
+    parser.add_argument('--compact', action='store_true',
+                        help='Geladene Tabellen mit kleineren dtypes speichern (category, Arrow-Strings, '
+                             'verkleinerte Zahlen) und den Speicherbedarf in der Zusammenfassung berichten')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Streaming-Modus: Tabellen blockweise mit dieser Blockgröße laden '
+                             '(Profil und Ausreißergrafiken auf Zufallsstichproben)')
+    parser.add_argument('--pushdown', action='store_true',
+                        help='Statistiken, Ausreißergrenzen und Validierung per SQL in der Datenbank berechnen '
+                             '(Daten werden nur für das Profil geladen)')
+    parser.add_argument('--validation-backend', choices=VALIDIERUNGS_BACKENDS, default='numpy',
+                        help="Auswertung der Erwartungen ('numpy': native NumPy-Masken in einem Durchlauf, "
+                             "'ge': Great Expectations)")
+    parser.add_argument('--incremental', action='store_true',
+                        help='Nur seit dem letzten Lauf neu angehängte Zeilen prüfen (Watermark je Tabelle)')
+    parser.add_argument('--watermark-column', default=None,
+                        help="Watermark-Spalte für --incremental (Standard: 'id' bzw. 'created_at')")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Anzahl paralleler Worker-Prozesse für die Tabellenprüfung und die Grafiken')
+    parser.add_argument('--attachments', action='store_true',
+                        help='Dateien hinter tblattachment und den Medien-URLs von tblroad_damages prüfen '
+                             '(fehlende Dateien, abweichende Größen, verwaiste Dateien)')
+    parser.add_argument('--attachment-hash', action='store_true',
+                        help='Bei --attachments zusätzlich Inhalte per SHA-256 prüfen')
+    parser.add_argument('--upload-dir', default=None, help='Upload-Verzeichnis für --attachments')
+    parser.add_argument('--references', action='store_true',
+                        help='Verweise zwischen Tabellen (Fremdschlüssel und *_id-Spalten) per Anti-Join in der '
+                             'Datenbank prüfen')
+    parser.add_argument('--duplicates', action='store_true',
+                        help='Doppelte und fast doppelte Zeilen suchen (Hash-Index, Folgeläufe hashen nur neue '
+                             'Zeilen); ohne --table nur in tblroad_damages und tblconstruction_diary')
+    parser.add_argument('--timeseries', action='store_true',
+                        help='Auffällige Mengen je Stunde und Tag in den Protokolltabellen suchen '
+                             '(gezählt per SQL in der Datenbank)')
+    parser.add_argument('--deadline', default=None,
+                        help="Ende des Wartungsfensters ('HH:MM', Dauer wie '90m' oder ISO-Zeitpunkt); Tabellen, "
+                             "die nicht mehr vollständig passen, werden auf Stichproben herabgestuft oder aufgeschoben")
+    parser.add_argument('--priority', action='append', default=[], metavar='TABELLE=N',
+                        help='Priorität einer Tabelle für den Zeitplan (höher zuerst, Standard 0; mehrfach möglich)')
+    parser.add_argument('--no-charts', action='store_true',
+                        help='Keine Ausreißergrafiken erstellen')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Auch unveränderte Tabellen erneut prüfen; Cache und Berichte werden nicht bereinigt')
+    parser.add_argument('--no-sketches', action='store_true',
+                        help='Keine Spalten-Sketches speichern und keine Drift gegenüber früheren Läufen berechnen')
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL_TAGE,
+                        help=f'Höchstalter von Cache-Einträgen und Berichtsdateien in Tagen (Standard: {CACHE_TTL_TAGE})')
+    parser.add_argument('--cache-max-mb', type=float, default=CACHE_MAX_MB,
+                        help=f'Höchstgröße des Berichtsverzeichnisses in MB (Standard: {CACHE_MAX_MB})')
+    parser.add_argument('--metrics-file', default=None,
+                        help='Laufzeiten je Abschnitt zusätzlich als Prometheus-Textdatei schreiben '
+                             '(z. B. für den Textfile-Collector des node_exporter)')
+    parser.add_argument('--trace-file', default=None,
+                        help='Laufzeiten je Abschnitt zusätzlich als Chrome-Trace (chrome://tracing, Perfetto) schreiben')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    try:
+        args.stichprobe = stichprobe_definieren(args.sample_fraction, args.sample_rows,
+                                                args.sample_method, args.sample_seed)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.stichprobe is not None and args.incremental:
+        parser.error("--incremental kann nicht mit einer Stichprobe kombiniert werden")
+    try:
+        args.prioritaeten = {table: int(wert) for table, wert in (p.split('=', 1) for p in args.priority)}
+        args.ende = deadline_lesen(args.deadline) if args.deadline else None
+    except ValueError as e:
+        parser.error(f"Ungültige Angabe für --priority oder --deadline: {e}")
     
     # Wenn keine spezifische Aktion ausgewählt wurde, alle durchführen
     if not (args.profile or args.outliers or args.validate):
         args.profile = True
         args.outliers = True
         args.validate = True
+    return args
+
+def zeitplan_berechnen(engine, tables: list, args: argparse.Namespace) -> list:
+    """
+    Erstellt den Zeitplan eines Laufs aus Tabellengrößen, früheren Laufzeiten und Prioritäten.
+    
+    Im letzten Lauf aufgeschobene Tabellen erhalten einen Prioritätszuschlag, damit
+    sie nicht dauerhaft hinter größeren Tabellen zurückbleiben.
+    
+    Returns:
+        Planeinträge aus zeitplan_erstellen
+    """
+    historie = laufzeiten_aus_historie(str(REPORT_DIR))
+    prioritaeten = dict(args.prioritaeten)
+    for table in historie["deferred"]:
+        prioritaeten[table] = prioritaeten.get(table, 0) + PLAN_ZUSCHLAG_AUFGESCHOBEN
+    
+    kosten = kosten_schaetzen(engine, tables, profil=args.profile, historie=historie)
+    budget = (args.ende - datetime.now()).total_seconds() if args.ende else None
+    plan = zeitplan_erstellen(
+        kosten, worker=args.jobs, budget=budget, prioritaeten=prioritaeten, profil=args.profile,
+        # Eigene Stichproben und inkrementelle Prüfungen werden nicht weiter verkleinert
+        herabstufen=args.stichprobe is None and not args.incremental,
+        minimal=args.outliers or args.validate
+    )
+    
+    print(f"Zeitplan für {len(plan)} Tabellen" + (f" bis {args.ende:%Y-%m-%d %H:%M}:" if args.ende else ":"))
+    for eintrag in plan:
+        quelle = "Historie" if kosten[eintrag["table"]]["source"] == 'history' else "Größe"
+        print(f"  {eintrag['table']}: {eintrag['mode']}, ca. {eintrag['estimated_seconds']:.1f} s "
+              f"(Priorität {eintrag['priority']}, Schätzung aus {quelle})")
+    print()
+    return plan
+
+def main():
+    args = argumente_lesen()
     
     print("=== Bau-Structura Datenqualitätsprüfung ===")
     print(f"Zeitstempel: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -63,135 +766,127 @@ def main():
     
     summary = {"timestamp": datetime.now().isoformat(), "tables": {}}
     
-    # Prüfungen für jede Tabelle durchführen
-    for table in tables:
-        print(f"=== Prüfe Tabelle: {table} ===")
-        summary["tables"][table] = {}
-        
-        try:
-            # Daten laden
-            df = table_to_dataframe(engine, table, limit=args.limit)
-            print(f"Daten geladen: {df.shape[0]} Zeilen, {df.shape[1]} Spalten")
-            
-            # Datenprofil erstellen
-            if args.profile:
-                print("\n--- Erstelle Datenprofil ---")
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                profile_file = f"profil_{table}_{timestamp}.html"
-                profile_path = REPORT_DIR / profile_file
-                
-                profile = profil_erstellen(df, str(profile_path), f"Datenprofil für {table}")
-                print(f"Datenprofil erstellt: {profile_path}")
-                
-                # Speichere Profil-Metadaten in der Zusammenfassung
-                summary["tables"][table]["profile"] = {
-                    "file": str(profile_path),
-                    "variables": df.shape[1],
-                    "observations": df.shape[0],
-                    "missing_cells": profile.get_description()["table"]["n_cells_missing"],
-                    "missing_percent": profile.get_description()["table"]["p_cells_missing"]
-                }
-            
-            # Ausreißeranalyse für numerische Spalten
-            if args.outliers:
-                print("\n--- Führe Ausreißeranalyse durch ---")
-                numeric_columns = df.select_dtypes(include=['number']).columns
-                
-                if len(numeric_columns) == 0:
-                    print("Keine numerischen Spalten für Ausreißeranalyse gefunden.")
-                    summary["tables"][table]["outliers"] = {"status": "no_numeric_columns"}
-                else:
-                    outlier_results = {}
-                    
-                    for column in numeric_columns:
-                        if df[column].nunique() <= 2:  # Überspringe binäre Spalten
-                            continue
-                            
-                        print(f"\nAnalysiere Ausreißer in Spalte: {column}")
-                        try:
-                            ausreisser, grenzen, fig = identifiziere_ausreisser(df, column, methode='iqr')
-                            
-                            # Speichere Grafik
-                            fig_file = f"ausreisser_{table}_{column}_{timestamp}.png"
-                            fig_path = REPORT_DIR / fig_file
-                            fig.savefig(fig_path)
-                            print(f"  • Ausreißergrafik gespeichert: {fig_path}")
-                            
-                            # Speichere Ergebnisse
-                            outlier_count = len(ausreisser)
-                            outlier_percent = outlier_count / df.shape[0] * 100
-                            print(f"  • Gefundene Ausreißer: {outlier_count} ({outlier_percent:.2f}%)")
-                            print(f"  • Grenzen: Untere = {grenzen['lower']:.2f}, Obere = {grenzen['upper']:.2f}")
-                            
-                            outlier_results[column] = {
-                                "count": outlier_count,
-                                "percent": outlier_percent,
-                                "bounds": grenzen,
-                                "chart": str(fig_path)
-                            }
-                        except Exception as e:
-                            print(f"  • Fehler bei Ausreißeranalyse: {e}")
-                            outlier_results[column] = {"error": str(e)}
-                    
-                    summary["tables"][table]["outliers"] = outlier_results
-            
-            # Datenvalidierung mit automatisch erstellten Erwartungen
-            if args.validate:
-                print("\n--- Validiere Daten gegen Erwartungen ---")
-                
-                # Erwartungssuite erstellen
-                suite_name = f"{table}_suite_{timestamp}"
-                suite = erstelle_expectations_suite(df, suite_name=suite_name)
-                
-                # Erwartungssuite speichern
-                suite_file = f"erwartungen_{table}_{timestamp}.json"
-                suite_path = REPORT_DIR / suite_file
-                
-                with open(suite_path, 'w') as f:
-                    json.dump(suite.to_json_dict(), f, indent=2)
-                print(f"Erwartungssuite gespeichert: {suite_path}")
-                
-                # Daten validieren
-                result = teste_daten_gegen_erwartungen(df, suite)
-                
-                # Ergebnisse speichern
-                result_file = f"validierung_{table}_{timestamp}.json"
-                result_path = REPORT_DIR / result_file
-                
-                with open(result_path, 'w') as f:
-                    json.dump(result.to_json_dict(), f, indent=2)
-                print(f"Validierungsergebnis gespeichert: {result_path}")
-                
-                # Erfolgsrate berechnen
-                success_rate = result.statistics['successful_expectations'] / result.statistics['evaluated_expectations']
-                success_percent = success_rate * 100
-                print(f"Erfolgsrate: {success_rate:.2%} ({result.statistics['successful_expectations']} von {result.statistics['evaluated_expectations']} Tests bestanden)")
-                
-                summary["tables"][table]["validation"] = {
-                    "expectations_file": str(suite_path),
-                    "result_file": str(result_path),
-                    "success_rate": success_rate,
-                    "success_percent": success_percent,
-                    "total_expectations": result.statistics['evaluated_expectations'],
-                    "successful_expectations": result.statistics['successful_expectations']
-                }
-            
-            print("\n--- Prüfung abgeschlossen ---")
-            
-        except Exception as e:
-            print(f"Fehler bei der Prüfung von {table}: {e}")
-            summary["tables"][table]["error"] = str(e)
-        
+    # Reihenfolge nach Priorität und geschätzter Dauer, bei einer Deadline mit Herabstufung
+    plan = None
+    if len(tables) > 1 or args.ende is not None:
+        plan = zeitplan_berechnen(engine, tables, args)
+        tables = [eintrag["table"] for eintrag in plan]
+        plan = {eintrag["table"]: eintrag for eintrag in plan}
+    
+    if args.jobs > 1 and len(tables) > 1:
+        summary["tables"] = pruefe_tabellen_parallel(engine, tables, args, plan=plan, ende=args.ende)
+    else:
+        # Prüfungen für jede Tabelle durchführen
+        for table in tables:
+            summary["tables"][table] = pruefe_tabelle_geplant(engine, table, args, (plan or {}).get(table), args.ende)
+            print()
+    
+    if plan is not None:
+        summary["schedule"] = {
+            "deadline": args.ende.isoformat() if args.ende else None,
+            "workers": args.jobs,
+            "tables": list(plan.values()),
+            "deferred": [table for table, ergebnis in summary["tables"].items()
+                         if ergebnis.get("schedule", {}).get("mode") == 'deferred'],
+        }
+        if summary["schedule"]["deferred"]:
+            print(f"Aufgeschobene Tabellen: {', '.join(summary['schedule']['deferred'])}")
+            print()
+    
+    # Gemessene Abschnitte aller Tabellen (auch aus Worker-Prozessen) einsammeln
+    abschnitte = []
+    for ergebnis in summary["tables"].values():
+        abschnitte.extend(ergebnis.pop("_timings", []))
+    
+    if args.attachments:
+        print("--- Prüfe Anhänge und Mediendateien ---")
+        with abschnitt_messen(abschnitte, "attachments") as abschnitt:
+            try:
+                summary["attachments"] = anhaenge_pruefen(engine, upload_dir=args.upload_dir, threads=ANHANG_THREADS,
+                                                          mit_hash=args.attachment_hash)
+                abschnitt["rows"] = sum(q["rows"] for q in summary["attachments"]["sources"].values())
+            except Exception as e:
+                summary["attachments"] = {"error": str(e)}
+        if "error" in summary["attachments"]:
+            print(f"Fehler bei der Prüfung der Anhänge: {summary['attachments']['error']}")
+        else:
+            anhaenge_ausgeben(summary["attachments"])
         print()
     
+    if args.references:
+        print("--- Prüfe Verweise zwischen Tabellen ---")
+        with abschnitt_messen(abschnitte, "references") as abschnitt:
+            try:
+                summary["references"] = referenzen_pruefen(engine, tabellen=tables)
+                abschnitt["rows"] = summary["references"]["orphans"]
+            except Exception as e:
+                summary["references"] = {"error": str(e)}
+        if "error" in summary["references"]:
+            print(f"Fehler bei der Prüfung der Verweise: {summary['references']['error']}")
+        else:
+            referenzen_ausgeben(summary["references"])
+        print()
+    
+    if args.duplicates:
+        print("--- Suche doppelte Zeilen ---")
+        summary["duplicates"] = {}
+        # Ohne --table nur Tabellen mit Formulareingaben; in Protokolltabellen wären sonst
+        # alle gleichen Aktionen desselben Benutzers "doppelt"
+        for table in [t for t in tables if args.table or t in DUPLIKAT_KONFIGURATION]:
+            with abschnitt_messen(abschnitte, "duplicates", table=table) as abschnitt:
+                try:
+                    summary["duplicates"][table] = duplikate_finden(engine, table)
+                except Exception as e:
+                    print(f"Fehler bei der Duplikatsuche für {table}: {e}")
+                    summary["duplicates"][table] = {"error": str(e)}
+                    continue
+                abschnitt["rows"] = summary["duplicates"][table]["new_rows"]
+            duplikate_ausgeben(summary["duplicates"][table])
+        print()
+    
+    if args.timeseries:
+        print("--- Suche auffällige Mengen in Protokolltabellen ---")
+        summary["timeseries"] = {}
+        for table in [t for t in tables if t in ZEITREIHEN_KONFIGURATION]:
+            for intervall in ZEITREIHEN_INTERVALLE:
+                with abschnitt_messen(abschnitte, "timeseries", table=table) as abschnitt:
+                    try:
+                        ergebnis = zeitreihen_pruefen(engine, table, intervall=intervall)
+                    except Exception as e:
+                        print(f"Fehler bei der Zeitreihenprüfung für {table} ({intervall}): {e}")
+                        summary["timeseries"].setdefault(table, {})[intervall] = {"error": str(e)}
+                        continue
+                    abschnitt["rows"] = ergebnis["rows"]
+                summary["timeseries"].setdefault(table, {})[intervall] = ergebnis
+                zeitreihen_ausgeben(ergebnis)
+        print()
+    
+    with abschnitt_messen(abschnitte, "charts") as abschnitt:
+        abschnitt["rows"] = grafiken_ausgeben(summary["tables"], args)
+    
+    # Alte Berichte und Cache-Einträge entfernen (nicht bei --no-cache)
+    if not args.no_cache:
+        with abschnitt_messen(abschnitte, "cache_cleanup"):
+            cache_bereinigen(ttl_tage=args.cache_ttl, max_mb=args.cache_max_mb)
+    
     # Gesamtzusammenfassung speichern
     summary_file = f"qualitaetspruefung_zusammenfassung_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     summary_path = REPORT_DIR / summary_file
     
-    with open(summary_path, 'w') as f:
-        json.dump(summary, f, indent=2)
+    # Das Schreiben der Zusammenfassung selbst erscheint nur in Prometheus-Datei und Trace
+    summary["timings"] = list(abschnitte)
+    with abschnitt_messen(abschnitte, "io"):
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
     
     print(f"=== Zusammenfassung der Datenqualitätsprüfung wurde gespeichert: {summary_path} ===")
+    
+    if args.metrics_file:
+        prometheus_textdatei_schreiben(abschnitte, args.metrics_file)
+        print(f"Prometheus-Metriken gespeichert: {args.metrics_file}")
+    if args.trace_file:
+        chrome_trace_schreiben(abschnitte, args.trace_file)
+        print(f"Chrome-Trace gespeichert: {args.trace_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
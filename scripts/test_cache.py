@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für die Bereinigung des Berichtsverzeichnisses
+----------------------------------------------------
+
+Alte Berichte werden entfernt, die neuesten Zusammenfassungen der Läufe
+bleiben für die Zeitplanung erhalten. Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+import os
+import time
+import pytest
+
+import data_quality as dq
+
+@pytest.fixture
+def berichte(tmp_path) -> dict:
+    alt = time.time() - 30 * 86400
+    anzahl = dq.ZUSAMMENFASSUNGEN_BEHALTEN + 5
+    zusammenfassungen = [tmp_path / f"qualitaetspruefung_zusammenfassung_202401{i // 24 + 1:02d}_{i % 24:02d}0000.json"
+                         for i in range(anzahl)]
+    bericht = tmp_path / "ausreisser_tblroad_damages.png"
+    for datei in zusammenfassungen + [bericht]:
+        datei.write_text("{}" + " " * 1000)
+        os.utime(datei, (alt, alt))
+    (tmp_path / "inkrementell").mkdir()
+    return {"dir": tmp_path, "zusammenfassungen": zusammenfassungen, "bericht": bericht}
+
+def test_neueste_zusammenfassungen_bleiben_erhalten(berichte):
+    ergebnis = dq.cache_bereinigen(report_dir=berichte["dir"], cache_dir=berichte["dir"] / "cache")
+
+    zusammenfassungen = berichte["zusammenfassungen"]
+    assert not berichte["bericht"].exists()
+    assert all(d.exists() for d in zusammenfassungen[-dq.ZUSAMMENFASSUNGEN_BEHALTEN:])
+    assert not any(d.exists() for d in zusammenfassungen[:-dq.ZUSAMMENFASSUNGEN_BEHALTEN])
+    assert ergebnis["removed_files"] == len(zusammenfassungen) - dq.ZUSAMMENFASSUNGEN_BEHALTEN + 1
+    assert (berichte["dir"] / "inkrementell").is_dir()
+
+def test_groessengrenze_verschont_neueste_zusammenfassungen(berichte):
+    # Mit langer TTL greift nur die Größengrenze; sie entfernt alles außer den geschützten Zusammenfassungen
+    dq.cache_bereinigen(ttl_tage=365, max_mb=0, report_dir=berichte["dir"], cache_dir=berichte["dir"] / "cache")
+
+    assert sorted(d.name for d in berichte["dir"].iterdir() if d.is_file()) == \
+        sorted(d.name for d in berichte["zusammenfassungen"][-dq.ZUSAMMENFASSUNGEN_BEHALTEN:])
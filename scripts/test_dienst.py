@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für das Einreichen von Aufträgen im Dienstmodus
+-----------------------------------------------------
+
+Aufträge für Tabellen, die nicht in der Datenbank vorhanden sind, müssen
+abgelehnt werden, bevor ein Tabellenname in SQL eingesetzt wird.
+Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+import data_quality as dq
+import dq_dienst
+
+@pytest.fixture
+def dienst(tmp_path) -> dict:
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'dienst.db'}")
+    pd.DataFrame({"id": [1, 2, 3], "area_size": [1.0, 2.0, 3.0]}).to_sql("tblroad_damages", engine, index=False)
+    # Ohne Worker bleiben eingereichte Aufträge in der Warteschlange
+    return dq_dienst.dienst_erstellen(engine, parallel=0)
+
+def test_vorhandene_tabelle_wird_eingereiht(dienst):
+    auftrag = dq_dienst.auftrag_einreichen(dienst, "outliers", {"table": "tblroad_damages"})
+    assert auftrag["status"] == "queued"
+    assert dienst["warteschlange"].qsize() == 1
+
+@pytest.mark.parametrize("tabelle", [
+    "tblunbekannt",
+    "tblroad_damages; DROP TABLE tblroad_damages",
+    "(SELECT * FROM sqlite_master) AS t",
+    ["tblroad_damages"],
+])
+def test_unbekannte_tabelle_wird_abgelehnt(dienst, tabelle):
+    with pytest.raises(ValueError, match="Unbekannte Tabelle"):
+        dq_dienst.auftrag_einreichen(dienst, "outliers", {"table": tabelle})
+    assert dienst["warteschlange"].empty()
+    assert dienst["auftraege"] == {}
+
+def test_http_antwortet_mit_400(dienst):
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(('127.0.0.1', 0), dq_dienst._dienst_handler(dienst))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        anfrage = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_address[1]}/jobs", method='POST',
+            data=json.dumps({"type": "check", "params": {"table": "tblroad_damages--"}}).encode('utf-8'))
+        with pytest.raises(urllib.error.HTTPError) as fehler:
+            urllib.request.urlopen(anfrage, timeout=10)
+        assert fehler.value.code == 400
+        assert "Unbekannte Tabelle" in json.loads(fehler.value.read())["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_spitzenwert_nur_mit_einem_worker(dienst):
+    # VmHWM gilt für den Prozess; mehrere Worker würden sich gegenseitig zurücksetzen
+    try:
+        for parallel, erwartet in ((2, None), (1, "stage")):
+            dq_dienst.dienst_erstellen(dienst["engine"], parallel=parallel)
+            abschnitte = []
+            with dq.abschnitt_messen(abschnitte, "load"):
+                pass
+            assert (abschnitte[0]["peak_rss_bytes"] is None) == (erwartet is None)
+            if dq._rss_spitze_zuruecksetzen():
+                assert abschnitte[0]["peak_rss_scope"] == erwartet
+    finally:
+        dq.rss_messung_einstellen(True)
+
+def test_grafiken_gleichzeitig_ohne_pyplot(tmp_path):
+    werte = pd.Series(np.random.default_rng(3).normal(0, 1, 2000))
+    auftraege = []
+    for i, methode in enumerate(["iqr", "zscore"] * 4):
+        grenzen = dq.identifiziere_ausreisser_batch(werte.to_frame("wert"), methode=methode).loc["wert"]
+        auftraege.append({"daten": dq.grafikdaten_berechnen(werte, "wert", grenzen, methode, 1.5),
+                          "pfad": str(tmp_path / f"grafik_{i}.png")})
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pfade = list(executor.map(dq.grafik_rendern, auftraege))
+    assert all((tmp_path / f"grafik_{i}.png").stat().st_size > 0 for i in range(len(pfade)))
+    # Keine Figure in der globalen Registry von pyplot
+    from matplotlib import _pylab_helpers
+    assert _pylab_helpers.Gcf.get_all_fig_managers() == []
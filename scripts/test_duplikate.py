@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für MinHash-Signaturen und LSH der Duplikatsuche
+------------------------------------------------------
+
+Die aus den Signaturen geschätzte Ähnlichkeit muss der Jaccard-Ähnlichkeit der
+Zeichen-Shingles entsprechen. Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dq_duplikate
+
+TEXTE = [
+    "Schlagloch vor Hausnummer 12 in der Bahnhofstraße, ca. 40 cm Durchmesser",
+    "Schlagloch vor Hausnummer 14 in der Bahnhofstraße, ca. 40 cm Durchmesser",
+    "Riss in der Fahrbahndecke auf Höhe der Einmündung Lindenweg, Länge etwa 3 m",
+    "Riss in der Fahrbahndecke am Lindenweg",
+    "Bordstein am Kreisverkehr beschädigt, Gefahr für Radfahrer",
+    "Spurrinnen auf der Landstraße zwischen Ober- und Unterdorf nach Frostperiode",
+]
+
+def _jaccard(a: str, b: str, laenge: int = dq_duplikate.SHINGLE_LAENGE) -> float:
+    def shingles(text: str) -> set:
+        return {text[i:i + laenge] for i in range(len(text) - laenge + 1)} if len(text) >= laenge else {text}
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+def _aehnlichkeit(signaturen: np.ndarray, i: int, j: int) -> float:
+    return float((signaturen[i] == signaturen[j]).mean())
+
+@pytest.fixture
+def texte() -> list:
+    return dq_duplikate._text_normalisieren(pd.Series(TEXTE)).tolist()
+
+def test_aehnlichkeit_bekannter_paare(texte):
+    signaturen = dq_duplikate.minhash_signaturen(texte)
+    assert signaturen.shape == (len(texte), dq_duplikate.MINHASH_PERMUTATIONEN)
+    assert signaturen.dtype == np.uint32
+
+    # Standardabweichung der Schätzung bei 64 Hashfunktionen höchstens 1/16
+    for i, j in [(0, 1), (2, 3), (0, 2), (4, 5), (1, 4)]:
+        assert _aehnlichkeit(signaturen, i, j) == pytest.approx(_jaccard(texte[i], texte[j]), abs=0.2)
+    assert _aehnlichkeit(signaturen, 0, 1) >= dq_duplikate.DUPLIKAT_AEHNLICHKEIT
+    assert _aehnlichkeit(signaturen, 0, 2) < 0.2
+
+def test_gleiche_texte_gleiche_signaturen(texte):
+    signaturen = dq_duplikate.minhash_signaturen(texte + texte[:1])
+    assert np.array_equal(signaturen[0], signaturen[-1])
+
+def test_leere_und_kurze_texte():
+    signaturen = dq_duplikate.minhash_signaturen(["", "ab", "ab", "abc d"])
+    assert (signaturen[0] == np.iinfo(np.uint32).max).all()
+    assert np.array_equal(signaturen[1], signaturen[2])
+    assert (signaturen[1] != np.iinfo(np.uint32).max).all()
+    assert _aehnlichkeit(signaturen, 1, 3) < 0.5
+
+def test_unabhaengig_von_der_blockgroesse(texte, monkeypatch):
+    erwartet = np.vstack([dq_duplikate.minhash_signaturen([text]) for text in texte])
+    monkeypatch.setattr(dq_duplikate, "MINHASH_BLOCK", 7)
+    assert np.array_equal(dq_duplikate.minhash_signaturen(texte), erwartet)
+
+def test_lsh_findet_fast_gleiche_texte(texte):
+    signaturen = dq_duplikate.minhash_signaturen(texte)
+    gruppen = dq_duplikate._lsh_gruppen(signaturen, np.zeros(len(texte), dtype=np.uint64))
+    assert sorted(sorted(positionen.tolist()) for positionen, _ in gruppen) == [[0, 1]]
+
+    # Im Block getrennte Zeilen werden nicht verglichen
+    bloecke = np.array([1, 2, 0, 0, 0, 0], dtype=np.uint64)
+    assert dq_duplikate._lsh_gruppen(signaturen, bloecke) == []
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für Spalten-Sketches und Drift-Erkennung
+----------------------------------------------
+
+Zusammengeführte Sketches müssen einem Durchlauf über alle Zeilen entsprechen,
+und der PSI muss stabile von verschobenen Verteilungen unterscheiden.
+Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_quality as dq
+
+def _tabelle(n: int, seed: int, verschiebung: float = 0.0, anteil_schlagloch: float = 0.5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    kosten = rng.normal(1000 + verschiebung, 200, n)
+    kosten[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        "estimated_repair_cost": kosten,
+        "damage_type": np.where(rng.random(n) < anteil_schlagloch, "pothole", "crack"),
+        "user_id": rng.integers(0, 3000, n),
+    })
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return _tabelle(20000, seed=1)
+
+def test_zusammenfuehren_entspricht_einem_durchlauf(df):
+    erwartet = dq.sketches_berechnen(df)
+    teile = [dq.sketches_berechnen(df.iloc[i:i + 3000]) for i in range(0, len(df), 3000)]
+    ergebnis = teile[0]
+    for teil in teile[1:]:
+        ergebnis = dq.sketches_zusammenfuehren(ergebnis, teil)
+
+    assert ergebnis["rows"] == erwartet["rows"] == len(df)
+    for column, sketch in erwartet["columns"].items():
+        zusammen = ergebnis["columns"][column]
+        assert (zusammen["kind"], zusammen["count"], zusammen["nulls"]) == \
+               (sketch["kind"], sketch["count"], sketch["nulls"])
+        # HyperLogLog-Register und Häufigkeiten (weniger als TOPK_GROESSE Werte) sind exakt
+        assert np.array_equal(zusammen["hll"], sketch["hll"])
+        assert zusammen["topk"] == sketch["topk"]
+
+    digest = ergebnis["columns"]["estimated_repair_cost"]["tdigest"]
+    kosten = df["estimated_repair_cost"].dropna()
+    assert digest["weights"].sum() == len(kosten)
+    assert (digest["min"], digest["max"]) == (kosten.min(), kosten.max())
+    # Rangfehler der Quantile deutlich unter einem Prozent
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        rang = (kosten <= float(dq.tdigest_quantil(digest, q))).mean()
+        assert rang == pytest.approx(q, abs=0.005)
+
+def test_hll_schaetzt_anzahl_unterschiedlicher_werte(df):
+    sketch = dq.sketches_berechnen(df)["columns"]["user_id"]
+    assert dq.hll_schaetzen(sketch["hll"]) == pytest.approx(df["user_id"].nunique(), rel=0.07)
+
+def test_psi_stabil_bei_gleicher_verteilung(df):
+    drift = dq.drift_berechnen(dq.sketches_berechnen(_tabelle(20000, seed=2)), dq.sketches_berechnen(df))
+    for column in ("estimated_repair_cost", "damage_type"):
+        assert drift["columns"][column]["psi"] < dq.PSI_LEICHT
+        assert drift["columns"][column]["status"] == "stabil"
+    assert drift["columns"]["estimated_repair_cost"]["ks"] < 0.03
+
+def test_psi_erkennt_verschiebung(df):
+    aktuell = _tabelle(20000, seed=2, verschiebung=200.0, anteil_schlagloch=0.8)
+    drift = dq.drift_berechnen(dq.sketches_berechnen(aktuell), dq.sketches_berechnen(df))
+
+    kosten = drift["columns"]["estimated_repair_cost"]
+    assert kosten["status"] == "deutlich"
+    assert kosten["median"] - kosten["reference_median"] == pytest.approx(200.0, abs=20.0)
+    # Kategorien: PSI von 50/50 nach 80/20 = 0.3 ln(0.8/0.5) + 0.3 ln(0.5/0.2) ≈ 0.416
+    typ = drift["columns"]["damage_type"]
+    assert typ["psi"] == pytest.approx(0.3 * np.log(0.8 / 0.5) + 0.3 * np.log(0.5 / 0.2), abs=0.02)
+    assert typ["status"] == "deutlich"
+
+def test_serialisierung(df):
+    sketches = dq.sketches_berechnen(df)
+    wiederhergestellt = dq.sketches_deserialisieren(json.loads(json.dumps(dq.sketches_serialisieren(sketches))))
+    drift = dq.drift_berechnen(wiederhergestellt, sketches)
+    for spalte in drift["columns"].values():
+        assert spalte["psi"] == pytest.approx(0.0, abs=1e-9)
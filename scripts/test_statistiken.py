@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für die blockweise berechneten Spaltenstatistiken
+-------------------------------------------------------
+
+Zusammengeführte Statistiken über Teilbestände müssen dem Ergebnis eines
+Durchlaufs über den gesamten Bestand entsprechen. Ausführen mit:
+cd scripts && python -m pytest -q
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_quality as dq
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    n = 5000
+    kosten = rng.lognormal(7, 1, n)
+    kosten[rng.choice(n, 250, replace=False)] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "estimated_repair_cost": kosten,
+        "repair_priority": rng.integers(1, 6, n),
+        "damage_type": rng.choice(["pothole", "crack", "rutting", None], n),
+        "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, n), unit='s'),
+    })
+
+def _pruefen(ergebnis: dict, erwartet: dict) -> None:
+    assert ergebnis["rows"] == erwartet["rows"]
+    assert list(ergebnis["columns"]) == list(erwartet["columns"])
+    for column, spalte in erwartet["columns"].items():
+        zusammen = ergebnis["columns"][column]
+        for schluessel in ("kind", "nulls", "count", "min", "max", "seen"):
+            assert zusammen[schluessel] == spalte[schluessel], (column, schluessel)
+        assert zusammen["mean"] == pytest.approx(spalte["mean"], rel=1e-12)
+        assert zusammen["m2"] == pytest.approx(spalte["m2"], rel=1e-9)
+        if spalte["values"] is None:
+            assert zusammen["values"] is None
+        else:
+            assert sorted(zusammen["values"]) == sorted(spalte["values"])
+        # Unterhalb von RESERVOIR_GROESSE enthält die Stichprobe alle Werte
+        assert np.array_equal(np.sort(zusammen["reservoir"]), np.sort(spalte["reservoir"]))
+
+def test_zusammenfuehren_entspricht_einem_durchlauf(df):
+    erwartet = dq.statistiken_berechnen_streaming([df])
+
+    teile = [df.iloc[:1234], df.iloc[1234:4000], df.iloc[4000:]]
+    zustaende = [dq.statistiken_berechnen_streaming([teil]) for teil in teile]
+    ergebnis = dq.statistiken_zusammenfuehren(dq.statistiken_zusammenfuehren(zustaende[0], zustaende[1]),
+                                              zustaende[2])
+    _pruefen(ergebnis, erwartet)
+
+def test_blockweise_entspricht_pandas(df):
+    stats = dq.statistiken_berechnen_streaming(df.iloc[i:i + 700] for i in range(0, len(df), 700))
+
+    kosten = stats["columns"]["estimated_repair_cost"]
+    assert kosten["nulls"] == df["estimated_repair_cost"].isna().sum()
+    assert kosten["mean"] == pytest.approx(df["estimated_repair_cost"].mean(), rel=1e-12)
+    assert kosten["m2"] / (kosten["count"] - 1) == pytest.approx(df["estimated_repair_cost"].var(), rel=1e-9)
+    assert stats["columns"]["created_at"]["max"] == df["created_at"].max()
+    assert sorted(stats["columns"]["repair_priority"]["values"]) == [1, 2, 3, 4, 5]
+
+def test_fehlende_spalte_gilt_als_null(df):
+    a = dq.statistiken_berechnen_streaming([df.iloc[:100]])
+    b = dq.statistiken_berechnen_streaming([df.iloc[100:300].drop(columns="damage_type")])
+    ergebnis = dq.statistiken_zusammenfuehren(a, b)
+
+    assert ergebnis["columns"]["damage_type"]["nulls"] == a["columns"]["damage_type"]["nulls"] + 200
+    assert ergebnis["columns"]["damage_type"]["count"] == a["columns"]["damage_type"]["count"]
+
+def test_serialisierung_erhaelt_zusammenfuehrung(df):
+    a = dq.statistiken_berechnen_streaming([df.iloc[:2500]])
+    b = dq.statistiken_berechnen_streaming([df.iloc[2500:]])
+    wiederhergestellt = dq.statistiken_deserialisieren(json.loads(json.dumps(dq.statistiken_serialisieren(a))))
+    _pruefen(dq.statistiken_zusammenfuehren(wiederhergestellt, b), dq.statistiken_zusammenfuehren(a, b))
+
+@pytest.mark.parametrize("methode", ["iqr", "zscore"])
+def test_ausreisser_blockweise_entspricht_batch(df, tmp_path, methode):
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'ausreisser.db'}")
+    df.to_sql("tblroad_damages", engine, index=False)
+
+    ergebnis = dq.identifiziere_ausreisser_streaming(engine, "tblroad_damages", methode=methode, chunk_size=700)
+    erwartet = dq.identifiziere_ausreisser_batch(df, methode=methode).drop(columns=['indices'])
+    # Unterhalb von RESERVOIR_GROESSE sind die Quartile exakt
+    pd.testing.assert_frame_equal(ergebnis, erwartet, check_dtype=False, rtol=1e-9)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für die native Auswertung von Erwartungen (Backend 'numpy')
+-----------------------------------------------------------------
+
+Die native Auswertung muss für jede Erwartung dieselben Ergebnisse liefern wie
+Great Expectations. Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ge = pytest.importorskip("great_expectations")
+
+import data_quality as dq
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    # Kleine Tabelle mit fehlenden Werten und Werten außerhalb der Grenzen
+    return pd.DataFrame({
+        "id": np.arange(1, 21),
+        "project_id": [1, 2, None, 4, 5, 6, 7, None, 9, 10, 11, 12, 13, 14, 15, None, 17, 18, 19, 20],
+        "area_size": [0.5, 1.0, 2.5, -1.0, 3.0, 4.0, None, 5.0, 6.0, 250.0,
+                      7.0, 8.0, 9.0, 10.0, 11.0, 12.0, 13.0, None, 14.0, 15.0],
+        "damage_type": ["pothole", "crack", "pothole", None, "rutting", "crack", "pothole", "crack",
+                        "unknown", "pothole", "crack", "pothole", "crack", "pothole", None, "crack",
+                        "pothole", "crack", "pothole", "other"],
+        "title": [f"Schaden {i}" for i in range(19)] + [""],
+    })
+
+def _erwartung(typ: str, **kwargs) -> "ge.core.ExpectationConfiguration":
+    return ge.core.ExpectationConfiguration(expectation_type=typ, kwargs=kwargs)
+
+@pytest.fixture
+def suite() -> "ge.core.ExpectationSuite":
+    # Über den Konstruktor, da add_expectation gleiche Erwartungen für eine Spalte ersetzt
+    return ge.core.ExpectationSuite(expectation_suite_name="test_suite", expectations=[
+        _erwartung("expect_column_values_to_not_be_null", column="id"),
+        _erwartung("expect_column_values_to_not_be_null", column="project_id"),
+        _erwartung("expect_column_values_to_not_be_null", column="project_id", mostly=0.8),
+        _erwartung("expect_column_values_to_be_between", column="area_size", min_value=0, max_value=100),
+        _erwartung("expect_column_values_to_be_between", column="area_size", min_value=0, max_value=100,
+                   mostly=0.8),
+        _erwartung("expect_column_values_to_be_between", column="area_size", min_value=0.5, max_value=None,
+                   strict_min=True),
+        _erwartung("expect_column_values_to_be_between", column="id", min_value=1, max_value=20),
+        _erwartung("expect_column_values_to_be_in_set", column="damage_type",
+                   value_set=["pothole", "crack", "rutting"]),
+        _erwartung("expect_column_values_to_be_in_set", column="damage_type",
+                   value_set=["pothole", "crack", "rutting"], mostly=0.9),
+        # Nicht nativ unterstützt; wird in beiden Backends von Great Expectations geprüft
+        _erwartung("expect_column_value_lengths_to_be_between", column="title", min_value=1),
+    ])
+
+def _kennzahlen(ergebnis) -> list:
+    return [(r.expectation_config.expectation_type, r.expectation_config.kwargs.get("mostly"),
+             r.success, r.result.get("unexpected_count"))
+            for r in ergebnis.results]
+
+def test_numpy_und_ge_liefern_gleiche_ergebnisse(df, suite):
+    ge_ergebnis = dq.teste_daten_gegen_erwartungen(df, suite, backend='ge')
+    assert len(ge_ergebnis.results) == len(suite.expectations) == 10
+
+    # Ohne Statistiken (nur NumPy-Masken) und mit Statistiken aus dem gemeinsamen Durchlauf
+    for stats in (None, dq.spaltenstatistiken_berechnen(df)):
+        numpy_ergebnis = dq.teste_daten_gegen_erwartungen(df, suite, stats=stats, backend='numpy')
+        assert _kennzahlen(numpy_ergebnis) == _kennzahlen(ge_ergebnis)
+        assert numpy_ergebnis.success == ge_ergebnis.success
+        assert numpy_ergebnis.statistics == ge_ergebnis.statistics
+
+def test_mostly_und_grenzen_werden_ausgewertet(df, suite):
+    ergebnis = dq.teste_daten_gegen_erwartungen(df, suite, backend='numpy')
+    kennzahlen = _kennzahlen(ergebnis)
+
+    # project_id: 3 von 20 Werten fehlen, mit mostly=0.8 noch erfüllt
+    assert kennzahlen[1][2:] == (False, 3)
+    assert kennzahlen[2][2:] == (True, 3)
+    # area_size: -1.0 und 250.0 liegen außerhalb, fehlende Werte zählen nicht
+    assert kennzahlen[3][2:] == (False, 2)
+    assert kennzahlen[4][2:] == (True, 2)
+    # strict_min schließt den Grenzwert 0.5 aus
+    assert kennzahlen[5][2:] == (False, 2)
+    assert kennzahlen[6][2:] == (True, 0)
+    # damage_type: 'unknown' und 'other' fehlen in der Wertemenge
+    assert kennzahlen[7][2:] == (False, 2)
+    assert kennzahlen[8][2:] == (False, 2)
+    assert kennzahlen[9][2:] == (False, 1)
+
+def test_unbekanntes_backend(df, suite):
+    with pytest.raises(ValueError):
+        dq.teste_daten_gegen_erwartungen(df, suite, backend='spark')
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für die Zeitplanung nächtlicher Läufe
+-------------------------------------------
+
+Der Plan muss das Zeitbudget einhalten, Tabellen schrittweise herabstufen
+(Stichprobe, minimal, aufgeschoben) und folgenden Tabellen ihre kleinste
+Prüfung lassen. Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+from datetime import datetime
+import pytest
+
+import dq_zeitplan
+
+def _kosten(**zeilen: int) -> dict:
+    # Kosten wie kosten_schaetzen ohne frühere Läufe
+    raten = dict(dq_zeitplan.PLAN_SEKUNDEN_JE_ZEILE)
+    return {table: {"rows": n, "bytes": None, "rates": raten, "source": 'size',
+                    "seconds": dq_zeitplan._plankosten(n, raten, 1.0, True)}
+            for table, n in zeilen.items()}
+
+def _eintraege(plan: list) -> dict:
+    return {eintrag["table"]: eintrag for eintrag in plan}
+
+def test_ohne_budget_nach_prioritaet_und_dauer():
+    kosten = _kosten(tbla=1000, tblb=50000, tblc=20000, tbld=1000)
+    plan = dq_zeitplan.zeitplan_erstellen(kosten, worker=2, prioritaeten={"tbld": 1})
+
+    assert [e["mode"] for e in plan] == ['full'] * 4
+    # Höhere Priorität vor längerer Dauer; je Worker direkt hintereinander
+    assert [e["table"] for e in plan] == ["tbld", "tblb", "tblc", "tbla"]
+    eintraege = _eintraege(plan)
+    assert (eintraege["tbld"]["worker"], eintraege["tblb"]["worker"]) == (0, 1)
+    assert eintraege["tblc"]["start"] == pytest.approx(kosten["tbld"]["seconds"])
+
+def test_stichprobe_bleibt_im_budget():
+    kosten = _kosten(tblroad_damages=1_000_000)
+    budget = 100.0
+    eintrag = dq_zeitplan.zeitplan_erstellen(kosten, budget=budget)[0]
+
+    assert eintrag["mode"] == 'sampled'
+    assert kosten["tblroad_damages"]["seconds"] > budget
+    # Der Anteil wird abgerundet: knapp unter dem Budget, nie darüber
+    assert budget - 0.05 < eintrag["estimated_seconds"] <= budget
+    assert eintrag["estimated_seconds"] == pytest.approx(
+        dq_zeitplan._plankosten(1_000_000, kosten["tblroad_damages"]["rates"], eintrag["sample_fraction"], True))
+
+def test_herabstufen_bis_zum_aufschieben():
+    kosten = _kosten(tblroad_damages=1_000_000)
+    raten = kosten["tblroad_damages"]["rates"]
+    minimalkosten = dq_zeitplan._plankosten(1_000_000, raten, dq_zeitplan.PLAN_MIN_ANTEIL, False)
+    stichprobe_ab = dq_zeitplan._plankosten(1_000_000, raten, dq_zeitplan.PLAN_MIN_ANTEIL, True)
+
+    # Zu knapp für eine Stichprobe von PLAN_MIN_ANTEIL mit Profil, genug für die minimale Prüfung
+    eintrag = dq_zeitplan.zeitplan_erstellen(kosten, budget=(minimalkosten + stichprobe_ab) / 2)[0]
+    assert (eintrag["mode"], eintrag["sample_fraction"]) == ('minimal', dq_zeitplan.PLAN_MIN_ANTEIL)
+    assert eintrag["estimated_seconds"] == pytest.approx(minimalkosten)
+
+    eintrag = dq_zeitplan.zeitplan_erstellen(kosten, budget=minimalkosten * 0.9)[0]
+    assert (eintrag["mode"], eintrag["worker"], eintrag["start"]) == ('deferred', None, None)
+
+    # Ohne weitere Prüfungen bzw. ohne Stichproben wird direkt aufgeschoben
+    assert dq_zeitplan.zeitplan_erstellen(kosten, budget=(minimalkosten + stichprobe_ab) / 2,
+                                          minimal=False)[0]["mode"] == 'deferred'
+    assert dq_zeitplan.zeitplan_erstellen(kosten, budget=100.0, herabstufen=False)[0]["mode"] == 'deferred'
+
+def test_reserve_fuer_folgende_tabellen():
+    kosten = _kosten(tblroad_damages=1_000_000, tblprojects=10_000)
+    budget = 50.0
+    plan = dq_zeitplan.zeitplan_erstellen(kosten, budget=budget, prioritaeten={"tblroad_damages": 1})
+    eintraege = _eintraege(plan)
+
+    # Die große Tabelle lässt die kleinste Prüfung der folgenden Tabelle im Budget
+    assert eintraege["tblroad_damages"]["mode"] == 'sampled'
+    assert eintraege["tblprojects"]["mode"] == 'minimal'
+    assert sum(e["estimated_seconds"] for e in plan) <= budget
+    assert eintraege["tblprojects"]["start"] == pytest.approx(eintraege["tblroad_damages"]["estimated_seconds"])
+
+def test_aufgeschobene_tabellen_am_ende():
+    kosten = _kosten(tbla=1_000_000, tblb=1000)
+    plan = dq_zeitplan.zeitplan_erstellen(kosten, budget=5.0, herabstufen=False)
+    assert [(e["table"], e["mode"]) for e in plan] == [("tblb", 'full'), ("tbla", 'deferred')]
+
+@pytest.mark.parametrize("angabe, erwartet", [
+    ("23:30", datetime(2024, 3, 10, 23, 30)),
+    ("06:00", datetime(2024, 3, 11, 6, 0)),
+    ("22:15", datetime(2024, 3, 11, 22, 15)),
+    ("90m", datetime(2024, 3, 10, 23, 45)),
+    ("2h", datetime(2024, 3, 11, 0, 15)),
+    ("2024-03-11T05:00", datetime(2024, 3, 11, 5, 0)),
+])
+def test_deadline_lesen(angabe, erwartet):
+    # 'HH:MM' bis einschließlich jetzt gilt für den nächsten Tag
+    jetzt = datetime(2024, 3, 10, 22, 15)
+    assert dq_zeitplan.deadline_lesen(angabe, jetzt=jetzt) == erwartet
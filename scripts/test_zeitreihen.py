@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests für die Suche nach Zeitreihen-Anomalien
+---------------------------------------------
+
+Eingefügte Spitzen und Einbrüche in stündlichen Zählreihen müssen gefunden,
+saisonale Muster dagegen als erwartet erkannt werden.
+Ausführen mit: cd scripts && python -m pytest -q
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dq_zeitreihen
+
+def _index(tage: int) -> pd.DatetimeIndex:
+    return pd.date_range("2024-03-04", periods=tage * 24, freq='h')
+
+def _anomalien(reihen: pd.DataFrame, **kwargs) -> set:
+    ergebnis = dq_zeitreihen.zeitreihen_anomalien(reihen, 'hour', **kwargs)
+    return {(zeile.series, zeile.bucket, zeile.kind) for zeile in ergebnis.itertuples()}
+
+@pytest.fixture
+def reihen() -> pd.DataFrame:
+    # Drei Wochen mit Tagesgang (nachts wenig, mittags viel) und Poisson-Rauschen
+    index = _index(21)
+    tagesgang = 60 + 40 * np.sin((index.hour.to_numpy() - 6) / 24 * 2 * np.pi)
+    rng = np.random.default_rng(5)
+    return pd.DataFrame({
+        "gesamt": rng.poisson(tagesgang),
+        "action_type=login": rng.poisson(tagesgang / 4),
+    }, index=index)
+
+def test_spitze_und_einbruch(reihen):
+    spitze, einbruch = pd.Timestamp("2024-03-20 12:00"), pd.Timestamp("2024-03-22 15:00")
+    reihen.loc[spitze, "gesamt"] *= 4
+    reihen.loc[einbruch, "action_type=login"] = 0
+
+    ergebnis = dq_zeitreihen.zeitreihen_anomalien(reihen, 'hour')
+    assert list(ergebnis.columns) == ['series', 'bucket', 'count', 'expected', 'score', 'kind']
+    assert _anomalien(reihen) == {("gesamt", spitze, 'spike'), ("action_type=login", einbruch, 'drop')}
+    nach_art = ergebnis.set_index('kind')
+    assert nach_art.loc['spike', 'score'] >= dq_zeitreihen.ZEITREIHEN_SCHWELLE
+    assert nach_art.loc['drop', 'score'] <= -dq_zeitreihen.ZEITREIHEN_SCHWELLE
+    assert nach_art.loc['spike', 'count'] > nach_art.loc['spike', 'expected']
+
+def test_ohne_auffaelligkeiten(reihen):
+    ergebnis = dq_zeitreihen.zeitreihen_anomalien(reihen, 'hour')
+    assert ergebnis.empty
+    assert list(ergebnis.columns) == ['series', 'bucket', 'count', 'expected', 'score', 'kind']
+
+def test_keine_meldung_unter_mindestanzahl():
+    # Ohne Streuung ergibt ein einzelnes Ereignis mehr bereits z = 1
+    reihen = pd.DataFrame({"gesamt": 0}, index=_index(14))
+    reihen.iloc[300, 0] = dq_zeitreihen.ZEITREIHEN_MIN_ANZAHL - 1
+    assert _anomalien(reihen, schwelle=2.0) == set()
+    assert _anomalien(reihen, schwelle=2.0, min_anzahl=dq_zeitreihen.ZEITREIHEN_MIN_ANZAHL - 1) == \
+        {("gesamt", reihen.index[300], 'spike')}
+
+def test_saisonale_basislinie_ab_zwei_vorsaisons(monkeypatch):
+    # Mittags 100 statt 10 Ereignisse, sonntags (jeder 7. Tag ab dem 10.03.) mittags keine
+    index = _index(28)
+    mittags = index.hour == 12
+    sonntag = mittags & (index.dayofweek == 6)
+    reihen = pd.DataFrame({"gesamt": np.where(sonntag, 0, np.where(mittags, 100, 10))}, index=index)
+
+    # Der Tagesgang (Saison 24) ist ab dem dritten Tag erwartet. Der Wochengang
+    # (Saison 168) erst ab zwei Vorwochen; bis dahin sind Sonntage Einbrüche.
+    sonntage = index[sonntag]
+    assert _anomalien(reihen) == {("gesamt", sonntage[0], 'drop'), ("gesamt", sonntage[1], 'drop')}
+
+    # Nur mit dem gleitenden Median gilt dagegen jeder Mittag als Spitze
+    monkeypatch.setitem(dq_zeitreihen.ZEITREIHEN_INTERVALLE, 'hour',
+                        dict(dq_zeitreihen.ZEITREIHEN_INTERVALLE['hour'], seasons=()))
+    spitzen = {bucket for _, bucket, kind in _anomalien(reihen) if kind == 'spike'}
+    assert len(spitzen) >= 20
+    assert all(bucket.hour == 12 for bucket in spitzen)